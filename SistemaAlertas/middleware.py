@@ -7,6 +7,8 @@ import traceback
 import requests
 from django.utils import timezone
 
+from apps.base import clientes_http
+
 
 logger = logging.getLogger('api_requests')
 
@@ -186,7 +188,7 @@ class RequestLoggingMiddleware:
         }
 
         try:
-            response = requests.post(self.api_url, json=payload, timeout=5)
+            response = clientes_http.post(self.api_url, json=payload, timeout=5)
             if response.status_code >= 400:
                 logger.error(
                     'Falló el envío del log a la API externa. Código: %s, Respuesta: %s',
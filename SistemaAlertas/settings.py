@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 import dotenv
 from dotenv import load_dotenv
@@ -274,6 +275,11 @@ CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Con acks tardíos Redis reentrega lo que no se confirma en este plazo:
+# tiene que superar el countdown más largo (WHATSAPP_ESPERA_MAXIMA_SEGUNDOS)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", str(2 * 60 * 60))),
+}
 # En tests las tareas corren de forma síncrona (sin broker)
 CELERY_TASK_ALWAYS_EAGER = (
     os.getenv("CELERY_EAGER", "false").lower() == "true" or "test" in sys.argv
@@ -287,12 +293,34 @@ CELERY_TASK_ROUTES = {
     "ia.*": {"queue": "fast"},
     "whatsapp.*": {"queue": "fast"},
     "enriquecimiento.*": {"queue": "enrich"},
+    # La ingesta asíncrona de archivos grandes tarda minutos: comparte el
+    # worker lento de enriquecimiento para no frenar la clasificación en `fast`.
+    "ingesta.*": {"queue": "enrich"},
+    "outbox.*": {"queue": "fast"},
+    "conectores.*": {"queue": "fast"},
 }
 CELERY_BEAT_SCHEDULE = {
     "rescatar-alertas-atascadas": {
         "task": "ia.rescatar_alertas_atascadas",
         "schedule": 60.0,
     },
+    "purgar-huellas-contenido": {
+        "task": "ia.purgar_huellas_contenido",
+        "schedule": 60.0 * 60,
+    },
+    "drenar-lotes-whatsapp": {
+        "task": "whatsapp.drenar_lotes",
+        "schedule": 30.0,
+    },
+    "drenar-outbox": {
+        "task": "outbox.drenar",
+        "schedule": 30.0,
+    },
+    # Cada conector tiene su propio intervalo: esto solo encola los vencidos
+    "sondear-conectores": {
+        "task": "conectores.sondear_vencidos",
+        "schedule": 30.0,
+    },
 }
 
 if os.getenv("REDIS_URL"):
@@ -312,6 +340,10 @@ IA_PIPELINE_ENABLED = os.getenv("IA_PIPELINE_ENABLED", "true").lower() == "true"
 IA_TIMEOUT_SECONDS = int(os.getenv("IA_TIMEOUT_SECONDS", "45"))        # soft limit por tarea de clasificación
 IA_TIMEOUT_TOTAL = int(os.getenv("IA_TIMEOUT_TOTAL", "120"))           # sweeper: atascadas → cola humana (B3)
 ENRIQUECIMIENTO_TIMEOUT = int(os.getenv("ENRIQUECIMIENTO_TIMEOUT", "300"))
+# Casi duplicados: alertas con SimHash a <= N bits (máx. 4) dentro de la
+# ventana reutilizan la salida del LLM de la primera
+IA_CASI_DUPLICADOS_DISTANCIA = int(os.getenv("IA_CASI_DUPLICADOS_DISTANCIA", "4"))
+IA_CASI_DUPLICADOS_VENTANA_HORAS = int(os.getenv("IA_CASI_DUPLICADOS_VENTANA_HORAS", "72"))
 
 # --- Vertex AI (Gemini) ---
 # GOOGLE_APPLICATION_CREDENTIALS debe apuntar al JSON del service account (vía .env)
@@ -327,4 +359,107 @@ WHATSAPP_PROVIDERS = [
     p.strip() for p in os.getenv("WHATSAPP_PROVIDERS", "whapi").split(",") if p.strip()
 ]
 OPENWA_BASE_URL = os.getenv("OPENWA_BASE_URL")
-OPENWA_API_KEY = os.getenv("OPENWA_API_KEY")
\ No newline at end of file
+OPENWA_API_KEY = os.getenv("OPENWA_API_KEY")
+# Limitador de envíos (token bucket en Redis, ver apps/whatsapp/services/limitador.py):
+# mensajes por minuto y ráfaga por grupo (codigo_acceso) y por proveedor.
+# En tests va apagado para que los envíos no dependan del orden de los tests.
+WHATSAPP_LIMITADOR_ACTIVO = (
+    os.getenv("WHATSAPP_LIMITADOR_ACTIVO", "true").lower() == "true" and not TESTING
+)
+WHATSAPP_LIMITE_POR_MINUTO_GRUPO = float(os.getenv("WHATSAPP_LIMITE_POR_MINUTO_GRUPO", "20"))
+WHATSAPP_LIMITE_RAFAGA_GRUPO = int(os.getenv("WHATSAPP_LIMITE_RAFAGA_GRUPO", "5"))
+WHATSAPP_LIMITE_POR_MINUTO_PROVEEDOR = float(
+    os.getenv("WHATSAPP_LIMITE_POR_MINUTO_PROVEEDOR", "120")
+)
+WHATSAPP_LIMITE_RAFAGA_PROVEEDOR = int(os.getenv("WHATSAPP_LIMITE_RAFAGA_PROVEEDOR", "20"))
+# Tasas por proveedor, en JSON: {"openwa": {"por_minuto_grupo": 10, "rafaga_grupo": 2}}
+WHATSAPP_LIMITES_PROVEEDOR = json.loads(os.getenv("WHATSAPP_LIMITES_PROVEEDOR", "{}"))
+# Intentos por mensaje en los envíos legacy. Los reintentos corren como
+# tareas programadas (backoff exponencial con jitter), no esperan en el worker
+WHATSAPP_INTENTOS_ENVIO = int(os.getenv("WHATSAPP_INTENTOS_ENVIO", "3"))
+WHATSAPP_REINTENTO_BASE_SEGUNDOS = int(os.getenv("WHATSAPP_REINTENTO_BASE_SEGUNDOS", "2"))
+WHATSAPP_REINTENTO_MAXIMO_SEGUNDOS = int(os.getenv("WHATSAPP_REINTENTO_MAXIMO_SEGUNDOS", "300"))
+# Countdown máximo de una tarea de envío; una espera mayor se parte en saltos
+# (debe quedar bajo el visibility_timeout del broker)
+WHATSAPP_ESPERA_MAXIMA_SEGUNDOS = int(os.getenv("WHATSAPP_ESPERA_MAXIMA_SEGUNDOS", str(30 * 60)))
+# Vencimiento de la toma de un envío programado: pasado este tiempo sin
+# resultado, una reentrega de la tarea lo retoma (bajo el visibility_timeout)
+WHATSAPP_ENVIO_TOMADO_SEGUNDOS = int(os.getenv("WHATSAPP_ENVIO_TOMADO_SEGUNDOS", str(10 * 60)))
+# Envíos simultáneos del lote automático (apps/whatsapp/services/envio_concurrente.py).
+# Los mensajes de un mismo grupo salen siempre en orden, de a uno.
+WHATSAPP_ENVIO_CONCURRENCIA = int(os.getenv("WHATSAPP_ENVIO_CONCURRENCIA", "8"))
+# Los lotes automáticos que llegan dentro de esta ventana salen en una sola
+# tarea (apps/whatsapp/services/buzon_lotes.py). 0 = cada lote por separado
+WHATSAPP_VENTANA_LOTES_SEGUNDOS = float(os.getenv("WHATSAPP_VENTANA_LOTES_SEGUNDOS", "2"))
+
+# --- Ingesta de archivos ---
+# Los archivos de la ingesta asíncrona se guardan aquí hasta que el job termina
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR / "media"))
+
+# Archivos desde este tamaño se leen en flujo (memoria acotada); `?streaming=1`
+# fuerza el modo en cualquier tamaño.
+INGESTION_STREAMING_UMBRAL_BYTES = int(
+    os.getenv("INGESTION_STREAMING_UMBRAL_BYTES", str(5 * 1024 * 1024))
+)
+INGESTION_LOTE_PERSISTENCIA = int(os.getenv("INGESTION_LOTE_PERSISTENCIA", "1000"))
+# Tope descomprimido de cada archivo de un .gz/.zst/.zip y de todo el upload
+# (bombas de descompresión): pasarlo responde 400
+INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO = int(
+    os.getenv("INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO", str(512 * 1024 * 1024))
+)
+INGESTION_DESCOMPRIMIDO_MAXIMO_UPLOAD = int(
+    os.getenv("INGESTION_DESCOMPRIMIDO_MAXIMO_UPLOAD", str(1024 * 1024 * 1024))
+)
+# Desde este número de filas el mapeo se reparte en bloques entre procesos
+# (0 lo desactiva); por defecto un proceso por núcleo.
+INGESTION_PARALELO_UMBRAL_FILAS = int(os.getenv("INGESTION_PARALELO_UMBRAL_FILAS", "20000"))
+INGESTION_PARALELO_PROCESOS = int(os.getenv("INGESTION_PARALELO_PROCESOS", "0")) or None
+INGESTION_PARALELO_BLOQUE_FILAS = int(os.getenv("INGESTION_PARALELO_BLOQUE_FILAS", "2000"))
+# En PostgreSQL las alertas se cargan con COPY a una tabla temporal e
+# INSERT ... SELECT (en otros motores, bulk_create)
+INGESTION_CARGA_COPY = os.getenv("INGESTION_CARGA_COPY", "true").lower() == "true"
+# Huellas de ingesta: un archivo ya ingestado en el proyecto devuelve el
+# resumen guardado y de uno parcialmente repetido solo se procesan filas nuevas
+INGESTION_HUELLAS = os.getenv("INGESTION_HUELLAS", "true").lower() == "true"
+# forward_payload ejecuta en proceso las vistas de este servidor; solo hace
+# POST si INGESTION_FORWARD_BASE_URL apunta a otro host
+INGESTION_FORWARD_EN_PROCESO = (
+    os.getenv("INGESTION_FORWARD_EN_PROCESO", "true").lower() == "true"
+)
+# Push NDJSON (/api/ingestion/ndjson/): alertas por lote confirmado y tamaño
+# máximo de una línea
+INGESTION_NDJSON_LOTE = int(os.getenv("INGESTION_NDJSON_LOTE", "500"))
+INGESTION_NDJSON_MAXIMO_BYTES_LINEA = int(
+    os.getenv("INGESTION_NDJSON_MAXIMO_BYTES_LINEA", str(1024 * 1024))
+)
+# ?respuesta=stream: registros del listado por bloque enviado
+INGESTION_RESPUESTA_BLOQUE = int(os.getenv("INGESTION_RESPUESTA_BLOQUE", "500"))
+
+# --- Canonicalización de URLs para deduplicar (ver apps/base/api/canonicalizacion_url.py) ---
+# Sigue las redirecciones de t.co, vm.tiktok.com, fb.watch... (resultado en cache)
+URL_RESOLVER_CORTAS = os.getenv("URL_RESOLVER_CORTAS", "false").lower() == "true"
+URL_RESOLVER_TIMEOUT = int(os.getenv("URL_RESOLVER_TIMEOUT", "5"))
+
+# --- Conectores de sondeo a APIs de proveedores (ver apps/base/conectores.py) ---
+CONECTORES_PAGINAS_POR_SONDEO = int(os.getenv("CONECTORES_PAGINAS_POR_SONDEO", "20"))
+CONECTORES_TIMEOUT_SEGUNDOS = int(os.getenv("CONECTORES_TIMEOUT_SEGUNDOS", "30"))
+
+# --- Cliente HTTP compartido de las integraciones (ver apps/base/clientes_http.py) ---
+# Sesión keep-alive por host; timeouts (segundos) para quien no pasa uno propio
+HTTP_TIMEOUT_CONEXION = float(os.getenv("HTTP_TIMEOUT_CONEXION", "5"))
+HTTP_TIMEOUT_LECTURA = float(os.getenv("HTTP_TIMEOUT_LECTURA", "30"))
+# Requests simultáneos por host y proceso; por host en JSON: {"gate.whapi.cloud": 4}
+HTTP_CONCURRENCIA_POR_HOST = int(os.getenv("HTTP_CONCURRENCIA_POR_HOST", "10"))
+HTTP_LIMITES_HOST = json.loads(os.getenv("HTTP_LIMITES_HOST", "{}"))
+HTTP_ESPERA_CUPO_SEGUNDOS = float(os.getenv("HTTP_ESPERA_CUPO_SEGUNDOS", "30"))
+
+# --- Outbox de webhooks salientes (monitoreo, ruta externa, forward) ---
+# Los POST se guardan en la transacción que los origina y un drenador los
+# entrega con reintentos (backoff exponencial con jitter)
+OUTBOX_DRENAR_AL_COMMIT = os.getenv("OUTBOX_DRENAR_AL_COMMIT", "true").lower() == "true"
+OUTBOX_LOTE_DRENADO = int(os.getenv("OUTBOX_LOTE_DRENADO", "200"))
+OUTBOX_MAXIMO_ALERTAS_POR_POST = int(os.getenv("OUTBOX_MAXIMO_ALERTAS_POR_POST", "200"))
+OUTBOX_MAX_INTENTOS = int(os.getenv("OUTBOX_MAX_INTENTOS", "8"))
+OUTBOX_BACKOFF_BASE_SEGUNDOS = int(os.getenv("OUTBOX_BACKOFF_BASE_SEGUNDOS", "30"))
+OUTBOX_TIMEOUT_SEGUNDOS = int(os.getenv("OUTBOX_TIMEOUT_SEGUNDOS", "10"))
+OUTBOX_RETENCION_DIAS = int(os.getenv("OUTBOX_RETENCION_DIAS", "7"))
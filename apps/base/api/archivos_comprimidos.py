@@ -0,0 +1,366 @@
+"""Uploads comprimidos de la ingesta.
+
+Además de `.csv` y `.xlsx` se aceptan `.csv.gz`, `.csv.zst` y `.zip` con
+exports CSV/XLSX adentro (los CSV del zip también pueden venir comprimidos).
+`preparar_archivos` expande cada upload en los archivos a parsear. Cada uno
+es un `ArchivoDescomprimido` que descomprime a medida que el lector pide
+bloques, así que un CSV comprimido nunca se descomprime entero en memoria.
+
+Un XLSX ya es un zip y openpyxl necesita acceso aleatorio. Por eso los que
+vienen dentro de un `.zip` se copian a un archivo temporal al abrirlos, en
+disco salvo que sean chicos.
+
+Contra las bombas de descompresión, cada archivo descomprimido tiene un
+tope (`INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO`) y también la suma de los
+de un upload (`INGESTION_DESCOMPRIMIDO_MAXIMO_UPLOAD`). El tamaño que
+declara el `.zip` se revisa al preparar el upload y los bytes se cuentan al
+leerlos; pasarse lanza `ArchivoNoSoportado`.
+"""
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import ExitStack
+from typing import Any, BinaryIO, Callable, List, Optional, Tuple
+
+from django.conf import settings
+
+
+EXTENSIONES_PLANAS = (".csv", ".xlsx")
+# Extensión comprimida -> extensión del contenido
+EXTENSIONES_COMPRIMIDAS = {".csv.gz": ".csv", ".csv.zst": ".csv"}
+EXTENSION_ZIP = ".zip"
+
+# Los exports CSV de los proveedores comprimen cerca de 10:1
+FACTOR_DESCOMPRESION_ESTIMADO = 10
+XLSX_EN_MEMORIA_MAXIMO = 8 * 1024 * 1024
+TAMANO_BLOQUE_COPIA = 1024 * 1024
+DESCOMPRIMIDO_MAXIMO_ARCHIVO = 512 * 1024 * 1024
+DESCOMPRIMIDO_MAXIMO_UPLOAD = 1024 * 1024 * 1024
+
+DETALLE_NO_SOPORTADO = "Formato de archivo no soportado."
+DETALLE_DEMASIADO_GRANDE = "El archivo comprimido excede el tamaño máximo descomprimido permitido."
+
+
+class ArchivoNoSoportado(ValueError):
+    """El upload no se puede parsear; `detalle` va en la respuesta 400."""
+
+    def __init__(self, detalle: str = DETALLE_NO_SOPORTADO):
+        super().__init__(detalle)
+        self.detalle = detalle
+
+
+def extension_de(nombre: Optional[str]) -> str:
+    nombre = (nombre or "").lower()
+    for extension in (*EXTENSIONES_COMPRIMIDAS, EXTENSION_ZIP):
+        if nombre.endswith(extension):
+            return extension
+    return os.path.splitext(nombre)[1]
+
+
+def extension_soportada(nombre: Optional[str]) -> bool:
+    extension = extension_de(nombre)
+    return (
+        extension in EXTENSIONES_PLANAS
+        or extension in EXTENSIONES_COMPRIMIDAS
+        or extension == EXTENSION_ZIP
+    )
+
+
+def tamano_estimado(archivo: Any) -> int:
+    """Tamaño descomprimido aproximado, para decidir el modo streaming."""
+    tamano = getattr(archivo, "size", 0) or 0
+    if extension_de(getattr(archivo, "name", "")) in EXTENSIONES_PLANAS:
+        return tamano
+    return tamano * FACTOR_DESCOMPRESION_ESTIMADO
+
+
+def _maximo_archivo() -> int:
+    return getattr(settings, "INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO", DESCOMPRIMIDO_MAXIMO_ARCHIVO)
+
+
+def _maximo_upload() -> int:
+    return getattr(settings, "INGESTION_DESCOMPRIMIDO_MAXIMO_UPLOAD", DESCOMPRIMIDO_MAXIMO_UPLOAD)
+
+
+class CupoDescompresion:
+    """Bytes descomprimidos de un upload, sumando todos sus archivos."""
+
+    def __init__(self):
+        self.total = 0
+
+    def sumar(self, cantidad: int) -> None:
+        self.total += cantidad
+        if self.total > _maximo_upload():
+            raise ArchivoNoSoportado(DETALLE_DEMASIADO_GRANDE)
+
+
+class MedidorDescompresion:
+    """Bytes descomprimidos de un archivo. Releerlo desde el inicio no
+    vuelve a contar: cuenta la posición más lejana alcanzada."""
+
+    def __init__(self, cupo: CupoDescompresion):
+        self.cupo = cupo
+        self.maximo = 0
+
+    def leidos(self, posicion: int) -> None:
+        if posicion <= self.maximo:
+            return
+        self.cupo.sumar(posicion - self.maximo)
+        self.maximo = posicion
+        if posicion > _maximo_archivo():
+            raise ArchivoNoSoportado(DETALLE_DEMASIADO_GRANDE)
+
+
+class _FlujoMedido(io.RawIOBase):
+    """Flujo descomprimido de solo lectura que reporta al medidor lo leído."""
+
+    def __init__(self, flujo: BinaryIO, medidor: MedidorDescompresion):
+        super().__init__()
+        self._flujo = flujo
+        self._medidor = medidor
+        self._posicion = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        datos = self._flujo.read(len(buffer))
+        buffer[: len(datos)] = datos
+        self._posicion += len(datos)
+        self._medidor.leidos(self._posicion)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+
+class ArchivoDescomprimido(io.RawIOBase):
+    """Archivo de solo lectura cuyo contenido sale de `abrir(pila)`; lo que
+    se abre para leerlo se registra en `pila` y se cierra con el archivo.
+    Se abre recién en la primera lectura y volver al inicio de un flujo no
+    rebobinable lo vuelve a abrir."""
+
+    def __init__(self, abrir: Callable[[ExitStack], BinaryIO], nombre: str):
+        super().__init__()
+        self._abrir = abrir
+        self._pila: Optional[ExitStack] = None
+        self._flujo: Optional[BinaryIO] = None
+        self.name = nombre
+
+    def _actual(self) -> BinaryIO:
+        if self._flujo is None:
+            self._pila = ExitStack()
+            self._flujo = self._abrir(self._pila)
+        return self._flujo
+
+    def _cerrar_flujo(self) -> None:
+        if self._pila is not None:
+            self._pila.close()
+        self._pila = None
+        self._flujo = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        datos = self._actual().read(len(buffer))
+        buffer[: len(datos)] = datos
+        return len(datos)
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        flujo = self._actual()
+        if not flujo.seekable():
+            if offset != 0 or whence != io.SEEK_SET:
+                raise io.UnsupportedOperation("Solo se puede volver al inicio del archivo")
+            self._cerrar_flujo()
+            return 0
+        return flujo.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._actual().tell()
+
+    def close(self) -> None:
+        self._cerrar_flujo()
+        super().close()
+
+
+def _desde_el_inicio(archivo: Any) -> Any:
+    archivo.seek(0)
+    return archivo
+
+
+def _descomprimir_gzip(fuente: BinaryIO, pila: ExitStack) -> BinaryIO:
+    return pila.enter_context(gzip.GzipFile(fileobj=fuente, mode="rb"))
+
+
+def _modulo_zstd():
+    try:
+        from compression import zstd  # Python >= 3.14
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _descomprimir_zstd(fuente: BinaryIO, pila: ExitStack) -> BinaryIO:
+    modulo = _modulo_zstd()
+    if hasattr(modulo, "ZstdFile"):
+        return pila.enter_context(modulo.ZstdFile(fuente, mode="rb"))
+    lector = modulo.ZstdDecompressor().stream_reader(
+        fuente, read_across_frames=True, closefd=False
+    )
+    return pila.enter_context(lector)
+
+
+DESCOMPRESORES = {
+    ".csv.gz": _descomprimir_gzip,
+    ".csv.zst": _descomprimir_zstd,
+}
+
+
+def _validar_descompresor(extension: str) -> None:
+    if extension == ".csv.zst" and _modulo_zstd() is None:
+        raise ArchivoNoSoportado(
+            "Los archivos .zst requieren el paquete zstandard en el servidor."
+        )
+
+
+def _comprimido(
+    abrir_fuente: Callable[[ExitStack], BinaryIO],
+    extension: str,
+    nombre: str,
+    cupo: CupoDescompresion,
+) -> Tuple[str, ArchivoDescomprimido]:
+    _validar_descompresor(extension)
+    descomprimir = DESCOMPRESORES[extension]
+    contenido = EXTENSIONES_COMPRIMIDAS[extension]
+    medidor = MedidorDescompresion(cupo)
+    return contenido, ArchivoDescomprimido(
+        lambda pila: _FlujoMedido(descomprimir(abrir_fuente(pila), pila), medidor),
+        nombre[: len(nombre) - len(extension)] + contenido,
+    )
+
+
+def _xlsx_en_temporal(
+    zip_archivo: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    medidor: MedidorDescompresion,
+    pila: ExitStack,
+) -> BinaryIO:
+    temporal = pila.enter_context(tempfile.SpooledTemporaryFile(max_size=XLSX_EN_MEMORIA_MAXIMO))
+    with zip_archivo.open(info) as miembro:
+        shutil.copyfileobj(_FlujoMedido(miembro, medidor), temporal, TAMANO_BLOQUE_COPIA)
+    temporal.seek(0)
+    return temporal
+
+
+def _es_miembro_ignorado(nombre: str) -> bool:
+    # Carpetas y metadatos que agregan los compresores de macOS/Windows
+    base = nombre.rsplit("/", 1)[-1]
+    return (
+        not base
+        or nombre.startswith("__MACOSX/")
+        or base.startswith(".")
+        or base.startswith("~$")
+        or base.lower() == "thumbs.db"
+    )
+
+
+def _miembros_zip(archivo: Any) -> List[Tuple[str, ArchivoDescomprimido]]:
+    try:
+        zip_archivo = zipfile.ZipFile(_desde_el_inicio(archivo))
+    except zipfile.BadZipFile as exc:
+        raise ArchivoNoSoportado("El archivo .zip está dañado.") from exc
+
+    cupo = CupoDescompresion()
+    declarado = 0
+    preparados: List[Tuple[str, ArchivoDescomprimido]] = []
+    for info in zip_archivo.infolist():
+        if info.is_dir() or _es_miembro_ignorado(info.filename):
+            continue
+        nombre = info.filename.rsplit("/", 1)[-1]
+        extension = extension_de(nombre)
+        # El tamaño declarado ya delata la mayoría de las bombas; el real se
+        # cuenta al leer
+        declarado += info.file_size
+        if info.file_size > _maximo_archivo() or declarado > _maximo_upload():
+            raise ArchivoNoSoportado(DETALLE_DEMASIADO_GRANDE)
+
+        def _abrir_miembro(pila: ExitStack, info: zipfile.ZipInfo = info) -> BinaryIO:
+            return pila.enter_context(zip_archivo.open(info))
+
+        if extension == ".csv":
+            medidor = MedidorDescompresion(cupo)
+            preparados.append(
+                (
+                    extension,
+                    ArchivoDescomprimido(
+                        lambda pila, abrir=_abrir_miembro, medidor=medidor: _FlujoMedido(
+                            abrir(pila), medidor
+                        ),
+                        nombre,
+                    ),
+                )
+            )
+        elif extension == ".xlsx":
+            medidor = MedidorDescompresion(cupo)
+            preparados.append(
+                (
+                    extension,
+                    ArchivoDescomprimido(
+                        lambda pila, info=info, medidor=medidor: _xlsx_en_temporal(
+                            zip_archivo, info, medidor, pila
+                        ),
+                        nombre,
+                    ),
+                )
+            )
+        elif extension in EXTENSIONES_COMPRIMIDAS:
+            preparados.append(_comprimido(_abrir_miembro, extension, nombre, cupo))
+        else:
+            raise ArchivoNoSoportado(
+                f"El archivo .zip contiene un archivo no soportado: {nombre}"
+            )
+
+    if not preparados:
+        raise ArchivoNoSoportado("El archivo .zip no contiene archivos CSV o XLSX.")
+    return preparados
+
+
+def preparar_archivos(archivos: List[Any]) -> List[Tuple[str, Any]]:
+    """(extensión, archivo) de cada archivo a parsear, en orden. Los planos
+    se devuelven tal cual; los comprimidos, como `ArchivoDescomprimido`.
+    Lanza `ArchivoNoSoportado` si algún upload no se puede leer; también
+    al leerlos, si alguno pasa el tamaño máximo descomprimido."""
+    preparados: List[Tuple[str, Any]] = []
+    for archivo in archivos:
+        nombre = getattr(archivo, "name", "") or ""
+        extension = extension_de(nombre)
+        if extension in EXTENSIONES_PLANAS:
+            preparados.append((extension, archivo))
+        elif extension in EXTENSIONES_COMPRIMIDAS:
+            preparados.append(
+                _comprimido(
+                    lambda pila, archivo=archivo: _desde_el_inicio(archivo),
+                    extension,
+                    nombre,
+                    CupoDescompresion(),
+                )
+            )
+        elif extension == EXTENSION_ZIP:
+            preparados.extend(_miembros_zip(archivo))
+        else:
+            raise ArchivoNoSoportado()
+    return preparados
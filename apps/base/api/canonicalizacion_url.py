@@ -0,0 +1,312 @@
+"""Forma canónica de una URL para la deduplicación (`clave_url`).
+
+Una misma publicación llega con distintas URLs según la red y el proveedor:
+- con parámetros de tracking (`utm_*`, `fbclid`, `igshid`, `si`...);
+- desde hosts móviles (`m.facebook.com`, `mobile.twitter.com`);
+- en la forma corta o larga de TikTok y YouTube.
+Cada variante que pasa la deduplicación cuesta una clasificación del LLM y
+un mensaje de WhatsApp.
+
+Las reglas de cada red están en `REGLAS_REDES`:
+- hosts equivalentes;
+- reescrituras de ruta al identificador de la publicación;
+- parámetros de query que sí identifican el contenido.
+
+Una red nueva se agrega con su `ReglaRed`, no con ramas nuevas. Los links
+cortos que solo se pueden resolver siguiendo la redirección (`t.co`,
+`vm.tiktok.com`, `fb.watch`...) pasan por `resolver_url_corta`. Esta
+función es opcional (`URL_RESOLVER_CORTAS`) y cachea el resultado.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from typing import Callable, FrozenSet, Iterable, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.base import clientes_http
+
+
+logger = logging.getLogger(__name__)
+
+Resolutor = Callable[[str], Optional[str]]
+
+# Parámetros de campañas y de "compartir" que no cambian el contenido
+PARAMETROS_TRACKING = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "yclid",
+        "igshid",
+        "igsh",
+        "si",
+        "mibextid",
+        "mc_cid",
+        "mc_eid",
+        "_ga",
+        "_gl",
+        "ocid",
+        "ref_src",
+        "ref_url",
+        "share_id",
+    }
+)
+PREFIJOS_TRACKING = ("utm_",)
+# Subdominios de versión móvil de cualquier sitio. Los de cada red
+# (`web.facebook.com`, `mbasic.facebook.com`...) los cubre su regla.
+PREFIJOS_HOST_MOVIL = ("m.", "mobile.")
+
+CACHE_PREFIJO = "url_corta:"
+CACHE_TTL_RESUELTA = 60 * 60 * 24 * 30
+CACHE_TTL_FALLIDA = 60 * 60
+TIMEOUT_RESOLVER_SEGUNDOS = 5
+
+
+class ReglaRed:
+    """Canonicalización de una red.
+
+    - `hosts`: el host y sus subdominios se reescriben a `host_canonico`.
+    - `cortos`: hosts de links cortos que solo se resuelven siguiendo la
+      redirección.
+    - `rutas`: pares (regex, plantilla). La plantilla puede traer query
+      (`/watch?v={id}`) y se usa la primera regex que coincide con la ruta.
+    - `parametros`: parámetros de query que se conservan. Con None se
+      conservan todos menos los de tracking.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        hosts: Iterable[str],
+        host_canonico: str,
+        rutas: Sequence[Tuple[str, str]] = (),
+        parametros: Optional[Iterable[str]] = None,
+        cortos: Iterable[str] = (),
+    ):
+        self.nombre = nombre
+        self.hosts: FrozenSet[str] = frozenset(hosts)
+        self.host_canonico = host_canonico
+        self.rutas = tuple((re.compile(patron), plantilla) for patron, plantilla in rutas)
+        self.parametros: Optional[FrozenSet[str]] = (
+            frozenset(parametros) if parametros is not None else None
+        )
+        self.cortos: FrozenSet[str] = frozenset(cortos)
+
+    def aplica_a(self, host: str) -> bool:
+        return _host_en(host, self.hosts) or _host_en(host, self.cortos)
+
+    def reescribir_ruta(self, path: str) -> Tuple[str, str]:
+        """(ruta, query de la plantilla; "" si la plantilla no trae)."""
+        for patron, plantilla in self.rutas:
+            match = patron.match(path)
+            if match:
+                ruta, _, query = plantilla.format(**match.groupdict()).partition("?")
+                return ruta, query
+        return path, ""
+
+
+REGLAS_REDES: Tuple[ReglaRed, ...] = (
+    ReglaRed(
+        "twitter",
+        hosts=("twitter.com", "x.com"),
+        host_canonico="twitter.com",
+        # El id del tweet es único: el usuario de la URL puede cambiar
+        rutas=((r"^/(?:[^/]+|i(?:/web)?)/status(?:es)?/(?P<id>\d+)(?:/|$)", "/i/status/{id}"),),
+        parametros=(),
+        cortos=("t.co",),
+    ),
+    ReglaRed(
+        "facebook",
+        hosts=("facebook.com", "fb.com"),
+        host_canonico="facebook.com",
+        # permalink.php?story_fbid=..&id=.., photo.php?fbid=.., watch?v=..
+        parametros=("story_fbid", "id", "fbid", "v"),
+        cortos=("fb.watch", "fb.me"),
+    ),
+    ReglaRed(
+        "instagram",
+        hosts=("instagram.com", "instagr.am"),
+        host_canonico="instagram.com",
+        rutas=((r"^/(?:[^/]+/)?(?:p|reels?|tv)/(?P<id>[\w-]+)(?:/|$)", "/p/{id}"),),
+        parametros=(),
+    ),
+    ReglaRed(
+        "tiktok",
+        hosts=("tiktok.com",),
+        host_canonico="tiktok.com",
+        rutas=(
+            (r"^/@[^/]+/(?:video|photo)/(?P<id>\d+)(?:/|$)", "/video/{id}"),
+            (r"^/v/(?P<id>\d+)(?:\.html)?$", "/video/{id}"),
+            (r"^/embed(?:/v2)?/(?P<id>\d+)(?:/|$)", "/video/{id}"),
+        ),
+        parametros=(),
+        cortos=("vm.tiktok.com", "vt.tiktok.com"),
+    ),
+    ReglaRed(
+        "youtube",
+        hosts=("youtube.com", "youtu.be", "youtube-nocookie.com"),
+        host_canonico="youtube.com",
+        rutas=(
+            (r"^/(?:shorts|embed|live|v)/(?P<id>[\w-]{11})(?:/|$)", "/watch?v={id}"),
+            # youtu.be/<id>: el host corto no necesita resolver
+            (r"^/(?P<id>[\w-]{11})$", "/watch?v={id}"),
+        ),
+        parametros=("v", "list"),
+    ),
+    ReglaRed(
+        "linkedin",
+        hosts=("linkedin.com",),
+        host_canonico="linkedin.com",
+        parametros=(),
+        cortos=("lnkd.in",),
+    ),
+)
+
+# Acortadores genéricos: solo se canonicalizan si se resuelven
+HOSTS_CORTOS_GENERICOS = frozenset(
+    {"bit.ly", "buff.ly", "ow.ly", "tinyurl.com", "goo.gl", "dlvr.it", "trib.al", "shorturl.at"}
+)
+
+
+def _host_en(host: str, hosts: FrozenSet[str]) -> bool:
+    if host in hosts:
+        return True
+    return any(host.endswith(f".{candidato}") for candidato in hosts)
+
+
+def _limpiar_host(netloc: str) -> str:
+    host = netloc.lower().rsplit("@", 1)[-1]
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    for prefijo in PREFIJOS_HOST_MOVIL:
+        if host.startswith(prefijo) and host.count(".") >= 2:
+            return host[len(prefijo):]
+    return host
+
+
+def regla_para(host: str) -> Optional[ReglaRed]:
+    for regla in REGLAS_REDES:
+        if regla.aplica_a(host):
+            return regla
+    return None
+
+
+def es_url_corta(url: Optional[str]) -> bool:
+    if not url:
+        return False
+    host = _limpiar_host(urlparse(url if "//" in url else f"http://{url}").netloc)
+    if host in HOSTS_CORTOS_GENERICOS:
+        return True
+    regla = regla_para(host)
+    return regla is not None and _host_en(host, regla.cortos)
+
+
+def _es_tracking(nombre: str) -> bool:
+    nombre = nombre.lower()
+    return nombre in PARAMETROS_TRACKING or nombre.startswith(PREFIJOS_TRACKING)
+
+
+def _filtrar_query(query: str, regla: Optional[ReglaRed]) -> str:
+    parametros = [
+        (nombre, valor)
+        for nombre, valor in parse_qsl(query, keep_blank_values=True)
+        if not _es_tracking(nombre)
+        and (regla is None or regla.parametros is None or nombre in regla.parametros)
+    ]
+    # El orden de los parámetros no cambia el contenido
+    return urlencode(sorted(parametros))
+
+
+def partes_canonicas(
+    url_normalizada: str, resolver: Optional[Resolutor] = None
+) -> Tuple[str, str, str, str, str]:
+    """(host, ruta, params, query, fragmento) canónicos de una URL ya pasada
+    por `normalizar_url`. Con `resolver`, los links cortos se reemplazan
+    por su destino antes de aplicar las reglas."""
+    parsed = urlparse(url_normalizada)
+    host = _limpiar_host(parsed.netloc)
+
+    if resolver is not None and es_url_corta(url_normalizada):
+        destino = resolver(url_normalizada)
+        if destino and destino != url_normalizada:
+            from .utils import normalizar_url
+
+            normalizado = normalizar_url(destino)
+            if normalizado:
+                # Sin resolver: un destino que vuelve a ser corto no se sigue
+                return partes_canonicas(normalizado)
+
+    regla = regla_para(host)
+    path = (parsed.path or "").rstrip("/")
+    query = parsed.query or ""
+    fragment = parsed.fragment or ""
+    if regla is not None:
+        # Un link corto sin resolver conserva su host: su ruta no es la
+        # de la red
+        if not _host_en(host, regla.cortos):
+            host = regla.host_canonico
+        path, query_plantilla = regla.reescribir_ruta(path)
+        if query_plantilla:
+            query = query_plantilla
+    query = _filtrar_query(query, regla)
+    # Los fragmentos son anclas dentro de la página salvo el ruteo por hash
+    # de sitios fuera de las redes
+    if regla is not None or not fragment.startswith(("!", "/")):
+        fragment = ""
+    return host, path, parsed.params or "", query, fragment
+
+
+def _clave_cache(url: str) -> str:
+    return CACHE_PREFIJO + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def resolver_url_corta(url: str) -> Optional[str]:
+    """Destino de un link corto siguiendo las redirecciones. El resultado
+    (también el fallo) queda en el cache de Django."""
+    clave = _clave_cache(url)
+    cacheado = cache.get(clave)
+    if cacheado is not None:
+        return cacheado or None
+
+    timeout = getattr(settings, "URL_RESOLVER_TIMEOUT", TIMEOUT_RESOLVER_SEGUNDOS)
+    destino = None
+    try:
+        response = clientes_http.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code >= 400:
+            # Algunos acortadores no aceptan HEAD
+            response = clientes_http.get(url, allow_redirects=True, timeout=timeout, stream=True)
+            response.close()
+        if response.status_code < 400:
+            destino = response.url
+    except requests.RequestException as exc:
+        logger.info("No se pudo resolver el link corto %s: %s", url, exc)
+
+    if destino and destino != url:
+        cache.set(clave, destino, CACHE_TTL_RESUELTA)
+        return destino
+    cache.set(clave, "", CACHE_TTL_FALLIDA)
+    return None
+
+
+def resolver_desde_cache(url: str) -> Optional[str]:
+    """Solo lo ya resuelto. Sirve para `save()`, que no debe salir a la red."""
+    return cache.get(_clave_cache(url)) or None
+
+
+def resolutor_configurado(consultar: bool = True) -> Optional[Resolutor]:
+    """Resolutor de links cortos según `URL_RESOLVER_CORTAS`. Con
+    `consultar=False` solo usa lo ya cacheado."""
+    if not getattr(settings, "URL_RESOLVER_CORTAS", False):
+        return None
+    return resolver_url_corta if consultar else resolver_desde_cache
+
@@ -0,0 +1,164 @@
+"""Carga masiva de alertas (Articulo/Redes) con su DetalleEnvio.
+
+En PostgreSQL las filas se envían con `COPY ... FROM STDIN` a una tabla
+temporal. Después, una sola sentencia inserta en la tabla real, omitiendo
+los choques con restricciones únicas, y crea los DetalleEnvio de las filas
+insertadas, todo en SQL por conjuntos. En otros motores (SQLite en
+desarrollo y tests) se usa `bulk_create`.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from apps.base.models import Articulo, DetalleEnvio, Redes
+
+
+logger = logging.getLogger(__name__)
+
+# Campo de DetalleEnvio que apunta a cada tipo de alerta
+CAMPO_DETALLE = {Articulo: "medio", Redes: "red_social"}
+
+NULO_COPY = "\\N"
+TAMANO_BLOQUE_COPY = 64 * 1024
+
+
+def _valor_copy(valor: Any) -> str:
+    # Los textos van siempre entre comillas: así un "\N" literal no es NULL
+    if valor is None:
+        return NULO_COPY
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+class FlujoCopy:
+    """Archivo de solo lectura que genera el CSV de COPY a medida que
+    psycopg2 lo pide, sin armar el lote completo en memoria."""
+
+    def __init__(self, filas: Iterable[Sequence[Any]]):
+        self._lineas = (",".join(_valor_copy(valor) for valor in fila) + "\n" for fila in filas)
+        self._pendiente = ""
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = TAMANO_BLOQUE_COPY
+        partes = [self._pendiente]
+        largo = len(self._pendiente)
+        for linea in self._lineas:
+            partes.append(linea)
+            largo += len(linea)
+            if largo >= size:
+                break
+        texto = "".join(partes)
+        self._pendiente = texto[size:]
+        return texto[:size]
+
+
+def usar_copy(using: str) -> bool:
+    conexion = connections[using]
+    if conexion.vendor != "postgresql":
+        return False
+    return bool(getattr(settings, "INGESTION_CARGA_COPY", True))
+
+
+def cargar_alertas(
+    objetos: List[Any],
+    detalle: Dict[str, Any],
+    using: Optional[str] = None,
+) -> Set[Any]:
+    """Inserta `objetos` (todos Articulo o todos Redes) omitiendo los que
+    chocan con una restricción única. Por cada insertado crea un DetalleEnvio
+    con los valores de `detalle` y devuelve los ids insertados."""
+    if not objetos:
+        return set()
+    model = type(objetos[0])
+    using = using or router.db_for_write(model)
+
+    if usar_copy(using):
+        # La tabla temporal se borra al commit: todo en una transacción
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            # Solo psycopg2 expone copy_expert
+            if hasattr(cursor.cursor, "copy_expert"):
+                return _cargar_con_copy(cursor, model, objetos, detalle, using)
+        logger.warning("El driver de PostgreSQL no soporta copy_expert; se usa bulk_create")
+
+    return _cargar_con_bulk_create(model, objetos, detalle, using)
+
+
+def _cargar_con_bulk_create(model, objetos: List[Any], detalle: Dict[str, Any], using: str) -> Set[Any]:
+    model.objects.using(using).bulk_create(objetos, ignore_conflicts=True)
+    # bulk_create(ignore_conflicts=True) no informa qué filas omitió
+    insertados = set(
+        model.objects.using(using)
+        .filter(id__in=[obj.id for obj in objetos])
+        .values_list("id", flat=True)
+    )
+    campo = CAMPO_DETALLE[model]
+    DetalleEnvio.objects.using(using).bulk_create(
+        [DetalleEnvio(**detalle, **{campo: obj}) for obj in objetos if obj.id in insertados],
+        ignore_conflicts=True,
+    )
+    return insertados
+
+
+def _filas_alerta(campos, objetos: List[Any], conexion) -> Iterator[List[Any]]:
+    for obj in objetos:
+        # pre_save fija created_at/modified_at en el objeto, como bulk_create
+        fila = [campo.get_db_prep_save(campo.pre_save(obj, True), conexion) for campo in campos]
+        fila.append(DetalleEnvio._meta.pk.get_default())
+        yield fila
+
+
+def _cargar_con_copy(cursor, model, objetos: List[Any], detalle: Dict[str, Any], using: str) -> Set[Any]:
+    conexion = connections[using]
+    qn = conexion.ops.quote_name
+    tabla = model._meta.db_table
+    temporal = qn(f"carga_{tabla}")
+    campos = list(model._meta.concrete_fields)
+    columnas = ", ".join(qn(campo.column) for campo in campos)
+
+    # La tabla temporal vive hasta el commit: se reutiliza entre lotes
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {temporal} "
+        f"(LIKE {qn(tabla)}, detalle_id uuid) ON COMMIT DROP"
+    )
+    cursor.execute(f"TRUNCATE {temporal}")
+    cursor.cursor.copy_expert(
+        f"COPY {temporal} ({columnas}, detalle_id) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')",
+        FlujoCopy(_filas_alerta(campos, objetos, conexion)),
+    )
+
+    campo_alerta = CAMPO_DETALLE[model]
+    plantilla = DetalleEnvio(**detalle)
+    columnas_detalle: List[str] = []
+    expresiones: List[str] = []
+    parametros: List[Any] = []
+    for campo in DetalleEnvio._meta.concrete_fields:
+        columnas_detalle.append(qn(campo.column))
+        if campo.primary_key:
+            expresiones.append("t.detalle_id")
+        elif campo.name == campo_alerta:
+            expresiones.append("t.id")
+        else:
+            # Con cast: en un SELECT los literales sin tipo quedarían como text
+            expresiones.append(f"%s::{campo.cast_db_type(conexion)}")
+            parametros.append(campo.get_db_prep_save(campo.pre_save(plantilla, True), conexion))
+
+    columna_alerta = qn(DetalleEnvio._meta.get_field(campo_alerta).column)
+    cursor.execute(
+        f"""
+        WITH insertados AS (
+            INSERT INTO {qn(tabla)} ({columnas})
+            SELECT {columnas} FROM {temporal}
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        )
+        INSERT INTO {qn(DetalleEnvio._meta.db_table)} ({", ".join(columnas_detalle)})
+        SELECT {", ".join(expresiones)}
+        FROM insertados i JOIN {temporal} t ON t.id = i.id
+        RETURNING {columna_alerta}
+        """,
+        parametros,
+    )
+    return {fila[0] for fila in cursor.fetchall()}
@@ -0,0 +1,206 @@
+"""Huellas de ingesta: evita reprocesar archivos que ya se subieron.
+
+Cada ingesta de archivos completada queda registrada (`HuellaIngesta`) con
+el SHA-256 de su contenido y la firma de la configuración del proyecto que
+decide qué se acepta (criterios y tipo de alerta). Si se vuelve a subir el
+mismo contenido, la vista devuelve el resumen guardado sin parsear.
+
+Además se guarda un hash por fila (`HuellaFilaIngesta`): en un archivo que
+se solapa en parte con otro anterior solo se mapean y persisten las filas
+nuevas. Las omitidas cuentan como duplicadas en la respuesta.
+
+Solo se registran las filas que la persistencia creó o confirmó como URL
+duplicada, y la ingesta completa solo si terminó sin errores: lo que falló
+vuelve a procesarse en la siguiente subida.
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from django.conf import settings
+from django.db import models
+
+from apps.base.models import HuellaFilaIngesta, HuellaIngesta
+
+
+TAMANO_BLOQUE_HASH = 1024 * 1024
+TAMANO_LOTE_HUELLAS = 1000
+
+# Campos de la respuesta que se guardan como resumen (sin listado/errores)
+CAMPOS_RESUMEN = ("proveedor", "mensaje", "duplicados", "descartados")
+
+
+def huellas_activas() -> bool:
+    return bool(getattr(settings, "INGESTION_HUELLAS", True))
+
+
+def huella_archivo(archivo) -> str:
+    """SHA-256 del contenido del archivo leído por bloques; deja el cursor
+    al inicio para que el parseo lo lea completo."""
+    digest = hashlib.sha256()
+    if hasattr(archivo, "chunks"):
+        bloques: Iterable[bytes] = archivo.chunks(TAMANO_BLOQUE_HASH)
+    else:
+        archivo.seek(0)
+        bloques = iter(lambda: archivo.read(TAMANO_BLOQUE_HASH), b"")
+    for bloque in bloques:
+        digest.update(bloque.encode("utf-8") if isinstance(bloque, str) else bloque)
+    archivo.seek(0)
+    return digest.hexdigest()
+
+
+def huella_archivos(archivos: Iterable[Any]) -> str:
+    # El orden en que llegan los archivos no cambia la huella
+    huellas = sorted(huella_archivo(archivo) for archivo in archivos)
+    return hashlib.sha256("\n".join(huellas).encode("ascii")).hexdigest()
+
+
+def firma_criterios(proyecto) -> str:
+    criterios = sorted(
+        criterio.lower() for criterio in proyecto.get_criterios_aceptacion_list()
+    )
+    contenido = json.dumps(
+        {"criterios": criterios, "tipo_alerta": getattr(proyecto, "tipo_alerta", None)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def huella_fila(row: Mapping[str, Any], firma: str) -> str:
+    # Las filas compactas (`registros.Fila`) se serializan como el dict
+    # equivalente: la huella no depende de la representación
+    contenido = json.dumps(
+        row if isinstance(row, dict) else dict(row.items()),
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(
+        contenido.encode("utf-8"), digest_size=16, key=firma.encode("ascii")[:64]
+    ).hexdigest()
+
+
+class HuellasIngesta:
+    """Huellas de una subida de archivos a un proyecto.
+
+    `filtrar_filas` deja pasar solo las filas cuyo hash no está registrado;
+    la persistencia llama a `confirmar` con los registros que quedaron
+    guardados y `registrar` guarda esos hashes junto con el resumen una vez
+    que la ingesta terminó."""
+
+    def __init__(self, proyecto, huella: str, nombres: List[str]):
+        self.proyecto = proyecto
+        self.huella = huella
+        self.nombres = nombres
+        self.firma = firma_criterios(proyecto)
+        self.filas_nuevas = 0
+        self.filas_omitidas = 0
+        self.huellas_confirmadas: List[str] = []
+
+    @classmethod
+    def para_archivos(cls, proyecto, archivos: List[Any]) -> Optional["HuellasIngesta"]:
+        # Sin un proyecto persistido no hay dónde registrar la ingesta
+        if not archivos or not huellas_activas() or not isinstance(proyecto, models.Model):
+            return None
+        nombres = [getattr(archivo, "name", "") for archivo in archivos]
+        return cls(proyecto, huella_archivos(archivos), nombres)
+
+    def ingesta_previa(self) -> Optional[HuellaIngesta]:
+        return HuellaIngesta.objects.filter(
+            proyecto=self.proyecto, huella=self.huella, firma_criterios=self.firma
+        ).first()
+
+    def filtrar_filas(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        al_omitir: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Consulta las huellas por lotes (`huella IN (...)`) y omite las filas
+        ya ingestadas; `al_omitir` recibe cuántas se omitieron en cada lote.
+        Funciona igual sobre listas que sobre iteradores."""
+        lote: List[Dict[str, Any]] = []
+        for row in rows:
+            lote.append(row)
+            if len(lote) >= TAMANO_LOTE_HUELLAS:
+                yield from self._filtrar_lote(lote, al_omitir)
+                lote = []
+        if lote:
+            yield from self._filtrar_lote(lote, al_omitir)
+
+    def _filtrar_lote(
+        self, lote: List[Dict[str, Any]], al_omitir: Optional[Callable[[int], None]]
+    ) -> List[Dict[str, Any]]:
+        huellas = [huella_fila(row, self.firma) for row in lote]
+        existentes = set(
+            HuellaFilaIngesta.objects.filter(
+                proyecto=self.proyecto, huella__in=set(huellas)
+            ).values_list("huella", flat=True)
+        )
+        nuevas = [row for huella, row in zip(huellas, lote) if huella not in existentes]
+        self.filas_nuevas += len(nuevas)
+
+        omitidas = len(lote) - len(nuevas)
+        self.filas_omitidas += omitidas
+        if omitidas and al_omitir is not None:
+            al_omitir(omitidas)
+        return nuevas
+
+    def confirmar(self, registros: Iterable[Mapping[str, Any]]) -> None:
+        """Anota el hash de la fila de origen de cada registro persistido (o
+        descartado por URL ya existente). Los registros sin fila de origen
+        no vienen de un archivo y no tienen huella."""
+        for registro in registros:
+            fila = getattr(registro, "fila", None)
+            if fila is not None:
+                self.huellas_confirmadas.append(huella_fila(fila, self.firma))
+
+    def registrar(self, respuesta: Dict[str, Any], status: int) -> Optional[HuellaIngesta]:
+        for inicio in range(0, len(self.huellas_confirmadas), TAMANO_LOTE_HUELLAS):
+            HuellaFilaIngesta.objects.bulk_create(
+                [
+                    HuellaFilaIngesta(proyecto=self.proyecto, huella=huella)
+                    for huella in self.huellas_confirmadas[inicio : inicio + TAMANO_LOTE_HUELLAS]
+                ],
+                ignore_conflicts=True,
+            )
+
+        # Con errores (o una respuesta fallida) el archivo debe poder volver a
+        # subirse sin el atajo de "ya fue ingestado"
+        if respuesta.get("errores") or not 200 <= status < 300:
+            return None
+
+        resumen = {campo: respuesta.get(campo) for campo in CAMPOS_RESUMEN}
+        resumen["creados"] = len(respuesta.get("listado") or [])
+        # Una reingesta forzada del mismo contenido reemplaza el resumen
+        huella, _ = HuellaIngesta.objects.update_or_create(
+            proyecto=self.proyecto,
+            huella=self.huella,
+            firma_criterios=self.firma,
+            defaults={
+                "archivos": self.nombres,
+                "filas_nuevas": self.filas_nuevas,
+                "filas_omitidas": self.filas_omitidas,
+                "resultado": resumen,
+                "codigo_http": status,
+            },
+        )
+        return huella
+
+
+def respuesta_ingesta_previa(previa: HuellaIngesta) -> Dict[str, Any]:
+    """Resumen guardado de la ingesta anterior, con la forma de la respuesta
+    normal (sin listado: esos registros ya se crearon entonces)."""
+    resumen = dict(previa.resultado or {})
+    mensaje = resumen.get("mensaje") or ""
+    return {
+        **resumen,
+        "mensaje": f"El archivo ya fue ingestado en este proyecto: {mensaje}".rstrip(": "),
+        "listado": [],
+        "errores": [],
+        "ingesta_previa": {
+            "id": str(previa.id),
+            "fecha": previa.created_at,
+            "archivos": previa.archivos,
+        },
+    }
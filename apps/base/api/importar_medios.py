@@ -2,13 +2,16 @@ from collections.abc import Iterable
 from typing import Any, Dict, List, Optional, Tuple
 
 from rest_framework.response import Response
-from apps.base.models import Articulo, DetalleEnvio
+from apps.base.models import Articulo
 from apps.proyectos.models import Proyecto
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
+from apps.whatsapp.services.buzon_lotes import encolar_lote
+from django.db import transaction
 from django.utils import timezone
-from apps.base.api.utils import parsear_datetime
+from apps.base.api.carga_masiva import cargar_alertas
+from apps.base.api.canonicalizacion_url import resolutor_configurado
+from apps.base.api.utils import huella_clave_url, parsear_datetime
 
 
 class ImportarArticuloAPIView(APIView):
@@ -45,17 +48,23 @@ class ImportarArticuloAPIView(APIView):
         registros, duplicados_payload = self._normalizar_registros(articulos_data)
         errores.extend(duplicados_payload)
 
-        urls = [r[3] for r in registros if r[3]]
+        resolver = resolutor_configurado()
+        claves = {r[3]: huella_clave_url(r[3], resolver) for r in registros if r[3]}
         existentes = set(
-            Articulo.objects.filter(proyecto=proyecto, url__in=urls).values_list("url", flat=True)
-        ) if urls else set()
+            Articulo.objects.filter(
+                proyecto=proyecto, clave_url__in=[c for c in claves.values() if c]
+            ).values_list("clave_url", flat=True)
+        ) if claves else set()
 
         nuevos: List[Articulo] = []
         aceptados: List[Tuple[Optional[str], Optional[str], Any, str, Optional[str], Any, Any]] = []
         for titulo, contenido, fecha_raw, url, autor, reach, engagement, ubicacion in registros:
-            if url and url in existentes:
+            clave_url = claves.get(url) if url else None
+            if clave_url and clave_url in existentes:
                 errores.append({"url": url, "error": "La URL ya existe en este proyecto"})
                 continue
+            if clave_url:
+                existentes.add(clave_url)
 
             nuevos.append(
                 Articulo(
@@ -67,6 +76,7 @@ class ImportarArticuloAPIView(APIView):
                     reach=reach,
                     ubicacion=ubicacion,
                     proyecto=proyecto,
+                    clave_url=clave_url,
                     created_by=usuario_creador,
                     modified_by=usuario_creador,
                 )
@@ -74,22 +84,22 @@ class ImportarArticuloAPIView(APIView):
             aceptados.append((titulo, contenido, fecha_raw, url, autor, reach, engagement))
 
         if nuevos:
-            Articulo.objects.bulk_create(nuevos, batch_size=300)
-
-            detalles = [
-                DetalleEnvio(
-                    estado_enviado=False,
-                    estado_revisado=True,
-                    medio=articulo,
-                    proyecto_id=proyecto.id,
-                    created_by=usuario_creador,
-                    modified_by=usuario_creador,
-                )
-                for articulo in nuevos
-            ]
-            DetalleEnvio.objects.bulk_create(detalles, batch_size=300)
+            insertados = cargar_alertas(
+                nuevos,
+                {
+                    "estado_enviado": False,
+                    "estado_revisado": True,
+                    "proyecto": proyecto,
+                    "created_by": usuario_creador,
+                    "modified_by": usuario_creador,
+                },
+            )
 
             for articulo, registro in zip(nuevos, aceptados):
+                if articulo.id not in insertados:
+                    # Otra carga concurrente ganó la restricción única
+                    errores.append({"url": articulo.url, "error": "La URL ya existe en este proyecto"})
+                    continue
                 engagement = registro[6]
                 creados.append({
                     "id": str(articulo.id),
@@ -116,11 +126,11 @@ class ImportarArticuloAPIView(APIView):
                 }
                 for c in creados
             ]
-            enviar_alertas_automatico(
-                proyecto_id=proyecto.id,
-                tipo_alerta="medios",
-                alertas=alertas,
-                usuario_id=getattr(usuario_creador, "id", None)
+            # Al buzón de lotes: sale junto con los de otros proyectos
+            transaction.on_commit(
+                lambda: encolar_lote(
+                    proyecto.id, "medios", alertas, getattr(usuario_creador, "id", None)
+                )
             )
         print('creados--------------',creados)
 
@@ -4,13 +4,16 @@ from collections.abc import Iterable
 from typing import Any, Dict, List, Optional, Tuple
 
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from apps.proyectos.models import Proyecto
-from apps.base.models import Redes,RedesSociales,DetalleEnvio
-from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
+from apps.base.api.carga_masiva import cargar_alertas
+from apps.base.models import Redes,RedesSociales
+from apps.whatsapp.services.buzon_lotes import encolar_lote
 from django.contrib.auth import get_user_model
 from django.http import QueryDict
-from apps.base.api.utils import parsear_datetime
+from apps.base.api.canonicalizacion_url import resolutor_configurado
+from apps.base.api.utils import huella_clave_url, parsear_datetime
 
 class ImportarRedesAPIView(APIView):
     authentication_classes = []
@@ -46,18 +49,24 @@ class ImportarRedesAPIView(APIView):
         registros, duplicados_payload = self._normalizar_registros(redes_data)
         errores.extend(duplicados_payload)
 
-        urls = [r[2] for r in registros if r[2]]
+        resolver = resolutor_configurado()
+        claves = {r[2]: huella_clave_url(r[2], resolver) for r in registros if r[2]}
         existentes = set(
-            Redes.objects.filter(proyecto=proyecto, url__in=urls).values_list("url", flat=True)
-        ) if urls else set()
+            Redes.objects.filter(
+                proyecto=proyecto, clave_url__in=[c for c in claves.values() if c]
+            ).values_list("clave_url", flat=True)
+        ) if claves else set()
 
         red_sociales_map = self._mapear_redes_sociales(registros)
 
         nuevos: List[Redes] = []
         for contenido, fecha_raw, url, autor, reach, engagement, red_social_nombre, ubicacion in registros:
-            if url and url in existentes:
+            clave_url = claves.get(url) if url else None
+            if clave_url and clave_url in existentes:
                 errores.append({"url": url, "error": "La URL ya existe en este proyecto"})
                 continue
+            if clave_url:
+                existentes.add(clave_url)
 
             red_social_obj = red_sociales_map.get(red_social_nombre)
             nuevos.append(
@@ -71,28 +80,29 @@ class ImportarRedesAPIView(APIView):
                     ubicacion=ubicacion,
                     proyecto=proyecto,
                     red_social=red_social_obj,
+                    clave_url=clave_url,
                     created_by=usuario_creador,
                     modified_by=usuario_creador,
                 )
             )
 
         if nuevos:
-            Redes.objects.bulk_create(nuevos, batch_size=300)
-
-            detalles = [
-                DetalleEnvio(
-                    estado_enviado=False,
-                    estado_revisado=True,
-                    red_social=red,
-                    proyecto_id=proyecto.id,
-                    created_by=usuario_creador,
-                    modified_by=usuario_creador,
-                )
-                for red in nuevos
-            ]
-            DetalleEnvio.objects.bulk_create(detalles, batch_size=300)
+            insertados = cargar_alertas(
+                nuevos,
+                {
+                    "estado_enviado": False,
+                    "estado_revisado": True,
+                    "proyecto": proyecto,
+                    "created_by": usuario_creador,
+                    "modified_by": usuario_creador,
+                },
+            )
 
             for red in nuevos:
+                if red.id not in insertados:
+                    # Otra carga concurrente ganó la restricción única
+                    errores.append({"url": red.url, "error": "La URL ya existe en este proyecto"})
+                    continue
                 creados.append({
                     "id": str(red.id),
                     "url": red.url,
@@ -119,11 +129,11 @@ class ImportarRedesAPIView(APIView):
                 }
                 for c in creados
             ]
-            enviar_alertas_automatico(
-                proyecto_id=proyecto.id,
-                tipo_alerta="redes",
-                alertas=alertas,
-                usuario_id=getattr(usuario_creador, "id", None)
+            # Al buzón de lotes: sale junto con los de otros proyectos
+            transaction.on_commit(
+                lambda: encolar_lote(
+                    proyecto.id, "redes", alertas, getattr(usuario_creador, "id", None)
+                )
             )
 
         
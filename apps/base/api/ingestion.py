@@ -1,29 +1,52 @@
+import codecs
 import csv
 import io
+import itertools
+import json
 import logging
-import os
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
 from urllib.parse import urlparse
+from xml.etree.ElementTree import iterparse
 
 import requests
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
 from django.utils import timezone
 from openpyxl import load_workbook
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.xml.constants import REL_NS, SHEET_MAIN_NS
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.urls import NoReverseMatch, reverse
+from django.urls import NoReverseMatch, Resolver404, resolve, reverse
 
-from apps.base.models import Articulo, DetalleEnvio, Redes, RedesSociales
+from apps.base import clientes_http, outbox
+from apps.base.models import Articulo, DetalleEnvio, MensajeSaliente, Redes, RedesSociales
 from apps.proyectos.models import Proyecto
 from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
 
+from .archivos_comprimidos import ArchivoNoSoportado, preparar_archivos, tamano_estimado
+from .carga_masiva import cargar_alertas
 from .contenido_redes import ajustar_contenido_red_social
+from .huellas_ingesta import HuellasIngesta, respuesta_ingesta_previa
+from .ingestion_paralela import mapear_en_procesos, umbral_filas_paralelo
+from .registros import AUSENTE, EsquemaFilas, Fila, RegistroAlerta
+from .mapeo_proveedores import (
+    MAPEO_DETERM,
+    MAPEO_REDES_TWK,
+    especificacion_medios,
+    valor_contiene_datos,
+)
+from .canonicalizacion_url import resolutor_configurado
+from .respuestas_ingesta import construir_respuesta, modo_respuesta, respuesta_modo_invalido
 from .utils import (
-    combinar_fecha_hora,
+    criterios_aceptacion_proyecto,
     filtrar_registros_por_palabras,
     formatear_fecha_respuesta,
+    huella_clave_url,
     limpiar_texto,
     normalizar_url,
     normalizar_valor_adicional,
@@ -47,35 +70,6 @@ COLUMNAS_MEDIOS_TWK_VARIANTE_FUENTE = (
     COLUMNAS_MEDIOS_TWK - {"extra_author_attributes.name"}
 ) | {"extra_source_attributes.name"}
 
-COLUMNAS_MEDIOS_GLOBAL_NEWS = {
-    "autor - conductor",
-    "medio",
-    "fecha",
-    "resumen - aclaracion",
-    "resumen - aclaración",
-    "título",
-    "titulo",
-    "audiencia",
-}
-
-COLUMNAS_MEDIOS_STAKEHOLDERS = {
-    "autor",
-    "fuente",
-    "fecha",
-    "resumen",
-    "titular",
-    "titulo",
-    "audiencia",
-}
-
-COLUMNAS_MEDIOS_DETERM = {
-    "author",
-    "from",
-    "title",
-    "mention_snippet",
-    "date",
-}
-
 COLUMNAS_REDES_TWK = {
     "content",
     "published",
@@ -125,21 +119,51 @@ DOMINIOS_REDES_SOCIALES = {
     "linkedin.com": "LinkedIn",
 }
 
-CAMPOS_PRINCIPALES = {
-    "medios": (
-        COLUMNAS_MEDIOS_TWK
-        | COLUMNAS_MEDIOS_GLOBAL_NEWS
-        | COLUMNAS_MEDIOS_STAKEHOLDERS
-        | COLUMNAS_MEDIOS_DETERM
-        | {"url", "link", "extra_source_attributes.name"}
-    ),
-    "redes": (
-        COLUMNAS_REDES_TWK
-        | COLUMNAS_REDES_TWK_VARIANTE_AUTOR
-        | {"url", "link", "red_social"}
-    ),
-    "determ": COLUMNAS_DETERM | {"url", "social_network"},
-}
+COLUMNAS_URL_ALTERNATIVAS = (
+    "link (streaming - imagen)",
+    "link (streaming – imagen)",
+    "link",
+)
+
+# Lectura en flujo: archivos a partir de este tamaño se procesan fila a fila
+# (openpyxl read-only / decodificador CSV incremental) y se persisten por lotes.
+STREAMING_UMBRAL_BYTES = 5 * 1024 * 1024
+TAMANO_BLOQUE_LECTURA = 64 * 1024
+TAMANO_LOTE_PERSISTENCIA = 1000
+
+
+# (orden en el XML, fila inicial, fila final, columna inicial, columna final, destino)
+Hipervinculo = Tuple[int, int, int, int, int, str]
+
+
+class _HipervinculosPorFila:
+    """Destinos de los hipervínculos de una hoja XLSX, fila por fila, a la par
+    del lector read-only. `hipervinculos` viene ordenado por fila inicial y se
+    consume a medida que avanzan las filas: en memoria solo quedan los
+    rangos que cubren la fila actual."""
+
+    def __init__(self, hipervinculos: Iterator[Hipervinculo]):
+        self._fuente = hipervinculos
+        self._siguiente = next(self._fuente, None)
+        self._activos: List[Hipervinculo] = []
+
+    def destinos(self, fila: int) -> Dict[int, str]:
+        """{columna: destino} de la fila; las filas se piden en orden."""
+        while self._siguiente is not None and self._siguiente[1] <= fila:
+            self._activos.append(self._siguiente)
+            self._siguiente = next(self._fuente, None)
+        self._activos = [vinculo for vinculo in self._activos if vinculo[2] >= fila]
+        destinos: Dict[int, str] = {}
+        # Si dos rangos cubren la misma celda gana el último del XML
+        for _, _, _, min_col, max_col, destino in sorted(self._activos):
+            for columna in range(min_col, max_col + 1):
+                destinos[columna] = destino
+        return destinos
+
+    def close(self) -> None:
+        cerrar = getattr(self._fuente, "close", None)
+        if cerrar is not None:
+            cerrar()
 
 
 class IngestionAPIView(APIView):
@@ -151,56 +175,108 @@ class IngestionAPIView(APIView):
         if proyecto is None:
             return Response({"detail": "Proyecto no encontrado o no indicado."}, status=400)
 
+        modo = modo_respuesta(request)
+        if modo is None:
+            return respuesta_modo_invalido()
+
+        if self._solicita_modo_asincrono(request):
+            from .ingestion_jobs import encolar_ingesta
+
+            return encolar_ingesta(self, request, proyecto)
+
         tipo_alerta_proyecto = self._obtener_tipo_alerta_proyecto(proyecto)
         registros_estandar, proveedor, error_response = self._extraer_registros_estandar(
             request,
             tipo_alerta_proyecto,
+            proyecto,
         )
         if error_response:
             return error_response
 
-        # No aplicar criterios de aceptación para ingesta manual
+        self._usuario_sistema_cache = self._obtener_usuario_desde_request(request)
+        try:
+            respuesta, status = self._ejecutar_ingesta(registros_estandar, proveedor, proyecto)
+        except ArchivoNoSoportado as exc:
+            # En flujo, el tope de descompresión salta al leer: nada queda guardado
+            return Response({"detail": exc.detalle}, status=400)
+        self._registrar_huellas(respuesta, status)
+        return construir_respuesta(respuesta, status, modo)
+
+    def _ejecutar_ingesta(
+        self,
+        registros_estandar: Iterable[Dict[str, Any]],
+        proveedor: Optional[str],
+        proyecto: Proyecto,
+    ) -> Tuple[Dict[str, Any], int]:
+        """Filtra, persiste, despacha y notifica los registros ya mapeados.
+        Compartido por la petición síncrona y el job asíncrono de ingesta."""
+        # En modo streaming los registros llegan como iterador: el filtro cuenta
+        # los descartados a medida que se consumen.
+        contador_filtro = {"descartados": 0}
         if proveedor == "manual":
+            # No aplicar criterios de aceptación para ingesta manual
             registros_filtrados = registros_estandar
-            descartados_por_criterios = 0
-        else:
+        elif isinstance(registros_estandar, list):
             total_antes_filtro = len(registros_estandar)
             registros_filtrados = self._filtrar_por_criterios(registros_estandar, proyecto)
-            descartados_por_criterios = total_antes_filtro - len(registros_filtrados)
+            contador_filtro["descartados"] = total_antes_filtro - len(registros_filtrados)
+            self._registrar_progreso(descartados=contador_filtro["descartados"])
+        else:
+            registros_filtrados = self._filtrar_por_criterios_en_flujo(
+                registros_estandar, proyecto, contador_filtro
+            )
 
-        if not registros_filtrados:
+        primer_registro, registros_filtrados = self._separar_primer_registro(
+            registros_filtrados
+        )
+        if primer_registro is None:
             respuesta = self._construir_respuesta_sin_registros(
                 proveedor,
                 proyecto,
             )
-            respuesta["descartados"] = descartados_por_criterios
+            respuesta["descartados"] = contador_filtro["descartados"]
+            filas_omitidas = self._filas_ya_ingestadas()
+            if filas_omitidas:
+                # Todas las filas nuevas para el filtro ya estaban ingestadas
+                respuesta["duplicados"] = filas_omitidas
+                respuesta["filas_ya_ingestadas"] = filas_omitidas
+                respuesta["mensaje"] = (
+                    f"0 registros nuevos: {filas_omitidas} filas ya fueron ingestadas "
+                    "en este proyecto."
+                )
+                return respuesta, 200
             self._notificar_ruta_externa(respuesta)
-            return Response(respuesta, status=405)
+            return respuesta, 405
 
-        self._usuario_sistema_cache = self._obtener_usuario_desde_request(request)
-        resultado = self._persistir_registros(registros_filtrados, proyecto)
-        respuesta = self._construir_respuesta_exito(
-            registros_filtrados,
-            resultado,
-            proveedor,
-            proyecto,
-        )
-        # Sumar descartados por criterios + descartados por errores de persistencia
-        respuesta["descartados"] = descartados_por_criterios + resultado.get("descartados", 0)
+        # Las alertas y el aviso a la ruta externa (outbox) se confirman juntos:
+        # si la ingesta falla a medias no queda un aviso de filas inexistentes
+        with transaction.atomic():
+            resultado = self._persistir_registros(registros_filtrados, proyecto)
+            filas_omitidas = self._filas_ya_ingestadas()
+            # Las filas omitidas por huella cuentan como duplicadas
+            resultado["duplicados"] = resultado.get("duplicados", 0) + filas_omitidas
+            respuesta = self._construir_respuesta_exito(
+                [primer_registro],
+                resultado,
+                proveedor,
+                proyecto,
+            )
+            # Sumar descartados por criterios + descartados por errores de persistencia
+            respuesta["descartados"] = contador_filtro["descartados"] + resultado.get("descartados", 0)
+            if filas_omitidas:
+                respuesta["filas_ya_ingestadas"] = filas_omitidas
 
-        self._procesar_envio_automatico(proyecto, respuesta)
-        self._notificar_ruta_externa(respuesta)
+            self._procesar_envio_automatico(proyecto, respuesta)
+            self._notificar_ruta_externa(respuesta)
 
-        return Response(
-            respuesta,
-            status=201 if resultado["listado"] else 400,
-        )
+        return respuesta, 201 if resultado["listado"] else 400
 
     def _extraer_registros_estandar(
         self,
         request,
         tipo_alerta_proyecto: Optional[str],
-    ) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Response]]:
+        proyecto: Optional[Proyecto] = None,
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[str], Optional[Response]]:
         registro_manual = self._obtener_registro_manual(request)
         if registro_manual:
             self._ajustar_registro_manual_por_tipo_alerta(
@@ -215,18 +291,42 @@ class IngestionAPIView(APIView):
                 status=400,
             )
 
-        registros_acumulados: List[Dict[str, Any]] = []
+        if not self._solicita_reingesta(request):
+            huellas = HuellasIngesta.para_archivos(proyecto, archivos)
+            previa = huellas.ingesta_previa() if huellas is not None else None
+            if previa is not None:
+                # Mismo contenido ya ingestado: se responde sin parsear
+                return [], None, Response(respuesta_ingesta_previa(previa), status=200)
+            self._huellas_ingesta = huellas
+
+        return self._extraer_registros_de_archivos(
+            archivos,
+            tipo_alerta_proyecto,
+            streaming=self._usar_modo_streaming(request, archivos),
+        )
+
+    def _extraer_registros_de_archivos(
+        self,
+        archivos: List[Any],
+        tipo_alerta_proyecto: Optional[str],
+        streaming: bool = False,
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[str], Optional[Response]]:
+        if streaming:
+            return self._extraer_registros_en_flujo(archivos, tipo_alerta_proyecto)
+
+        archivos_parseados: List[Tuple[str, List[str], List[Dict[str, Any]]]] = []
         proveedores_detectados: List[str] = []
 
-        for archivo in archivos:
-            extension = os.path.splitext(archivo.name)[1].lower()
-            if extension not in {".csv", ".xlsx"}:
-                return [], None, Response(
-                    {"detail": "Formato de archivo no soportado."},
-                    status=400,
-                )
+        try:
+            por_parsear = preparar_archivos(archivos)
+        except ArchivoNoSoportado as exc:
+            return [], None, Response({"detail": exc.detalle}, status=400)
 
-            headers, rows = self._parse_file(archivo, extension)
+        for extension, archivo in por_parsear:
+            try:
+                headers, rows = self._parse_file(archivo, extension)
+            except ArchivoNoSoportado as exc:
+                return [], None, Response({"detail": exc.detalle}, status=400)
             headers, rows = self._normalizar_columnas_url(headers, rows)
             if not headers:
                 return [], None, Response(
@@ -252,16 +352,141 @@ class IngestionAPIView(APIView):
             if error_validacion:
                 return [], provider, error_validacion
 
-            registros_estandar = self._mapear_filas(provider, rows)
-            if not registros_estandar:
+            # El mapeo es fila a fila: sin filas no habría registros
+            if not rows:
                 return [], provider, Response(
                     {"detail": "No se encontraron filas válidas en el archivo."},
                     status=400,
                 )
 
-            registros_acumulados.extend(registros_estandar)
             proveedores_detectados.append(provider)
+            rows = self._filtrar_filas_nuevas(rows)
+            if not isinstance(rows, list):
+                rows = list(rows)
+            if rows:
+                archivos_parseados.append((provider, headers, rows))
+
+        registros_acumulados = self._mapear_archivos(archivos_parseados)
+        return registros_acumulados, self._resolver_proveedor_final(proveedores_detectados), None
+
+    def _extraer_registros_en_flujo(
+        self,
+        archivos: List[Any],
+        tipo_alerta_proyecto: Optional[str],
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[str], Optional[Response]]:
+        """Variante en flujo de `_extraer_registros_estandar`: valida encabezados
+        y proveedor de cada archivo por adelantado y devuelve un iterador que
+        parsea y mapea las filas a medida que se consumen."""
+        lectores: List[Iterator[Dict[str, Any]]] = []
+        flujos: List[Iterator[Dict[str, Any]]] = []
+        proveedores_detectados: List[str] = []
+
+        def _error(respuesta: Response, provider: Optional[str] = None):
+            # Cierra los libros/archivos ya abiertos antes de responder
+            for lector in lectores:
+                lector.close()
+            return [], provider, respuesta
+
+        try:
+            por_parsear = preparar_archivos(archivos)
+        except ArchivoNoSoportado as exc:
+            return _error(Response({"detail": exc.detalle}, status=400))
+
+        for extension, archivo in por_parsear:
+            try:
+                headers, rows = self._parse_file_en_flujo(archivo, extension)
+            except ArchivoNoSoportado as exc:
+                return _error(Response({"detail": exc.detalle}, status=400))
+            lectores.append(rows)
+            headers, rows = self._normalizar_columnas_url_en_flujo(headers, rows)
+            if not headers:
+                return _error(
+                    Response(
+                        {"detail": "El archivo no contiene encabezados válidos."},
+                        status=400,
+                    )
+                )
+
+            error_url, rows = self._validar_columna_url_en_flujo(headers, rows)
+            if error_url:
+                return _error(error_url)
+
+            provider = self._detectar_proveedor(headers)
+            if not provider:
+                return _error(
+                    Response(
+                        {
+                            "detail": "No fue posible determinar el tipo de datos del archivo.",
+                        },
+                        status=400,
+                    )
+                )
+
+            error_validacion = self._validar_tipo_archivo_con_proyecto(provider, tipo_alerta_proyecto)
+            if error_validacion:
+                return _error(error_validacion, provider)
+
+            flujos.append(
+                self._mapear_filas_en_flujo(provider, self._filtrar_filas_nuevas(rows), headers)
+            )
+            proveedores_detectados.append(provider)
+
+        # La validación de URL garantiza al menos una fila por archivo, por lo
+        # que el mapeo nunca queda vacío (equivale al chequeo del modo completo).
+        registros = itertools.chain.from_iterable(flujos)
+        return registros, self._resolver_proveedor_final(proveedores_detectados), None
+
+    def _usar_modo_streaming(self, request, archivos: List[Any]) -> bool:
+        parametro = None
+        if hasattr(request, "query_params"):
+            parametro = request.query_params.get("streaming")
+        if parametro is not None:
+            return str(parametro).strip().lower() in {"1", "true", "si", "sí"}
+
+        umbral = getattr(settings, "INGESTION_STREAMING_UMBRAL_BYTES", STREAMING_UMBRAL_BYTES)
+        return any(tamano_estimado(archivo) >= umbral for archivo in archivos)
+
+    def _solicita_modo_asincrono(self, request) -> bool:
+        parametro = None
+        if hasattr(request, "query_params"):
+            parametro = request.query_params.get("asincrono")
+        return str(parametro or "").strip().lower() in {"1", "true", "si", "sí"}
 
+    def _solicita_reingesta(self, request) -> bool:
+        parametro = None
+        if hasattr(request, "query_params"):
+            parametro = request.query_params.get("reingestar")
+        return str(parametro or "").strip().lower() in {"1", "true", "si", "sí"}
+
+    def _filtrar_filas_nuevas(self, rows: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+        """Omite las filas ya ingestadas en el proyecto (ver `huellas_ingesta`)."""
+        huellas = getattr(self, "_huellas_ingesta", None)
+        if huellas is None:
+            return rows
+        return huellas.filtrar_filas(
+            rows, al_omitir=lambda omitidas: self._registrar_progreso(duplicados=omitidas)
+        )
+
+    def _filas_ya_ingestadas(self) -> int:
+        huellas = getattr(self, "_huellas_ingesta", None)
+        return huellas.filas_omitidas if huellas is not None else 0
+
+    def _confirmar_huellas(self, registros: Iterable[Dict[str, Any]]) -> None:
+        huellas = getattr(self, "_huellas_ingesta", None)
+        if huellas is not None:
+            huellas.confirmar(registros)
+
+    def _registrar_huellas(self, respuesta: Dict[str, Any], status: int) -> None:
+        huellas = getattr(self, "_huellas_ingesta", None)
+        if huellas is not None:
+            huellas.registrar(respuesta, status)
+
+    def _registrar_progreso(self, **conteos: int) -> None:
+        progreso = getattr(self, "_progreso_ingesta", None)
+        if progreso is not None:
+            progreso.sumar(**conteos)
+
+    def _resolver_proveedor_final(self, proveedores_detectados: List[str]) -> Optional[str]:
         provider_final: Optional[str] = None
         if proveedores_detectados:
             provider_final = proveedores_detectados[0]
@@ -269,8 +494,16 @@ class IngestionAPIView(APIView):
                 if proveedor != provider_final:
                     provider_final = "multiple"
                     break
+        return provider_final
 
-        return registros_acumulados, provider_final, None
+    def _separar_primer_registro(
+        self, registros: Iterable[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], Iterable[Dict[str, Any]]]:
+        iterador = iter(registros)
+        primero = next(iterador, None)
+        if primero is None:
+            return None, []
+        return primero, itertools.chain([primero], iterador)
 
     def _construir_respuesta_sin_registros(
         self,
@@ -382,99 +615,104 @@ class IngestionAPIView(APIView):
         for data in data_sources:
             if not hasattr(data, "get"):
                 continue
+            registro = self._registro_manual_desde_datos(data)
+            if registro is not None:
+                return registro
+        return None
 
-            url = normalizar_url(self._obtener_valor_data(data, "url") or self._obtener_valor_data(data, "link"))
-            if not url:
-                continue
-
-            tipo = (self._obtener_valor_data(data, "tipo") or "articulo").strip().lower()
-            if tipo not in {"articulo", "red"}:
-                tipo = "articulo"
+    def _registro_manual_desde_datos(self, data) -> Optional[Dict[str, Any]]:
+        """Registro estándar a partir de un objeto con los campos de una
+        alerta (formulario, JSON o línea NDJSON). None si no trae URL."""
+        url = normalizar_url(self._obtener_valor_data(data, "url") or self._obtener_valor_data(data, "link"))
+        if not url:
+            return None
 
-            fecha_raw = (
-                self._obtener_valor_data(data, "fecha")
-                or self._obtener_valor_data(data, "published")
-                or self._obtener_valor_data(data, "fecha_publicacion")
-            )
+        tipo = (self._obtener_valor_data(data, "tipo") or "articulo").strip().lower()
+        if tipo not in {"articulo", "red"}:
+            tipo = "articulo"
 
-            red_social_valor = limpiar_texto(
-                self._obtener_valor_data(data, "red_social")
-                or self._obtener_valor_data(data, "social_network")
-            )
+        fecha_raw = (
+            self._obtener_valor_data(data, "fecha")
+            or self._obtener_valor_data(data, "published")
+            or self._obtener_valor_data(data, "fecha_publicacion")
+        )
 
-            if not red_social_valor and url:
-                parsed_url = urlparse(url)
-                domain = parsed_url.netloc.lower()
-                for dominio, nombre in DOMINIOS_REDES_SOCIALES.items():
-                    if dominio in domain:
-                        red_social_valor = domain
-                        break
+        red_social_valor = limpiar_texto(
+            self._obtener_valor_data(data, "red_social")
+            or self._obtener_valor_data(data, "social_network")
+        )
 
-            registro: Dict[str, Any] = {
-                "tipo": tipo,
-                "titulo": limpiar_texto(
-                    self._obtener_valor_data(data, "titulo")
-                    or self._obtener_valor_data(data, "title")
-                ),
-                "contenido": limpiar_texto(
-                    self._obtener_valor_data(data, "contenido")
-                    or self._obtener_valor_data(data, "content")
-                ),
-                "fecha": parsear_datetime(fecha_raw) if fecha_raw else None,
-                "autor": limpiar_texto(
-                    self._obtener_valor_data(data, "autor")
-                    or self._obtener_valor_data(data, "extra_source_attributes.name")
-                    or self._obtener_valor_data(data, "extra_author_attributes.short_name")
-                    or self._obtener_valor_data(data, "extra_author_attributes.name")
-                ),
-                "reach": parsear_entero(self._obtener_valor_data(data, "reach")),
-                "engagement": parsear_entero(self._obtener_valor_data(data, "engagement")),
-                "url": url,
-                "red_social": red_social_valor,
-                "proveedor": "manual",
-                "datos_adicionales": {},
-            }
+        if not red_social_valor and url:
+            parsed_url = urlparse(url)
+            domain = parsed_url.netloc.lower()
+            for dominio, nombre in DOMINIOS_REDES_SOCIALES.items():
+                if dominio in domain:
+                    red_social_valor = domain
+                    break
 
-            if registro["tipo"] == "red":
-                registro["contenido"] = ajustar_contenido_red_social(
-                    registro.get("contenido"), registro.get("red_social")
-                )
+        registro: Dict[str, Any] = {
+            "tipo": tipo,
+            "titulo": limpiar_texto(
+                self._obtener_valor_data(data, "titulo")
+                or self._obtener_valor_data(data, "title")
+            ),
+            "contenido": limpiar_texto(
+                self._obtener_valor_data(data, "contenido")
+                or self._obtener_valor_data(data, "content")
+            ),
+            "fecha": parsear_datetime(fecha_raw) if fecha_raw else None,
+            "autor": limpiar_texto(
+                self._obtener_valor_data(data, "autor")
+                or self._obtener_valor_data(data, "extra_source_attributes.name")
+                or self._obtener_valor_data(data, "extra_author_attributes.short_name")
+                or self._obtener_valor_data(data, "extra_author_attributes.name")
+            ),
+            "reach": parsear_entero(self._obtener_valor_data(data, "reach")),
+            "engagement": parsear_entero(self._obtener_valor_data(data, "engagement")),
+            "url": url,
+            "red_social": red_social_valor,
+            "proveedor": "manual",
+            "datos_adicionales": {},
+        }
 
-            adicionales = {}
-            for clave, valor in self._iterar_items_data(data):
-                if clave in {
-                    "url",
-                    "link",
-                    "proyecto",
-                    "proyecto_id",
-                    "tipo",
-                    "titulo",
-                    "title",
-                    "contenido",
-                    "content",
-                    "fecha",
-                    "published",
-                    "fecha_publicacion",
-                    "autor",
-                    "extra_source_attributes.name",
-                    "extra_author_attributes.name",
-                    "extra_author_attributes.short_name",
-                    "reach",
-                    "engagement",
-                    "red_social",
-                    "social_network",
-                }:
-                    continue
-                valor_normalizado = normalizar_valor_adicional(valor)
-                if valor_normalizado is not None:
-                    adicionales[clave] = valor_normalizado
+        if registro["tipo"] == "red":
+            registro["contenido"] = ajustar_contenido_red_social(
+                registro.get("contenido"), registro.get("red_social")
+            )
 
-            if adicionales:
-                registro["datos_adicionales"] = adicionales
+        adicionales = {}
+        for clave, valor in self._iterar_items_data(data):
+            if clave in {
+                "url",
+                "link",
+                "proyecto",
+                "proyecto_id",
+                "tipo",
+                "titulo",
+                "title",
+                "contenido",
+                "content",
+                "fecha",
+                "published",
+                "fecha_publicacion",
+                "autor",
+                "extra_source_attributes.name",
+                "extra_author_attributes.name",
+                "extra_author_attributes.short_name",
+                "reach",
+                "engagement",
+                "red_social",
+                "social_network",
+            }:
+                continue
+            valor_normalizado = normalizar_valor_adicional(valor)
+            if valor_normalizado is not None:
+                adicionales[clave] = valor_normalizado
 
-            return registro
+        if adicionales:
+            registro["datos_adicionales"] = adicionales
 
-        return None
+        return registro
 
     def _ajustar_registro_manual_por_tipo_alerta(
         self,
@@ -516,18 +754,14 @@ class IngestionAPIView(APIView):
             return self._parse_csv(uploaded_file)
         return self._parse_xlsx(uploaded_file)
 
-    def _parse_csv(self, uploaded_file) -> Tuple[List[str], List[Dict[str, Any]]]:
-        uploaded_file.seek(0)
-        data = uploaded_file.read().decode("utf-8-sig")
-        csv_buffer = io.StringIO(data)
-        reader = csv.DictReader(csv_buffer)
-        headers = [self._normalizar_encabezado(h) for h in (reader.fieldnames or [])]
-        rows = []
-        for raw_row in reader:
-            rows.append({self._normalizar_encabezado(k): v for k, v in raw_row.items()})
-        return headers, rows
+    def _parse_csv(self, uploaded_file) -> Tuple[List[str], List[Fila]]:
+        # Mismo lector por bloques que el modo streaming: el texto completo
+        # (descomprimido, si el upload venía comprimido) no se arma en memoria
+        lector = self._iterar_csv(uploaded_file)
+        headers = next(lector)
+        return headers, list(lector)
 
-    def _parse_xlsx(self, uploaded_file) -> Tuple[List[str], List[Dict[str, Any]]]:
+    def _parse_xlsx(self, uploaded_file) -> Tuple[List[str], List[Fila]]:
         uploaded_file.seek(0)
         workbook = load_workbook(uploaded_file, data_only=True)
         sheet = workbook.active
@@ -545,17 +779,20 @@ class IngestionAPIView(APIView):
             return [], []
 
         headers = [self._normalizar_encabezado(cell.value) for cell in headers_row]
-        rows: List[Dict[str, Any]] = []
         header_indices = [
             (index, header)
             for index, header in enumerate(headers)
             if header
         ]
-        columnas_con_datos = {header: False for _, header in header_indices}
+        esquema = EsquemaFilas(header for _, header in header_indices)
+        rows: List[Fila] = []
 
+        # Las celdas sin datos quedan AUSENTE: una columna vacía en todo el
+        # archivo no aparece en ninguna fila
         for row in rows_iter:
-            row_dict: Dict[str, Any] = {}
-            for idx, header in header_indices:
+            valores = []
+            tiene_datos = False
+            for idx, _ in header_indices:
                 cell = row[idx] if idx < len(row) else None
                 value = None
                 if cell is not None:
@@ -564,48 +801,231 @@ class IngestionAPIView(APIView):
                     if hyperlink:
                         value = hyperlink.target or hyperlink.location or value
                 if self._valor_contiene_datos(value):
-                    columnas_con_datos[header] = True
-                    row_dict[header] = value
-            if row_dict:
-                rows.append(row_dict)
-
-        columnas_vacias = {
-            header for header, tiene_datos in columnas_con_datos.items() if not tiene_datos
-        }
-        if columnas_vacias:
-            for row_dict in rows:
-                for columna in columnas_vacias:
-                    row_dict.pop(columna, None)
+                    tiene_datos = True
+                    valores.append(value)
+                else:
+                    valores.append(AUSENTE)
+            if tiene_datos:
+                rows.append(esquema.fila(valores))
         return headers, rows
 
+    def _parse_file_en_flujo(
+        self, uploaded_file, extension: str
+    ) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+        """Lee solo el encabezado y devuelve un generador con las filas
+        restantes; el archivo se recorre a medida que se consumen."""
+        if extension == ".csv":
+            lector = self._iterar_csv(uploaded_file)
+        else:
+            lector = self._iterar_xlsx(uploaded_file)
+        headers = next(lector, None) or []
+        return headers, lector
+
+    def _iterar_lineas_texto(self, uploaded_file) -> Iterator[str]:
+        uploaded_file.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pendiente = ""
+        for bloque in iter(lambda: uploaded_file.read(TAMANO_BLOQUE_LECTURA), b""):
+            pendiente += decoder.decode(bloque)
+            lineas = pendiente.split("\n")
+            pendiente = lineas.pop()
+            for linea in lineas:
+                yield linea + "\n"
+        pendiente += decoder.decode(b"", final=True)
+        if pendiente:
+            yield pendiente
+
+    def _iterar_csv(self, uploaded_file) -> Iterator[Any]:
+        """Primero produce los encabezados normalizados y luego cada fila."""
+        return self._filas_csv(self._iterar_lineas_texto(uploaded_file))
+
+    def _filas_csv(self, lineas: Iterable[str]) -> Iterator[Any]:
+        """Encabezados normalizados y luego una `Fila` por registro, con la
+        semántica de `csv.DictReader`: se saltan las líneas vacías, a las filas
+        cortas les faltan valores (None) y lo que sobra va a la columna ""."""
+        reader = csv.reader(lineas)
+        fieldnames = next(reader, None) or []
+        esquema = EsquemaFilas(self._normalizar_encabezado(campo) for campo in fieldnames)
+        yield list(esquema.encabezados)
+
+        columnas = len(fieldnames)
+        esquema_sobrante = esquema.con_columna("")
+        faltantes = (None,) * columnas
+        for raw_row in reader:
+            total = len(raw_row)
+            if total == columnas:
+                yield Fila(esquema, tuple(raw_row))
+            elif not raw_row:
+                continue
+            elif total < columnas:
+                yield Fila(esquema, tuple(raw_row) + faltantes[total:])
+            else:
+                yield Fila(esquema_sobrante, tuple(raw_row[:columnas]) + (raw_row[columnas:],))
+
+    def _iterar_xlsx(self, uploaded_file) -> Iterator[Any]:
+        """Igual que `_iterar_csv` pero sobre openpyxl en modo read-only."""
+        uploaded_file.seek(0)
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        hipervinculos = None
+        try:
+            sheet = workbook.active
+            # Algunos exportadores declaran dimensiones erróneas; sin resetearlas
+            # read-only recorta las columnas que quedan fuera del rango.
+            sheet.reset_dimensions()
+            hipervinculos = self._hipervinculos_por_fila_xlsx(sheet)
+
+            rows_iter = enumerate(sheet.iter_rows(values_only=True), start=1)
+            headers_row = None
+            for _, potential_header_row in rows_iter:
+                if any(self._valor_contiene_datos(value) for value in potential_header_row):
+                    headers_row = potential_header_row
+                    break
+
+            if headers_row is None:
+                yield []
+                return
+
+            headers = [self._normalizar_encabezado(value) for value in headers_row]
+            header_indices = [
+                (index, header)
+                for index, header in enumerate(headers)
+                if header
+            ]
+            esquema = EsquemaFilas(header for _, header in header_indices)
+            yield headers
+
+            for numero_fila, row in rows_iter:
+                destinos = hipervinculos.destinos(numero_fila) if hipervinculos else None
+                valores = []
+                tiene_datos = False
+                for idx, _ in header_indices:
+                    value = row[idx] if idx < len(row) else None
+                    if destinos:
+                        value = destinos.get(idx + 1, value)
+                    if self._valor_contiene_datos(value):
+                        tiene_datos = True
+                        valores.append(value)
+                    else:
+                        valores.append(AUSENTE)
+                if tiene_datos:
+                    yield esquema.fila(valores)
+        finally:
+            if hipervinculos is not None:
+                hipervinculos.close()
+            workbook.close()
+
+    def _hipervinculos_por_fila_xlsx(self, sheet) -> Optional[_HipervinculosPorFila]:
+        """Cursor de hipervínculos para `_iterar_xlsx`; None si la hoja no
+        tiene.
+
+        La tabla de hipervínculos va al final del XML, después de las filas.
+        Una primera pasada (memoria constante) comprueba que venga ordenada
+        por fila, como la escriben Excel y openpyxl; entonces una segunda
+        lectura de la hoja la consume a la par de las filas. Si no viene
+        ordenada, se carga entera y se ordena.
+        """
+        hay_vinculos = False
+        ordenada = True
+        fila_anterior = 0
+        for _, min_row, _, _, _, _ in self._recorrer_hipervinculos_xlsx(sheet):
+            hay_vinculos = True
+            if min_row < fila_anterior:
+                ordenada = False
+                break
+            fila_anterior = min_row
+        if not hay_vinculos:
+            return None
+        if ordenada:
+            return _HipervinculosPorFila(self._recorrer_hipervinculos_xlsx(sheet))
+        todos = sorted(
+            self._recorrer_hipervinculos_xlsx(sheet), key=lambda vinculo: (vinculo[1], vinculo[0])
+        )
+        return _HipervinculosPorFila(iter(todos))
+
+    def _recorrer_hipervinculos_xlsx(self, sheet) -> Iterator[Hipervinculo]:
+        """Produce los hipervínculos de la hoja en el orden del XML.
+
+        openpyxl en modo read-only no expone `cell.hyperlink`, así que se
+        recorre el XML de la hoja con iterparse (liberando cada fila) y se
+        resuelven los destinos con las relaciones de la hoja.
+        """
+        archivo_zip = sheet.parent._archive  # pylint: disable=protected-access
+        ruta_hoja = sheet._worksheet_path  # pylint: disable=protected-access
+
+        destinos_rel: Dict[str, str] = {}
+        ruta_rels = get_rels_path(ruta_hoja)
+        if ruta_rels in archivo_zip.namelist():
+            destinos_rel = {
+                rel.Id: rel.Target for rel in get_dependents(archivo_zip, ruta_rels)
+            }
+
+        etiqueta_datos = f"{{{SHEET_MAIN_NS}}}sheetData"
+        etiqueta_fila = f"{{{SHEET_MAIN_NS}}}row"
+        etiqueta_hipervinculos = f"{{{SHEET_MAIN_NS}}}hyperlinks"
+        etiqueta_hipervinculo = f"{{{SHEET_MAIN_NS}}}hyperlink"
+        atributo_rel = f"{{{REL_NS}}}id"
+
+        orden = 0
+        padre = None
+        with archivo_zip.open(ruta_hoja) as fuente:
+            for evento, elemento in iterparse(fuente, events=("start", "end")):
+                if evento == "start":
+                    if elemento.tag in (etiqueta_datos, etiqueta_hipervinculos):
+                        padre = elemento
+                    continue
+                if elemento.tag == etiqueta_fila and padre is not None:
+                    padre.clear()
+                elif elemento.tag == etiqueta_hipervinculo:
+                    destino = destinos_rel.get(elemento.get(atributo_rel) or "")
+                    destino = destino or elemento.get("location")
+                    referencia = elemento.get("ref")
+                    if padre is not None:
+                        padre.clear()
+                    if not destino or not referencia:
+                        continue
+                    min_col, min_row, max_col, max_row = range_boundaries(referencia)
+                    orden += 1
+                    yield orden, min_row, max_row, min_col, max_col, destino
+
+    def _columna_url_alternativa(self, headers: List[str]) -> Optional[str]:
+        headers_normalizados = [header for header in headers if header]
+        if "url" in headers_normalizados:
+            return None
+        for columna in COLUMNAS_URL_ALTERNATIVAS:
+            if columna in headers_normalizados:
+                return columna
+        return None
+
+    def _copiar_url_alternativa(self, row: Dict[str, Any], columna: str) -> Dict[str, Any]:
+        if not row.get("url"):
+            valor_alternativo = row.get(columna)
+            if valor_alternativo:
+                row["url"] = valor_alternativo
+        return row
+
     def _normalizar_columnas_url(
         self, headers: List[str], rows: List[Dict[str, Any]]
     ) -> Tuple[List[str], List[Dict[str, Any]]]:
-        headers_normalizados = [header for header in headers if header]
-        if "url" in headers_normalizados:
+        columna = self._columna_url_alternativa(headers)
+        if columna is None:
             return headers, rows
 
-        columnas_alternativas = [
-            "link (streaming - imagen)",
-            "link (streaming – imagen)",
-            "link",
-        ]
+        if "url" not in headers:
+            headers.append("url")
+        for row in rows:
+            self._copiar_url_alternativa(row, columna)
+        return headers, rows
 
-        for columna in columnas_alternativas:
-            if columna not in headers_normalizados:
-                continue
-            if "url" not in headers:
-                headers.append("url")
-            for row in rows:
-                valor_url = row.get("url")
-                if valor_url:
-                    continue
-                valor_alternativo = row.get(columna)
-                if valor_alternativo:
-                    row["url"] = valor_alternativo
+    def _normalizar_columnas_url_en_flujo(
+        self, headers: List[str], rows: Iterator[Dict[str, Any]]
+    ) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+        columna = self._columna_url_alternativa(headers)
+        if columna is None:
             return headers, rows
 
-        return headers, rows
+        if "url" not in headers:
+            headers.append("url")
+        return headers, (self._copiar_url_alternativa(row, columna) for row in rows)
 
     def _normalizar_encabezado(self, header_value) -> str:
         if header_value is None:
@@ -613,11 +1033,7 @@ class IngestionAPIView(APIView):
         return str(header_value).strip().lower()
 
     def _valor_contiene_datos(self, value: Any) -> bool:
-        if value is None:
-            return False
-        if isinstance(value, str):
-            return bool(value.strip())
-        return True
+        return valor_contiene_datos(value)
 
     # ------------------------------------------------------------------
     # Detección y mapeo de filas
@@ -639,7 +1055,7 @@ class IngestionAPIView(APIView):
         return ""
 
     def _validar_columna_url(
-        self, headers: List[str], rows: List[Dict[str, Any]]
+        self, headers: List[str], rows: List[Mapping[str, Any]]
     ) -> Optional[Response]:
         headers_normalizados = {header for header in headers if header}
         if "url" not in headers_normalizados:
@@ -649,7 +1065,7 @@ class IngestionAPIView(APIView):
             )
 
         for row in rows:
-            url_valida = normalizar_url(row.get("url")) if isinstance(row, dict) else None
+            url_valida = normalizar_url(row.get("url")) if isinstance(row, Mapping) else None
             if url_valida:
                 return None
 
@@ -658,6 +1074,29 @@ class IngestionAPIView(APIView):
             status=400,
         )
 
+    def _validar_columna_url_en_flujo(
+        self, headers: List[str], rows: Iterator[Dict[str, Any]]
+    ) -> Tuple[Optional[Response], Iterator[Dict[str, Any]]]:
+        """Como `_validar_columna_url`, pero solo consume (y retiene) las filas
+        hasta encontrar la primera URL válida; el resto sigue en el flujo."""
+        headers_normalizados = {header for header in headers if header}
+        if "url" not in headers_normalizados:
+            return Response(
+                {"detail": "El archivo debe incluir una columna 'url'."},
+                status=400,
+            ), iter(())
+
+        leidas: List[Dict[str, Any]] = []
+        for row in rows:
+            leidas.append(row)
+            if normalizar_url(row.get("url")):
+                return None, itertools.chain(leidas, rows)
+
+        return Response(
+            {"detail": "La columna 'url' debe contener al menos un valor válido."},
+            status=400,
+        ), iter(())
+
     def _validar_tipo_archivo_con_proyecto(
         self, provider: str, tipo_alerta_proyecto: Optional[str]
     ) -> Optional[Response]:
@@ -689,35 +1128,92 @@ class IngestionAPIView(APIView):
     def _obtener_nombre_proveedor(self, provider: str) -> str:
         return PROVEEDORES_NOMBRES.get(provider, provider)
 
-    def _mapear_filas(self, provider: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        if provider == "determ":
-            map_function = self._mapear_determ
-            campos_principales = CAMPOS_PRINCIPALES.get("determ", set())
-            nombre_proveedor = self._obtener_nombre_proveedor("determ")
+    def _mapear_filas(
+        self,
+        provider: str,
+        rows: List[Dict[str, Any]],
+        headers: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        if headers is None:
+            headers = {clave for row in rows for clave in row}
+        mapear = self._compilar_mapeador(provider, headers)
+        registros = [mapear(row) for row in rows]
+        self._registrar_progreso(filas_parseadas=len(registros))
+        return registros
+
+    def _mapear_archivos(
+        self, archivos_parseados: List[Tuple[str, List[str], List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """Mapea las filas de todos los archivos en orden; desde el umbral de
+        filas reparte los bloques (de uno o varios archivos) entre procesos."""
+        umbral = umbral_filas_paralelo()
+        total_filas = sum(len(rows) for _, _, rows in archivos_parseados)
+        if umbral is None or total_filas < umbral:
             registros: List[Dict[str, Any]] = []
-            for row in rows:
-                registro = map_function(row)
-                registro["proveedor"] = nombre_proveedor
-                registro["datos_adicionales"] = self._extraer_datos_adicionales(row, campos_principales)
-                registros.append(registro)
+            for provider, headers, rows in archivos_parseados:
+                registros.extend(self._mapear_filas(provider, rows, headers))
             return registros
 
         registros = []
-        for row in rows:
+        for bloque in mapear_en_procesos(archivos_parseados):
+            registros.extend(bloque)
+            self._registrar_progreso(filas_parseadas=len(bloque))
+        return registros
+
+    def _mapear_filas_en_flujo(
+        self, provider: str, rows: Iterable[Dict[str, Any]], headers: Iterable[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """Mapea a medida que se consumen las filas. Pasado el umbral de filas,
+        el resto del archivo se mapea por bloques en procesos."""
+        mapear = self._compilar_mapeador(provider, headers)
+        umbral = umbral_filas_paralelo()
+        rows = iter(rows)
+        for row in rows if umbral is None else itertools.islice(rows, umbral):
+            registro = mapear(row)
+            self._registrar_progreso(filas_parseadas=1)
+            yield registro
+
+        if umbral is not None:
+            for bloque in mapear_en_procesos([(provider, headers, rows)]):
+                self._registrar_progreso(filas_parseadas=len(bloque))
+                yield from bloque
+
+    def _compilar_mapeador(
+        self, provider: str, headers: Iterable[str]
+    ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """Compila las specs de `mapeo_proveedores` contra los encabezados del
+        archivo. En archivos que no son Determ cada fila se mapea como red o
+        como medio según `_inferir_proveedor`."""
+        headers = frozenset(headers)
+        if provider == "determ":
+            mapear_determ = MAPEO_DETERM.compilar(headers)
+            nombre_determ = self._obtener_nombre_proveedor("determ")
+
+            def _mapear_fila_determ(row: Fila) -> RegistroAlerta:
+                registro = mapear_determ(row)
+                registro.proveedor = nombre_determ
+                # Los datos adicionales se arman desde la fila al serializar
+                registro.fila = row
+                return registro
+
+            return _mapear_fila_determ
+
+        mapeadores = {
+            "redes": MAPEO_REDES_TWK.compilar(headers),
+            "medios": especificacion_medios(provider).compilar(headers),
+        }
+
+        def _mapear_fila(row: Fila) -> RegistroAlerta:
             proveedor_inferido = self._inferir_proveedor(row)
-            campos_principales = CAMPOS_PRINCIPALES.get(proveedor_inferido, set())
             proveedor_respuesta = (
                 provider if provider in PROVEEDORES_NOMBRES else proveedor_inferido
             )
-            nombre_proveedor = self._obtener_nombre_proveedor(proveedor_respuesta)
-            if proveedor_inferido == "redes":
-                registro = self._mapear_redes_twk(row)
-            else:
-                registro = self._mapear_medios_twk(row, proveedor_respuesta)
-            registro["proveedor"] = nombre_proveedor
-            registro["datos_adicionales"] = self._extraer_datos_adicionales(row, campos_principales)
-            registros.append(registro)
-        return registros
+            registro = mapeadores[proveedor_inferido](row)
+            registro.proveedor = self._obtener_nombre_proveedor(proveedor_respuesta)
+            registro.fila = row
+            return registro
+
+        return _mapear_fila
 
     def _inferir_proveedor(self, row: Dict[str, Any]) -> str:
         if row.get("red_social"):
@@ -737,10 +1233,21 @@ class IngestionAPIView(APIView):
     def _filtrar_por_criterios(
         self, registros: List[Dict[str, Any]], proyecto: Proyecto
     ) -> List[Dict[str, Any]]:
-        criterios: Iterable[str] = []
-        if proyecto and hasattr(proyecto, "get_criterios_aceptacion_list"):
-            criterios = proyecto.get_criterios_aceptacion_list()
-        return filtrar_registros_por_palabras(registros, criterios)
+        return filtrar_registros_por_palabras(registros, criterios_aceptacion_proyecto(proyecto))
+
+    def _filtrar_por_criterios_en_flujo(
+        self,
+        registros: Iterable[Dict[str, Any]],
+        proyecto: Proyecto,
+        contador: Dict[str, int],
+    ) -> Iterator[Dict[str, Any]]:
+        criterios = criterios_aceptacion_proyecto(proyecto)
+        for registro in registros:
+            if criterios.cumple(registro):
+                yield registro
+            else:
+                contador["descartados"] += 1
+                self._registrar_progreso(descartados=1)
 
     def _obtener_keywords_proyecto(self, proyecto: Optional[Proyecto]) -> List[str]:
         if not proyecto:
@@ -809,292 +1316,8 @@ class IngestionAPIView(APIView):
     def _mapear_medios_twk(
         self, row: Dict[str, Any], provider: Optional[str] = None
     ) -> Dict[str, Any]:
-        provider_normalized = (provider or "").strip().lower()
-        fecha = None
-        fecha_raw: Optional[Any] = None
-        hora_raw: Optional[Any] = None
-
-        if provider_normalized == "global_news":
-            hora_candidata = row.get("Hora") or row.get("hora")
-            if self._valor_contiene_datos(hora_candidata):
-                hora_raw = hora_candidata
-
-        if provider_normalized == "medios":
-            fecha = parsear_datetime(row.get("published"))
-        elif provider_normalized == "global_news":
-            fecha_raw = self._obtener_primera_coincidencia(row, ["fecha"])
-            if hora_raw is not None:
-                fecha = combinar_fecha_hora(fecha_raw, hora_raw)
-            if fecha is None:
-                fecha = parsear_datetime(fecha_raw)
-
-        if fecha is None:
-            if fecha_raw is None:
-                fecha_raw = self._obtener_primera_coincidencia(
-                    row,
-                    ["fecha", "published", "date"],
-                )
-
-            if hora_raw is None and provider_normalized != "stakeholders":
-                hora_raw = self._obtener_primera_coincidencia(row, ["hora", "time"])
-
-            if hora_raw is not None:
-                fecha = combinar_fecha_hora(fecha_raw, hora_raw)
-
-            if fecha is None:
-                fecha = parsear_datetime(fecha_raw)
-        titulo = limpiar_texto(
-            self._obtener_primera_coincidencia(
-                row,
-                ["title", "título", "titulo", "titular"],
-            )
-        )
-        contenido_valor: Optional[Any]
-        if provider_normalized == "medios":
-            contenido_valor = row.get("content_snippet")
-        elif provider_normalized == "global_news":
-            contenido_valor = self._obtener_primera_coincidencia(
-                row,
-                ["resumen - aclaracion", "resumen - aclaración"],
-            )
-        elif provider_normalized == "stakeholders":
-            contenido_valor = row.get("resumen")
-        else:
-            contenido_valor = None
-
-        if not self._valor_contiene_datos(contenido_valor):
-            contenido_valor = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "content_snippet",
-                    "content",
-                    "resumen",
-                    "resumen - aclaracion",
-                    "resumen - aclaración",
-                    "mention_snippet",
-                ],
-            )
-
-        contenido = limpiar_texto(contenido_valor)
-
-        # Obtener fuente según proveedor
-        fuente_valor: Optional[Any] = None
-        if provider_normalized == "global_news":
-            fuente_valor = self._obtener_primera_coincidencia(row, ["Medio", "medio"])
-        elif provider_normalized == "stakeholders":
-            fuente_valor = self._obtener_primera_coincidencia(row, ["Fuente", "fuente"])
-        elif provider_normalized in {"medios", "determ_medios"}:
-            # Para TWK medios, extraer dominio limpio de la URL
-            url_raw = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "url",
-                    "link",
-                    "link (streaming - imagen)",
-                    "link (streaming – imagen)",
-                ],
-            )
-            if url_raw:
-                url_normalizada = normalizar_url(url_raw)
-                if url_normalizada:
-                    parsed = urlparse(url_normalizada)
-                    dominio = parsed.netloc.lower()
-                    if dominio.startswith("www."):
-                        dominio = dominio[4:]
-                    fuente_valor = dominio
-
-        fuente = limpiar_texto(fuente_valor) if fuente_valor else None
-
-        # Obtener tipo_medio según proveedor
-        tipo_medio: Optional[str] = None
-        if provider_normalized == "global_news":
-            tipo_medio_raw = self._obtener_primera_coincidencia(row, ["Tipo de Medio", "tipo de medio"])
-            if tipo_medio_raw:
-                tipo_medio_str = str(tipo_medio_raw).strip().lower()
-                if "cable" in tipo_medio_str:
-                    tipo_medio = "Televisión"
-                elif "fm" in tipo_medio_str:
-                    tipo_medio = "Radio"
-                elif "diario" in tipo_medio_str or "revista" in tipo_medio_str:
-                    tipo_medio = "Prensa"
-                else:
-                    tipo_medio = limpiar_texto(tipo_medio_raw)
-        elif provider_normalized == "stakeholders":
-            medio_raw = self._obtener_primera_coincidencia(row, ["Medio", "medio"])
-            if medio_raw:
-                medio_str = str(medio_raw).strip().lower()
-                if "internet" in medio_str:
-                    tipo_medio = "Online"
-                else:
-                    tipo_medio = limpiar_texto(medio_raw)
-        elif provider_normalized in {"medios", "determ_medios"}:
-            tipo_medio = "Online"
-
-        if provider_normalized == "medios":
-            autor_valor = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "extra_source_attributes.name",
-                    "extra_author_attributes.short_name",
-                    "extra_author_attributes.name",
-                    "autor - conductor",
-                    "autor",
-                    "author",
-                ],
-            )
-        elif provider_normalized == "global_news":
-            autor_valor = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "Medio",
-                    "medio",
-                    "autor - conductor",
-                    "autor",
-                    "author",
-                ],
-            )
-        elif provider_normalized == "stakeholders":
-            autor_valor = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "Fuente",
-                    "fuente",
-                    "autor",
-                    "autor - conductor",
-                    "author",
-                ],
-            )
-        elif provider_normalized == "determ_medios":
-            autor_valor = row.get("from")
-            if not self._valor_contiene_datos(autor_valor):
-                autor_valor = row.get("FROM")
-        else:
-            autor_valor = self._obtener_primera_coincidencia(
-                row,
-                [
-                    "extra_source_attributes.name",
-                    "extra_author_attributes.short_name",
-                    "extra_author_attributes.name",
-                    "autor - conductor",
-                    "autor",
-                    "author",
-                ],
-            )
-
-        autor = limpiar_texto(autor_valor)
-
-        # Limpieza adicional del autor para medios TWK y Determ medios
-        if provider_normalized in {"medios", "determ_medios"} and autor:
-            # Quitar www. del inicio
-            if autor.lower().startswith("www."):
-                autor = autor[4:]
-            # Quitar / del final
-            autor = autor.rstrip("/")
-        reach_claves = ["reach"]
-        if provider_normalized in {"global_news", "stakeholders"}:
-            reach_claves.insert(0, "audiencia")
-
-        reach = parsear_entero(
-            self._obtener_primera_coincidencia(row, reach_claves)
-        )
-        url = normalizar_url(
-            self._obtener_primera_coincidencia(
-                row,
-                [
-                    "url",
-                    "link",
-                    "link (streaming - imagen)",
-                    "link (streaming – imagen)",
-                ],
-            )
-        )
-        engagement = parsear_entero(
-            self._obtener_primera_coincidencia(row, ["engagement", "engagement_rate"])
-        )
-
-        # Obtener ubicación de extra_source_attributes.world_data.country
-        ubicacion = limpiar_texto(
-            row.get("extra_source_attributes.world_data.country")
-        )
-
-        return {
-            "tipo": "articulo",
-            "titulo": titulo,
-            "contenido": contenido,
-            "fecha": fecha,
-            "autor": autor,
-            "fuente": fuente,
-            "tipo_medio": tipo_medio,
-            "reach": reach,
-            "engagement": engagement,
-            "url": url,
-            "ubicacion": ubicacion,
-        }
-
-    def _mapear_redes_twk(self, row: Dict[str, Any]) -> Dict[str, Any]:
-        fecha = parsear_datetime(row.get("published"))
-        red_social = limpiar_texto(row.get("domain_url"))
-        contenido = ajustar_contenido_red_social(
-            limpiar_texto(row.get("content")),
-            red_social,
-        )
-
-        # Obtener ubicación de extra_source_attributes.world_data.country
-        ubicacion = limpiar_texto(
-            row.get("extra_source_attributes.world_data.country")
-        )
-
-        return {
-            "tipo": "red",
-            "contenido": contenido,
-            "titulo": limpiar_texto(row.get("title")),
-            "fecha": fecha,
-            "autor": limpiar_texto(
-                row.get("extra_author_attributes.short_name")
-                or row.get("extra_author_attributes.name")
-            ),
-            "reach": parsear_entero(row.get("reach")),
-            "engagement": parsear_entero(row.get("engagement")),
-            "url": normalizar_url(row.get("url") or row.get("link")),
-            "red_social": red_social,
-            "ubicacion": ubicacion,
-        }
-
-    def _mapear_determ(self, row: Dict[str, Any]) -> Dict[str, Any]:
-        fecha = combinar_fecha_hora(row.get("date"), row.get("time"))
-        red_social = limpiar_texto(row.get("social_network"))
-        contenido = ajustar_contenido_red_social(
-            limpiar_texto(row.get("mention_snippet")),
-            red_social,
-        )
-        return {
-            "tipo": "red",
-            "contenido": contenido,
-            "titulo": limpiar_texto(row.get("title")),
-            "fecha": fecha,
-            "autor": limpiar_texto(
-                row.get("author")
-                or row.get("AUTHOR")
-                or row.get("FROM")
-                or row.get("from")
-            ),
-            "reach": parsear_entero(row.get("reach")),
-            "engagement": parsear_entero(row.get("engagement_rate")),
-            "url": normalizar_url(row.get("url")),
-            "red_social": red_social,
-        }
-
-    def _obtener_primera_coincidencia(
-        self, row: Dict[str, Any], claves: Iterable[str]
-    ) -> Optional[Any]:
-        for clave in claves:
-            if clave not in row:
-                continue
-            valor = row.get(clave)
-            if valor in (None, ""):
-                continue
-            return valor
-        return None
+        """Mapea una fila suelta de medios (compila la spec contra sus claves)."""
+        return especificacion_medios(provider).compilar(row.keys())(row)
 
     # ------------------------------------------------------------------
     # Persistencia y serialización
@@ -1128,7 +1351,11 @@ class IngestionAPIView(APIView):
 
         return None
 
-    def _persistir_registros(self, registros: List[Dict[str, Any]], proyecto: Proyecto) -> Dict[str, List[Dict[str, Any]]]:
+    def _persistir_registros(
+        self, registros: Iterable[Dict[str, Any]], proyecto: Proyecto
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Deduplica por `clave_url` y crea los registros en lotes de
+        `INGESTION_LOTE_PERSISTENCIA`; acepta listas o iteradores en flujo."""
         errores: List[Dict[str, Any]] = []
         listado: List[Dict[str, Any]] = []
         duplicados = 0
@@ -1137,36 +1364,77 @@ class IngestionAPIView(APIView):
         tipo_alerta_proyecto = self._obtener_tipo_alerta_proyecto(proyecto)
         tipo_normalizado = (tipo_alerta_proyecto or "medios").strip().lower()
         es_articulo = tipo_normalizado == "medios"
+        tamano_lote = getattr(settings, "INGESTION_LOTE_PERSISTENCIA", TAMANO_LOTE_PERSISTENCIA)
 
-        # Crear caché de URLs existentes (una sola query)
-        if es_articulo:
-            urls_existentes = self._construir_cache_urls(Articulo, proyecto)
-        else:
-            urls_existentes = self._construir_cache_urls(Redes, proyecto)
+        modelo = Articulo if es_articulo else Redes
+        # Con URL_RESOLVER_CORTAS los links cortos se deduplican por su destino
+        resolver = resolutor_configurado()
 
-        # Separar registros válidos de duplicados
-        registros_a_crear = []
-        for indice, registro in enumerate(registros, start=1):
-            url = registro.get("url") or ""
-            clave_url = self._construir_clave_url(url)
-
-            if clave_url and clave_url in urls_existentes:
-                duplicados += 1
-                errores.append({"fila": indice, "error": "La URL ya existe para este proyecto"})
-                continue
+        def _crear_lote(lote: List[Tuple[int, Dict[str, Any]]]) -> Tuple[int, int]:
+            """Deduplica el lote con una consulta `clave_url IN (...)` y lo crea.
+            Devuelve (duplicados, descartados) del lote."""
+            claves = {
+                indice: huella_clave_url(registro.get("url"), resolver) for indice, registro in lote
+            }
+            existentes = set(
+                modelo.objects.filter(
+                    proyecto=proyecto,
+                    clave_url__in=[clave for clave in claves.values() if clave],
+                ).values_list("clave_url", flat=True)
+            )
 
-            registros_a_crear.append((indice, registro))
+            duplicados_lote = 0
+            persistidas: Set[int] = set()
+            registros_a_crear: List[Tuple[int, Dict[str, Any]]] = []
+            for indice, registro in lote:
+                clave_url = claves[indice]
+                if clave_url and clave_url in existentes:
+                    duplicados_lote += 1
+                    persistidas.add(indice)
+                    errores.append({"fila": indice, "error": "La URL ya existe para este proyecto"})
+                    continue
+                if clave_url:
+                    # Repetida dentro del mismo archivo: cuenta como duplicado
+                    existentes.add(clave_url)
+                registros_a_crear.append((indice, registro))
 
-        # Bulk create con transaction
-        with transaction.atomic():
             if es_articulo:
-                resultado = self._bulk_crear_articulos(registros_a_crear, proyecto, sistema_user, tipo_alerta_proyecto)
+                resultado = self._bulk_crear_articulos(
+                    registros_a_crear, proyecto, sistema_user, tipo_alerta_proyecto, claves
+                )
             else:
-                resultado = self._bulk_crear_redes(registros_a_crear, proyecto, tipo_alerta_proyecto)
-
-            listado = resultado["listado"]
+                resultado = self._bulk_crear_redes(
+                    registros_a_crear, proyecto, tipo_alerta_proyecto, claves
+                )
+            duplicados_lote += resultado.get("duplicados", 0)
+            persistidas.update(resultado.get("persistidas", ()))
+            self._confirmar_huellas(
+                registro for indice, registro in lote if indice in persistidas
+            )
+            listado.extend(resultado["listado"])
             errores.extend(resultado["errores"])
-            descartados = resultado["descartados"]
+            self._registrar_progreso(
+                creados=len(resultado["listado"]),
+                duplicados=duplicados_lote,
+                descartados=resultado["descartados"],
+            )
+            return duplicados_lote, resultado["descartados"]
+
+        # Bulk create con transaction
+        with transaction.atomic():
+            lote: List[Tuple[int, Dict[str, Any]]] = []
+            for indice, registro in enumerate(registros, start=1):
+                lote.append((indice, registro))
+                if len(lote) >= tamano_lote:
+                    duplicados_lote, descartados_lote = _crear_lote(lote)
+                    duplicados += duplicados_lote
+                    descartados += descartados_lote
+                    lote = []
+
+            if lote:
+                duplicados_lote, descartados_lote = _crear_lote(lote)
+                duplicados += duplicados_lote
+                descartados += descartados_lote
 
         return {
             "listado": listado,
@@ -1254,14 +1522,18 @@ class IngestionAPIView(APIView):
         proyecto: Proyecto,
         sistema_user,
         tipo_alerta_proyecto: str,
+        claves: Optional[Dict[int, Optional[str]]] = None,
     ) -> Dict[str, Any]:
         """Crea múltiples artículos usando bulk_create para mejor rendimiento."""
         listado = []
         errores = []
         descartados = 0
+        duplicados = 0
+        # Índices creados o descartados por URL ya existente
+        persistidas: List[int] = []
 
         articulos_a_crear = []
-        registros_mapa = {}  # Mapeo de URL a registro para crear DetalleEnvio después
+        registros_mapa = {}  # Mapeo de id a registro para crear DetalleEnvio después
 
         for indice, registro in registros_con_indice:
             try:
@@ -1283,46 +1555,50 @@ class IngestionAPIView(APIView):
                     kwargs["created_by"] = sistema_user
                     kwargs["modified_by"] = sistema_user
 
+                kwargs["clave_url"] = (
+                    claves[indice] if claves is not None else huella_clave_url(kwargs["url"])
+                )
+
                 articulo = Articulo(**kwargs)
                 articulos_a_crear.append(articulo)
-                registros_mapa[kwargs["url"]] = (registro, tipo_alerta_proyecto)
+                registros_mapa[articulo.id] = (indice, registro, tipo_alerta_proyecto)
 
             except Exception as exc:
                 logger.exception("Error preparando artículo en fila %s", indice)
                 descartados += 1
                 errores.append({"fila": indice, "error": str(exc)})
 
-        # Bulk create de artículos
+        # Artículos y sus DetalleEnvio (COPY en PostgreSQL, bulk_create si no)
         if articulos_a_crear:
-            articulos_creados = Articulo.objects.bulk_create(articulos_a_crear, ignore_conflicts=True)
-
-            # Crear DetalleEnvio para cada artículo
-            detalles_a_crear = []
-            for articulo in articulos_creados:
-                if articulo.url in registros_mapa:
-                    registro, tipo_alerta = registros_mapa[articulo.url]
-
-                    detalle = DetalleEnvio(
-                        proyecto=proyecto,
-                        medio=articulo,
-                        estado_enviado=False,
-                        estado_revisado=True,
-                        created_by=sistema_user,
-                        modified_by=sistema_user,
-                    )
-                    detalles_a_crear.append(detalle)
+            insertados = cargar_alertas(
+                articulos_a_crear,
+                {
+                    "proyecto": proyecto,
+                    "estado_enviado": False,
+                    "estado_revisado": True,
+                    "created_by": sistema_user,
+                    "modified_by": sistema_user,
+                },
+            )
 
-                    # Serializar para respuesta
-                    listado.append(self._serializar_articulo(articulo, registro, tipo_alerta))
+            for articulo in articulos_a_crear:
+                indice, registro, tipo_alerta = registros_mapa[articulo.id]
+                persistidas.append(indice)
+                if articulo.id not in insertados:
+                    # Otra ingesta concurrente ganó la restricción única
+                    duplicados += 1
+                    errores.append({"fila": indice, "error": "La URL ya existe para este proyecto"})
+                    continue
 
-            # Bulk create de DetalleEnvio
-            if detalles_a_crear:
-                DetalleEnvio.objects.bulk_create(detalles_a_crear, ignore_conflicts=True)
+                # Serializar para respuesta
+                listado.append(self._serializar_articulo(articulo, registro, tipo_alerta))
 
         return {
             "listado": listado,
             "errores": errores,
             "descartados": descartados,
+            "duplicados": duplicados,
+            "persistidas": persistidas,
         }
 
     def _crear_red_social(self, registro: Dict[str, Any], proyecto: Proyecto) -> Redes:
@@ -1403,15 +1679,19 @@ class IngestionAPIView(APIView):
         registros_con_indice: List[Tuple[int, Dict[str, Any]]],
         proyecto: Proyecto,
         tipo_alerta_proyecto: str,
+        claves: Optional[Dict[int, Optional[str]]] = None,
     ) -> Dict[str, Any]:
         """Crea múltiples redes sociales usando bulk_create para mejor rendimiento."""
         listado = []
         errores = []
         descartados = 0
+        duplicados = 0
+        # Índices creados o descartados por URL ya existente
+        persistidas: List[int] = []
         usuario_creador = getattr(self, "_usuario_sistema_cache", None)
 
         redes_a_crear = []
-        registros_mapa = {}  # Mapeo de URL a registro
+        registros_mapa = {}  # Mapeo de id a registro
 
         for indice, registro in registros_con_indice:
             try:
@@ -1471,46 +1751,50 @@ class IngestionAPIView(APIView):
                     kwargs["created_by"] = usuario_creador
                     kwargs["modified_by"] = usuario_creador
 
+                kwargs["clave_url"] = (
+                    claves[indice] if claves is not None else huella_clave_url(kwargs["url"])
+                )
+
                 red = Redes(**kwargs)
                 redes_a_crear.append(red)
-                registros_mapa[kwargs["url"]] = (registro, tipo_alerta_proyecto)
+                registros_mapa[red.id] = (indice, registro, tipo_alerta_proyecto)
 
             except Exception as exc:
                 logger.exception("Error preparando red social en fila %s", indice)
                 descartados += 1
                 errores.append({"fila": indice, "error": str(exc)})
 
-        # Bulk create de redes
+        # Redes y sus DetalleEnvio (COPY en PostgreSQL, bulk_create si no)
         if redes_a_crear:
-            redes_creadas = Redes.objects.bulk_create(redes_a_crear, ignore_conflicts=True)
-
-            # Crear DetalleEnvio para cada red
-            detalles_a_crear = []
-            for red in redes_creadas:
-                if red.url in registros_mapa:
-                    registro, tipo_alerta = registros_mapa[red.url]
-
-                    detalle = DetalleEnvio(
-                        proyecto=proyecto,
-                        red_social=red,
-                        estado_enviado=False,
-                        estado_revisado=True,
-                        created_by=usuario_creador,
-                        modified_by=usuario_creador,
-                    )
-                    detalles_a_crear.append(detalle)
+            insertados = cargar_alertas(
+                redes_a_crear,
+                {
+                    "proyecto": proyecto,
+                    "estado_enviado": False,
+                    "estado_revisado": True,
+                    "created_by": usuario_creador,
+                    "modified_by": usuario_creador,
+                },
+            )
 
-                    # Serializar para respuesta
-                    listado.append(self._serializar_red(red, registro, tipo_alerta))
+            for red in redes_a_crear:
+                indice, registro, tipo_alerta = registros_mapa[red.id]
+                persistidas.append(indice)
+                if red.id not in insertados:
+                    # Otra ingesta concurrente ganó la restricción única
+                    duplicados += 1
+                    errores.append({"fila": indice, "error": "La URL ya existe para este proyecto"})
+                    continue
 
-            # Bulk create de DetalleEnvio
-            if detalles_a_crear:
-                DetalleEnvio.objects.bulk_create(detalles_a_crear, ignore_conflicts=True)
+                # Serializar para respuesta
+                listado.append(self._serializar_red(red, registro, tipo_alerta))
 
         return {
             "listado": listado,
             "errores": errores,
             "descartados": descartados,
+            "duplicados": duplicados,
+            "persistidas": persistidas,
         }
 
     def _despachar_pipeline_ia(self, proyecto: Proyecto, listado: List[Dict[str, Any]]) -> bool:
@@ -1539,18 +1823,35 @@ class IngestionAPIView(APIView):
             estado_pipeline=DetalleEnvio.PIPELINE_PENDIENTE_IA
         )
 
+        from apps.ia.services.casi_duplicados import indexar_detalles
         from apps.ia.tasks import clasificar_alerta
 
-        def _encolar():
-            for detalle_id in detalles:
-                clasificar_alerta.delay(str(detalle_id))
+        def _indexar_y_encolar():
+            # Tras el commit, en bloque: no alarga la transacción de la ingesta
+            try:
+                vinculados = indexar_detalles(proyecto, detalles)
+            except Exception:  # pylint: disable=broad-except
+                # Sin índice cada alerta se clasifica (y se indexa) en su tarea
+                logger.exception("Pipeline IA: no se pudo indexar el lote del proyecto %s", proyecto.id)
+                vinculados = {}
+            # Los casi duplicados de otra alerta del mismo lote no se encolan: la
+            # canónica los reencola al terminar y reutilizan su salida del LLM
+            en_lote = {str(detalle_id) for detalle_id in detalles}
+            a_encolar = [
+                str(detalle_id)
+                for detalle_id in detalles
+                if vinculados.get(str(detalle_id)) not in en_lote
+            ]
+            for detalle_id in a_encolar:
+                clasificar_alerta.delay(detalle_id)
+            logger.info(
+                "Pipeline IA: %s alertas encoladas (%s casi duplicados) para el proyecto %s",
+                len(a_encolar),
+                len(vinculados),
+                proyecto.id,
+            )
 
-        transaction.on_commit(_encolar)
-        logger.info(
-            "Pipeline IA: %s alertas encoladas para el proyecto %s",
-            len(detalles),
-            proyecto.id,
-        )
+        transaction.on_commit(_indexar_y_encolar)
         return True
 
     def _procesar_envio_automatico(
@@ -1594,12 +1895,11 @@ class IngestionAPIView(APIView):
             kwargs["usuario_id"] = usuario_id
 
         try:
-            from apps.whatsapp.tasks import enviar_lote_legacy
+            from apps.whatsapp.services.buzon_lotes import encolar_lote
 
+            # Al buzón: sale junto con los lotes de otros proyectos de la ventana
             transaction.on_commit(
-                lambda: enviar_lote_legacy.delay(
-                    str(proyecto.id), tipo_alerta, alertas, kwargs.get("usuario_id")
-                )
+                lambda: encolar_lote(str(proyecto.id), tipo_alerta, alertas, kwargs.get("usuario_id"))
             )
         except Exception:  # pylint: disable=broad-except
             logger.exception(
@@ -1683,72 +1983,34 @@ class IngestionAPIView(APIView):
         except UserModel.DoesNotExist as exc:  # type: ignore[attr-defined]
             raise ValueError("El usuario del sistema (id=2) no existe") from exc
 
-    def _extraer_datos_adicionales(self, row: Dict[str, Any], campos_principales: Iterable[str]) -> Dict[str, Any]:
-        adicionales: Dict[str, Any] = {}
-        for key, value in row.items():
-            valor_limpio = normalizar_valor_adicional(value)
-            if valor_limpio is not None:
-                adicionales[key] = valor_limpio
-        return adicionales
-
     def _notificar_ruta_externa(self, payload: Dict[str, Any]) -> None:
+        """Deja el aviso en el outbox; el drenador lo entrega y reintenta."""
         url = getattr(settings, "RUTA_X_URL", None) or "http://localhost:8000/ruta_x"
-        try:
-            requests.post(url, json=payload, timeout=5)
-        except requests.RequestException as exc:  # pylint: disable=broad-except
-            logger.warning("No fue posible notificar la ruta externa %s: %s", url, exc)
+        outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, url, payload)
 
     # ------------------------------------------------------------------
     # Validación de URLs por proyecto
     # ------------------------------------------------------------------
-    def _construir_cache_urls(self, model, proyecto: Proyecto) -> set:
-        """Construye un set con las claves normalizadas de URLs existentes."""
-        urls_existentes = model.objects.filter(proyecto=proyecto).values_list("url", flat=True)
-        cache = set()
-        for url in urls_existentes:
-            clave = self._construir_clave_url(url)
-            if clave:
-                cache.add(clave)
-        return cache
-
     def _es_url_duplicada_por_proyecto(self, model, proyecto: Proyecto, url: Optional[str]) -> bool:
-        if not url:
-            return False
-
-        clave_objetivo = self._construir_clave_url(url)
+        clave_objetivo = huella_clave_url(url, resolutor_configurado())
         if not clave_objetivo:
             return False
+        return model.objects.filter(proyecto=proyecto, clave_url=clave_objetivo).exists()
 
-        existentes = model.objects.filter(proyecto=proyecto).values_list("url", flat=True)
-        for url_existente in existentes:
-            if self._construir_clave_url(url_existente) == clave_objetivo:
-                return True
-        return False
-
-    def _construir_clave_url(self, url: Optional[str]) -> Optional[str]:
-        if not url:
-            return None
-
-        normalizada = normalizar_url(url)
-        if not normalizada:
-            return None
-
-        parsed = urlparse(normalizada)
-        netloc = parsed.netloc.lower()
-        if netloc.startswith("www."):
-            netloc = netloc[4:]
-
-        # Normalize x.com and twitter.com to the same domain for deduplication
-        if netloc == "x.com":
-            netloc = "twitter.com"
-
-        path = (parsed.path or "").rstrip("/")
-        params = parsed.params or ""
-        query = parsed.query or ""
-        fragment = parsed.fragment or ""
-        return "|".join([netloc, path, params, query, fragment]) or None
-
-    def forward_payload(self, endpoint_name: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+    def forward_payload(
+        self,
+        endpoint_name: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        diferido: bool = False,
+    ):
+        """Reenvía el payload al endpoint indicado.
+
+        Si el endpoint vive en este mismo servidor la vista se ejecuta en
+        proceso, sin ida y vuelta HTTP. Solo se hace un POST cuando
+        `INGESTION_FORWARD_BASE_URL` apunta a otro host; con `diferido=True`
+        ese POST queda en el outbox (se entrega tras el commit, con
+        reintentos) y se responde 202."""
         headers = headers.copy() if headers else {}
 
         if "Authorization" not in headers and getattr(self.request, "META", None):
@@ -1766,6 +2028,11 @@ class IngestionAPIView(APIView):
             )
 
         forward_base_url = getattr(settings, "INGESTION_FORWARD_BASE_URL", None)
+        if getattr(settings, "INGESTION_FORWARD_EN_PROCESO", True) and not self._forward_es_externo(
+            forward_base_url
+        ):
+            return self._despachar_en_proceso(relative_url, payload, headers)
+
         if forward_base_url:
             base_url = forward_base_url.rstrip("/")
             target_url = f"{base_url}{relative_url}"
@@ -1775,10 +2042,16 @@ class IngestionAPIView(APIView):
             default_base = getattr(settings, "DEFAULT_DOMAIN", "http://localhost:8000")
             target_url = f"{default_base.rstrip('/')}{relative_url}"
 
+        if diferido:
+            mensaje = outbox.encolar(
+                MensajeSaliente.DESTINO_FORWARD, target_url, payload, headers=headers
+            )
+            return Response({"status": "encolado", "outbox_id": str(mensaje.id)}, status=202)
+
         timeout = getattr(settings, "INGESTION_FORWARD_TIMEOUT", 10)
 
         try:
-            response = requests.post(
+            response = clientes_http.post(
                 target_url,
                 json=payload,
                 headers=headers or None,
@@ -1801,3 +2074,71 @@ class IngestionAPIView(APIView):
             content = {"detail": response.text or "Respuesta vacía"}
 
         return Response(content, status=response.status_code)
+
+    def _hosts_locales(self) -> set:
+        hosts = {"localhost", "127.0.0.1"}
+        request = getattr(self, "request", None)
+        if request is not None and getattr(request, "META", None):
+            try:
+                hosts.add(request.get_host().split(":")[0].lower())
+            except Exception:  # pylint: disable=broad-except
+                # DisallowedHost: el host de la petición no cuenta como local
+                pass
+        default_domain = getattr(settings, "DEFAULT_DOMAIN", None)
+        if default_domain:
+            hosts.add((urlparse(default_domain).hostname or "").lower())
+        return hosts
+
+    def _forward_es_externo(self, forward_base_url: Optional[str]) -> bool:
+        if not forward_base_url:
+            return False
+        host = (urlparse(forward_base_url).hostname or "").lower()
+        return host not in self._hosts_locales()
+
+    def _despachar_en_proceso(
+        self, relative_url: str, payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> Response:
+        """Ejecuta la vista destino en este proceso con una petición interna
+        equivalente al POST HTTP: mismo cuerpo JSON y mismas cabeceras (el
+        Authorization incluido), así la vista autentica igual que por red."""
+        try:
+            match = resolve(relative_url)
+        except Resolver404:
+            logger.error("La ruta '%s' no resuelve a ninguna vista", relative_url)
+            return Response({"detail": f"Ruta '{relative_url}' no encontrada."}, status=500)
+
+        cuerpo = json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8")
+        request = getattr(self, "request", None)
+        environ = {
+            key: value
+            for key, value in (getattr(request, "META", None) or {}).items()
+            if isinstance(value, str)
+            and (key.startswith("HTTP_") or key.startswith("SERVER_") or key == "REMOTE_ADDR")
+        }
+        environ.setdefault("SERVER_NAME", "localhost")
+        environ.setdefault("SERVER_PORT", "80")
+        for nombre, valor in headers.items():
+            clave = nombre.upper().replace("-", "_")
+            if clave not in {"CONTENT_TYPE", "CONTENT_LENGTH"}:
+                environ[f"HTTP_{clave}"] = valor
+        environ.update(
+            {
+                "REQUEST_METHOD": "POST",
+                "PATH_INFO": relative_url,
+                "SCRIPT_NAME": "",
+                "QUERY_STRING": "",
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(cuerpo)),
+                "wsgi.input": io.BytesIO(cuerpo),
+                "wsgi.url_scheme": request.scheme if request is not None else "http",
+            }
+        )
+
+        response = match.func(WSGIRequest(environ), *match.args, **match.kwargs)
+        content = getattr(response, "data", None)
+        if content is None:
+            try:
+                content = json.loads(response.content or b"{}")
+            except ValueError:
+                content = {"detail": response.content.decode("utf-8", "replace") or "Respuesta vacía"}
+        return Response(content, status=response.status_code)
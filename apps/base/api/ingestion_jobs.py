@@ -0,0 +1,207 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.base.models import IngestaJob
+
+from .archivos_comprimidos import ArchivoNoSoportado, extension_soportada
+from .huellas_ingesta import HuellasIngesta, respuesta_ingesta_previa
+from .respuestas_ingesta import (
+    RESPUESTA_RESUMEN,
+    modo_respuesta,
+    respuesta_modo_invalido,
+    resumir_respuesta,
+)
+
+
+CAMPOS_PROGRESO = ("filas_parseadas", "creados", "duplicados", "descartados")
+PROGRESO_TTL = 24 * 60 * 60
+PROGRESO_INTERVALO_SEGUNDOS = 1.0
+
+
+def clave_progreso(job_id) -> str:
+    return f"ingesta_job:{job_id}:progreso"
+
+
+class ProgresoIngesta:
+    """Acumula los contadores de un job y los publica en caché como mucho
+    una vez por intervalo. La persistencia corre dentro de una transacción,
+    así que la fila del job no refleja el avance hasta el commit."""
+
+    def __init__(self, job_id, intervalo: float = PROGRESO_INTERVALO_SEGUNDOS):
+        self.job_id = job_id
+        self.intervalo = intervalo
+        self.conteos: Dict[str, int] = {campo: 0 for campo in CAMPOS_PROGRESO}
+        self._ultima_publicacion: Optional[float] = None
+
+    def sumar(self, **conteos: int) -> None:
+        for campo, valor in conteos.items():
+            if valor:
+                self.conteos[campo] += valor
+        if (
+            self._ultima_publicacion is None
+            or time.monotonic() - self._ultima_publicacion >= self.intervalo
+        ):
+            self.publicar()
+
+    def publicar(self) -> None:
+        cache.set(clave_progreso(self.job_id), dict(self.conteos), PROGRESO_TTL)
+        self._ultima_publicacion = time.monotonic()
+
+
+def encolar_ingesta(view, request, proyecto) -> Response:
+    """Guarda los archivos subidos, crea el IngestaJob y encola su
+    procesamiento. Responde 202 con el id del job sin parsear nada."""
+    archivos = view._obtener_archivos(request)  # pylint: disable=protected-access
+    if not archivos:
+        return Response(
+            {"detail": "El modo asíncrono requiere un archivo CSV o XLSX."},
+            status=400,
+        )
+    for archivo in archivos:
+        if not extension_soportada(archivo.name):
+            return Response({"detail": "Formato de archivo no soportado."}, status=400)
+
+    reingestar = view._solicita_reingesta(request)  # pylint: disable=protected-access
+    if not reingestar:
+        huellas = HuellasIngesta.para_archivos(proyecto, archivos)
+        previa = huellas.ingesta_previa() if huellas is not None else None
+        if previa is not None:
+            return Response(respuesta_ingesta_previa(previa), status=200)
+
+    usuario = view._obtener_usuario_desde_request(request)  # pylint: disable=protected-access
+
+    with transaction.atomic():
+        job = IngestaJob.objects.create(
+            proyecto=proyecto,
+            created_by=usuario,
+            modified_by=usuario,
+        )
+        job.archivos = [
+            {
+                "nombre": archivo.name,
+                "ruta": default_storage.save(f"ingestas/{job.id}/{archivo.name}", archivo),
+            }
+            for archivo in archivos
+        ]
+        job.save(update_fields=["archivos"])
+
+        from apps.base.tasks import procesar_ingesta
+
+        transaction.on_commit(lambda: procesar_ingesta.delay(str(job.id), reingestar))
+
+    return Response(
+        {
+            "job_id": str(job.id),
+            "estado": job.estado,
+            "detail": "Ingesta encolada.",
+        },
+        status=202,
+    )
+
+
+def ejecutar_job(job: IngestaJob, reingestar: bool = False) -> Dict[str, Any]:
+    """Corre el pipeline de IngestionAPIView sobre los archivos guardados del
+    job, siempre en modo streaming, y consolida el resultado en la fila. Salvo
+    con `reingestar`, omite las filas ya ingestadas en el proyecto."""
+    from apps.base.api.ingestion import IngestionAPIView
+
+    view = IngestionAPIView()
+    view._usuario_sistema_cache = job.created_by  # pylint: disable=protected-access
+    progreso = ProgresoIngesta(job.id)
+    view._progreso_ingesta = progreso  # pylint: disable=protected-access
+
+    archivos: List[Any] = []
+    try:
+        for archivo in job.archivos:
+            abierto = default_storage.open(archivo["ruta"], "rb")
+            abierto.name = archivo["nombre"]
+            archivos.append(abierto)
+
+        if not reingestar:
+            view._huellas_ingesta = HuellasIngesta.para_archivos(job.proyecto, archivos)  # pylint: disable=protected-access
+
+        tipo_alerta = view._obtener_tipo_alerta_proyecto(job.proyecto)  # pylint: disable=protected-access
+        registros, proveedor, error_response = view._extraer_registros_de_archivos(  # pylint: disable=protected-access
+            archivos, tipo_alerta, streaming=True
+        )
+        if error_response is None:
+            try:
+                respuesta, status = view._ejecutar_ingesta(  # pylint: disable=protected-access
+                    registros, proveedor, job.proyecto
+                )
+            except ArchivoNoSoportado as exc:
+                # Tope de descompresión alcanzado al leer: como la 400 síncrona
+                error_response = Response({"detail": exc.detalle}, status=400)
+            else:
+                view._registrar_huellas(respuesta, status)  # pylint: disable=protected-access
+                job.estado = IngestaJob.ESTADO_COMPLETADA
+        if error_response is not None:
+            # Archivo inválido: mismo cuerpo que la respuesta 400 síncrona
+            respuesta, status = error_response.data, error_response.status_code
+            job.estado = IngestaJob.ESTADO_ERROR
+            job.error = respuesta.get("detail")
+    finally:
+        for abierto in archivos:
+            abierto.close()
+        for archivo in job.archivos:
+            default_storage.delete(archivo["ruta"])
+
+    progreso.publicar()
+    job.resultado = respuesta
+    job.codigo_http = status
+    job.fin = timezone.now()
+    for campo in CAMPOS_PROGRESO:
+        setattr(job, campo, progreso.conteos[campo])
+    job.save()
+    return respuesta
+
+
+def serializar_job(job: IngestaJob, resumen: bool = False) -> Dict[str, Any]:
+    conteos = {campo: getattr(job, campo) for campo in CAMPOS_PROGRESO}
+    if job.estado == IngestaJob.ESTADO_PROCESANDO:
+        conteos.update(cache.get(clave_progreso(job.id)) or {})
+
+    return {
+        "job_id": str(job.id),
+        "proyecto": str(job.proyecto_id),
+        "estado": job.estado,
+        "archivos": [archivo.get("nombre") for archivo in job.archivos or []],
+        **conteos,
+        "codigo_http": job.codigo_http,
+        "error": job.error,
+        "inicio": job.inicio,
+        "fin": job.fin,
+        "resultado": resumir_respuesta(job.resultado) if resumen and job.resultado else job.resultado,
+    }
+
+
+class IngestaJobEstadoAPIView(APIView):
+    """GET /api/ingestion/jobs/<id>/ — avance de una ingesta asíncrona
+    (filas parseadas, creadas, duplicadas y descartadas) y, al terminar, la
+    misma respuesta que devolvería la ingesta síncrona en `resultado`
+    (`?respuesta=resumen` la devuelve sin el listado).
+
+    Cada usuario ve los jobs que creó o los de sus proyectos; el staff, todos."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        modo = modo_respuesta(request)
+        if modo is None:
+            return respuesta_modo_invalido()
+        jobs = IngestaJob.objects.all()
+        if not request.user.is_staff:
+            # Un job ajeno responde 404, igual que uno inexistente
+            jobs = jobs.filter(Q(created_by=request.user) | Q(proyecto__created_by=request.user))
+        job = get_object_or_404(jobs, pk=pk)
+        return Response(serializar_job(job, resumen=modo == RESPUESTA_RESUMEN))
@@ -0,0 +1,216 @@
+"""Ingesta por push en NDJSON (`application/x-ndjson`).
+
+Para integraciones que envían decenas de miles de alertas: cada línea del
+cuerpo es un objeto JSON con los campos de una alerta manual (`url`,
+`titulo`, `contenido`, `fecha`, `autor`, `reach`, `engagement`,
+`red_social`...). El cuerpo se lee línea a línea sin cargarlo completo. Las
+alertas se persisten en lotes de `INGESTION_NDJSON_LOTE`, cada uno en su
+propia transacción y con el mismo pipeline de `IngestionAPIView`: criterios
+de aceptación, deduplicación por URL, envío automático y aviso a la ruta
+externa.
+
+La respuesta también es NDJSON y se va enviando mientras se procesa: una
+línea de confirmación por lote ya confirmado en la base y al final una
+línea `resumen`. Si la conexión se corta, las líneas confirmadas ya están
+guardadas y el cliente puede reenviar desde la siguiente.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from apps.proyectos.models import Proyecto
+
+from .ingestion import IngestionAPIView
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_NDJSON = "application/x-ndjson"
+TAMANO_LOTE_NDJSON = 500
+# Una línea más larga que esto no es una alerta: se rechaza sin leerla entera
+MAXIMO_BYTES_LINEA = 1024 * 1024
+PROVEEDOR_NDJSON = "ndjson"
+
+
+class IngestionNDJSONAPIView(IngestionAPIView):
+    """`POST /api/ingestion/ndjson/?proyecto=<id>` con un cuerpo NDJSON."""
+
+    def post(self, request):
+        content_type = (request.content_type or "").split(";", 1)[0].strip().lower()
+        if content_type != CONTENT_TYPE_NDJSON:
+            return Response(
+                {"detail": f"Se requiere Content-Type {CONTENT_TYPE_NDJSON}."},
+                status=415,
+            )
+
+        # Solo query params: leer `request.data` consumiría el cuerpo
+        proyecto_id = request.query_params.get("proyecto") or request.query_params.get("proyecto_id")
+        proyecto = Proyecto.objects.filter(id=proyecto_id).first() if proyecto_id else None
+        if proyecto is None:
+            return Response({"detail": "Proyecto no encontrado o no indicado."}, status=400)
+
+        self._usuario_sistema_cache = self._obtener_usuario_desde_request(request)
+        lineas = self._leer_lineas(request._request)  # pylint: disable=protected-access
+        return StreamingHttpResponse(
+            self._procesar_en_lotes(lineas, proyecto),
+            content_type=CONTENT_TYPE_NDJSON,
+            status=200,
+        )
+
+    def _obtener_usuario_desde_request(self, request):
+        usuario = getattr(request, "user", None)
+        if usuario and getattr(usuario, "is_authenticated", False):
+            return usuario
+        UserModel = get_user_model()
+        for clave in ("usuario_id", "usuario", "user_id", "created_by"):
+            valor = request.query_params.get(clave)
+            if not valor:
+                continue
+            try:
+                return UserModel.objects.get(id=valor)
+            except (UserModel.DoesNotExist, ValueError, TypeError):
+                continue
+        return None
+
+    def _leer_lineas(self, stream) -> Iterator[Tuple[int, Optional[bytes]]]:
+        """(número, contenido) de cada línea no vacía del cuerpo. Las que
+        superan `MAXIMO_BYTES_LINEA` se descartan y llegan como None."""
+        maximo = getattr(settings, "INGESTION_NDJSON_MAXIMO_BYTES_LINEA", MAXIMO_BYTES_LINEA)
+        numero = 0
+        while True:
+            linea = stream.readline(maximo + 1)
+            if not linea:
+                return
+            numero += 1
+            if len(linea) > maximo and not linea.endswith(b"\n"):
+                # Consume el resto de la línea sin acumularlo
+                while linea and not linea.endswith(b"\n"):
+                    linea = stream.readline(maximo + 1)
+                yield numero, None
+                continue
+            if linea.strip():
+                yield numero, linea
+
+    def _procesar_en_lotes(
+        self, lineas: Iterator[Tuple[int, Optional[bytes]]], proyecto: Proyecto
+    ) -> Iterator[bytes]:
+        tamano = getattr(settings, "INGESTION_NDJSON_LOTE", TAMANO_LOTE_NDJSON)
+        tipo_alerta = self._obtener_tipo_alerta_proyecto(proyecto)
+        resumen = {"lineas": 0, "lotes": 0, "creados": 0, "duplicados": 0, "descartados": 0, "errores": 0}
+
+        lote: List[Tuple[int, Dict[str, Any]]] = []
+        errores: List[Dict[str, Any]] = []
+        primera: Optional[int] = None
+        ultima = 0
+
+        def _cerrar_lote() -> bytes:
+            ack = self._persistir_lote(lote, errores, proyecto)
+            ack.update({"lote": resumen["lotes"] + 1, "desde_linea": primera, "hasta_linea": ultima})
+            resumen["lotes"] += 1
+            for campo in ("creados", "duplicados", "descartados"):
+                resumen[campo] += ack[campo]
+            resumen["errores"] += len(ack["errores"])
+            return _linea_json(ack)
+
+        try:
+            for numero, contenido in lineas:
+                resumen["lineas"] += 1
+                primera = primera or numero
+                ultima = numero
+                registro, error = self._registro_de_linea(contenido, tipo_alerta)
+                if error is not None:
+                    errores.append({"linea": numero, "error": error})
+                else:
+                    lote.append((numero, registro))
+                if len(lote) + len(errores) >= tamano:
+                    yield _cerrar_lote()
+                    lote, errores, primera = [], [], None
+            if lote or errores:
+                yield _cerrar_lote()
+        except Exception:  # pylint: disable=broad-except
+            # La respuesta ya empezó: el error va como última línea. Los lotes
+            # confirmados antes quedan guardados.
+            logger.exception("Error procesando ingesta NDJSON del proyecto %s", proyecto.id)
+            yield _linea_json(
+                {"error": "Error interno procesando el lote.", "desde_linea": primera, "resumen": resumen}
+            )
+            return
+
+        yield _linea_json({"resumen": resumen})
+
+    def _registro_de_linea(
+        self, contenido: Optional[bytes], tipo_alerta: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if contenido is None:
+            return None, "Línea demasiado larga"
+        try:
+            objeto = json.loads(contenido)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None, "JSON inválido"
+        if not isinstance(objeto, dict):
+            return None, "Cada línea debe ser un objeto JSON"
+        try:
+            registro = self._registro_manual_desde_datos(objeto)
+        except (ValueError, TypeError, OverflowError) as exc:
+            # Fecha imposible, número fuera de rango...: error de la línea
+            return None, f"Datos inválidos: {exc}"
+        if registro is None:
+            return None, "La alerta no tiene URL"
+        registro["proveedor"] = PROVEEDOR_NDJSON
+        self._ajustar_registro_manual_por_tipo_alerta(registro, tipo_alerta)
+        return registro, None
+
+    def _persistir_lote(
+        self,
+        lote: List[Tuple[int, Dict[str, Any]]],
+        errores: List[Dict[str, Any]],
+        proyecto: Proyecto,
+    ) -> Dict[str, Any]:
+        """Filtra y persiste un lote en su propia transacción. Los errores de
+        persistencia (`fila` del lote filtrado) se reportan por línea."""
+        registros = [registro for _, registro in lote]
+        filtrados = self._filtrar_por_criterios(registros, proyecto) if registros else []
+        numero_de = {id(registro): numero for numero, registro in lote}
+        lineas_filtradas = [numero_de[id(registro)] for registro in filtrados]
+
+        ack: Dict[str, Any] = {
+            "creados": 0,
+            "duplicados": 0,
+            "descartados": len(registros) - len(filtrados),
+            "errores": list(errores),
+        }
+        if not filtrados:
+            return ack
+
+        with transaction.atomic():
+            resultado = self._persistir_registros(filtrados, proyecto)
+            respuesta = self._construir_respuesta_exito(
+                filtrados, resultado, PROVEEDOR_NDJSON, proyecto
+            )
+            self._procesar_envio_automatico(proyecto, respuesta)
+            if respuesta["listado"]:
+                self._notificar_ruta_externa(respuesta)
+
+        ack["creados"] = len(resultado["listado"])
+        ack["duplicados"] = resultado.get("duplicados", 0)
+        ack["descartados"] += resultado.get("descartados", 0)
+        for error in resultado["errores"]:
+            error = dict(error)
+            fila = error.pop("fila", None)
+            if isinstance(fila, int) and 0 < fila <= len(lineas_filtradas):
+                error["linea"] = lineas_filtradas[fila - 1]
+            ack["errores"].append(error)
+        ack["errores"].sort(key=lambda error: error.get("linea") or 0)
+        ack["ids"] = [alerta.get("id") for alerta in resultado["listado"]]
+        return ack
+
+
+def _linea_json(datos: Dict[str, Any]) -> bytes:
+    return (json.dumps(datos, ensure_ascii=False, default=str) + "\n").encode("utf-8")
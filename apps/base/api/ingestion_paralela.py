@@ -0,0 +1,93 @@
+"""Mapeo de filas en varios procesos para cargas grandes.
+
+El mapeo es Python puro y ocupa un solo núcleo. Desde
+`INGESTION_PARALELO_UMBRAL_FILAS` filas, las filas se reparten en bloques
+entre los procesos de un `ProcessPoolExecutor`. Los bloques mapeados se
+devuelven en el orden de entrada, así que el listado y los índices `fila` de
+los errores son los mismos del camino secuencial.
+
+En un proceso daemon (los workers prefork de Celery que corren la ingesta
+asíncrona) no se pueden crear procesos hijos: ahí el mapeo es secuencial.
+
+La lectura del archivo sigue en el proceso de la petición, porque los
+archivos subidos y los libros de openpyxl no se pueden serializar. Mientras
+se lee el siguiente bloque, los procesos ya mapean los anteriores.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+
+
+UMBRAL_FILAS_PARALELO = 20000
+TAMANO_BLOQUE_PARALELO = 2000
+# Bloques en vuelo por proceso: acota la memoria en modo streaming
+BLOQUES_EN_VUELO_POR_PROCESO = 2
+
+Fila = Mapping[str, Any]
+TareaMapeo = Tuple[str, Iterable[str], Iterable[Fila]]
+
+
+def procesos_paralelo() -> int:
+    procesos = getattr(settings, "INGESTION_PARALELO_PROCESOS", None) or os.cpu_count() or 1
+    return max(1, int(procesos))
+
+
+def umbral_filas_paralelo() -> Optional[int]:
+    """Filas a partir de las cuales se mapea en paralelo; None si está
+    desactivado (umbral 0 o un solo proceso) o si el proceso actual es
+    daemon (worker prefork de Celery), que no puede tener hijos."""
+    umbral = getattr(settings, "INGESTION_PARALELO_UMBRAL_FILAS", UMBRAL_FILAS_PARALELO)
+    if not umbral or procesos_paralelo() < 2 or multiprocessing.current_process().daemon:
+        return None
+    return int(umbral)
+
+
+def _mapear_bloque(provider: str, headers: frozenset, filas: List[Fila]) -> List[Mapping[str, Any]]:
+    from .ingestion import IngestionAPIView
+
+    mapear = IngestionAPIView()._compilar_mapeador(provider, headers)  # pylint: disable=protected-access
+    return [mapear(fila) for fila in filas]
+
+
+def _bloques(tareas: Iterable[TareaMapeo]) -> Iterator[Tuple[str, frozenset, List[Fila]]]:
+    tamano = int(getattr(settings, "INGESTION_PARALELO_BLOQUE_FILAS", TAMANO_BLOQUE_PARALELO))
+    for provider, headers, filas in tareas:
+        encabezados = frozenset(headers)
+        filas = iter(filas)
+        while True:
+            bloque = list(islice(filas, tamano))
+            if not bloque:
+                break
+            yield provider, encabezados, bloque
+
+
+def mapear_en_procesos(tareas: Iterable[TareaMapeo]) -> Iterator[List[Mapping[str, Any]]]:
+    """Mapea cada `(proveedor, encabezados, filas)` por bloques en procesos y
+    produce los bloques de registros en el orden de entrada."""
+    bloques = _bloques(tareas)
+    primero = next(bloques, None)
+    if primero is None:
+        return
+
+    procesos = procesos_paralelo()
+    maximo_en_vuelo = procesos * BLOQUES_EN_VUELO_POR_PROCESO
+    en_vuelo = deque()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        try:
+            en_vuelo.append(pool.submit(_mapear_bloque, *primero))
+            for bloque in bloques:
+                if len(en_vuelo) >= maximo_en_vuelo:
+                    yield en_vuelo.popleft().result()
+                en_vuelo.append(pool.submit(_mapear_bloque, *bloque))
+            while en_vuelo:
+                yield en_vuelo.popleft().result()
+        finally:
+            # Si el consumidor abandona el flujo, no seguir mapeando
+            for futuro in en_vuelo:
+                futuro.cancel()
@@ -0,0 +1,453 @@
+"""Mapeo declarativo de filas de proveedor a registros estándar.
+
+Cada proveedor se describe con una `EspecificacionMapeo`: por campo del
+registro, de qué columnas sale el valor (alias en orden de prioridad) y cómo
+se transforma. `compilar` resuelve los alias contra los encabezados reales del
+archivo una sola vez; el mapeador resultante solo hace lecturas directas por
+fila, sin recorrer listas de alias. Un proveedor nuevo se agrega con su spec
+en `ESPECIFICACIONES_MEDIOS` (o como constante propia), no con ramas nuevas.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from .contenido_redes import ajustar_contenido_red_social
+from .registros import RegistroAlerta
+from .utils import (
+    ParserFechaColumna,
+    combinar_fecha_hora,
+    limpiar_texto,
+    normalizar_url,
+    parsear_entero,
+)
+
+
+# Cualquier mapping: `registros.Fila` en la ingesta, dicts en los tests
+Fila = Mapping[str, Any]
+Lector = Callable[[Fila], Any]
+
+
+def valor_contiene_datos(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    return True
+
+
+def _lector_primera_coincidencia(columnas: Tuple[str, ...]) -> Lector:
+    """Primer valor distinto de None y "" entre las columnas ya resueltas."""
+    if not columnas:
+        return lambda row: None
+    if len(columnas) == 1:
+        columna = columnas[0]
+
+        def _leer_una(row: Fila) -> Any:
+            valor = row.get(columna)
+            return None if valor is None or valor == "" else valor
+
+        return _leer_una
+
+    def _leer(row: Fila) -> Any:
+        for columna in columnas:
+            valor = row.get(columna)
+            if valor is not None and valor != "":
+                return valor
+        return None
+
+    return _leer
+
+
+def _lector_or(columnas: Tuple[str, ...], ultima_presente: bool) -> Lector:
+    """`row.get(a) or row.get(b) or ...`: el primer valor verdadero o, si no
+    hay, el de la última columna."""
+
+    def _leer(row: Fila) -> Any:
+        valor = None
+        for columna in columnas:
+            valor = row.get(columna)
+            if valor:
+                return valor
+        return valor if ultima_presente else None
+
+    return _leer
+
+
+class Columna:
+    """Valor de la primera columna con datos entre `alias` (distinto de None
+    y ""; con `como_or`, el primero verdadero como en `a or b`). Si el valor
+    no tiene datos se usa `respaldo` (otra lista de alias); el resultado pasa
+    por `transformar`."""
+
+    def __init__(
+        self,
+        *alias: str,
+        transformar: Optional[Callable[[Any], Any]] = None,
+        respaldo: Sequence[str] = (),
+        como_or: bool = False,
+    ):
+        self.alias = alias
+        self.transformar = transformar
+        self.respaldo = tuple(respaldo)
+        self.como_or = como_or
+
+    def compilar(self, headers: frozenset) -> Lector:
+        columnas = tuple(a for a in self.alias if a in headers)
+        if self.como_or:
+            leer = _lector_or(columnas, self.alias[-1] in headers)
+        else:
+            leer = _lector_primera_coincidencia(columnas)
+        transformar = self.transformar or (lambda valor: valor)
+        if self.respaldo:
+            leer_principal = leer
+            leer_respaldo = _lector_primera_coincidencia(
+                tuple(a for a in self.respaldo if a in headers)
+            )
+
+            def leer(row: Fila) -> Any:
+                valor = leer_principal(row)
+                if not valor_contiene_datos(valor):
+                    valor = leer_respaldo(row)
+                return valor
+
+        elif not any(a in headers for a in self.alias):
+            # Ninguna columna del archivo: el campo es constante
+            vacio = transformar(None)
+            return lambda row: vacio
+
+        return lambda row: transformar(leer(row))
+
+
+class Constante:
+    def __init__(self, valor: Any):
+        self.valor = valor
+
+    def compilar(self, headers: frozenset) -> Lector:
+        valor = self.valor
+        return lambda row: valor
+
+
+class Fecha:
+    """Fecha de publicación. Si hay `hora` se combina con la fecha (y, si no
+    resulta, se parsea la fecha sola); `combinar_siempre` combina aunque no
+    haya hora. Con `hora_como_or` la hora se lee como `a or b` y se descarta
+    si no trae datos. Si el resultado es None se prueba `respaldo`, que
+    conserva la hora ya leída. Cada columna usa un `ParserFechaColumna` propio
+    del archivo compilado."""
+
+    def __init__(
+        self,
+        fecha: Sequence[str],
+        hora: Sequence[str] = (),
+        *,
+        combinar_siempre: bool = False,
+        hora_como_or: bool = False,
+        respaldo: Optional["Fecha"] = None,
+    ):
+        self.fecha = tuple(fecha)
+        self.hora = tuple(hora)
+        self.combinar_siempre = combinar_siempre
+        self.hora_como_or = hora_como_or
+        self.respaldo = respaldo
+
+    def compilar(self, headers: frozenset) -> Lector:
+        return self._compilar(headers)
+
+    def _compilar(self, headers: frozenset) -> Callable[..., Any]:
+        leer_fecha = _lector_primera_coincidencia(tuple(a for a in self.fecha if a in headers))
+        columnas_hora = tuple(a for a in self.hora if a in headers)
+        if self.hora_como_or:
+            leer_hora_or = _lector_or(columnas_hora, bool(self.hora) and self.hora[-1] in headers)
+
+            def leer_hora(row: Fila) -> Any:
+                hora = leer_hora_or(row)
+                return hora if valor_contiene_datos(hora) else None
+
+        else:
+            leer_hora = _lector_primera_coincidencia(columnas_hora)
+        parsear = ParserFechaColumna("datetime")
+        parsear_solo_fecha = ParserFechaColumna("fecha")
+        parsear_solo_hora = ParserFechaColumna("hora")
+        combinar_siempre = self.combinar_siempre
+        respaldo = self.respaldo._compilar(headers) if self.respaldo else None
+
+        def combinar(fecha_raw: Any, hora_raw: Any) -> Any:
+            # Solo se preparsean los textos: los datetime de XLSX conservan la
+            # semántica de combinar_fecha_hora
+            if isinstance(fecha_raw, str):
+                fecha_raw = parsear_solo_fecha(fecha_raw)
+            if isinstance(hora_raw, str):
+                hora_raw = parsear_solo_hora(hora_raw)
+            return combinar_fecha_hora(fecha_raw, hora_raw)
+
+        def leer(row: Fila, hora_previa: Any = None) -> Any:
+            fecha_raw = leer_fecha(row)
+            hora_raw = hora_previa if hora_previa is not None else leer_hora(row)
+            if combinar_siempre:
+                fecha = combinar(fecha_raw, hora_raw)
+            else:
+                fecha = None
+                if hora_raw is not None:
+                    fecha = combinar(fecha_raw, hora_raw)
+                if fecha is None:
+                    fecha = parsear(fecha_raw)
+            if fecha is None and respaldo is not None:
+                fecha = respaldo(row, hora_raw)
+            return fecha
+
+        return leer
+
+
+class EspecificacionMapeo:
+    """Campos del registro estándar y `ajustes` que se aplican al registro ya
+    armado (para campos que dependen de otros). Los campos deben ser de
+    `RegistroAlerta`."""
+
+    def __init__(
+        self,
+        campos: Dict[str, Any],
+        ajustes: Sequence[Callable[[RegistroAlerta], None]] = (),
+    ):
+        desconocidos = set(campos) - set(RegistroAlerta.CAMPOS)
+        if desconocidos:
+            raise ValueError(
+                f"Campos desconocidos para RegistroAlerta: {', '.join(sorted(desconocidos))}"
+            )
+        self.campos = campos
+        self.ajustes = tuple(ajustes)
+
+    def compilar(self, headers: Iterable[str]) -> Callable[[Fila], RegistroAlerta]:
+        encabezados = frozenset(headers)
+        # Escritura directa en el slot de cada campo
+        escritores = tuple(
+            (getattr(RegistroAlerta, campo).__set__, spec.compilar(encabezados))
+            for campo, spec in self.campos.items()
+        )
+        ajustes = self.ajustes
+
+        def mapear(row: Fila) -> RegistroAlerta:
+            registro = RegistroAlerta()
+            for escribir, leer in escritores:
+                escribir(registro, leer(row))
+            for ajuste in ajustes:
+                ajuste(registro)
+            return registro
+
+        return mapear
+
+
+# ----------------------------------------------------------------------
+# Transformaciones
+# ----------------------------------------------------------------------
+def _texto_si_hay(valor: Any) -> Optional[str]:
+    return limpiar_texto(valor) if valor else None
+
+
+def _dominio_de_url(valor: Any) -> Optional[str]:
+    # Para TWK medios, extraer dominio limpio de la URL
+    if not valor:
+        return None
+    url_normalizada = normalizar_url(valor)
+    if not url_normalizada:
+        return None
+    dominio = urlparse(url_normalizada).netloc.lower()
+    if dominio.startswith("www."):
+        dominio = dominio[4:]
+    return _texto_si_hay(dominio)
+
+
+def _autor_sin_dominio(valor: Any) -> Optional[str]:
+    autor = limpiar_texto(valor)
+    if autor:
+        # Quitar www. del inicio y / del final
+        if autor.lower().startswith("www."):
+            autor = autor[4:]
+        autor = autor.rstrip("/")
+    return autor
+
+
+def _tipo_medio_global_news(valor: Any) -> Optional[str]:
+    if not valor:
+        return None
+    tipo_medio = str(valor).strip().lower()
+    if "cable" in tipo_medio:
+        return "Televisión"
+    if "fm" in tipo_medio:
+        return "Radio"
+    if "diario" in tipo_medio or "revista" in tipo_medio:
+        return "Prensa"
+    return limpiar_texto(valor)
+
+
+def _tipo_medio_stakeholders(valor: Any) -> Optional[str]:
+    if not valor:
+        return None
+    if "internet" in str(valor).strip().lower():
+        return "Online"
+    return limpiar_texto(valor)
+
+
+def _ajustar_contenido_red(registro: RegistroAlerta) -> None:
+    registro["contenido"] = ajustar_contenido_red_social(
+        registro["contenido"], registro["red_social"]
+    )
+
+
+# ----------------------------------------------------------------------
+# Especificaciones por proveedor
+# ----------------------------------------------------------------------
+ALIAS_URL = ("url", "link", "link (streaming - imagen)", "link (streaming – imagen)")
+ALIAS_TITULO = ("title", "título", "titulo", "titular")
+ALIAS_CONTENIDO = (
+    "content_snippet",
+    "content",
+    "resumen",
+    "resumen - aclaracion",
+    "resumen - aclaración",
+    "mention_snippet",
+)
+ALIAS_AUTOR_TWK = (
+    "extra_source_attributes.name",
+    "extra_author_attributes.short_name",
+    "extra_author_attributes.name",
+    "autor - conductor",
+    "autor",
+    "author",
+)
+COLUMNA_PAIS = "extra_source_attributes.world_data.country"
+
+FECHA_GENERICA = Fecha(("fecha", "published", "date"), ("hora", "time"))
+
+# Filas de medios de un archivo sin proveedor de medios propio (p. ej. filas
+# sin red social dentro de un export de redes)
+MAPEO_MEDIOS_GENERICO = EspecificacionMapeo(
+    {
+        "tipo": Constante("articulo"),
+        "titulo": Columna(*ALIAS_TITULO, transformar=limpiar_texto),
+        "contenido": Columna(respaldo=ALIAS_CONTENIDO, transformar=limpiar_texto),
+        "fecha": FECHA_GENERICA,
+        "autor": Columna(*ALIAS_AUTOR_TWK, transformar=limpiar_texto),
+        "fuente": Constante(None),
+        "tipo_medio": Constante(None),
+        "reach": Columna("reach", transformar=parsear_entero),
+        "engagement": Columna("engagement", "engagement_rate", transformar=parsear_entero),
+        "url": Columna(*ALIAS_URL, transformar=normalizar_url),
+        "ubicacion": Columna(COLUMNA_PAIS, transformar=limpiar_texto),
+    }
+)
+
+MAPEO_MEDIOS_TWK = EspecificacionMapeo(
+    {
+        **MAPEO_MEDIOS_GENERICO.campos,
+        "contenido": Columna(
+            "content_snippet", respaldo=ALIAS_CONTENIDO, transformar=limpiar_texto
+        ),
+        "fecha": Fecha(("published",), respaldo=FECHA_GENERICA),
+        "autor": Columna(*ALIAS_AUTOR_TWK, transformar=_autor_sin_dominio),
+        "fuente": Columna(*ALIAS_URL, transformar=_dominio_de_url),
+        "tipo_medio": Constante("Online"),
+    }
+)
+
+MAPEO_GLOBAL_NEWS = EspecificacionMapeo(
+    {
+        **MAPEO_MEDIOS_GENERICO.campos,
+        "contenido": Columna(
+            "resumen - aclaracion",
+            "resumen - aclaración",
+            respaldo=ALIAS_CONTENIDO,
+            transformar=limpiar_texto,
+        ),
+        "fecha": Fecha(
+            ("fecha",),
+            ("Hora", "hora"),
+            hora_como_or=True,
+            respaldo=Fecha(("fecha", "published", "date"), ("hora", "time")),
+        ),
+        "autor": Columna(
+            "Medio", "medio", "autor - conductor", "autor", "author", transformar=limpiar_texto
+        ),
+        "fuente": Columna("Medio", "medio", transformar=_texto_si_hay),
+        "tipo_medio": Columna(
+            "Tipo de Medio", "tipo de medio", transformar=_tipo_medio_global_news
+        ),
+        "reach": Columna("audiencia", "reach", transformar=parsear_entero),
+    }
+)
+
+MAPEO_STAKEHOLDERS = EspecificacionMapeo(
+    {
+        **MAPEO_MEDIOS_GENERICO.campos,
+        "contenido": Columna("resumen", respaldo=ALIAS_CONTENIDO, transformar=limpiar_texto),
+        # Stakeholders no combina fecha y hora
+        "fecha": Fecha(("fecha", "published", "date")),
+        "autor": Columna(
+            "Fuente", "fuente", "autor", "autor - conductor", "author", transformar=limpiar_texto
+        ),
+        "fuente": Columna("Fuente", "fuente", transformar=_texto_si_hay),
+        "tipo_medio": Columna("Medio", "medio", transformar=_tipo_medio_stakeholders),
+        "reach": Columna("audiencia", "reach", transformar=parsear_entero),
+    }
+)
+
+MAPEO_DETERM_MEDIOS = EspecificacionMapeo(
+    {
+        **MAPEO_MEDIOS_GENERICO.campos,
+        "autor": Columna("from", respaldo=("FROM",), transformar=_autor_sin_dominio),
+        "fuente": Columna(*ALIAS_URL, transformar=_dominio_de_url),
+        "tipo_medio": Constante("Online"),
+    }
+)
+
+MAPEO_REDES_TWK = EspecificacionMapeo(
+    {
+        "tipo": Constante("red"),
+        "contenido": Columna("content", transformar=limpiar_texto),
+        "titulo": Columna("title", transformar=limpiar_texto),
+        "fecha": Fecha(("published",)),
+        "autor": Columna(
+            "extra_author_attributes.short_name",
+            "extra_author_attributes.name",
+            transformar=limpiar_texto,
+            como_or=True,
+        ),
+        "reach": Columna("reach", transformar=parsear_entero),
+        "engagement": Columna("engagement", transformar=parsear_entero),
+        "url": Columna("url", "link", transformar=normalizar_url, como_or=True),
+        "red_social": Columna("domain_url", transformar=limpiar_texto),
+        "ubicacion": Columna(COLUMNA_PAIS, transformar=limpiar_texto),
+    },
+    ajustes=(_ajustar_contenido_red,),
+)
+
+MAPEO_DETERM = EspecificacionMapeo(
+    {
+        "tipo": Constante("red"),
+        "contenido": Columna("mention_snippet", transformar=limpiar_texto),
+        "titulo": Columna("title", transformar=limpiar_texto),
+        "fecha": Fecha(("date",), ("time",), combinar_siempre=True),
+        "autor": Columna(
+            "author", "AUTHOR", "FROM", "from", transformar=limpiar_texto, como_or=True
+        ),
+        "reach": Columna("reach", transformar=parsear_entero),
+        "engagement": Columna("engagement_rate", transformar=parsear_entero),
+        "url": Columna("url", transformar=normalizar_url),
+        "red_social": Columna("social_network", transformar=limpiar_texto),
+    },
+    ajustes=(_ajustar_contenido_red,),
+)
+
+# Spec de medios según el proveedor detectado en el archivo
+ESPECIFICACIONES_MEDIOS = {
+    "medios": MAPEO_MEDIOS_TWK,
+    "global_news": MAPEO_GLOBAL_NEWS,
+    "stakeholders": MAPEO_STAKEHOLDERS,
+    "determ_medios": MAPEO_DETERM_MEDIOS,
+}
+
+
+def especificacion_medios(provider: Optional[str]) -> EspecificacionMapeo:
+    proveedor = (provider or "").strip().lower()
+    return ESPECIFICACIONES_MEDIOS.get(proveedor, MAPEO_MEDIOS_GENERICO)
@@ -0,0 +1,245 @@
+"""Representación compacta de filas y registros de la ingesta.
+
+Un archivo grande genera cientos de miles de filas. Como dict, cada fila
+repite sus claves y reserva su propia tabla hash, y el registro mapeado y
+sus `datos_adicionales` son dos dicts más por fila. Aquí:
+
+- `EsquemaFilas` es el índice de encabezados, compartido por todas las filas
+  de un archivo.
+- `Fila` guarda solo la tupla de valores y una referencia al esquema.
+- `RegistroAlerta` es el registro estándar mapeado, con `__slots__` fijos.
+  Sus `datos_adicionales` se arman a partir de la fila de origen solo cuando
+  se leen, es decir, al serializar la respuesta.
+
+Ambos se comportan como mappings (`get`, `[]`, `in`, `items`, `==` contra
+dicts), así que el mapeo, el filtro, las huellas y la persistencia no
+distinguen entre estas clases y un dict.
+"""
+
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from .utils import normalizar_valor_adicional
+
+
+class _Ausente:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "AUSENTE"
+
+    def __reduce__(self):
+        # Se serializa por referencia: los procesos del mapeo paralelo
+        # comparan con `is`
+        return "AUSENTE"
+
+
+# Valor de una columna que la fila no tiene (celdas vacías de XLSX)
+AUSENTE = _Ausente()
+
+
+class EsquemaFilas:
+    """Encabezados de un archivo y su índice. Con encabezados repetidos gana
+    la última columna, igual que al armar un dict."""
+
+    __slots__ = ("encabezados", "indices", "repetidos", "_extendidos")
+
+    def __init__(self, encabezados: Iterable[str]):
+        self.encabezados: Tuple[str, ...] = tuple(encabezados)
+        self.indices: Dict[str, int] = {}
+        posiciones: Dict[str, list] = {}
+        for indice, encabezado in enumerate(self.encabezados):
+            # Conserva el orden de la primera aparición al iterar
+            self.indices[encabezado] = indice
+            posiciones.setdefault(encabezado, []).append(indice)
+        self.repetidos = tuple(tuple(p) for p in posiciones.values() if len(p) > 1)
+        self._extendidos: Dict[str, "EsquemaFilas"] = {}
+
+    def con_columna(self, nombre: str) -> "EsquemaFilas":
+        """Esquema con `nombre` al final (o apuntando al final si ya existía),
+        compartido por todas las filas que lo necesiten."""
+        extendido = self._extendidos.get(nombre)
+        if extendido is None:
+            extendido = EsquemaFilas(self.encabezados + (nombre,))
+            self._extendidos[nombre] = extendido
+        return extendido
+
+    def fila(self, valores: Sequence[Any]) -> "Fila":
+        if self.repetidos:
+            # Como en un dict armado celda a celda: gana la última columna
+            # repetida que tenga valor
+            valores = list(valores)
+            for posiciones in self.repetidos:
+                ultima = posiciones[-1]
+                if ultima < len(valores) and valores[ultima] is AUSENTE:
+                    for posicion in reversed(posiciones[:-1]):
+                        if valores[posicion] is not AUSENTE:
+                            valores[ultima] = valores[posicion]
+                            break
+        return Fila(self, tuple(valores))
+
+    def __reduce__(self):
+        return EsquemaFilas, (self.encabezados,)
+
+
+class Fila(MutableMapping):
+    """Fila leída de un archivo: una tupla alineada con su `EsquemaFilas`."""
+
+    __slots__ = ("esquema", "valores")
+
+    def __init__(self, esquema: EsquemaFilas, valores: Tuple[Any, ...]):
+        self.esquema = esquema
+        self.valores = valores
+
+    def __getitem__(self, clave: str) -> Any:
+        indice = self.esquema.indices.get(clave)
+        if indice is None or indice >= len(self.valores):
+            raise KeyError(clave)
+        valor = self.valores[indice]
+        if valor is AUSENTE:
+            raise KeyError(clave)
+        return valor
+
+    def get(self, clave: str, default: Any = None) -> Any:
+        # Camino rápido: el mapeo lee columnas fila a fila
+        indice = self.esquema.indices.get(clave)
+        if indice is None or indice >= len(self.valores):
+            return default
+        valor = self.valores[indice]
+        return default if valor is AUSENTE else valor
+
+    def __contains__(self, clave: object) -> bool:
+        return self.get(clave, AUSENTE) is not AUSENTE  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[str]:
+        valores = self.valores
+        total = len(valores)
+        for clave, indice in self.esquema.indices.items():
+            if indice < total and valores[indice] is not AUSENTE:
+                yield clave
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def items(self):
+        valores = self.valores
+        total = len(valores)
+        return [
+            (clave, valores[indice])
+            for clave, indice in self.esquema.indices.items()
+            if indice < total and valores[indice] is not AUSENTE
+        ]
+
+    def __setitem__(self, clave: str, valor: Any) -> None:
+        indice = self.esquema.indices.get(clave)
+        if indice is None:
+            self.esquema = self.esquema.con_columna(clave)
+            indice = self.esquema.indices[clave]
+        valores = list(self.valores)
+        if indice >= len(valores):
+            valores.extend([AUSENTE] * (indice + 1 - len(valores)))
+        valores[indice] = valor
+        self.valores = tuple(valores)
+
+    def __delitem__(self, clave: str) -> None:
+        if clave not in self:
+            raise KeyError(clave)
+        self[clave] = AUSENTE
+
+    def __reduce__(self):
+        # El esquema se serializa una sola vez por bloque (memo de pickle)
+        return Fila, (self.esquema, self.valores)
+
+    def __repr__(self) -> str:
+        return f"Fila({dict(self.items())!r})"
+
+
+def datos_adicionales_de(fila: Optional[Mapping]) -> Dict[str, Any]:
+    """Columnas de la fila con datos, normalizadas para JSON."""
+    adicionales: Dict[str, Any] = {}
+    if fila is None:
+        return adicionales
+    for clave, valor in fila.items():
+        valor_limpio = normalizar_valor_adicional(valor)
+        if valor_limpio is not None:
+            adicionales[clave] = valor_limpio
+    return adicionales
+
+
+class RegistroAlerta(MutableMapping):
+    """Registro estándar mapeado desde una fila. Los campos sin asignar no
+    forman parte del mapping (como una clave ausente en un dict)."""
+
+    CAMPOS = (
+        "tipo",
+        "titulo",
+        "contenido",
+        "fecha",
+        "autor",
+        "fuente",
+        "tipo_medio",
+        "reach",
+        "engagement",
+        "url",
+        "red_social",
+        "ubicacion",
+        "proveedor",
+        "datos_adicionales",
+    )
+    __slots__ = CAMPOS + ("fila",)
+
+    def __init__(self, fila: Optional[Mapping] = None, **campos: Any):
+        self.fila = fila
+        for campo, valor in campos.items():
+            self[campo] = valor
+
+    def __getitem__(self, campo: str) -> Any:
+        if campo not in self.CAMPOS:
+            raise KeyError(campo)
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            if campo == "datos_adicionales" and self.fila is not None:
+                return datos_adicionales_de(self.fila)
+            raise KeyError(campo) from None
+
+    def get(self, campo: str, default: Any = None) -> Any:
+        try:
+            return self[campo]
+        except KeyError:
+            return default
+
+    def __setitem__(self, campo: str, valor: Any) -> None:
+        if campo not in self.CAMPOS:
+            raise KeyError(f"Campo desconocido para RegistroAlerta: {campo}")
+        setattr(self, campo, valor)
+
+    def __delitem__(self, campo: str) -> None:
+        try:
+            delattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+
+    def __iter__(self) -> Iterator[str]:
+        for campo in self.CAMPOS:
+            if campo in self:
+                yield campo
+
+    def __contains__(self, campo: object) -> bool:
+        if campo == "datos_adicionales" and self.fila is not None:
+            return True
+        return campo in self.CAMPOS and hasattr(self, campo)  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        campos = {campo: getattr(self, campo) for campo in self.CAMPOS if hasattr(self, campo)}
+        return _reconstruir_registro, (self.fila, campos)
+
+    def __repr__(self) -> str:
+        return f"RegistroAlerta({dict(self.items())!r})"
+
+
+def _reconstruir_registro(fila: Optional[Mapping], campos: Dict[str, Any]) -> RegistroAlerta:
+    return RegistroAlerta(fila, **campos)
@@ -0,0 +1,91 @@
+"""Formas de la respuesta de la ingesta (`?respuesta=`).
+
+- `completa` (por defecto): el JSON de siempre, con cada registro creado
+  serializado en `listado`.
+- `resumen`: conteos, filas con error e ids de lo creado, sin `listado`.
+  En un archivo de 20k filas el listado completo pesa decenas de MB.
+- `stream`: la respuesta completa, pero enviada como JSON por partes
+  (chunked). Los campos de resumen van primero y `listado` al final, de a
+  `INGESTION_RESPUESTA_BLOQUE` registros: el texto JSON del cuerpo no se
+  arma entero en memoria.
+
+Los modos solo cambian el cuerpo HTTP. El listado serializado se arma igual
+en los tres, y el aviso a la ruta externa (el `MensajeSaliente` del outbox)
+lo guarda completo: su destino espera ese contrato. `resumen` y `stream`
+ahorran el JSON de la respuesta, no la memoria ni el almacenamiento del
+listado.
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+RESPUESTA_COMPLETA = "completa"
+RESPUESTA_RESUMEN = "resumen"
+RESPUESTA_STREAM = "stream"
+MODOS_RESPUESTA = (RESPUESTA_COMPLETA, RESPUESTA_RESUMEN, RESPUESTA_STREAM)
+
+TAMANO_BLOQUE_RESPUESTA = 500
+
+
+def modo_respuesta(request) -> Optional[str]:
+    """Modo pedido en `?respuesta=`; None si el valor no es válido."""
+    parametro = None
+    if hasattr(request, "query_params"):
+        parametro = request.query_params.get("respuesta")
+    modo = str(parametro or RESPUESTA_COMPLETA).strip().lower()
+    return modo if modo in MODOS_RESPUESTA else None
+
+
+def respuesta_modo_invalido() -> Response:
+    return Response(
+        {"detail": f"respuesta debe ser uno de: {', '.join(MODOS_RESPUESTA)}."},
+        status=400,
+    )
+
+
+def resumir_respuesta(respuesta: Dict[str, Any]) -> Dict[str, Any]:
+    """La respuesta sin `listado`: conteos, errores e ids de lo creado."""
+    if "listado" not in respuesta:
+        return respuesta
+    resumen = {clave: valor for clave, valor in respuesta.items() if clave != "listado"}
+    listado = respuesta.get("listado") or []
+    resumen["creados"] = len(listado)
+    resumen["ids"] = [alerta.get("id") for alerta in listado]
+    return resumen
+
+
+def _json(valor: Any) -> str:
+    # Mismo encoder y formato que el JSONRenderer de DRF
+    return json.dumps(valor, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_en_flujo(respuesta: Dict[str, Any]) -> Iterator[bytes]:
+    """`respuesta` como JSON en bloques; el `listado` va al final."""
+    tamano = getattr(settings, "INGESTION_RESPUESTA_BLOQUE", TAMANO_BLOQUE_RESPUESTA)
+    cabecera = _json({clave: valor for clave, valor in respuesta.items() if clave != "listado"})
+    separador = "," if cabecera != "{}" else ""
+    yield f'{cabecera[:-1]}{separador}"listado":['.encode("utf-8")
+
+    listado = respuesta.get("listado") or []
+    for inicio in range(0, len(listado), tamano):
+        bloque = ",".join(_json(alerta) for alerta in listado[inicio : inicio + tamano])
+        yield (("," if inicio else "") + bloque).encode("utf-8")
+    yield b"]}"
+
+
+def construir_respuesta(respuesta: Dict[str, Any], status: int, modo: str):
+    """Cuerpo HTTP de `respuesta` según `modo`. `respuesta` ya trae el
+    listado completo (el mismo que fue al outbox)."""
+    if modo == RESPUESTA_RESUMEN:
+        return Response(resumir_respuesta(respuesta), status=status)
+    if modo == RESPUESTA_STREAM:
+        return StreamingHttpResponse(
+            json_en_flujo(respuesta), content_type="application/json", status=status
+        )
+    return Response(respuesta, status=status)
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import unicodedata
 
 from datetime import date, datetime, time, timedelta
 from typing import Iterable as _Iterable
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from urllib.parse import urlparse, urlunparse
 
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime, parse_time
 
+from .canonicalizacion_url import Resolutor, partes_canonicas
+
 
 def limpiar_texto(value: Any) -> Optional[str]:
     if value in (None, ""):
@@ -79,6 +83,30 @@ def normalizar_url(value: Any) -> Optional[str]:
     return cleaned or None
 
 
+def construir_clave_url(url: Optional[str], resolver: Optional[Resolutor] = None) -> Optional[str]:
+    """Clave de deduplicación: la forma canónica de la URL normalizada según
+    las reglas de `canonicalizacion_url`, unida por `|`
+    (host|path|params|query|fragment). `resolver` reemplaza los links cortos
+    por su destino."""
+    if not url:
+        return None
+
+    normalizada = normalizar_url(url)
+    if not normalizada:
+        return None
+
+    return "|".join(partes_canonicas(normalizada, resolver)) or None
+
+
+def huella_clave_url(url: Optional[str], resolver: Optional[Resolutor] = None) -> Optional[str]:
+    """SHA-256 de `construir_clave_url`; es lo que se guarda en `clave_url`
+    (las URLs llegan a 10.000 caracteres, demasiado para un índice btree)."""
+    clave = construir_clave_url(url, resolver)
+    if not clave:
+        return None
+    return hashlib.sha256(clave.encode("utf-8")).hexdigest()
+
+
 def limpiar_url(value: Any) -> Optional[str]:
     """Compatibilidad retroactiva con el nombre anterior de la función."""
     return normalizar_url(value)
@@ -240,6 +268,95 @@ def combinar_fecha_hora(fecha_value: Any, hora_value: Any) -> Optional[datetime]
     return asegurar_timezone(combinado)
 
 
+# Formatos de `parsear_datetime`/`parsear_fecha` con día primero:
+# dd/mm/aaaa y dd-mm-aaaa, con hora opcional (HH:MM o HH:MM:SS)
+_FECHA_DIA_PRIMERO = re.compile(
+    r"(\d{1,2})([/-])(\d{1,2})\2(\d{4})(?: (\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?"
+)
+
+
+def _datetime_dia_primero(texto: str) -> datetime:
+    match = _FECHA_DIA_PRIMERO.fullmatch(texto)
+    if not match:
+        raise ValueError(texto)
+    dia, _, mes, anio, hora, minuto, segundo = match.groups()
+    return datetime(
+        int(anio), int(mes), int(dia), int(hora or 0), int(minuto or 0), int(segundo or 0)
+    )
+
+
+def _fecha_dia_primero(texto: str) -> date:
+    match = _FECHA_DIA_PRIMERO.fullmatch(texto)
+    if not match or match.group(5) is not None:
+        raise ValueError(texto)
+    return date(int(match.group(4)), int(match.group(3)), int(match.group(1)))
+
+
+# Por tipo de columna: (parser por celda, formatos rápidos candidatos). Cada
+# formato rápido devuelve lo mismo que el parser por celda para los valores
+# que acepta y lanza ValueError para el resto.
+FORMATOS_COLUMNA = {
+    "datetime": (
+        parsear_datetime,
+        (
+            ("iso", lambda texto: asegurar_timezone(datetime.fromisoformat(texto))),
+            ("dia_primero", lambda texto: asegurar_timezone(_datetime_dia_primero(texto))),
+        ),
+    ),
+    "fecha": (
+        parsear_fecha,
+        (
+            ("iso", date.fromisoformat),
+            ("dia_primero", _fecha_dia_primero),
+        ),
+    ),
+    "hora": (
+        parsear_hora,
+        (("iso", lambda texto: time.fromisoformat(texto).replace(tzinfo=None)),),
+    ),
+}
+MUESTRA_INFERENCIA_FECHAS = 5
+
+
+class ParserFechaColumna:
+    """Parser de fechas de una columna de archivo. Infiere el formato con los
+    primeros valores de texto y lo aplica al resto con un parser directo; las
+    celdas que no encajan (y los valores no texto) pasan por el parser por celda."""
+
+    def __init__(self, tipo: str = "datetime"):
+        self.tipo = tipo
+        self._por_celda, self._candidatos = FORMATOS_COLUMNA[tipo]
+        self.formato: Optional[str] = None
+        self._rapido = None
+        self._muestras = 0
+        self.celdas_por_celda = 0
+
+    def __call__(self, value: Any) -> Any:
+        if not isinstance(value, str):
+            return self._por_celda(value)
+        texto = value.strip()
+        if not texto:
+            return None
+
+        if self._rapido is not None:
+            try:
+                return self._rapido(texto)
+            except ValueError:
+                pass
+        elif self._muestras < MUESTRA_INFERENCIA_FECHAS:
+            self._muestras += 1
+            for formato, parser in self._candidatos:
+                try:
+                    resultado = parser(texto)
+                except ValueError:
+                    continue
+                self.formato, self._rapido = formato, parser
+                return resultado
+
+        self.celdas_por_celda += 1
+        return self._por_celda(texto)
+
+
 def formatear_fecha_respuesta(value: Optional[Union[datetime, str]]) -> Optional[str]:
     if value in (None, ""):
         return None
@@ -290,19 +407,106 @@ def normalizar_valor_adicional(value: Any) -> Optional[Any]:
     return value
 
 
+_MARCAS_DIACRITICAS = re.compile(r"[\u0300-\u036f]")
+CRITERIOS_CACHE_MAXIMO = 512
+
+
+def quitar_acentos(texto: str) -> str:
+    if texto.isascii():
+        return texto
+    return _MARCAS_DIACRITICAS.sub("", unicodedata.normalize("NFD", texto))
+
+
+class CriteriosAceptacion:
+    """Criterios de aceptación compilados en una sola alternancia regex sobre
+    texto en minúsculas y sin acentos: una pasada por registro en lugar de un
+    `in` por criterio. `coincidencias` dice qué criterios aparecen (auditoría)."""
+
+    def __init__(self, criterios: Iterable[str]):
+        # normalizado -> criterio original, en el orden configurado
+        self.criterios: Dict[str, str] = {}
+        for criterio in criterios:
+            if not criterio:
+                continue
+            normalizado = quitar_acentos(str(criterio).lower())
+            if normalizado:
+                self.criterios.setdefault(normalizado, criterio)
+
+        self._patron = None
+        self._inicios = None
+        self._por_inicial: Dict[str, List[str]] = {}
+        if self.criterios:
+            alternancia = "|".join(
+                re.escape(criterio)
+                for criterio in sorted(self.criterios, key=len, reverse=True)
+            )
+            self._patron = re.compile(alternancia)
+            # Lookahead de ancho cero: encuentra todas las posiciones donde
+            # empieza algún criterio, incluso si se solapan
+            self._inicios = re.compile(f"(?=(?:{alternancia}))")
+            for criterio in self.criterios:
+                self._por_inicial.setdefault(criterio[0], []).append(criterio)
+
+    def __bool__(self) -> bool:
+        return self._patron is not None
+
+    @staticmethod
+    def texto_registro(registro: Dict[str, Any]) -> str:
+        titulo = registro.get("titulo") or ""
+        contenido = registro.get("contenido") or ""
+        return quitar_acentos(f"{titulo} {contenido}".lower().strip())
+
+    def cumple(self, registro: Dict[str, Any]) -> bool:
+        if self._patron is None:
+            return True
+        return self._patron.search(self.texto_registro(registro)) is not None
+
+    def coincidencias(self, registro: Dict[str, Any]) -> List[str]:
+        if self._patron is None:
+            return []
+        texto = self.texto_registro(registro)
+        encontrados = set()
+        for match in self._inicios.finditer(texto):
+            inicio = match.start()
+            for criterio in self._por_inicial[texto[inicio]]:
+                if texto.startswith(criterio, inicio):
+                    encontrados.add(criterio)
+        return [original for criterio, original in self.criterios.items() if criterio in encontrados]
+
+
+_CRITERIOS_CACHE: Dict[Any, Tuple[Any, CriteriosAceptacion]] = {}
+
+
+def criterios_aceptacion_proyecto(proyecto: Any) -> CriteriosAceptacion:
+    """Matcher de los criterios del proyecto, compilado una vez por proceso y
+    recompilado cuando cambia `modified_at`."""
+    if not proyecto or not hasattr(proyecto, "get_criterios_aceptacion_list"):
+        return CriteriosAceptacion([])
+
+    proyecto_id = getattr(proyecto, "id", None)
+    modified_at = getattr(proyecto, "modified_at", None)
+    if proyecto_id is None or modified_at is None:
+        return CriteriosAceptacion(proyecto.get_criterios_aceptacion_list())
+
+    en_cache = _CRITERIOS_CACHE.get(proyecto_id)
+    if en_cache is not None and en_cache[0] == modified_at:
+        return en_cache[1]
+
+    matcher = CriteriosAceptacion(proyecto.get_criterios_aceptacion_list())
+    if len(_CRITERIOS_CACHE) >= CRITERIOS_CACHE_MAXIMO:
+        _CRITERIOS_CACHE.clear()
+    _CRITERIOS_CACHE[proyecto_id] = (modified_at, matcher)
+    return matcher
+
+
 def filtrar_registros_por_palabras(
     registros: Sequence[Dict[str, Any]],
-    palabras: Iterable[str],
+    palabras: Union[Iterable[str], CriteriosAceptacion],
 ) -> List[Dict[str, Any]]:
-    palabras_normalizadas = [palabra.lower() for palabra in palabras if palabra]
-    if not palabras_normalizadas:
+    criterios = (
+        palabras if isinstance(palabras, CriteriosAceptacion) else CriteriosAceptacion(palabras)
+    )
+    if not criterios:
         return list(registros)
 
-    filtrados: List[Dict[str, Any]] = []
-    for registro in registros:
-        titulo = (registro.get("titulo") or "").lower()
-        contenido = (registro.get("contenido") or "").lower()
-        texto_busqueda = f"{titulo} {contenido}".strip()
-        if any(palabra in texto_busqueda for palabra in palabras_normalizadas):
-            filtrados.append(registro)
-    return filtrados
+    return [registro for registro in registros if criterios.cumple(registro)]
@@ -0,0 +1,174 @@
+"""Cliente HTTP compartido por las integraciones salientes.
+
+Una `requests.Session` por host (esquema + host + puerto) con su pool de
+conexiones keep-alive: los envíos seguidos a WHAPI, monitoreo o SimilarWeb
+reutilizan la conexión TCP+TLS en vez de abrir una por request.
+
+- Timeouts explícitos de conexión y lectura (`HTTP_TIMEOUT_CONEXION`,
+  `HTTP_TIMEOUT_LECTURA`) cuando quien llama no pasa `timeout`.
+- Requests simultáneos por host acotados (`HTTP_CONCURRENCIA_POR_HOST`, o
+  por host en `HTTP_LIMITES_HOST`). Si no se libera un cupo en
+  `HTTP_ESPERA_CUPO_SEGUNDOS` se lanza `CupoHostAgotado`, que es un
+  `requests.ConnectionError`: los `except requests.RequestException` de
+  siempre lo manejan.
+- Contadores por host: requests, errores (excepciones y 5xx), rechazos por
+  cupo y latencia media/máxima (`estadisticas()`).
+
+Las sesiones y los contadores son del proceso. Tras un fork (workers de
+Celery, gunicorn) se crean de nuevo para no compartir sockets.
+"""
+
+import http.cookiejar
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+TIMEOUT_CONEXION = 5
+TIMEOUT_LECTURA = 30
+CONCURRENCIA_POR_HOST = 10
+ESPERA_CUPO_SEGUNDOS = 30
+
+
+class CupoHostAgotado(requests.ConnectionError):
+    """No se liberó un cupo del host a tiempo."""
+
+
+def _config(nombre: str, defecto: Any) -> Any:
+    return getattr(settings, f"HTTP_{nombre}", defecto)
+
+
+def clave_host(url: str) -> str:
+    partes = urlsplit(url)
+    return f"{partes.scheme.lower()}://{partes.netloc.lower()}"
+
+
+def timeout_por_defecto() -> Tuple[float, float]:
+    return (_config("TIMEOUT_CONEXION", TIMEOUT_CONEXION), _config("TIMEOUT_LECTURA", TIMEOUT_LECTURA))
+
+
+class ClienteHost:
+    """Sesión, cupo y contadores de un host."""
+
+    def __init__(self, host: str, limite: int):
+        self.host = host
+        self.limite = max(int(limite), 1)
+        self.sesion = requests.Session()
+        # La sesión es compartida entre integraciones: no guarda cookies
+        self.sesion.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.limite)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self._cupo = threading.BoundedSemaphore(self.limite)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errores = 0
+        self.sin_cupo = 0
+        self.en_curso = 0
+        self.latencia_total = 0.0
+        self.latencia_maxima = 0.0
+
+    def request(self, metodo: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", timeout_por_defecto())
+        if not self._cupo.acquire(timeout=_config("ESPERA_CUPO_SEGUNDOS", ESPERA_CUPO_SEGUNDOS)):
+            with self._lock:
+                self.sin_cupo += 1
+            raise CupoHostAgotado(f"Sin cupo para {self.host} ({self.limite} requests en curso)")
+
+        with self._lock:
+            self.en_curso += 1
+        inicio = time.monotonic()
+        error = True
+        try:
+            response = self.sesion.request(metodo, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            self._cupo.release()
+            self._registrar(time.monotonic() - inicio, error)
+
+    def _registrar(self, latencia: float, error: bool) -> None:
+        with self._lock:
+            self.en_curso -= 1
+            self.requests += 1
+            self.errores += int(error)
+            self.latencia_total += latencia
+            self.latencia_maxima = max(self.latencia_maxima, latencia)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errores": self.errores,
+                "sin_cupo": self.sin_cupo,
+                "en_curso": self.en_curso,
+                "limite": self.limite,
+                "latencia_media_ms": (
+                    round(1000 * self.latencia_total / self.requests, 1) if self.requests else None
+                ),
+                "latencia_maxima_ms": round(1000 * self.latencia_maxima, 1),
+            }
+
+    def cerrar(self) -> None:
+        self.sesion.close()
+
+
+_lock = threading.Lock()
+_clientes: Dict[str, ClienteHost] = {}
+_pid: Optional[int] = None
+
+
+def cliente_para(url: str) -> ClienteHost:
+    global _pid  # pylint: disable=global-statement
+    host = clave_host(url)
+    with _lock:
+        if _pid != os.getpid():
+            # Proceso nuevo (fork): las sesiones heredadas no se usan
+            _clientes.clear()
+            _pid = os.getpid()
+        cliente = _clientes.get(host)
+        if cliente is None:
+            limite = (_config("LIMITES_HOST", None) or {}).get(
+                urlsplit(url).hostname or "", _config("CONCURRENCIA_POR_HOST", CONCURRENCIA_POR_HOST)
+            )
+            cliente = _clientes[host] = ClienteHost(host, limite)
+        return cliente
+
+
+def request(metodo: str, url: str, **kwargs) -> requests.Response:
+    return cliente_para(url).request(metodo, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    # Igual que requests.head: sin seguir redirecciones salvo que se pida
+    kwargs.setdefault("allow_redirects", False)
+    return request("HEAD", url, **kwargs)
+
+
+def estadisticas() -> Dict[str, Dict[str, Any]]:
+    """Contadores por host de este proceso."""
+    with _lock:
+        clientes = list(_clientes.values())
+    return {cliente.host: cliente.estadisticas() for cliente in clientes}
+
+
+def reiniciar() -> None:
+    """Cierra las sesiones y pone los contadores en cero (tests)."""
+    with _lock:
+        clientes = list(_clientes.values())
+        _clientes.clear()
+    for cliente in clientes:
+        cliente.cerrar()
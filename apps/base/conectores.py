@@ -0,0 +1,230 @@
+"""Conectores de sondeo a las APIs de los proveedores.
+
+Cada `ConectorProveedor` consulta `url` con su marca de agua
+(`?<parametro_cursor>=<cursor>`). La API responde
+`{"<campo_resultados>": [...], "<campo_cursor>": "..."}`, al estilo de las
+APIs de Determ/TWK. Cada resultado se aplana a columnas con puntos
+(`extra_author_attributes.name`), como en los exports. Luego pasa por los
+mismos mapeadores de proveedor que la ingesta de archivos, los criterios
+de aceptación, `_persistir_registros` y `_procesar_envio_automatico`
+(pipeline IA o envío automático).
+
+Cada página se confirma junto con el avance del cursor. Si el sondeo falla
+a medias, el siguiente retoma desde la última página guardada; lo que se
+repita lo descarta la deduplicación por URL. El beat
+(`conectores.sondear_vencidos`) encola un sondeo por conector vencido. Un
+compare-and-set sobre `proximo_sondeo` evita sondeos simultáneos del mismo
+conector.
+"""
+
+import logging
+from datetime import timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.base import clientes_http
+from apps.base.models import ConectorProveedor
+
+
+logger = logging.getLogger(__name__)
+
+PAGINAS_POR_SONDEO = 20
+TIMEOUT_SEGUNDOS = 30
+# Backoff tras fallos consecutivos: intervalo * 2^fallos, hasta este máximo
+ESPERA_MAXIMA_SEGUNDOS = 60 * 60
+
+
+class ErrorConector(Exception):
+    pass
+
+
+def _config(nombre: str, defecto: Any) -> Any:
+    return getattr(settings, f"CONECTORES_{nombre}", defecto)
+
+
+def aplanar(objeto: Dict[str, Any], prefijo: str = "") -> Dict[str, Any]:
+    """`{"a": {"b": 1}}` -> `{"a.b": 1}`, con claves normalizadas como los
+    encabezados de un archivo. Las listas quedan como valor."""
+    plano: Dict[str, Any] = {}
+    for clave, valor in objeto.items():
+        nombre = f"{prefijo}{str(clave).strip().lower()}"
+        if isinstance(valor, dict):
+            plano.update(aplanar(valor, f"{nombre}."))
+        else:
+            plano[nombre] = valor
+    return plano
+
+
+def _orden_marca(marca: Any) -> Tuple[int, Any]:
+    """Clave para comparar marcas de agua por su valor y no como texto: los
+    ids numéricos como enteros ("10" > "9") y las fechas como datetime
+    (con su zona horaria). El resto, como texto."""
+    if isinstance(marca, (int, float)) and not isinstance(marca, bool):
+        return (0, marca)
+    texto = str(marca).strip()
+    if texto.isdigit():
+        return (0, int(texto))
+    try:
+        fecha = parse_datetime(texto)
+    except ValueError:
+        fecha = None
+    if fecha is not None:
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha, dt_timezone.utc)
+        return (1, fecha)
+    return (2, texto)
+
+
+def _pedir_pagina(
+    conector: ConectorProveedor, cursor: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    parametros = dict(conector.parametros or {})
+    if cursor:
+        parametros[conector.parametro_cursor] = cursor
+    try:
+        response = clientes_http.get(
+            conector.url,
+            params=parametros,
+            headers=conector.headers or None,
+            timeout=_config("TIMEOUT_SEGUNDOS", TIMEOUT_SEGUNDOS),
+        )
+        response.raise_for_status()
+        cuerpo = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        raise ErrorConector(str(exc)) from exc
+
+    resultados = cuerpo.get(conector.campo_resultados) if isinstance(cuerpo, dict) else cuerpo
+    if not isinstance(resultados, list):
+        raise ErrorConector(f"La respuesta no trae la lista '{conector.campo_resultados}'")
+    items = [item for item in resultados if isinstance(item, dict)]
+
+    nuevo_cursor = cuerpo.get(conector.campo_cursor) if isinstance(cuerpo, dict) else None
+    if nuevo_cursor in (None, "") and conector.campo_marca:
+        marcas = [
+            marca
+            for marca in (aplanar(item).get(conector.campo_marca.lower()) for item in items)
+            if marca not in (None, "")
+        ]
+        nuevo_cursor = max(marcas, key=_orden_marca, default=None)
+        if cursor and nuevo_cursor is not None and _orden_marca(nuevo_cursor) < _orden_marca(cursor):
+            nuevo_cursor = cursor
+    return items, str(nuevo_cursor) if nuevo_cursor not in (None, "") else cursor
+
+
+def _vista(conector: ConectorProveedor):
+    from apps.base.api.ingestion import IngestionAPIView
+
+    view = IngestionAPIView()
+    view._usuario_sistema_cache = conector.created_by  # pylint: disable=protected-access
+    return view
+
+
+def _ingestar_pagina(
+    conector: ConectorProveedor, view, items: List[Dict[str, Any]], cursor: Optional[str]
+) -> Dict[str, int]:
+    """Mapea, filtra y persiste una página y avanza el cursor, todo en una
+    transacción."""
+    # pylint: disable=protected-access
+    proyecto = conector.proyecto
+    filas = [aplanar(item) for item in items]
+    headers = {clave for fila in filas for clave in fila}
+    proveedor = conector.proveedor or view._detectar_proveedor(list(headers))
+    if not proveedor:
+        raise ErrorConector("No fue posible determinar el proveedor de los resultados")
+
+    registros = view._mapear_filas(proveedor, filas, headers)
+    filtrados = view._filtrar_por_criterios(registros, proyecto)
+    conteo = {"recibidos": len(items), "creados": 0, "duplicados": 0, "descartados": len(registros) - len(filtrados)}
+
+    with transaction.atomic():
+        if filtrados:
+            resultado = view._persistir_registros(filtrados, proyecto)
+            respuesta = view._construir_respuesta_exito(
+                filtrados, resultado, view._obtener_nombre_proveedor(proveedor), proyecto
+            )
+            view._procesar_envio_automatico(proyecto, respuesta)
+            if respuesta["listado"]:
+                view._notificar_ruta_externa(respuesta)
+            conteo["creados"] = len(resultado["listado"])
+            conteo["duplicados"] = resultado.get("duplicados", 0)
+            conteo["descartados"] += resultado.get("descartados", 0)
+        ConectorProveedor.objects.filter(id=conector.id).update(cursor=cursor)
+    conector.cursor = cursor
+    return conteo
+
+
+def sondear(conector: ConectorProveedor) -> Dict[str, Any]:
+    """Trae las páginas nuevas desde el cursor guardado hasta agotar los
+    resultados, que el cursor deje de avanzar o `PAGINAS_POR_SONDEO`."""
+    view = _vista(conector)
+    resumen: Dict[str, Any] = {"paginas": 0, "recibidos": 0, "creados": 0, "duplicados": 0, "descartados": 0}
+    maximo_paginas = _config("PAGINAS_POR_SONDEO", PAGINAS_POR_SONDEO)
+    while resumen["paginas"] < maximo_paginas:
+        cursor_anterior = conector.cursor
+        items, cursor = _pedir_pagina(conector, cursor_anterior)
+        if not items:
+            break
+        conteo = _ingestar_pagina(conector, view, items, cursor)
+        resumen["paginas"] += 1
+        for campo, valor in conteo.items():
+            resumen[campo] += valor
+        if cursor == cursor_anterior:
+            break
+    resumen["cursor"] = conector.cursor
+    return resumen
+
+
+def conectores_vencidos() -> List[str]:
+    return [
+        str(conector_id)
+        for conector_id in ConectorProveedor.objects.filter(
+            activo=True, proximo_sondeo__lte=timezone.now()
+        ).values_list("id", flat=True)
+    ]
+
+
+def reclamar(conector_id: str) -> Optional[ConectorProveedor]:
+    """Toma el conector si sigue vencido y corre su próximo sondeo al final
+    del intervalo. Otro worker que llegue después no lo encuentra vencido."""
+    conector = ConectorProveedor.objects.filter(id=conector_id, activo=True).first()
+    if conector is None:
+        return None
+    ahora = timezone.now()
+    tomados = ConectorProveedor.objects.filter(
+        id=conector.id, proximo_sondeo=conector.proximo_sondeo, proximo_sondeo__lte=ahora
+    ).update(proximo_sondeo=ahora + timedelta(seconds=conector.intervalo_segundos))
+    if not tomados:
+        return None
+    return ConectorProveedor.objects.select_related("proyecto", "created_by").get(id=conector.id)
+
+
+def ejecutar(conector: ConectorProveedor) -> Dict[str, Any]:
+    """Sondea y registra el resultado en el conector. Tras un fallo espera
+    con backoff exponencial antes de reintentar."""
+    ahora = timezone.now()
+    try:
+        resumen = sondear(conector)
+    except Exception as exc:  # pylint: disable=broad-except
+        fallos = conector.fallos_consecutivos + 1
+        espera = min(
+            conector.intervalo_segundos * 2 ** fallos,
+            _config("ESPERA_MAXIMA_SEGUNDOS", ESPERA_MAXIMA_SEGUNDOS),
+        )
+        logger.warning("Conector %s falló (%s seguidos): %s", conector.id, fallos, exc)
+        ConectorProveedor.objects.filter(id=conector.id).update(
+            ultimo_sondeo=ahora,
+            fallos_consecutivos=fallos,
+            ultimo_error=str(exc)[:2000],
+            proximo_sondeo=ahora + timedelta(seconds=espera),
+        )
+        return {"error": str(exc), "fallos_consecutivos": fallos}
+
+    ConectorProveedor.objects.filter(id=conector.id).update(
+        ultimo_sondeo=ahora, fallos_consecutivos=0, ultimo_error=None
+    )
+    return resumen
@@ -0,0 +1,109 @@
+"""Rellena `clave_url` en artículos y redes creados antes de la migración 0018.
+
+Recorre cada tabla por lotes en orden de creación; si dos filas del mismo
+proyecto comparten clave, se la queda la que ya la tenía o la más antigua y
+las demás quedan en NULL (la restricción única las admite). Idempotente:
+    python manage.py backfill_clave_url [--lote 2000] [--proyecto <uuid>]
+
+Con `--recalcular` primero pone en NULL las claves que cambiaron con las
+reglas de canonicalización actuales y después las rellena. Las filas que
+con las reglas nuevas resultan repetidas quedan sin clave.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.base.api.canonicalizacion_url import resolutor_configurado
+from apps.base.api.utils import huella_clave_url
+from apps.base.models import Articulo, Redes
+
+
+class Command(BaseCommand):
+    help = "Calcula la clave de deduplicación de URL en filas existentes de Articulo y Redes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por lote")
+        parser.add_argument("--proyecto", help="Limita el backfill a un proyecto (UUID)")
+        parser.add_argument(
+            "--recalcular",
+            action="store_true",
+            help="Recalcula también las claves existentes (tras cambiar las reglas de canonicalización)",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] <= 0:
+            raise CommandError("--lote debe ser mayor que cero")
+
+        # Sin red: las claves de save() también usan solo el cache
+        resolver = resolutor_configurado(consultar=False)
+        for model in (Articulo, Redes):
+            base = model.objects.all()
+            if options["proyecto"]:
+                base = base.filter(proyecto_id=options["proyecto"])
+
+            if options["recalcular"]:
+                invalidadas = self._invalidar_cambiadas(model, base, options["lote"], resolver)
+                self.stdout.write(f"{model.__name__}: {invalidadas} claves cambiaron")
+
+            actualizadas, repetidas = self._backfill(model, base, options["lote"], resolver)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model.__name__}: {actualizadas} filas con clave, "
+                    f"{repetidas} repetidas quedan sin clave"
+                )
+            )
+
+    def _lotes(self, consulta, tamano_lote):
+        """Lotes de `consulta` en orden de creación, paginando por
+        (created_at, id): las filas que siguen cumpliendo el filtro no se
+        vuelven a leer."""
+        consulta = consulta.order_by("created_at", "id")
+        ultimo = None
+        while True:
+            pagina = consulta
+            if ultimo is not None:
+                pagina = pagina.filter(
+                    Q(created_at__gt=ultimo.created_at)
+                    | Q(created_at=ultimo.created_at, id__gt=ultimo.id)
+                )
+            lote = list(
+                pagina.only("id", "url", "proyecto_id", "created_at", "clave_url")[:tamano_lote]
+            )
+            if not lote:
+                return
+            yield lote
+            ultimo = lote[-1]
+
+    def _invalidar_cambiadas(self, model, base, tamano_lote, resolver):
+        invalidadas = 0
+        for lote in self._lotes(base.exclude(clave_url__isnull=True), tamano_lote):
+            cambiadas = [obj.id for obj in lote if huella_clave_url(obj.url, resolver) != obj.clave_url]
+            if cambiadas:
+                model.objects.filter(id__in=cambiadas).update(clave_url=None)
+                invalidadas += len(cambiadas)
+        return invalidadas
+
+    def _backfill(self, model, base, tamano_lote, resolver):
+        actualizadas = repetidas = 0
+        # (proyecto, clave) ya asignadas en esta corrida o en una anterior
+        ocupadas = set(
+            base.exclude(clave_url__isnull=True).values_list("proyecto_id", "clave_url")
+        )
+
+        for lote in self._lotes(base.filter(clave_url__isnull=True), tamano_lote):
+            cambios = []
+            for obj in lote:
+                clave = huella_clave_url(obj.url, resolver)
+                if not clave:
+                    continue
+                if (obj.proyecto_id, clave) in ocupadas:
+                    repetidas += 1
+                    continue
+                ocupadas.add((obj.proyecto_id, clave))
+                obj.clave_url = clave
+                cambios.append(obj)
+
+            model.objects.bulk_update(cambios, ["clave_url"], batch_size=tamano_lote)
+            actualizadas += len(cambios)
+
+        return actualizadas, repetidas
@@ -0,0 +1,494 @@
+"""Benchmark de throughput de la ingesta con archivos sintéticos.
+
+Genera archivos de cada proveedor (TWK medios/redes, Determ, Global News y
+Stakeholders) en CSV y XLSX. Cada archivo pasa por el pipeline de
+`IngestionAPIView` que usa el job asíncrono: extracción y `_ejecutar_ingesta`.
+Por caso y por etapa (parse, map, filter, dedup, bulk_create, dispatch)
+reporta filas/s, RSS pico y número de consultas.
+
+Corre sobre una base de pruebas creada para la ocasión con el motor
+configurado (SQLite o Postgres), así que no toca datos reales. El envío a
+WhatsApp se encola contra un mock, y la notificación externa solo serializa
+el payload. Por eso dispatch mide el trabajo propio, sin red. Uso:
+    python manage.py bench_ingestion [--filas 1000,10000,100000,500000]
+        [--proveedores medios,redes] [--formatos csv,xlsx] [--streaming]
+        [--salida benchmarks/ingestion.json] [--comparar base.json]
+"""
+
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from unittest.mock import patch
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.proyectos.models import Proyecto
+
+
+PROVEEDORES = ("medios", "redes", "determ", "global_news", "stakeholders")
+FORMATOS = ("csv", "xlsx")
+TAMANOS = (1000, 10000, 100000, 500000)
+ETAPAS = ("parse", "map", "filter", "dedup", "bulk_create", "dispatch")
+ETAPA_FLUJO = "parse_map_filter_dedup"
+
+# Métodos de la vista medidos por etapa. `_persistir_registros` incluye
+# bulk_create: dedup es la diferencia entre ambos.
+METODOS_ETAPA = {
+    "_parse_file": "parse",
+    "_mapear_archivos": "map",
+    "_filtrar_por_criterios": "filter",
+    "_persistir_registros": "persistencia",
+    "_bulk_crear_articulos": "bulk_create",
+    "_bulk_crear_redes": "bulk_create",
+    "_procesar_envio_automatico": "dispatch",
+    "_notificar_ruta_externa": "dispatch",
+}
+
+TIPO_ALERTA_PROVEEDOR = {
+    "medios": "medios",
+    "global_news": "medios",
+    "stakeholders": "medios",
+    "redes": "redes",
+    "determ": "redes",
+}
+
+APPS_SIN_MIGRACIONES_SQLITE = ("base", "proyectos", "whatsapp", "ia")
+
+CRITERIO = "energia"
+# Fracción de filas sin el criterio (descartadas) y con URL repetida
+FRACCION_DESCARTE = 0.1
+FRACCION_REPETIDAS = 0.03
+
+PALABRAS = (
+    "gobierno", "mercado", "empresa", "sector", "precio", "petróleo", "región",
+    "anuncio", "informe", "inversión", "proyecto", "comunidad", "ministro",
+)
+REDES = (("twitter.com", "Twitter"), ("facebook.com", "Facebook"), ("instagram.com", "Instagram"))
+MEDIOS_GLOBAL_NEWS = ("Diario", "Cable", "FM", "Revista", "Web")
+
+
+# ----------------------------------------------------------------------
+# Archivos sintéticos
+# ----------------------------------------------------------------------
+def _texto(rnd: random.Random, palabras: int, con_criterio: bool) -> str:
+    texto = [rnd.choice(PALABRAS) for _ in range(palabras)]
+    if con_criterio:
+        texto[rnd.randrange(palabras)] = CRITERIO
+    return " ".join(texto)
+
+
+def generar_filas(
+    proveedor: str, filas: int, semilla: int = 7
+) -> Tuple[List[str], Iterator[List[Any]]]:
+    """Encabezados y filas de un export sintético del proveedor."""
+    if proveedor not in PROVEEDORES:
+        raise ValueError(f"Proveedor desconocido: {proveedor}")
+    rnd = random.Random(semilla)
+    inicio = datetime(2024, 1, 1, 6, 0)
+
+    def _url(indice: int, dominio) -> str:
+        # Una fracción repite la URL (y el dominio) de una fila anterior
+        if indice and rnd.random() < FRACCION_REPETIDAS:
+            indice = rnd.randrange(indice)
+        return f"https://www.{dominio(indice)}/nota/{indice}"
+
+    def _medio(indice: int) -> str:
+        return f"medio{indice % 50}.com"
+
+    def _red(indice: int) -> str:
+        return REDES[indice % len(REDES)][0]
+
+    headers = {
+        "medios": [
+            "title", "content", "published", "extra_source_attributes.name",
+            "extra_author_attributes.name", "reach", "engagement", "url",
+            "extra_source_attributes.world_data.country",
+        ],
+        "redes": [
+            "content", "published", "extra_author_attributes.name",
+            "extra_author_attributes.short_name", "reach", "engagement", "url",
+            "domain_url",
+        ],
+        "determ": [
+            "date", "time", "author", "mention_snippet", "reach", "engagement_rate",
+            "url", "social_network",
+        ],
+        "global_news": [
+            "Fecha", "Hora", "Medio", "Tipo de Medio", "Autor - Conductor", "Título",
+            "Resumen - Aclaración", "Audiencia", "Link (Streaming - Imagen)",
+        ],
+        "stakeholders": [
+            "Fecha", "Autor", "Fuente", "Medio", "Titular", "Resumen", "Audiencia", "url",
+        ],
+    }[proveedor]
+
+    def _filas() -> Iterator[List[Any]]:
+        for indice in range(filas):
+            fecha = inicio + timedelta(minutes=7 * indice)
+            contenido = _texto(rnd, 40, rnd.random() >= FRACCION_DESCARTE)
+            titulo = _texto(rnd, 8, False).capitalize()
+            alcance = rnd.randrange(100, 1_000_000)
+            if proveedor == "medios":
+                yield [
+                    titulo, contenido, fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                    _medio(indice), f"Autor {indice % 300}", alcance,
+                    rnd.randrange(0, 500), _url(indice, _medio), "Colombia",
+                ]
+            elif proveedor == "redes":
+                url = _url(indice, _red)
+                yield [
+                    contenido, fecha.strftime("%Y-%m-%d %H:%M:%S"), f"Usuario {indice % 900}",
+                    f"usuario{indice % 900}", alcance, rnd.randrange(0, 500),
+                    url, url.split("/")[2][4:],
+                ]
+            elif proveedor == "determ":
+                url = _url(indice, _red)
+                yield [
+                    fecha.strftime("%d/%m/%Y"), fecha.strftime("%H:%M"), f"usuario{indice % 900}",
+                    contenido, alcance, f"{rnd.randrange(0, 100)}", url,
+                    dict(REDES)[url.split("/")[2][4:]],
+                ]
+            elif proveedor == "global_news":
+                yield [
+                    fecha.strftime("%d/%m/%Y"), fecha.strftime("%H:%M:%S"),
+                    f"Medio {indice % 40}", rnd.choice(MEDIOS_GLOBAL_NEWS),
+                    f"Conductor {indice % 120}", titulo, contenido, alcance,
+                    _url(indice, lambda n: f"globalnews{n % 40}.com"),
+                ]
+            else:
+                yield [
+                    fecha.strftime("%d/%m/%Y"), f"Autor {indice % 300}", f"Fuente {indice % 60}",
+                    rnd.choice(("Internet", "Prensa", "Radio")), titulo, contenido, alcance,
+                    _url(indice, lambda n: f"fuente{n % 60}.com"),
+                ]
+
+    return headers, _filas()
+
+
+def escribir_archivo(headers: Sequence[str], filas: Iterator[List[Any]], formato: str, destino) -> None:
+    if formato == "csv":
+        texto = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+        escritor = csv.writer(texto)
+        escritor.writerow(headers)
+        escritor.writerows(filas)
+        texto.flush()
+        texto.detach()
+    elif formato == "xlsx":
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet()
+        hoja.append(list(headers))
+        for fila in filas:
+            hoja.append(fila)
+        libro.save(destino)
+    else:
+        raise ValueError(f"Formato desconocido: {formato}")
+
+
+# ----------------------------------------------------------------------
+# Medición
+# ----------------------------------------------------------------------
+def _leer_memoria_mb() -> Tuple[float, float]:
+    """(RSS actual, RSS pico) del proceso en MB."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            valores = dict(linea.split(":", 1) for linea in status if ":" in linea)
+        return (
+            int(valores["VmRSS"].split()[0]) / 1024,
+            int(valores["VmHWM"].split()[0]) / 1024,
+        )
+    except (OSError, KeyError, ValueError):
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico_mb = pico / (1024 * 1024) if platform.system() == "Darwin" else pico / 1024
+        return pico_mb, pico_mb
+
+
+def _reiniciar_pico_memoria() -> None:
+    # Linux >= 4.0: reinicia VmHWM para medir el pico de cada caso
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+class MedidorEtapas:
+    """Acumula tiempo y consultas por etapa envolviendo métodos de la vista.
+    Las etapas pueden anidarse: cada consulta suma en todas las activas."""
+
+    def __init__(self):
+        self.segundos: Dict[str, float] = {}
+        self.consultas: Dict[str, int] = {}
+        self.memoria: Dict[str, Tuple[float, float]] = {}
+        self.consultas_total = 0
+        self._activas: List[str] = []
+
+    def contar_consulta(self, execute, sql, params, many, context):
+        self.consultas_total += 1
+        for etapa in set(self._activas):
+            self.consultas[etapa] = self.consultas.get(etapa, 0) + 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def medir(self, etapa: str):
+        self._activas.append(etapa)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.segundos[etapa] = self.segundos.get(etapa, 0.0) + time.perf_counter() - inicio
+            self._activas.pop()
+            self.memoria[etapa] = _leer_memoria_mb()
+
+    def envolver(self, etapa: str, metodo):
+        def _medido(*args, **kwargs):
+            with self.medir(etapa):
+                return metodo(*args, **kwargs)
+
+        return _medido
+
+    def instrumentar(self, view: IngestionAPIView) -> None:
+        for nombre, etapa in METODOS_ETAPA.items():
+            setattr(view, nombre, self.envolver(etapa, getattr(view, nombre)))
+
+    def resumen(self, filas: int, streaming: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Métricas por etapa. En streaming parse, map y filter se consumen
+        dentro de la persistencia: junto con dedup salen en `flujo`."""
+        segundos = dict(self.segundos)
+        consultas = dict(self.consultas)
+        etapa_resto = ETAPA_FLUJO if streaming else "dedup"
+        segundos[etapa_resto] = segundos.pop("persistencia", 0.0) - segundos.get("bulk_create", 0.0)
+        consultas[etapa_resto] = consultas.pop("persistencia", 0) - consultas.get("bulk_create", 0)
+        self.memoria[etapa_resto] = self.memoria.get("persistencia", (0.0, 0.0))
+
+        etapas = {}
+        for etapa in (ETAPA_FLUJO,) + ETAPAS:
+            if etapa not in segundos:
+                continue
+            rss, pico = self.memoria.get(etapa, (0.0, 0.0))
+            etapas[etapa] = {
+                "segundos": round(segundos[etapa], 4),
+                "filas_por_segundo": round(filas / segundos[etapa], 1) if segundos[etapa] > 0 else None,
+                "consultas": consultas.get(etapa, 0),
+                "rss_mb": round(rss, 1),
+                "rss_pico_mb": round(pico, 1),
+            }
+        return etapas
+
+
+def _notificacion_sin_red(payload: Dict[str, Any]) -> None:
+    # Lo que haría requests.post antes de enviar
+    json.dumps(payload, default=str)
+
+
+def ejecutar_caso(
+    proveedor: str,
+    formato: str,
+    filas: int,
+    directorio: str,
+    usuario=None,
+    streaming: bool = False,
+) -> Dict[str, Any]:
+    """Genera el archivo, lo ingesta en un proyecto nuevo y devuelve las
+    métricas del caso."""
+    nombre = f"{proveedor}_{filas}.{formato}"
+    ruta = os.path.join(directorio, nombre)
+    headers, generadas = generar_filas(proveedor, filas)
+    with open(ruta, "wb") as destino:
+        escribir_archivo(headers, generadas, formato, destino)
+
+    proyecto = Proyecto.objects.create(
+        nombre=f"Benchmark {nombre}",
+        codigo_acceso="bench@g.us",
+        tipo_alerta=TIPO_ALERTA_PROVEEDOR[proveedor],
+        tipo_envio="automatico",
+        criterios_aceptacion=CRITERIO,
+    )
+
+    view = IngestionAPIView()
+    view._usuario_sistema_cache = usuario  # pylint: disable=protected-access
+    view._notificar_ruta_externa = _notificacion_sin_red  # pylint: disable=protected-access
+    medidor = MedidorEtapas()
+    medidor.instrumentar(view)
+
+    _reiniciar_pico_memoria()
+    inicio = time.perf_counter()
+    with open(ruta, "rb") as abierto, connection.execute_wrapper(
+        medidor.contar_consulta
+    ), patch("apps.whatsapp.services.buzon_lotes.encolar_lote"):
+        archivo = File(abierto, name=nombre)
+        tipo_alerta = view._obtener_tipo_alerta_proyecto(proyecto)  # pylint: disable=protected-access
+        registros, proveedor_detectado, error = view._extraer_registros_de_archivos(  # pylint: disable=protected-access
+            [archivo], tipo_alerta, streaming=streaming
+        )
+        if error is not None:
+            raise CommandError(f"{nombre}: {error.data.get('detail')}")
+        respuesta, status = view._ejecutar_ingesta(  # pylint: disable=protected-access
+            registros, proveedor_detectado, proyecto
+        )
+    segundos = time.perf_counter() - inicio
+    _, pico = _leer_memoria_mb()
+
+    return {
+        "proveedor": proveedor,
+        "formato": formato,
+        "filas": filas,
+        "bytes": os.path.getsize(ruta),
+        "streaming": streaming,
+        "proveedor_detectado": proveedor_detectado,
+        "status": status,
+        "creados": len(respuesta.get("listado") or []),
+        "duplicados": respuesta.get("duplicados", 0),
+        "descartados": respuesta.get("descartados", 0),
+        "segundos": round(segundos, 4),
+        "filas_por_segundo": round(filas / segundos, 1) if segundos > 0 else None,
+        "consultas": medidor.consultas_total,
+        "rss_pico_mb": round(pico, 1),
+        "etapas": medidor.resumen(filas, streaming),
+    }
+
+
+def _clave_caso(caso: Dict[str, Any]) -> Tuple[Any, ...]:
+    return caso["proveedor"], caso["formato"], caso["filas"], caso.get("streaming", False)
+
+
+def comparar(base: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """Líneas con la variación de filas/s, consultas y RSS pico por caso."""
+    anteriores = {_clave_caso(caso): caso for caso in base.get("casos", [])}
+    lineas = []
+    for caso in actual.get("casos", []):
+        anterior = anteriores.get(_clave_caso(caso))
+        if anterior is None:
+            continue
+        variacion = None
+        if anterior.get("filas_por_segundo") and caso.get("filas_por_segundo"):
+            variacion = (caso["filas_por_segundo"] / anterior["filas_por_segundo"] - 1) * 100
+        lineas.append(
+            f"{caso['proveedor']:<13}{caso['formato']:<5}{caso['filas']:>8} filas  "
+            f"filas/s {anterior['filas_por_segundo']} -> {caso['filas_por_segundo']}"
+            + (f" ({variacion:+.1f}%)" if variacion is not None else "")
+            + f"  consultas {anterior['consultas']} -> {caso['consultas']}"
+            f"  rss pico {anterior['rss_pico_mb']} -> {caso['rss_pico_mb']} MB"
+        )
+    return lineas
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _lista(valor: str) -> List[str]:
+    return [item.strip() for item in valor.split(",") if item.strip()]
+
+
+class Command(BaseCommand):
+    help = "Mide el throughput de la ingesta por etapa con archivos sintéticos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--filas", default=",".join(str(tamano) for tamano in TAMANOS),
+            help="Tamaños de archivo separados por coma",
+        )
+        parser.add_argument("--proveedores", default=",".join(PROVEEDORES))
+        parser.add_argument("--formatos", default=",".join(FORMATOS))
+        parser.add_argument(
+            "--streaming", action="store_true", help="Usa la lectura en flujo de la vista"
+        )
+        parser.add_argument("--salida", help="Ruta del JSON de resultados")
+        parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(valor) for valor in _lista(options["filas"])]
+        except ValueError as exc:
+            raise CommandError("--filas debe ser una lista de enteros") from exc
+        proveedores = _lista(options["proveedores"])
+        formatos = _lista(options["formatos"])
+        desconocidos = (set(proveedores) - set(PROVEEDORES)) | (set(formatos) - set(FORMATOS))
+        if desconocidos:
+            raise CommandError(f"Valores desconocidos: {', '.join(sorted(desconocidos))}")
+
+        base = None
+        if options["comparar"]:
+            with open(options["comparar"], encoding="utf-8") as entrada:
+                base = json.load(entrada)
+
+        resultado = {
+            "generado": timezone.now().isoformat(),
+            "commit": _commit_actual(),
+            "motor": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cpus": os.cpu_count(),
+            "casos": [],
+        }
+
+        with tempfile.TemporaryDirectory(prefix="bench_ingestion_") as directorio:
+            nombre_original = self._crear_base_pruebas(directorio)
+            try:
+                usuario = get_user_model().objects.create_user(username="bench_ingestion")
+                for proveedor in proveedores:
+                    for formato in formatos:
+                        for filas in tamanos:
+                            caso = ejecutar_caso(
+                                proveedor, formato, filas, directorio, usuario, options["streaming"]
+                            )
+                            resultado["casos"].append(caso)
+                            self.stdout.write(
+                                f"{proveedor:<13}{formato:<5}{filas:>8} filas  "
+                                f"{caso['filas_por_segundo']} filas/s  "
+                                f"{caso['consultas']} consultas  {caso['rss_pico_mb']} MB"
+                            )
+            finally:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        salida = options["salida"] or os.path.join(
+            "benchmarks", f"ingestion-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+        with open(salida, "w", encoding="utf-8") as archivo_salida:
+            json.dump(resultado, archivo_salida, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {salida}"))
+
+        if base is not None:
+            for linea in comparar(base, resultado):
+                self.stdout.write(linea)
+
+    def _crear_base_pruebas(self, directorio: str) -> str:
+        nombre_original = connection.settings_dict["NAME"]
+        migraciones = {}
+        if connection.vendor == "sqlite":
+            # En archivo y no en memoria, como la base real. Las migraciones
+            # legacy no aplican sobre SQLite: el esquema sale de los modelos,
+            # igual que en los tests (ver MIGRATION_MODULES en settings).
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(
+                directorio, "bench.sqlite3"
+            )
+            migraciones = {app: None for app in APPS_SIN_MIGRACIONES_SQLITE}
+        with override_settings(MIGRATION_MODULES=migraciones):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return nombre_original
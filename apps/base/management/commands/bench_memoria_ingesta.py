@@ -0,0 +1,161 @@
+"""Benchmark de memoria retenida por fila en la ingesta.
+
+Genera un archivo sintético por proveedor y formato (ver `bench_ingestion`).
+Lo parsea y mapea con `IngestionAPIView` y mide con `tracemalloc` los bytes
+que quedan retenidos por fila en dos representaciones:
+- compacta: `Fila` y `RegistroAlerta`, la que usa el pipeline;
+- dict: las mismas filas y registros como dicts, con `datos_adicionales`
+  materializado, como se representaban antes.
+
+También reporta los objetos rastreados por el GC en cada caso. No toca la
+base de datos. Uso:
+    python manage.py bench_memoria_ingesta [--filas 10000,100000]
+        [--proveedores medios,redes] [--formatos csv,xlsx]
+        [--salida benchmarks/memoria.json]
+"""
+
+import gc
+import io
+import json
+import os
+import platform
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.registros import Fila, RegistroAlerta
+from apps.base.management.commands.bench_ingestion import (
+    FORMATOS,
+    PROVEEDORES,
+    _commit_actual,
+    _lista,
+    escribir_archivo,
+    generar_filas,
+)
+
+
+TAMANOS = (10000, 100000)
+
+
+def _retenido(construir: Callable[[], Any]) -> Dict[str, Any]:
+    """Bytes que siguen asignados y objetos rastreados por el GC después de
+    `construir`, mientras su resultado siga vivo."""
+    gc.collect()
+    objetos_antes = len(gc.get_objects())
+    tracemalloc.start()
+    try:
+        antes, _ = tracemalloc.get_traced_memory()
+        resultado = construir()
+        gc.collect()
+        despues, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    objetos = len(gc.get_objects()) - objetos_antes
+    del resultado
+    return {"bytes": despues - antes, "pico_bytes": pico - antes, "objetos_gc": objetos}
+
+
+def _registro_como_dict(registro) -> Dict[str, Any]:
+    # Como se armaba antes: dict con todas las columnas en datos_adicionales
+    return dict(registro.items())
+
+
+def _copiar_registro(registro: RegistroAlerta) -> RegistroAlerta:
+    campos = {campo: getattr(registro, campo) for campo in registro.CAMPOS if hasattr(registro, campo)}
+    return RegistroAlerta(registro.fila, **campos)
+
+
+def medir_caso(proveedor: str, formato: str, filas: int) -> Dict[str, Any]:
+    """Memoria retenida por cada representación de las filas parseadas y de
+    los registros mapeados de un archivo. Ambas representaciones comparten
+    los mismos valores: se mide el costo de los contenedores."""
+    headers, generadas = generar_filas(proveedor, filas)
+    contenido = io.BytesIO()
+    escribir_archivo(headers, generadas, formato, contenido)
+
+    view = IngestionAPIView()
+    contenido.seek(0)
+    headers, rows = view._parse_file(contenido, f".{formato}")  # pylint: disable=protected-access
+    headers, rows = view._normalizar_columnas_url(headers, rows)  # pylint: disable=protected-access
+    detectado = view._detectar_proveedor(headers)  # pylint: disable=protected-access
+    registros = view._mapear_filas(detectado, rows, headers)  # pylint: disable=protected-access
+
+    mediciones = {
+        "filas": {
+            "compacta": _retenido(lambda: [Fila(row.esquema, tuple(list(row.valores))) for row in rows]),
+            "dict": _retenido(lambda: [dict(row.items()) for row in rows]),
+        },
+        "registros": {
+            "compacta": _retenido(lambda: [_copiar_registro(registro) for registro in registros]),
+            "dict": _retenido(lambda: [_registro_como_dict(registro) for registro in registros]),
+        },
+    }
+    for representaciones in mediciones.values():
+        for medicion in representaciones.values():
+            medicion["bytes_por_fila"] = round(medicion["bytes"] / filas, 1) if filas else None
+        if representaciones["compacta"]["bytes"] > 0:
+            representaciones["ahorro"] = round(
+                1 - representaciones["compacta"]["bytes"] / representaciones["dict"]["bytes"], 3
+            )
+
+    return {
+        "proveedor": proveedor,
+        "formato": formato,
+        "filas": filas,
+        "proveedor_detectado": detectado,
+        "mediciones": mediciones,
+    }
+
+
+class Command(BaseCommand):
+    help = "Mide la memoria retenida por fila en el parseo y el mapeo de la ingesta"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--filas", default=",".join(str(tamano) for tamano in TAMANOS),
+            help="Tamaños de archivo separados por coma",
+        )
+        parser.add_argument("--proveedores", default=",".join(PROVEEDORES))
+        parser.add_argument("--formatos", default=",".join(FORMATOS))
+        parser.add_argument("--salida", help="Ruta del JSON de resultados")
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(valor) for valor in _lista(options["filas"])]
+        except ValueError as exc:
+            raise CommandError("--filas debe ser una lista de enteros") from exc
+        proveedores = _lista(options["proveedores"])
+        formatos = _lista(options["formatos"])
+        desconocidos = (set(proveedores) - set(PROVEEDORES)) | (set(formatos) - set(FORMATOS))
+        if desconocidos:
+            raise CommandError(f"Valores desconocidos: {', '.join(sorted(desconocidos))}")
+
+        resultado: Dict[str, Any] = {
+            "generado": timezone.now().isoformat(),
+            "commit": _commit_actual(),
+            "python": platform.python_version(),
+            "casos": [],
+        }
+        casos: List[Dict[str, Any]] = resultado["casos"]
+        for proveedor in proveedores:
+            for formato in formatos:
+                for filas in tamanos:
+                    caso = medir_caso(proveedor, formato, filas)
+                    casos.append(caso)
+                    self.stdout.write(
+                        f"{proveedor:<13}{formato:<5}{filas:>8} filas  "
+                        + "  ".join(
+                            f"{etapa} {medicion['compacta']['bytes_por_fila']} vs "
+                            f"{medicion['dict']['bytes_por_fila']} B/fila"
+                            for etapa, medicion in caso["mediciones"].items()
+                        )
+                    )
+
+        if options["salida"]:
+            os.makedirs(os.path.dirname(options["salida"]) or ".", exist_ok=True)
+            with open(options["salida"], "w", encoding="utf-8") as archivo_salida:
+                json.dump(resultado, archivo_salida, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
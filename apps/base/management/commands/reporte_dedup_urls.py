@@ -0,0 +1,162 @@
+"""Cuánto mejora la deduplicación con la canonicalización de URLs.
+
+Compara, sobre URLs históricas, cuántas quedan como alertas distintas con
+la clave anterior (normalizar_url + x.com como twitter.com) y con las reglas
+de `canonicalizacion_url`. La deduplicación es por proyecto: desde la base
+se agrupan por proyecto. Un archivo (`--archivo`, una URL por línea o un
+CSV con columna `url`) cuenta como un solo grupo. Uso:
+    python manage.py reporte_dedup_urls [--proyecto <uuid>] [--limite 50000]
+        [--archivo urls.txt] [--resolver] [--ejemplos 10] [--json]
+
+Con `--resolver` sigue las redirecciones de los links cortos (sale a la red
+para lo que no esté en el cache).
+"""
+
+import csv
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.api.canonicalizacion_url import Resolutor, regla_para, resolver_url_corta
+from apps.base.api.utils import construir_clave_url, normalizar_url
+from apps.base.models import Articulo, Redes
+
+
+def clave_url_anterior(url: Optional[str]) -> Optional[str]:
+    """La clave de deduplicación previa a las reglas por red."""
+    normalizada = normalizar_url(url)
+    if not normalizada:
+        return None
+    parsed = urlparse(normalizada)
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    if netloc == "x.com":
+        netloc = "twitter.com"
+    partes = [netloc, (parsed.path or "").rstrip("/"), parsed.params, parsed.query, parsed.fragment]
+    return "|".join(partes)
+
+
+def _red_de_clave(clave: str) -> str:
+    regla = regla_para(clave.split("|", 1)[0])
+    return regla.nombre if regla is not None else "otros"
+
+
+def medir_deduplicacion(
+    grupos: Iterable[Iterable[str]],
+    resolver: Optional[Resolutor] = None,
+    ejemplos: int = 0,
+) -> Dict[str, Any]:
+    """Claves distintas con cada criterio sobre `grupos` de URLs (una
+    deduplicación independiente por grupo, como por proyecto)."""
+    total = distintas_antes = distintas_ahora = 0
+    por_red: Dict[str, int] = defaultdict(int)
+    muestras: List[Dict[str, Any]] = []
+
+    for urls in grupos:
+        # clave actual -> claves anteriores que junta, con una URL de cada una
+        fusionadas: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for url in urls:
+            anterior = clave_url_anterior(url)
+            actual = construir_clave_url(url, resolver)
+            if not anterior or not actual:
+                continue
+            total += 1
+            fusionadas[actual].setdefault(anterior, url)
+
+        distintas_ahora += len(fusionadas)
+        for actual, anteriores in fusionadas.items():
+            distintas_antes += len(anteriores)
+            if len(anteriores) > 1:
+                por_red[_red_de_clave(actual)] += len(anteriores) - 1
+                if len(muestras) < ejemplos:
+                    muestras.append({"clave": actual, "urls": list(anteriores.values())})
+
+    def _tasa(distintas: int) -> float:
+        return round(100 * (total - distintas) / total, 2) if total else 0.0
+
+    return {
+        "urls": total,
+        "anterior": {"distintas": distintas_antes, "duplicados": total - distintas_antes, "tasa": _tasa(distintas_antes)},
+        "actual": {"distintas": distintas_ahora, "duplicados": total - distintas_ahora, "tasa": _tasa(distintas_ahora)},
+        "duplicados_adicionales": distintas_antes - distintas_ahora,
+        "por_red": dict(sorted(por_red.items(), key=lambda item: -item[1])),
+        "ejemplos": muestras,
+    }
+
+
+def _urls_de_archivo(ruta: str) -> List[str]:
+    with open(ruta, encoding="utf-8-sig", newline="") as archivo:
+        if ruta.lower().endswith(".csv"):
+            lector = csv.DictReader(archivo)
+            if "url" not in (lector.fieldnames or []):
+                raise CommandError("El CSV no tiene columna 'url'")
+            return [fila["url"] for fila in lector if fila.get("url")]
+        return [linea.strip() for linea in archivo if linea.strip()]
+
+
+def _urls_por_proyecto(proyecto_id: Optional[str], limite: Optional[int]) -> List[List[str]]:
+    grupos: Dict[Any, List[str]] = defaultdict(list)
+    for model in (Articulo, Redes):
+        consulta = model.objects.exclude(url__isnull=True).exclude(url="")
+        if proyecto_id:
+            consulta = consulta.filter(proyecto_id=proyecto_id)
+        consulta = consulta.order_by("-created_at").values_list("proyecto_id", "url")
+        if limite:
+            consulta = consulta[:limite]
+        for proyecto, url in consulta.iterator(chunk_size=2000):
+            grupos[(model.__name__, proyecto)].append(url)
+    return list(grupos.values())
+
+
+class Command(BaseCommand):
+    help = "Compara la tasa de deduplicación de URLs con la clave anterior y la canonicalización actual"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proyecto", help="Limita el reporte a un proyecto (UUID)")
+        parser.add_argument("--limite", type=int, help="Últimas N URLs por tabla")
+        parser.add_argument("--archivo", help="Archivo con una URL por línea o CSV con columna url")
+        parser.add_argument("--resolver", action="store_true", help="Resuelve los links cortos")
+        parser.add_argument("--ejemplos", type=int, default=10, help="Grupos fusionados a mostrar")
+        parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    def handle(self, *args, **options):
+        if options["archivo"]:
+            grupos = [_urls_de_archivo(options["archivo"])]
+        else:
+            grupos = _urls_por_proyecto(options["proyecto"], options["limite"])
+
+        reporte = medir_deduplicacion(
+            grupos,
+            resolver_url_corta if options["resolver"] else None,
+            options["ejemplos"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(reporte, ensure_ascii=False, indent=2))
+            return
+
+        anterior, actual = reporte["anterior"], reporte["actual"]
+        self.stdout.write(f"URLs analizadas: {reporte['urls']}")
+        self.stdout.write(
+            f"Clave anterior: {anterior['distintas']} distintas, "
+            f"{anterior['duplicados']} duplicados ({anterior['tasa']}%)"
+        )
+        self.stdout.write(
+            f"Canonicalización: {actual['distintas']} distintas, "
+            f"{actual['duplicados']} duplicados ({actual['tasa']}%)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Duplicados adicionales: {reporte['duplicados_adicionales']} "
+                f"(+{round(actual['tasa'] - anterior['tasa'], 2)} puntos)"
+            )
+        )
+        for red, cantidad in reporte["por_red"].items():
+            self.stdout.write(f"  {red}: {cantidad}")
+        for ejemplo in reporte["ejemplos"]:
+            self.stdout.write(f"{ejemplo['clave']}")
+            for url in ejemplo["urls"]:
+                self.stdout.write(f"    {url}")
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:16
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('proyectos', '0006_alter_proyecto_proveedor'),
+        ('base', '0016_detalleenvio_estado_pipeline_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestaJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], db_index=True, default='pendiente', max_length=15)),
+                ('archivos', models.JSONField(blank=True, default=list, help_text='[{"nombre": "...", "ruta": "..."}]')),
+                ('filas_parseadas', models.PositiveIntegerField(default=0)),
+                ('creados', models.PositiveIntegerField(default=0)),
+                ('duplicados', models.PositiveIntegerField(default=0)),
+                ('descartados', models.PositiveIntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('codigo_http', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('inicio', models.DateTimeField(blank=True, null=True)),
+                ('fin', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_creado_por', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('modified_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_modificado_por', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingesta_jobs', to='proyectos.proyecto', verbose_name='Proyecto')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0017_ingestajob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='clave_url',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 de la URL normalizada; única por proyecto', max_length=64, null=True, verbose_name='Clave de deduplicación'),
+        ),
+        migrations.AddField(
+            model_name='redes',
+            name='clave_url',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 de la URL normalizada; única por proyecto', max_length=64, null=True, verbose_name='Clave de deduplicación'),
+        ),
+        migrations.AddConstraint(
+            model_name='articulo',
+            constraint=models.UniqueConstraint(fields=('proyecto', 'clave_url'), name='articulo_proyecto_clave_url_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='redes',
+            constraint=models.UniqueConstraint(fields=('proyecto', 'clave_url'), name='redes_proyecto_clave_url_unica'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:41
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0006_alter_proyecto_proveedor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0018_clave_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HuellaIngesta',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+                ('huella', models.CharField(help_text='SHA-256 del contenido de los archivos', max_length=64)),
+                ('firma_criterios', models.CharField(max_length=64)),
+                ('archivos', models.JSONField(blank=True, default=list)),
+                ('filas_nuevas', models.PositiveIntegerField(default=0)),
+                ('filas_omitidas', models.PositiveIntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('codigo_http', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_creado_por', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('modified_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_modificado_por', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='huellas_ingesta', to='proyectos.proyecto', verbose_name='Proyecto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HuellaFilaIngesta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('huella', models.CharField(max_length=32)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='huellas_filas_ingesta', to='proyectos.proyecto')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='huellaingesta',
+            constraint=models.UniqueConstraint(fields=('proyecto', 'huella', 'firma_criterios'), name='huella_ingesta_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='huellafilaingesta',
+            constraint=models.UniqueConstraint(fields=('proyecto', 'huella'), name='huella_fila_ingesta_unica'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:48
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0019_huellas_ingesta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MensajeSaliente',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+                ('destino', models.CharField(choices=[('monitoreo', 'API de monitoreo'), ('ruta_externa', 'Ruta externa'), ('forward', 'Reenvío de payload')], max_length=20)),
+                ('url', models.TextField()),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('clave_agrupacion', models.CharField(blank=True, max_length=64, null=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=15)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_error', models.TextField(blank=True, null=True)),
+                ('codigo_http', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('enviado_en', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_creado_por', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('modified_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_modificado_por', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='base_mensaj_estado_46b265_idx')],
+            },
+        ),
+    ]
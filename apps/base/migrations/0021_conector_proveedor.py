@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0006_alter_proyecto_proveedor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0020_mensaje_saliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConectorProveedor',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+                ('nombre', models.CharField(max_length=150)),
+                ('proveedor', models.CharField(blank=True, choices=[('', 'Detectar por campos'), ('medios', 'Medios TWK'), ('redes', 'Redes TWK'), ('determ', 'Determ'), ('determ_medios', 'Determ medios'), ('global_news', 'Global News'), ('stakeholders', 'Stakeholders')], default='', max_length=20)),
+                ('url', models.TextField()),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('parametros', models.JSONField(blank=True, default=dict, help_text='Query params fijos')),
+                ('parametro_cursor', models.CharField(default='since', max_length=50)),
+                ('campo_resultados', models.CharField(default='results', max_length=50)),
+                ('campo_cursor', models.CharField(default='next_cursor', max_length=50)),
+                ('campo_marca', models.CharField(blank=True, default='', max_length=100)),
+                ('cursor', models.TextField(blank=True, null=True)),
+                ('activo', models.BooleanField(default=True)),
+                ('intervalo_segundos', models.PositiveIntegerField(default=300)),
+                ('proximo_sondeo', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_sondeo', models.DateTimeField(blank=True, null=True)),
+                ('fallos_consecutivos', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo_error', models.TextField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_creado_por', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('modified_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_modificado_por', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conectores', to='proyectos.proyecto', verbose_name='Proyecto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['activo', 'proximo_sondeo'], name='base_conect_activo_67da69_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0021_conector_proveedor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleenvio',
+            name='envio_tomado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicaldetalleenvio',
+            name='envio_tomado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
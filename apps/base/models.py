@@ -1,10 +1,13 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django_currentuser.middleware import get_current_user
 import uuid
 from simple_history.models import HistoricalRecords
 from apps.proyectos.models import Proyecto
+from apps.base.api.canonicalizacion_url import resolutor_configurado
+from apps.base.api.utils import huella_clave_url
 
 
 
@@ -55,7 +58,84 @@ class BaseModel(IdToken):
 
 
 
-class Articulo(BaseModel):
+_SIN_CARGAR = object()
+
+
+class ClaveUrlMixin(models.Model):
+    """Mantiene `clave_url` (huella de la URL normalizada) sincronizada con
+    `url`. Los `bulk_create` no pasan por save(): deben fijarla ellos. Los
+    links cortos solo se resuelven si ya están en el cache: save() no sale
+    a la red.
+
+    En una fila existente la clave solo se recalcula si cambió `url`: así
+    no se pisa una clave que vino del resolutor (el cache del link corto
+    puede haber vencido) ni se aplica la regla de canonicalización nueva a
+    filas que `backfill_clave_url --recalcular` no tocó. Una
+    fila sin clave (repetida que `backfill_clave_url` dejó en NULL) la toma
+    solo si ninguna otra fila del proyecto la tiene; si no, sigue en NULL y
+    se puede editar sin chocar con la restricción única."""
+
+    clave_url = models.CharField(
+        "Clave de deduplicación",
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 de la URL normalizada; única por proyecto",
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._url_guardada = instancia.__dict__.get("url", _SIN_CARGAR)
+        return instancia
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._url_guardada = self.__dict__.get("url", _SIN_CARGAR)
+
+    def _calcular_clave_url(self):
+        return huella_clave_url(self.url, resolutor_configurado(consultar=False))
+
+    def _actualizar_clave_url(self) -> bool:
+        """Fija la clave que corresponde guardar; True si la cambió."""
+        url_guardada = getattr(self, "_url_guardada", _SIN_CARGAR)
+        if self._state.adding:
+            # Una clave ya fijada (calculada con el resolutor de red) se respeta
+            if self.clave_url is None:
+                self.clave_url = self._calcular_clave_url()
+            return True
+        if url_guardada is not _SIN_CARGAR and url_guardada != self.url:
+            self.clave_url = self._calcular_clave_url()
+            return True
+        if self.clave_url is not None:
+            return False
+
+        clave = self._calcular_clave_url()
+        if clave is None:
+            return False
+        ocupada = (
+            type(self)._default_manager.filter(proyecto_id=self.proyecto_id, clave_url=clave)
+            .exclude(pk=self.pk)
+            .exists()
+        )
+        if ocupada:
+            return False
+        self.clave_url = clave
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if self._actualizar_clave_url() and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "clave_url"}
+        super().save(*args, **kwargs)
+        self._url_guardada = self.url
+
+    class Meta:
+        abstract = True
+
+
+class Articulo(ClaveUrlMixin, BaseModel):
     titulo = models.CharField(verbose_name="title", max_length=500, null=True, blank=True)
     contenido = models.TextField(verbose_name="content", null=True, blank=True)
     url = models.URLField(verbose_name="url",max_length=5000, unique=False, blank=True)
@@ -73,10 +153,17 @@ class Articulo(BaseModel):
         verbose_name="Proyecto"
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "clave_url"], name="articulo_proyecto_clave_url_unica"
+            ),
+        ]
+
 class RedesSociales(BaseModel):
     nombre = models.CharField(max_length=100)
 
-class Redes(BaseModel):
+class Redes(ClaveUrlMixin, BaseModel):
     contenido = models.TextField(verbose_name="Contenido",null=True, blank=True)
     fecha_publicacion = models.DateTimeField(verbose_name="Publicado")
     url = models.URLField(verbose_name="url",max_length=10000, unique=False, blank=True)
@@ -92,6 +179,13 @@ class Redes(BaseModel):
         verbose_name="Proyecto"
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "clave_url"], name="redes_proyecto_clave_url_unica"
+            ),
+        ]
+
 
 class DetalleEnvio(BaseModel):
     # Estados del pipeline IA. "manual" = flujo legacy sin IA (default para
@@ -124,6 +218,9 @@ class DetalleEnvio(BaseModel):
 
     inicio_envio = models.DateTimeField(null=True)
     fin_envio = models.DateTimeField(null=True)
+    # Marca de la tarea que está enviando el mensaje; vence para que una
+    # reentrega pueda retomarlo si el worker murió a mitad del envío
+    envio_tomado_en = models.DateTimeField(null=True, blank=True)
     mensaje = models.TextField(null=True)
     estado_enviado = models.BooleanField(default=False)
     estado_revisado = models.BooleanField(default=False)
@@ -203,6 +300,203 @@ class DetalleEnvio(BaseModel):
 
 
 
+class IngestaJob(BaseModel):
+    """Ingesta de archivos encolada en Celery (modo asíncrono de
+    IngestionAPIView). Los contadores se consolidan al terminar; durante la
+    ejecución el avance se publica en caché (ver apps/base/api/ingestion_jobs.py)."""
+
+    ESTADO_PENDIENTE = "pendiente"
+    ESTADO_PROCESANDO = "procesando"
+    ESTADO_COMPLETADA = "completada"
+    ESTADO_ERROR = "error"
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_PROCESANDO, "Procesando"),
+        (ESTADO_COMPLETADA, "Completada"),
+        (ESTADO_ERROR, "Error"),
+    ]
+
+    proyecto = models.ForeignKey(
+        "proyectos.Proyecto",
+        on_delete=models.CASCADE,
+        related_name="ingesta_jobs",
+        verbose_name="Proyecto",
+    )
+    estado = models.CharField(
+        max_length=15, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, db_index=True
+    )
+    archivos = models.JSONField(
+        default=list, blank=True, help_text='[{"nombre": "...", "ruta": "..."}]'
+    )
+    filas_parseadas = models.PositiveIntegerField(default=0)
+    creados = models.PositiveIntegerField(default=0)
+    duplicados = models.PositiveIntegerField(default=0)
+    descartados = models.PositiveIntegerField(default=0)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    codigo_http = models.PositiveSmallIntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    inicio = models.DateTimeField(null=True, blank=True)
+    fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"IngestaJob {self.id} [{self.estado}]"
+
+
+class HuellaIngesta(BaseModel):
+    """Ingesta de archivos completada, identificada por el hash del contenido
+    subido y la firma de los criterios de aceptación del proyecto. Una nueva
+    subida con la misma huella devuelve `resultado` sin parsear nada (ver
+    apps/base/api/huellas_ingesta.py)."""
+
+    proyecto = models.ForeignKey(
+        "proyectos.Proyecto",
+        on_delete=models.CASCADE,
+        related_name="huellas_ingesta",
+        verbose_name="Proyecto",
+    )
+    huella = models.CharField(max_length=64, help_text="SHA-256 del contenido de los archivos")
+    firma_criterios = models.CharField(max_length=64)
+    archivos = models.JSONField(default=list, blank=True)
+    filas_nuevas = models.PositiveIntegerField(default=0)
+    filas_omitidas = models.PositiveIntegerField(default=0)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    codigo_http = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "huella", "firma_criterios"],
+                name="huella_ingesta_unica",
+            ),
+        ]
+
+    def __str__(self):
+        return f"HuellaIngesta {self.huella[:12]} - Proyecto: {self.proyecto_id}"
+
+
+class HuellaFilaIngesta(models.Model):
+    """Hash de una fila ya ingestada en el proyecto. Las filas de un archivo
+    que coinciden se omiten antes del mapeo."""
+
+    proyecto = models.ForeignKey(
+        "proyectos.Proyecto",
+        on_delete=models.CASCADE,
+        related_name="huellas_filas_ingesta",
+    )
+    huella = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "huella"], name="huella_fila_ingesta_unica"
+            ),
+        ]
+
+
+class MensajeSaliente(BaseModel):
+    """Outbox de webhooks salientes (monitoreo, ruta externa, reenvíos).
+
+    La fila se escribe en la misma transacción que el cambio de negocio que
+    la origina. El drenador de Celery la entrega después con reintentos (ver
+    apps/base/outbox.py), así que un receptor lento o caído no frena la
+    petición ni pierde el aviso."""
+
+    DESTINO_MONITOREO = "monitoreo"
+    DESTINO_RUTA_EXTERNA = "ruta_externa"
+    DESTINO_FORWARD = "forward"
+    DESTINO_CHOICES = [
+        (DESTINO_MONITOREO, "API de monitoreo"),
+        (DESTINO_RUTA_EXTERNA, "Ruta externa"),
+        (DESTINO_FORWARD, "Reenvío de payload"),
+    ]
+
+    ESTADO_PENDIENTE = "pendiente"
+    ESTADO_ENVIANDO = "enviando"
+    ESTADO_ENVIADO = "enviado"
+    ESTADO_FALLIDO = "fallido"
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_ENVIANDO, "Enviando"),
+        (ESTADO_ENVIADO, "Enviado"),
+        (ESTADO_FALLIDO, "Fallido"),
+    ]
+
+    destino = models.CharField(max_length=20, choices=DESTINO_CHOICES)
+    url = models.TextField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    headers = models.JSONField(default=dict, blank=True)
+    # Mensajes con la misma clave (y destino/url) se combinan en un solo POST
+    clave_agrupacion = models.CharField(max_length=64, null=True, blank=True)
+    estado = models.CharField(max_length=15, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(null=True, blank=True)
+    codigo_http = models.PositiveSmallIntegerField(null=True, blank=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento"]),
+        ]
+
+    def __str__(self):
+        return f"MensajeSaliente {self.destino} [{self.estado}]"
+
+
+class ConectorProveedor(BaseModel):
+    """API de un proveedor (JSON estilo Determ/TWK) que se sondea
+    periódicamente para un proyecto, sin esperar a que alguien suba un
+    archivo. `cursor` es la marca de agua: se envía en cada consulta y
+    avanza en la misma transacción que persiste la página (ver
+    apps/base/conectores.py)."""
+
+    PROVEEDOR_AUTOMATICO = ""
+    PROVEEDOR_CHOICES = [
+        (PROVEEDOR_AUTOMATICO, "Detectar por campos"),
+        ("medios", "Medios TWK"),
+        ("redes", "Redes TWK"),
+        ("determ", "Determ"),
+        ("determ_medios", "Determ medios"),
+        ("global_news", "Global News"),
+        ("stakeholders", "Stakeholders"),
+    ]
+
+    proyecto = models.ForeignKey(
+        "proyectos.Proyecto",
+        on_delete=models.CASCADE,
+        related_name="conectores",
+        verbose_name="Proyecto",
+    )
+    nombre = models.CharField(max_length=150)
+    proveedor = models.CharField(
+        max_length=20, choices=PROVEEDOR_CHOICES, default=PROVEEDOR_AUTOMATICO, blank=True
+    )
+    url = models.TextField()
+    # Credenciales de la API (p. ej. Authorization)
+    headers = models.JSONField(default=dict, blank=True)
+    parametros = models.JSONField(default=dict, blank=True, help_text="Query params fijos")
+    parametro_cursor = models.CharField(max_length=50, default="since")
+    campo_resultados = models.CharField(max_length=50, default="results")
+    campo_cursor = models.CharField(max_length=50, default="next_cursor")
+    # Sin cursor en la respuesta, la marca es el mayor valor de este campo
+    campo_marca = models.CharField(max_length=100, blank=True, default="")
+    cursor = models.TextField(null=True, blank=True)
+    activo = models.BooleanField(default=True)
+    intervalo_segundos = models.PositiveIntegerField(default=300)
+    proximo_sondeo = models.DateTimeField(default=timezone.now)
+    ultimo_sondeo = models.DateTimeField(null=True, blank=True)
+    fallos_consecutivos = models.PositiveSmallIntegerField(default=0)
+    ultimo_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["activo", "proximo_sondeo"]),
+        ]
+
+    def __str__(self):
+        return f"ConectorProveedor {self.nombre} ({self.proyecto_id})"
+
+
 class TemplateConfig(BaseModel):
     nombre = models.CharField(max_length=150)
     app_label = models.CharField(max_length=100) 
@@ -0,0 +1,270 @@
+"""Outbox transaccional de webhooks salientes.
+
+`encolar` guarda el POST pendiente (`MensajeSaliente`) dentro de la
+transacción en curso. Si la transacción hace rollback, el aviso desaparece
+con ella. Tras el commit se dispara el drenador (`outbox.drenar`), que
+también corre periódicamente vía beat.
+
+El drenador reclama filas con `SELECT ... FOR UPDATE SKIP LOCKED`, así que
+varios workers no toman la misma. Los mensajes de un destino que acepta
+listas (monitoreo recibe `listado`) y comparten el resto del payload se
+combinan en un solo POST. Los fallos se reintentan con backoff exponencial
+y jitter hasta `OUTBOX_MAX_INTENTOS`. Antes de cada POST el drenador renueva
+el reclamo de lo que le falta, así un drenado largo no se toma por
+huérfano (`OUTBOX_RECLAMO_EXPIRA_SEGUNDOS`). Un 4xx no se reintenta: si era un
+grupo combinado, sus mensajes vuelven a enviarse de a uno.
+"""
+
+import hashlib
+import json
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from apps.base import clientes_http
+from apps.base.models import MensajeSaliente
+
+
+logger = logging.getLogger(__name__)
+
+LOTE_DRENADO = 200
+MAXIMO_ALERTAS_POR_POST = 200
+MAX_INTENTOS = 8
+BACKOFF_BASE_SEGUNDOS = 30
+BACKOFF_MAXIMO_SEGUNDOS = 60 * 60
+TIMEOUT_SEGUNDOS = 10
+# Un mensaje en "enviando" por más tiempo quedó huérfano (worker caído)
+RECLAMO_EXPIRA_SEGUNDOS = 5 * 60
+RETENCION_DIAS = 7
+
+# 4xx que sí vale la pena reintentar
+CODIGOS_REINTENTABLES = {408, 409, 425, 429}
+
+
+def _config(nombre: str, defecto: Any) -> Any:
+    return getattr(settings, f"OUTBOX_{nombre}", defecto)
+
+
+def _combinar_monitoreo(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    combinado = dict(payloads[0])
+    listado = [alerta for payload in payloads for alerta in payload.get("listado") or []]
+    combinado["listado"] = listado
+    combinado["mensaje"] = f"{len(listado)} alertas enviadas"
+    return combinado
+
+
+# Destinos que aceptan varias alertas por POST: campo de la lista y cómo
+# combinar los payloads
+COMBINADORES: Dict[str, Tuple[str, Callable[[List[Dict[str, Any]]], Dict[str, Any]]]] = {
+    MensajeSaliente.DESTINO_MONITOREO: ("listado", _combinar_monitoreo),
+}
+
+
+def _clave_agrupacion(destino: str, payload: Dict[str, Any]) -> Optional[str]:
+    if destino not in COMBINADORES:
+        return None
+    campo_lista, _ = COMBINADORES[destino]
+    resto = {
+        clave: valor
+        for clave, valor in payload.items()
+        if clave not in {campo_lista, "mensaje"}
+    }
+    contenido = json.dumps(resto, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def encolar(
+    destino: str,
+    url: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> MensajeSaliente:
+    """Registra el POST en la transacción actual y agenda el drenado para
+    después del commit."""
+    mensaje = MensajeSaliente.objects.create(
+        destino=destino,
+        url=url,
+        payload=payload,
+        headers=headers or {},
+        clave_agrupacion=_clave_agrupacion(destino, payload),
+    )
+    if _config("DRENAR_AL_COMMIT", True):
+        transaction.on_commit(_disparar_drenado)
+    return mensaje
+
+
+def _disparar_drenado() -> None:
+    try:
+        from apps.base.tasks import drenar_outbox
+
+        drenar_outbox.delay()
+    except Exception:  # pylint: disable=broad-except
+        # Sin broker el beat lo drena en la siguiente pasada
+        logger.warning("No fue posible disparar el drenado del outbox", exc_info=True)
+
+
+def _backoff(intentos: int) -> timedelta:
+    base = _config("BACKOFF_BASE_SEGUNDOS", BACKOFF_BASE_SEGUNDOS)
+    maximo = _config("BACKOFF_MAXIMO_SEGUNDOS", BACKOFF_MAXIMO_SEGUNDOS)
+    espera = min(base * 2 ** max(intentos - 1, 0), maximo)
+    # Jitter: la mitad fija y la otra al azar, para no sincronizar reintentos
+    return timedelta(seconds=espera / 2 + random.uniform(0, espera / 2))
+
+
+def _liberar_reclamos_vencidos(ahora) -> int:
+    limite = ahora - timedelta(seconds=_config("RECLAMO_EXPIRA_SEGUNDOS", RECLAMO_EXPIRA_SEGUNDOS))
+    return MensajeSaliente.objects.filter(
+        estado=MensajeSaliente.ESTADO_ENVIANDO, modified_at__lt=limite
+    ).update(estado=MensajeSaliente.ESTADO_PENDIENTE)
+
+
+def _reclamar(ahora, limite: int) -> List[MensajeSaliente]:
+    with transaction.atomic():
+        ids = list(
+            MensajeSaliente.objects.select_for_update(skip_locked=True)
+            .filter(estado=MensajeSaliente.ESTADO_PENDIENTE, proximo_intento__lte=ahora)
+            .order_by("proximo_intento")
+            .values_list("id", flat=True)[:limite]
+        )
+        MensajeSaliente.objects.filter(id__in=ids).update(
+            estado=MensajeSaliente.ESTADO_ENVIANDO, modified_at=ahora
+        )
+    return list(MensajeSaliente.objects.filter(id__in=ids).order_by("created_at"))
+
+
+def _renovar_reclamo(mensajes: Iterable[MensajeSaliente]) -> None:
+    """Marca como vigente el reclamo de los mensajes que faltan: un drenado
+    largo no debe parecer huérfano y que otro reenvíe lo que tiene en curso."""
+    MensajeSaliente.objects.filter(
+        id__in=[mensaje.id for mensaje in mensajes], estado=MensajeSaliente.ESTADO_ENVIANDO
+    ).update(modified_at=timezone.now())
+
+
+def _agrupar(mensajes: Iterable[MensajeSaliente]) -> List[List[MensajeSaliente]]:
+    """Agrupa por (destino, url, clave) respetando el orden de llegada y el
+    máximo de alertas por POST. Los mensajes sin clave van solos."""
+    maximo = _config("MAXIMO_ALERTAS_POR_POST", MAXIMO_ALERTAS_POR_POST)
+    grupos: List[List[MensajeSaliente]] = []
+    abiertos: Dict[Tuple[str, str, str], Tuple[List[MensajeSaliente], int]] = {}
+    for mensaje in mensajes:
+        if not mensaje.clave_agrupacion:
+            grupos.append([mensaje])
+            continue
+        campo_lista, _ = COMBINADORES[mensaje.destino]
+        alertas = len(mensaje.payload.get(campo_lista) or [])
+        clave = (mensaje.destino, mensaje.url, mensaje.clave_agrupacion)
+        grupo, total = abiertos.get(clave, (None, 0))
+        if grupo is None or total + alertas > maximo:
+            grupo, total = [], 0
+            grupos.append(grupo)
+        grupo.append(mensaje)
+        abiertos[clave] = (grupo, total + alertas)
+    return grupos
+
+
+def _payload_grupo(grupo: List[MensajeSaliente]) -> Dict[str, Any]:
+    if len(grupo) == 1:
+        return grupo[0].payload
+    _, combinar = COMBINADORES[grupo[0].destino]
+    return combinar([mensaje.payload for mensaje in grupo])
+
+
+def _entregar(grupo: List[MensajeSaliente]) -> bool:
+    primero = grupo[0]
+    error: Optional[str] = None
+    codigo: Optional[int] = None
+    try:
+        response = clientes_http.post(
+            primero.url,
+            json=json.loads(json.dumps(_payload_grupo(grupo), cls=DjangoJSONEncoder)),
+            headers=primero.headers or None,
+            timeout=_config("TIMEOUT_SEGUNDOS", TIMEOUT_SEGUNDOS),
+        )
+        codigo = response.status_code
+        if response.ok:
+            MensajeSaliente.objects.filter(
+                id__in=[mensaje.id for mensaje in grupo], estado=MensajeSaliente.ESTADO_ENVIANDO
+            ).update(
+                estado=MensajeSaliente.ESTADO_ENVIADO,
+                enviado_en=timezone.now(),
+                codigo_http=codigo,
+                # Los headers pueden llevar credenciales: no se guardan más de lo necesario
+                headers={},
+            )
+            return True
+        error = f"HTTP {codigo}: {response.text[:500]}"
+    except requests.RequestException as exc:
+        error = str(exc)
+
+    logger.warning(
+        "Outbox: fallo entregando %s mensajes a %s (%s): %s",
+        len(grupo),
+        primero.destino,
+        # Sin query string: la URL de monitoreo lleva el token
+        primero.url.split("?", 1)[0],
+        error,
+    )
+    _registrar_fallo(grupo, codigo, error)
+    return False
+
+
+def _registrar_fallo(grupo: List[MensajeSaliente], codigo: Optional[int], error: str) -> None:
+    ahora = timezone.now()
+    max_intentos = _config("MAX_INTENTOS", MAX_INTENTOS)
+    no_reintentable = codigo is not None and 400 <= codigo < 500 and codigo not in CODIGOS_REINTENTABLES
+    for mensaje in grupo:
+        mensaje.intentos += 1
+        mensaje.codigo_http = codigo
+        mensaje.ultimo_error = error
+        if no_reintentable and len(grupo) > 1:
+            # El receptor rechazó el POST combinado: cada mensaje va solo
+            mensaje.clave_agrupacion = None
+            mensaje.estado = MensajeSaliente.ESTADO_PENDIENTE
+            mensaje.proximo_intento = ahora
+        elif no_reintentable or mensaje.intentos >= max_intentos:
+            mensaje.estado = MensajeSaliente.ESTADO_FALLIDO
+        else:
+            mensaje.estado = MensajeSaliente.ESTADO_PENDIENTE
+            mensaje.proximo_intento = ahora + _backoff(mensaje.intentos)
+        mensaje.save(
+            update_fields=[
+                "intentos",
+                "codigo_http",
+                "ultimo_error",
+                "clave_agrupacion",
+                "estado",
+                "proximo_intento",
+                "modified_at",
+            ]
+        )
+
+
+def drenar(limite: Optional[int] = None) -> Dict[str, int]:
+    """Entrega los mensajes pendientes vencidos. Devuelve cuántos mensajes
+    se entregaron o fallaron y cuántos POST se hicieron."""
+    ahora = timezone.now()
+    _liberar_reclamos_vencidos(ahora)
+    mensajes = _reclamar(ahora, limite or _config("LOTE_DRENADO", LOTE_DRENADO))
+
+    resumen = {"entregados": 0, "fallidos": 0, "posts": 0}
+    grupos = _agrupar(mensajes)
+    for posicion, grupo in enumerate(grupos):
+        _renovar_reclamo(mensaje for pendientes in grupos[posicion:] for mensaje in pendientes)
+        resumen["posts"] += 1
+        resumen["entregados" if _entregar(grupo) else "fallidos"] += len(grupo)
+    return resumen
+
+
+def purgar_entregados() -> int:
+    limite = timezone.now() - timedelta(days=_config("RETENCION_DIAS", RETENCION_DIAS))
+    borrados, _ = MensajeSaliente.objects.filter(
+        estado=MensajeSaliente.ESTADO_ENVIADO, enviado_en__lt=limite
+    ).delete()
+    return borrados
@@ -0,0 +1,66 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="ingesta.procesar_archivos")
+def procesar_ingesta(job_id, reingestar=False):
+    """Procesa una ingesta asíncrona (IngestionAPIView con `?asincrono=1`).
+    Idempotente: un compare-and-set sobre `estado` evita que dos workers
+    tomen el mismo job si el broker lo reentrega."""
+    from apps.base.api.ingestion_jobs import ejecutar_job
+    from apps.base.models import IngestaJob
+
+    tomados = IngestaJob.objects.filter(
+        id=job_id, estado=IngestaJob.ESTADO_PENDIENTE
+    ).update(estado=IngestaJob.ESTADO_PROCESANDO, inicio=timezone.now())
+    if not tomados:
+        return "omitido"
+
+    job = IngestaJob.objects.select_related("proyecto", "created_by").get(id=job_id)
+    try:
+        ejecutar_job(job, reingestar=reingestar)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.exception("Ingesta asíncrona falló para el job %s", job_id)
+        IngestaJob.objects.filter(id=job_id).update(
+            estado=IngestaJob.ESTADO_ERROR, error=str(exc), fin=timezone.now()
+        )
+        return IngestaJob.ESTADO_ERROR
+    return job.estado
+
+
+@shared_task(name="outbox.drenar")
+def drenar_outbox():
+    """Entrega los webhooks pendientes del outbox (tras cada commit que los
+    encola y cada 30s vía beat, que además cubre los reintentos)."""
+    from apps.base import outbox
+
+    resumen = outbox.drenar()
+    resumen["purgados"] = outbox.purgar_entregados()
+    return resumen
+
+
+@shared_task(name="conectores.sondear_vencidos")
+def sondear_conectores_vencidos():
+    """Encola un sondeo por cada conector de proveedor vencido (vía beat)."""
+    from apps.base import conectores
+
+    vencidos = conectores.conectores_vencidos()
+    for conector_id in vencidos:
+        sondear_conector.delay(conector_id)
+    return len(vencidos)
+
+
+@shared_task(name="conectores.sondear")
+def sondear_conector(conector_id):
+    """Trae lo nuevo de la API del proveedor desde la marca de agua del
+    conector. Si otro worker ya lo tomó, no hace nada."""
+    from apps.base import conectores
+
+    conector = conectores.reclamar(conector_id)
+    if conector is None:
+        return "omitido"
+    return conectores.ejecutar(conector)
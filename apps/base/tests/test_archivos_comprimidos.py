@@ -0,0 +1,204 @@
+import gzip
+import unittest
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api import archivos_comprimidos
+from apps.base.api.archivos_comprimidos import ArchivoNoSoportado, preparar_archivos
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.management.commands.bench_ingestion import escribir_archivo, generar_filas
+from apps.base.models import Articulo
+from apps.proyectos.models import Proyecto
+
+from .test_ingestion_streaming import CSV_MEDIOS
+
+
+CSV_BOM = ("\ufeff" + CSV_MEDIOS).encode("utf-8")
+
+
+def _subido(nombre, contenido):
+    return SimpleUploadedFile(nombre, contenido)
+
+
+def _zip(miembros, compresion=zipfile.ZIP_DEFLATED):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=compresion) as zip_archivo:
+        for nombre, contenido in miembros.items():
+            zip_archivo.writestr(nombre, contenido)
+    return buffer.getvalue()
+
+
+def _xlsx(proveedor="medios", filas=30):
+    headers, generadas = generar_filas(proveedor, filas)
+    buffer = BytesIO()
+    escribir_archivo(headers, generadas, "xlsx", buffer)
+    return buffer.getvalue()
+
+
+class ArchivosComprimidosTests(SimpleTestCase):
+    def setUp(self):
+        self.view = IngestionAPIView()
+        self.esperado = self.view._parse_csv(BytesIO(CSV_BOM))
+
+    def _parsear(self, archivo, streaming=False):
+        (extension, abierto), = preparar_archivos([archivo])
+        if streaming:
+            headers, rows = self.view._parse_file_en_flujo(abierto, extension)
+            return headers, list(rows)
+        return self.view._parse_file(abierto, extension)
+
+    def test_csv_gz_produce_las_mismas_filas(self):
+        comprimido = _subido("medios.CSV.GZ", gzip.compress(CSV_BOM))
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                self.assertEqual(self._parsear(comprimido, streaming), self.esperado)
+
+    @unittest.skipIf(archivos_comprimidos._modulo_zstd() is None, "zstandard no instalado")
+    def test_csv_zst_produce_las_mismas_filas(self):
+        import zstandard
+
+        comprimido = _subido("medios.csv.zst", zstandard.ZstdCompressor().compress(CSV_BOM))
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                self.assertEqual(self._parsear(comprimido, streaming), self.esperado)
+
+    def test_csv_gz_se_lee_por_bloques(self):
+        (_, abierto), = preparar_archivos([_subido("medios.csv.gz", gzip.compress(CSV_BOM))])
+
+        self.assertEqual(abierto.read(10), CSV_BOM[:10])
+        abierto.seek(0)
+        self.assertEqual(abierto.read(), CSV_BOM)
+        self.assertEqual(abierto.name, "medios.csv")
+
+    def test_zip_con_xlsx_y_csv(self):
+        xlsx = _xlsx()
+        contenido = _zip(
+            {
+                "exports/medios.xlsx": xlsx,
+                "exports/medios.csv.gz": gzip.compress(CSV_BOM),
+                "__MACOSX/exports/._medios.xlsx": b"basura",
+                "exports/": b"",
+            }
+        )
+
+        preparados = preparar_archivos([_subido("bundle.zip", contenido)])
+
+        self.assertEqual([extension for extension, _ in preparados], [".xlsx", ".csv"])
+        self.assertEqual(
+            self.view._parse_file(preparados[0][1], ".xlsx"),
+            self.view._parse_file(BytesIO(xlsx), ".xlsx"),
+        )
+        headers, rows = self.view._parse_file_en_flujo(preparados[1][1], ".csv")
+        self.assertEqual((headers, list(rows)), self.esperado)
+
+    def test_formatos_no_soportados(self):
+        casos = {
+            "medios.txt": b"x",
+            "medios.xls.gz": gzip.compress(b"x"),
+            "roto.zip": b"no es un zip",
+            "vacio.zip": _zip({}),
+            "otro.zip": _zip({"notas.pdf": b"x"}),
+        }
+        for nombre, contenido in casos.items():
+            with self.subTest(nombre=nombre):
+                with self.assertRaises(ArchivoNoSoportado):
+                    preparar_archivos([_subido(nombre, contenido)])
+
+    def test_zst_sin_descompresor_disponible(self):
+        with patch.object(archivos_comprimidos, "_modulo_zstd", return_value=None):
+            with self.assertRaises(ArchivoNoSoportado) as error:
+                preparar_archivos([_subido("medios.csv.zst", b"x")])
+
+        self.assertIn("zstandard", error.exception.detalle)
+
+
+    def test_tope_descomprimido_por_archivo_y_por_upload(self):
+        bomba = _subido("medios.csv.gz", gzip.compress(CSV_BOM + b"x" * 10_000))
+        with self.settings(INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO=5_000):
+            (_, abierto), = preparar_archivos([bomba])
+            with self.assertRaises(ArchivoNoSoportado) as error:
+                abierto.read()
+            self.assertEqual(error.exception.detalle, archivos_comprimidos.DETALLE_DEMASIADO_GRANDE)
+
+            # El zip declara el tamaño: se rechaza sin descomprimir
+            with self.assertRaises(ArchivoNoSoportado):
+                preparar_archivos([_subido("bundle.zip", _zip({"medios.csv": b"x" * 10_000}))])
+
+        dos = _zip({"a.csv": CSV_BOM, "b.csv.gz": gzip.compress(CSV_BOM)})
+        with self.settings(INGESTION_DESCOMPRIMIDO_MAXIMO_UPLOAD=len(CSV_BOM) + 10):
+            with self.assertRaises(ArchivoNoSoportado):
+                preparar_archivos([_subido("bundle.zip", dos)])
+
+            # Releer desde el inicio no cuenta dos veces
+            (_, abierto), = preparar_archivos([_subido("medios.csv.gz", gzip.compress(CSV_BOM))])
+            self.assertEqual(abierto.read(), CSV_BOM)
+            abierto.seek(0)
+            self.assertEqual(abierto.read(), CSV_BOM)
+
+
+class IngestionComprimidaTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="comprimida", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto comprimido",
+            codigo_acceso="123@g.us",
+            tipo_alerta="medios",
+        )
+
+    def _post(self, archivo, consulta=""):
+        request = APIRequestFactory().post(
+            f"/api/ingestion/?proyecto={self.proyecto.id}{consulta}",
+            {"archivo": archivo},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa"):
+            return IngestionAPIView.as_view()(request)
+
+    def test_csv_gz_crea_los_registros(self):
+        response = self._post(_subido("medios.csv.gz", gzip.compress(CSV_BOM)))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(Articulo.objects.values_list("url", flat=True)),
+            {"http://example.com/a", "http://example.com/b"},
+        )
+
+    def test_zip_en_modo_streaming(self):
+        contenido = _zip({"medios.xlsx": _xlsx(filas=5)}, compresion=zipfile.ZIP_STORED)
+
+        response = self._post(_subido("bundle.zip", contenido), "&streaming=1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 5)
+
+    def test_formato_no_soportado(self):
+        response = self._post(_subido("medios.csv.bz2", b"x"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Formato de archivo no soportado.")
+
+    def test_comprimido_grande_usa_streaming(self):
+        view = IngestionAPIView()
+        archivo = _subido("medios.csv.gz", b"x" * 1024)
+        with self.settings(INGESTION_STREAMING_UMBRAL_BYTES=5 * 1024):
+            self.assertTrue(view._usar_modo_streaming(None, [archivo]))
+            self.assertFalse(view._usar_modo_streaming(None, [_subido("medios.csv", b"x" * 1024)]))
+
+    def test_bomba_de_descompresion_responde_400(self):
+        bomba = gzip.compress(CSV_BOM + b"x" * 100_000)
+        for consulta in ("", "&streaming=1"):
+            with self.subTest(consulta=consulta), self.settings(
+                INGESTION_DESCOMPRIMIDO_MAXIMO_ARCHIVO=50_000
+            ):
+                response = self._post(_subido("medios.csv.gz", bomba), consulta)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["detail"], archivos_comprimidos.DETALLE_DEMASIADO_GRANDE)
+        self.assertFalse(Articulo.objects.exists())
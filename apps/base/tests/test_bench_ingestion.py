@@ -0,0 +1,72 @@
+import io
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.management.commands.bench_ingestion import (
+    ETAPAS,
+    FORMATOS,
+    PROVEEDORES,
+    comparar,
+    ejecutar_caso,
+    escribir_archivo,
+    generar_filas,
+)
+
+
+class ArchivosSinteticosTests(TestCase):
+    def test_cada_archivo_se_detecta_como_su_proveedor(self):
+        view = IngestionAPIView()
+        for proveedor in PROVEEDORES:
+            for formato in FORMATOS:
+                with self.subTest(proveedor=proveedor, formato=formato):
+                    headers, filas = generar_filas(proveedor, 20)
+                    destino = io.BytesIO()
+                    escribir_archivo(headers, filas, formato, destino)
+                    destino.seek(0)
+
+                    headers, rows = view._parse_file(destino, f".{formato}")
+                    headers, rows = view._normalizar_columnas_url(headers, rows)
+
+                    self.assertEqual(view._detectar_proveedor(headers), proveedor)
+                    self.assertIsNone(view._validar_columna_url(headers, rows))
+                    self.assertEqual(len(rows), 20)
+
+
+class EjecutarCasoTests(TestCase):
+    def test_reporta_metricas_por_etapa(self):
+        usuario = get_user_model().objects.create_user(username="bench")
+        with tempfile.TemporaryDirectory() as directorio:
+            caso = ejecutar_caso("redes", "csv", 60, directorio, usuario)
+
+        self.assertEqual(caso["proveedor_detectado"], "redes")
+        self.assertEqual(caso["status"], 201)
+        self.assertEqual(caso["creados"] + caso["duplicados"] + caso["descartados"], 60)
+        self.assertEqual(list(caso["etapas"]), list(ETAPAS))
+        self.assertGreater(caso["etapas"]["bulk_create"]["consultas"], 0)
+        self.assertEqual(caso["etapas"]["parse"]["consultas"], 0)
+
+    def test_comparar_con_corrida_anterior(self):
+        anterior = {
+            "proveedor": "medios",
+            "formato": "csv",
+            "filas": 10,
+            "filas_por_segundo": 100.0,
+            "consultas": 5,
+            "rss_pico_mb": 50.0,
+        }
+        base = {"casos": [anterior]}
+        actual = {
+            "casos": [
+                {**anterior, "filas_por_segundo": 150.0},
+                # Sin par en la base: no se compara
+                {**anterior, "filas": 20},
+            ]
+        }
+
+        lineas = comparar(base, actual)
+
+        self.assertEqual(len(lineas), 1)
+        self.assertIn("+50.0%", lineas[0])
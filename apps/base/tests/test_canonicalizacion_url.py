@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import Mock, patch
+
+import requests
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.base.api import canonicalizacion_url
+from apps.base.api.canonicalizacion_url import (
+    es_url_corta,
+    resolutor_configurado,
+    resolver_url_corta,
+)
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.utils import construir_clave_url, huella_clave_url
+from apps.base.management.commands.reporte_dedup_urls import (
+    clave_url_anterior,
+    medir_deduplicacion,
+)
+from apps.base.models import Articulo
+from apps.proyectos.models import Proyecto
+
+
+with open(os.path.join(os.path.dirname(__file__), "datos", "corpus_urls.json"), encoding="utf-8") as _archivo:
+    CORPUS = json.load(_archivo)
+
+
+def _redireccion(destinos):
+    """`clientes_http.head` falso: cada URL redirige a `destinos[url]`."""
+
+    def _head(url, **kwargs):
+        if url not in destinos:
+            raise requests.ConnectionError("sin red")
+        return Mock(status_code=200, url=destinos[url])
+
+    return _head
+
+
+class CorpusCanonicalizacionTests(SimpleTestCase):
+    def test_variantes_de_una_publicacion_comparten_clave(self):
+        for grupo in CORPUS["equivalentes"]:
+            with self.subTest(url=grupo[0]):
+                self.assertEqual({construir_clave_url(url) for url in grupo}, {construir_clave_url(grupo[0])})
+
+    def test_publicaciones_distintas_no_se_fusionan(self):
+        for grupo in CORPUS["distintas"]:
+            with self.subTest(url=grupo[0]):
+                self.assertEqual(len({construir_clave_url(url) for url in grupo}), len(grupo))
+
+    def test_mejora_sobre_la_clave_anterior(self):
+        urls = [url for grupo in CORPUS["equivalentes"] for url in grupo]
+
+        reporte = medir_deduplicacion([urls], ejemplos=1)
+
+        self.assertEqual(reporte["actual"]["distintas"], len(CORPUS["equivalentes"]))
+        self.assertGreater(reporte["anterior"]["distintas"], 3 * len(CORPUS["equivalentes"]))
+        self.assertEqual(
+            reporte["duplicados_adicionales"],
+            reporte["anterior"]["distintas"] - reporte["actual"]["distintas"],
+        )
+        self.assertEqual(
+            set(reporte["por_red"]),
+            {"otros", "twitter", "facebook", "instagram", "tiktok", "youtube", "linkedin"},
+        )
+        self.assertEqual(len(reporte["ejemplos"]), 1)
+
+    def test_ids_que_no_son_de_la_red_no_se_recortan(self):
+        self.assertNotEqual(
+            construir_clave_url("https://twitter.com/u/status/1712345.123"),
+            construir_clave_url("https://twitter.com/u/status/1712345.456"),
+        )
+
+    def test_links_cortos(self):
+        self.assertTrue(es_url_corta("https://t.co/AbC"))
+        self.assertTrue(es_url_corta("vm.tiktok.com/ZMabc/"))
+        self.assertTrue(es_url_corta("https://bit.ly/3xyz"))
+        self.assertFalse(es_url_corta("https://youtu.be/dQw4w9WgXcQ"))
+        self.assertFalse(es_url_corta("https://www.tiktok.com/@u/video/1"))
+
+
+class ResolverUrlsCortasTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_resuelve_una_vez_y_cachea(self):
+        head = Mock(side_effect=_redireccion({"http://t.co/AbC": "https://x.com/u/status/42?s=20"}))
+        with patch.object(canonicalizacion_url.clientes_http, "head", head):
+            clave = construir_clave_url("https://t.co/AbC", resolver_url_corta)
+            self.assertEqual(resolver_url_corta("http://t.co/AbC"), "https://x.com/u/status/42?s=20")
+
+        self.assertEqual(clave, construir_clave_url("https://twitter.com/otro/status/42"))
+        head.assert_called_once()
+
+    def test_un_fallo_se_cachea_y_conserva_la_clave_del_link(self):
+        head = Mock(side_effect=_redireccion({}))
+        with patch.object(canonicalizacion_url.clientes_http, "head", head):
+            clave = construir_clave_url("https://t.co/AbC", resolver_url_corta)
+            self.assertIsNone(resolver_url_corta("http://t.co/AbC"))
+
+        self.assertEqual(clave, construir_clave_url("https://t.co/AbC"))
+        head.assert_called_once()
+
+    def test_head_no_soportado_reintenta_con_get(self):
+        get = Mock(return_value=Mock(status_code=200, url="https://www.tiktok.com/@u/video/7"))
+        with patch.object(
+            canonicalizacion_url.clientes_http, "head", return_value=Mock(status_code=405, url="x")
+        ), patch.object(canonicalizacion_url.clientes_http, "get", get):
+            self.assertEqual(resolver_url_corta("http://vm.tiktok.com/ZMa"), "https://www.tiktok.com/@u/video/7")
+
+        self.assertTrue(get.call_args.kwargs["stream"])
+
+    def test_resolutor_segun_configuracion(self):
+        self.assertIsNone(resolutor_configurado())
+        cache.set(canonicalizacion_url._clave_cache("http://t.co/AbC"), "https://x.com/u/status/42")
+        with self.settings(URL_RESOLVER_CORTAS=True), patch.object(
+            canonicalizacion_url.clientes_http, "head"
+        ) as head:
+            solo_cache = resolutor_configurado(consultar=False)
+            self.assertEqual(solo_cache("http://t.co/AbC"), "https://x.com/u/status/42")
+            self.assertIsNone(solo_cache("http://t.co/Otro"))
+        head.assert_not_called()
+
+
+@override_settings(URL_RESOLVER_CORTAS=True)
+class DeduplicacionIngestaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto canonico", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+
+    def test_la_ingesta_descarta_variantes_y_links_cortos_ya_guardados(self):
+        Articulo.objects.create(proyecto=self.proyecto, url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        view = IngestionAPIView()
+        registros = [
+            {"url": "https://youtu.be/dQw4w9WgXcQ?si=abc", "titulo": "corto"},
+            {"url": "https://bit.ly/video", "titulo": "acortado"},
+            {"url": "https://www.youtube.com/shorts/aaaaaaaaaaa", "titulo": "nuevo"},
+        ]
+
+        with patch.object(
+            canonicalizacion_url.clientes_http,
+            "head",
+            side_effect=_redireccion({"http://bit.ly/video": "https://m.youtube.com/watch?v=dQw4w9WgXcQ"}),
+        ):
+            resultado = view._persistir_registros(registros, self.proyecto)
+
+        self.assertEqual(resultado["duplicados"], 2)
+        self.assertEqual(len(resultado["listado"]), 1)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 2)
+
+
+class ClaveUrlAlGuardarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto guardado", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+
+    def test_editar_no_pisa_la_clave_resuelta(self):
+        resuelta = huella_clave_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        articulo = Articulo.objects.create(
+            proyecto=self.proyecto, url="https://bit.ly/video", clave_url=resuelta
+        )
+        self.assertEqual(articulo.clave_url, resuelta)
+
+        # El cache del link corto ya no está (LocMem, TTL vencido)
+        articulo = Articulo.objects.get(id=articulo.id)
+        articulo.titulo = "Editado"
+        articulo.save()
+
+        articulo.refresh_from_db()
+        self.assertEqual(articulo.clave_url, resuelta)
+
+    def test_editar_la_variante_con_clave_anterior_no_choca(self):
+        original = Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/nota")
+        variante = Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/otra")
+        # Clave de la regla anterior, que no quitaba utm_*
+        url = "https://example.com/nota?utm_source=x"
+        clave = hashlib.sha256(clave_url_anterior(url).encode("utf-8")).hexdigest()
+        Articulo.objects.filter(id=variante.id).update(url=url, clave_url=clave)
+
+        variante = Articulo.objects.get(id=variante.id)
+        variante.titulo = "Editada"
+        variante.save()
+
+        variante.refresh_from_db()
+        self.assertEqual(variante.clave_url, clave)
+        self.assertNotEqual(variante.clave_url, original.clave_url)
+
+
+class RecalcularClaveUrlTests(TestCase):
+    def test_recalcular_deja_sin_clave_las_nuevas_repetidas(self):
+        proyecto = Proyecto.objects.create(
+            nombre="Proyecto recalculo", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+        urls = ("https://x.com/u/status/1", "https://twitter.com/u/status/1?s=20", "https://example.com/a")
+        original, variante, otra = (
+            Articulo.objects.create(proyecto=proyecto, url=f"https://example.com/{n}") for n in range(3)
+        )
+        # Estado con las claves de la regla anterior, que no fusionaba estas URLs
+        for articulo, url in zip((original, variante, otra), urls):
+            clave = hashlib.sha256(clave_url_anterior(url).encode("utf-8")).hexdigest()
+            Articulo.objects.filter(id=articulo.id).update(url=url, clave_url=clave)
+
+        salida = StringIO()
+        call_command("backfill_clave_url", "--recalcular", stdout=salida)
+
+        original.refresh_from_db()
+        variante.refresh_from_db()
+        otra.refresh_from_db()
+        self.assertEqual(original.clave_url, huella_clave_url("https://twitter.com/i/status/1"))
+        self.assertIsNone(variante.clave_url)
+        self.assertEqual(otra.clave_url, huella_clave_url("https://example.com/a"))
+        self.assertIn("Articulo: 2 claves cambiaron", salida.getvalue())
+        self.assertIn("Articulo: 1 filas con clave, 1 repetidas", salida.getvalue())
+
+
+class ReporteDedupUrlsTests(TestCase):
+    def test_reporte_desde_archivo(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as archivo:
+            archivo.write("\n".join(CORPUS["equivalentes"][2]) + "\n\n")
+        self.addCleanup(os.unlink, archivo.name)
+
+        salida = StringIO()
+        call_command("reporte_dedup_urls", "--archivo", archivo.name, "--json", stdout=salida)
+
+        reporte = json.loads(salida.getvalue())
+        self.assertEqual(reporte["urls"], 5)
+        self.assertEqual(reporte["actual"]["distintas"], 1)
+        self.assertEqual(reporte["por_red"], {"twitter": reporte["duplicados_adicionales"]})
+
+    def test_reporte_desde_la_base_por_proyecto(self):
+        for nombre in ("Uno", "Dos"):
+            proyecto = Proyecto.objects.create(nombre=nombre, codigo_acceso="1@g.us", tipo_alerta="medios")
+            Articulo.objects.create(proyecto=proyecto, url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+            corto = Articulo.objects.create(proyecto=proyecto, url="https://example.com/otra")
+            # Guardada antes de las reglas por red: no era duplicada
+            Articulo.objects.filter(id=corto.id).update(url="https://youtu.be/dQw4w9WgXcQ", clave_url=None)
+
+        salida = StringIO()
+        call_command("reporte_dedup_urls", stdout=salida)
+
+        self.assertIn("URLs analizadas: 4", salida.getvalue())
+        self.assertIn("Duplicados adicionales: 2", salida.getvalue())
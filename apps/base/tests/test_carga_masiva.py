@@ -0,0 +1,143 @@
+import csv
+from io import StringIO
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from apps.base.api import carga_masiva
+from apps.base.api.carga_masiva import FlujoCopy, cargar_alertas
+from apps.base.api.utils import huella_clave_url
+from apps.base.models import Articulo, DetalleEnvio, Redes
+from apps.proyectos.models import Proyecto
+
+
+def _articulo(proyecto, url, **kwargs):
+    return Articulo(proyecto=proyecto, url=url, clave_url=huella_clave_url(url), **kwargs)
+
+
+class CursorFalso:
+    """Registra lo que el cargador envía a PostgreSQL."""
+
+    def __init__(self, devueltos):
+        self.cursor = self
+        self.sentencias = []
+        self.copiado = ""
+        self._devueltos = devueltos
+
+    def execute(self, sql, params=None):
+        self.sentencias.append((sql, params))
+
+    def copy_expert(self, sql, archivo):
+        self.sentencias.append((sql, None))
+        while True:
+            bloque = archivo.read(50)
+            if not bloque:
+                break
+            self.copiado += bloque
+
+    def fetchall(self):
+        return [(id_,) for id_ in self._devueltos]
+
+
+class FlujoCopyTests(SimpleTestCase):
+    def test_csv_distingue_nulos_de_textos_y_escapa_comillas(self):
+        filas = [["a", None, 'con "comillas"\ny salto'], [1, "\\N", ""]]
+        flujo = FlujoCopy(iter(filas))
+
+        texto = ""
+        while True:
+            bloque = flujo.read(7)
+            if not bloque:
+                break
+            texto += bloque
+
+        leidas = list(csv.reader(StringIO(texto)))
+        self.assertEqual(leidas, [["a", "\\N", 'con "comillas"\ny salto'], ["1", "\\N", ""]])
+        # El NULL va sin comillas; el texto "\N" va entre comillas
+        self.assertIn(",\\N,", texto.splitlines()[0])
+        self.assertIn('"\\N"', texto)
+
+
+class CargarAlertasTests(TestCase):
+    def setUp(self):
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto carga", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+        self.detalle = {"proyecto": self.proyecto, "estado_enviado": False, "estado_revisado": True}
+
+    def test_bulk_create_omite_conflictos_y_crea_detalles_de_los_insertados(self):
+        Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/a")
+        objetos = [
+            _articulo(self.proyecto, "https://example.com/a"),
+            _articulo(self.proyecto, "https://example.com/b"),
+        ]
+
+        insertados = cargar_alertas(objetos, self.detalle)
+
+        self.assertEqual(insertados, {objetos[1].id})
+        detalle = DetalleEnvio.objects.get(medio_id=objetos[1].id)
+        self.assertTrue(detalle.estado_revisado)
+        self.assertEqual(detalle.proyecto, self.proyecto)
+        self.assertFalse(DetalleEnvio.objects.filter(medio_id=objetos[0].id).exists())
+
+    def test_redes_usan_el_campo_red_social_del_detalle(self):
+        red = Redes(
+            proyecto=self.proyecto,
+            url="https://twitter.com/p/1",
+            clave_url=huella_clave_url("https://twitter.com/p/1"),
+            fecha_publicacion="2024-01-01T00:00:00Z",
+        )
+
+        self.assertEqual(cargar_alertas([red], self.detalle), {red.id})
+        self.assertTrue(DetalleEnvio.objects.filter(red_social_id=red.id).exists())
+
+    def test_en_sqlite_no_usa_copy(self):
+        self.assertFalse(carga_masiva.usar_copy("default"))
+
+    def test_copy_envia_las_filas_y_crea_detalles_en_una_sentencia(self):
+        objetos = [
+            _articulo(self.proyecto, "https://example.com/a", titulo='Título "uno"'),
+            _articulo(self.proyecto, "https://example.com/b"),
+        ]
+        cursor = CursorFalso([objetos[0].id])
+
+        insertados = carga_masiva._cargar_con_copy(
+            cursor, Articulo, objetos, self.detalle, "default"
+        )
+
+        self.assertEqual(insertados, {objetos[0].id})
+        sentencias = [sql for sql, _ in cursor.sentencias]
+        self.assertIn("CREATE TEMP TABLE IF NOT EXISTS", sentencias[0])
+        self.assertIn("ON COMMIT DROP", sentencias[0])
+        self.assertTrue(sentencias[1].startswith("TRUNCATE"))
+        self.assertIn("FROM STDIN", sentencias[2])
+        self.assertIn("ON CONFLICT DO NOTHING", sentencias[3])
+        self.assertIn("RETURNING", sentencias[3])
+
+        # Una línea por objeto: columnas del modelo + id del DetalleEnvio
+        filas = list(csv.reader(StringIO(cursor.copiado)))
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(len(filas[0]), len(Articulo._meta.concrete_fields) + 1)
+        self.assertIn('Título "uno"', filas[0])
+        # pre_save fija created_at como lo haría bulk_create
+        self.assertIsNotNone(objetos[0].created_at)
+
+        # Parámetros del detalle: todo salvo id y el FK a la alerta
+        parametros = cursor.sentencias[3][1]
+        self.assertEqual(len(parametros), len(DetalleEnvio._meta.concrete_fields) - 2)
+        campo_proyecto = DetalleEnvio._meta.get_field("proyecto")
+        self.assertIn(
+            campo_proyecto.get_db_prep_save(self.proyecto.id, connection), parametros
+        )
+
+    def test_sin_copy_expert_cae_a_bulk_create(self):
+        objetos = [_articulo(self.proyecto, "https://example.com/c")]
+
+        with patch.object(carga_masiva, "usar_copy", return_value=True), patch.object(
+            carga_masiva, "_cargar_con_copy"
+        ) as copy:
+            insertados = cargar_alertas(objetos, self.detalle)
+
+        copy.assert_not_called()
+        self.assertEqual(insertados, {objetos[0].id})
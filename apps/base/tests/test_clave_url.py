@@ -0,0 +1,122 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.utils import construir_clave_url, huella_clave_url
+from apps.base.models import Articulo, DetalleEnvio, Redes
+from apps.proyectos.models import Proyecto
+
+
+class HuellaClaveUrlTests(SimpleTestCase):
+    def test_variantes_de_la_misma_url_comparten_huella(self):
+        huella = huella_clave_url("https://example.com/noticia")
+
+        self.assertEqual(huella_clave_url("http://www.example.com/noticia/"), huella)
+        self.assertEqual(len(huella), 64)
+        self.assertEqual(
+            construir_clave_url("https://x.com/user/status/1"),
+            construir_clave_url("https://twitter.com/user/status/1"),
+        )
+
+    def test_url_vacia_no_tiene_huella(self):
+        self.assertIsNone(huella_clave_url(""))
+        self.assertIsNone(huella_clave_url(None))
+
+
+class ClaveUrlModeloTests(TestCase):
+    def setUp(self):
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto clave", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+
+    def test_save_calcula_la_clave_y_la_restriccion_rechaza_variantes(self):
+        articulo = Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/a")
+        self.assertEqual(articulo.clave_url, huella_clave_url("https://example.com/a"))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Articulo.objects.create(proyecto=self.proyecto, url="http://www.example.com/a/")
+
+        otro = Proyecto.objects.create(nombre="Otro", codigo_acceso="456@g.us", tipo_alerta="medios")
+        Articulo.objects.create(proyecto=otro, url="http://www.example.com/a/")
+
+    def test_save_con_update_fields_actualiza_la_clave(self):
+        articulo = Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/a")
+        articulo.url = "https://example.com/b"
+        articulo.save(update_fields=["url"])
+
+        articulo.refresh_from_db()
+        self.assertEqual(articulo.clave_url, huella_clave_url("https://example.com/b"))
+
+    def test_bulk_crear_cuenta_como_duplicado_lo_que_omitio_ignore_conflicts(self):
+        view = IngestionAPIView()
+        # Simula una ingesta concurrente que insertó la misma URL entre la
+        # consulta de duplicados y el bulk_create
+        Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/a")
+        registros = [
+            (1, {"url": "https://example.com/a", "titulo": "A"}),
+            (2, {"url": "https://example.com/b", "titulo": "B"}),
+        ]
+
+        with patch.object(view, "_serializar_articulo", side_effect=lambda a, r, t: {"id": str(a.id)}):
+            resultado = view._bulk_crear_articulos(registros, self.proyecto, None, "medios")
+
+        self.assertEqual(resultado["duplicados"], 1)
+        self.assertEqual(resultado["errores"], [{"fila": 1, "error": "La URL ya existe para este proyecto"}])
+        self.assertEqual(len(resultado["listado"]), 1)
+        self.assertEqual(DetalleEnvio.objects.filter(proyecto=self.proyecto).count(), 1)
+
+
+class BackfillClaveUrlTests(TestCase):
+    def test_rellena_claves_y_deja_en_null_las_repetidas(self):
+        proyecto = Proyecto.objects.create(
+            nombre="Proyecto backfill", codigo_acceso="123@g.us", tipo_alerta="redes"
+        )
+        antigua = Articulo.objects.create(proyecto=proyecto, url="https://example.com/a")
+        repetida = Articulo.objects.create(proyecto=proyecto, url="https://example.com/otra")
+        red = Redes.objects.create(
+            proyecto=proyecto, url="https://x.com/u/status/1", fecha_publicacion="2024-01-01T00:00:00Z"
+        )
+        # Estado previo a la migración: sin claves y con variantes repetidas
+        Articulo.objects.filter(id=repetida.id).update(url="http://www.example.com/a/")
+        Articulo.objects.update(clave_url=None)
+        Redes.objects.update(clave_url=None)
+
+        salida = StringIO()
+        call_command("backfill_clave_url", "--lote", "1", stdout=salida)
+
+        antigua.refresh_from_db()
+        repetida.refresh_from_db()
+        red.refresh_from_db()
+        self.assertEqual(antigua.clave_url, huella_clave_url("https://example.com/a"))
+        self.assertIsNone(repetida.clave_url)
+        self.assertEqual(red.clave_url, huella_clave_url("https://twitter.com/u/status/1"))
+        self.assertIn("Articulo: 1 filas con clave, 1 repetidas", salida.getvalue())
+
+    def test_la_repetida_sin_clave_se_puede_editar(self):
+        proyecto = Proyecto.objects.create(
+            nombre="Proyecto legado", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+        Articulo.objects.create(proyecto=proyecto, url="https://example.com/a")
+        repetida = Articulo.objects.create(proyecto=proyecto, url="https://example.com/otra")
+        Articulo.objects.filter(id=repetida.id).update(url="http://www.example.com/a/", clave_url=None)
+
+        repetida.refresh_from_db()
+        repetida.titulo = "Editada"
+        repetida.save()
+        editada = Articulo.objects.get(id=repetida.id)
+        editada.titulo = "Editada otra vez"
+        editada.save(update_fields=["titulo"])
+
+        editada.refresh_from_db()
+        self.assertEqual(editada.titulo, "Editada otra vez")
+        self.assertIsNone(editada.clave_url)
+
+        # Sin la fila que la tapaba, la toma en el siguiente save()
+        Articulo.objects.exclude(id=repetida.id).delete()
+        editada.save()
+        editada.refresh_from_db()
+        self.assertEqual(editada.clave_url, huella_clave_url("https://example.com/a"))
@@ -0,0 +1,127 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from apps.base import clientes_http
+
+
+class ServidorKeepAlive:
+    """Servidor HTTP/1.1 local. Anota el puerto de origen de cada request
+    (mismo puerto = misma conexión) y, con `bloquear`, retiene la respuesta
+    hasta `liberar`."""
+
+    def __init__(self, status=200):
+        self.puertos = []
+        self.bloquear = False
+        self.atendiendo = threading.Event()
+        self.liberar = threading.Event()
+        falso = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                falso.puertos.append(self.client_address[1])
+                if falso.bloquear:
+                    falso.atendiendo.set()
+                    falso.liberar.wait(5)
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.servidor.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/"
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar.set()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class ClientesHttpTests(SimpleTestCase):
+    def setUp(self):
+        clientes_http.reiniciar()
+        self.addCleanup(clientes_http.reiniciar)
+
+    def test_reutiliza_la_conexion_del_host(self):
+        with ServidorKeepAlive() as servidor:
+            for _ in range(3):
+                self.assertEqual(clientes_http.get(servidor.url).text, "ok")
+
+        self.assertEqual(len(servidor.puertos), 3)
+        self.assertEqual(len(set(servidor.puertos)), 1)
+        host = clientes_http.clave_host(servidor.url)
+        estadisticas = clientes_http.estadisticas()[host]
+        self.assertEqual(estadisticas["requests"], 3)
+        self.assertEqual(estadisticas["errores"], 0)
+        self.assertIsNotNone(estadisticas["latencia_media_ms"])
+
+    @override_settings(HTTP_TIMEOUT_CONEXION=2, HTTP_TIMEOUT_LECTURA=7)
+    def test_timeout_por_defecto_y_explicito(self):
+        cliente = clientes_http.cliente_para("https://gate.whapi.cloud/messages/text")
+        with patch.object(cliente.sesion, "request") as request:
+            request.return_value.status_code = 200
+            clientes_http.post("https://gate.whapi.cloud/messages/text", json={})
+            clientes_http.get("https://gate.whapi.cloud/groups", timeout=5)
+            clientes_http.head("https://gate.whapi.cloud/")
+
+        self.assertEqual(request.call_args_list[0].kwargs["timeout"], (2, 7))
+        self.assertEqual(request.call_args_list[1].kwargs["timeout"], 5)
+        self.assertFalse(request.call_args_list[2].kwargs["allow_redirects"])
+        self.assertIs(clientes_http.cliente_para("https://GATE.whapi.cloud/x"), cliente)
+
+    def test_cuenta_errores_y_5xx(self):
+        with ServidorKeepAlive(status=503) as servidor:
+            self.assertEqual(clientes_http.get(servidor.url).status_code, 503)
+            self.assertEqual(clientes_http.get(servidor.url).status_code, 503)
+        # Puerto sin servidor: conexión rechazada
+        with socket.socket() as libre:
+            libre.bind(("127.0.0.1", 0))
+            cerrado = f"http://127.0.0.1:{libre.getsockname()[1]}/"
+        with self.assertRaises(requests.ConnectionError):
+            clientes_http.get(cerrado, timeout=1)
+
+        estadisticas = clientes_http.estadisticas()
+        self.assertEqual(estadisticas[clientes_http.clave_host(servidor.url)]["errores"], 2)
+        rechazado = estadisticas[clientes_http.clave_host(cerrado)]
+        self.assertEqual((rechazado["requests"], rechazado["errores"], rechazado["en_curso"]), (1, 1, 0))
+
+    @override_settings(HTTP_LIMITES_HOST={"127.0.0.1": 1}, HTTP_ESPERA_CUPO_SEGUNDOS=0.05)
+    def test_limite_de_concurrencia_por_host(self):
+        with ServidorKeepAlive() as servidor:
+            servidor.bloquear = True
+            hilo = threading.Thread(target=clientes_http.get, args=(servidor.url,))
+            hilo.start()
+            self.assertTrue(servidor.atendiendo.wait(5))
+
+            with self.assertRaises(clientes_http.CupoHostAgotado):
+                clientes_http.get(servidor.url)
+
+            servidor.liberar.set()
+            hilo.join(5)
+            servidor.bloquear = False
+            self.assertEqual(clientes_http.get(servidor.url).status_code, 200)
+
+        estadisticas = clientes_http.estadisticas()[clientes_http.clave_host(servidor.url)]
+        self.assertEqual(estadisticas["limite"], 1)
+        self.assertEqual(estadisticas["sin_cupo"], 1)
+        self.assertEqual(estadisticas["requests"], 2)
+
+    def test_un_proceso_nuevo_no_hereda_sesiones(self):
+        cliente = clientes_http.cliente_para("https://api.similarweb.com/v1")
+        with patch.object(clientes_http.os, "getpid", return_value=-1):
+            self.assertIsNot(clientes_http.cliente_para("https://api.similarweb.com/v1"), cliente)
@@ -0,0 +1,229 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.base import conectores, tasks
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.models import Articulo, ConectorProveedor
+from apps.proyectos.models import Proyecto
+
+
+def _mencion(numero):
+    # Forma de la API de TWK: el autor viene anidado
+    return {
+        "title": f"Titulo {numero}",
+        "content": f"Contenido energia {numero}",
+        "published": "2024-01-01T10:00:00",
+        "extra_author_attributes": {"name": f"Autor {numero}"},
+        "reach": 100 * numero,
+        "url": f"http://example.com/nota/{numero}",
+    }
+
+
+class ProveedorFalso:
+    """API de proveedor local: `paginas[cursor]` es la respuesta a
+    `?since=<cursor>` (None sin cursor). Un entero responde ese status."""
+
+    def __init__(self, paginas):
+        self.paginas = paginas
+        self.pedidos = []
+        falso = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                consulta = parse_qs(urlparse(self.path).query)
+                cursor = consulta.get("since", [None])[0]
+                falso.pedidos.append({"since": cursor, "token": self.headers.get("Authorization")})
+                respuesta = falso.paginas.get(cursor, {"results": []})
+                status = respuesta if isinstance(respuesta, int) else 200
+                cuerpo = json.dumps({} if status != 200 else respuesta).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/mentions"
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class AplanarTests(SimpleTestCase):
+    def test_claves_anidadas_quedan_como_columnas_con_puntos(self):
+        self.assertEqual(
+            conectores.aplanar({"Title": "x", "Extra_Author_Attributes": {"Name": "A", "tags": [1]}}),
+            {"title": "x", "extra_author_attributes.name": "A", "extra_author_attributes.tags": [1]},
+        )
+
+
+class ConectoresTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="conector", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto conector",
+            codigo_acceso="123@g.us",
+            tipo_alerta="medios",
+            criterios_aceptacion="energia",
+        )
+        patcher = patch.object(IngestionAPIView, "_notificar_ruta_externa")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _conector(self, url, **extra):
+        return ConectorProveedor.objects.create(
+            proyecto=self.proyecto,
+            nombre="TWK menciones",
+            url=url,
+            headers={"Authorization": "Bearer secreto"},
+            proximo_sondeo=timezone.now() - timedelta(seconds=1),
+            created_by=self.user,
+            **extra,
+        )
+
+    def _vencer(self, conector):
+        ConectorProveedor.objects.filter(id=conector.id).update(
+            proximo_sondeo=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_trae_las_paginas_desde_la_marca_de_agua(self):
+        paginas = {
+            None: {"results": [_mencion(1), _mencion(2)], "next_cursor": "c1"},
+            "c1": {"results": [_mencion(3), {**_mencion(4), "content": "sin criterio"}], "next_cursor": "c2"},
+            "c2": {"results": [], "next_cursor": "c2"},
+        }
+        with ProveedorFalso(paginas) as proveedor:
+            conector = self._conector(proveedor.url)
+
+            resumen = tasks.sondear_conector(str(conector.id))
+
+            self.assertEqual(
+                resumen,
+                {"paginas": 2, "recibidos": 4, "creados": 3, "duplicados": 0, "descartados": 1, "cursor": "c2"},
+            )
+            self.assertEqual([pedido["since"] for pedido in proveedor.pedidos], [None, "c1", "c2"])
+            self.assertEqual(proveedor.pedidos[0]["token"], "Bearer secreto")
+
+            # El siguiente sondeo retoma desde c2; lo ya ingestado se descarta
+            paginas["c2"] = {"results": [_mencion(3), _mencion(5)], "next_cursor": "c3"}
+            self._vencer(conector)
+            resumen = tasks.sondear_conector(str(conector.id))
+
+        self.assertEqual(proveedor.pedidos[3]["since"], "c2")
+        self.assertEqual((resumen["creados"], resumen["duplicados"]), (1, 1))
+        articulo = Articulo.objects.get(url="http://example.com/nota/1")
+        self.assertEqual(articulo.autor, "Autor 1")
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 4)
+        conector.refresh_from_db()
+        self.assertEqual((conector.cursor, conector.fallos_consecutivos), ("c3", 0))
+        self.assertIsNotNone(conector.ultimo_sondeo)
+
+    def test_campo_marca_como_cursor_si_la_api_no_lo_devuelve(self):
+        paginas = {
+            None: {"results": [{**_mencion(1), "id": "0007"}, {**_mencion(2), "id": "0009"}]},
+            "0009": {"results": []},
+        }
+        with ProveedorFalso(paginas) as proveedor:
+            conector = self._conector(proveedor.url, campo_marca="id", proveedor="medios")
+            tasks.sondear_conector(str(conector.id))
+
+        conector.refresh_from_db()
+        self.assertEqual(conector.cursor, "0009")
+        self.assertEqual(Articulo.objects.count(), 2)
+
+    def test_marca_numerica_se_compara_como_numero(self):
+        paginas = {
+            None: {"results": [{**_mencion(1), "id": 9}, {**_mencion(2), "id": 10}]},
+            # Una página con ids menores no hace retroceder el cursor
+            "10": {"results": [{**_mencion(3), "id": 8}]},
+        }
+        with ProveedorFalso(paginas) as proveedor:
+            conector = self._conector(proveedor.url, campo_marca="id", proveedor="medios")
+            tasks.sondear_conector(str(conector.id))
+
+        self.assertEqual([pedido["since"] for pedido in proveedor.pedidos], [None, "10"])
+        conector.refresh_from_db()
+        self.assertEqual(conector.cursor, "10")
+
+    def test_marca_de_fecha_respeta_la_zona_horaria(self):
+        paginas = {
+            None: {
+                "results": [
+                    {**_mencion(1), "published": "2024-01-01T10:00:00+00:00"},
+                    # 14:00 UTC: la más reciente aunque como texto sea menor
+                    {**_mencion(2), "published": "2024-01-01T09:00:00-05:00"},
+                ]
+            },
+        }
+        with ProveedorFalso(paginas) as proveedor:
+            conector = self._conector(proveedor.url, campo_marca="published", proveedor="medios")
+            tasks.sondear_conector(str(conector.id))
+
+        conector.refresh_from_db()
+        self.assertEqual(conector.cursor, "2024-01-01T09:00:00-05:00")
+
+    def test_un_fallo_conserva_el_cursor_confirmado_y_aplica_backoff(self):
+        paginas = {None: {"results": [_mencion(1)], "next_cursor": "c1"}, "c1": 500}
+        with ProveedorFalso(paginas) as proveedor:
+            conector = self._conector(proveedor.url, intervalo_segundos=60)
+            with self.assertLogs("apps.base.conectores", level="WARNING"):
+                resultado = tasks.sondear_conector(str(conector.id))
+
+        conector.refresh_from_db()
+        self.assertEqual(resultado["fallos_consecutivos"], 1)
+        self.assertEqual(conector.cursor, "c1")
+        self.assertEqual(conector.fallos_consecutivos, 1)
+        self.assertIn("500", conector.ultimo_error)
+        espera = (conector.proximo_sondeo - conector.ultimo_sondeo).total_seconds()
+        self.assertAlmostEqual(espera, 120, delta=1)
+        self.assertEqual(Articulo.objects.count(), 1)
+
+    def test_despacha_lo_nuevo_al_pipeline(self):
+        paginas = {None: {"results": [_mencion(1)], "next_cursor": "c1"}}
+        with ProveedorFalso(paginas) as proveedor, patch.object(
+            IngestionAPIView, "_despachar_pipeline_ia", return_value=True
+        ) as despachar:
+            conector = self._conector(proveedor.url)
+            tasks.sondear_conector(str(conector.id))
+
+        despachar.assert_called_once()
+        proyecto, listado = despachar.call_args.args
+        self.assertEqual(proyecto, self.proyecto)
+        self.assertEqual([alerta["url"] for alerta in listado], ["http://example.com/nota/1"])
+
+    def test_beat_encola_solo_los_conectores_vencidos(self):
+        vencido = self._conector("http://127.0.0.1:9/vencido")
+        self._conector("http://127.0.0.1:9/inactivo", activo=False)
+        futuro = self._conector("http://127.0.0.1:9/futuro")
+        ConectorProveedor.objects.filter(id=futuro.id).update(
+            proximo_sondeo=timezone.now() + timedelta(minutes=5)
+        )
+
+        with patch.object(tasks.sondear_conector, "delay") as delay:
+            self.assertEqual(tasks.sondear_conectores_vencidos(), 1)
+
+        delay.assert_called_once_with(str(vencido.id))
+
+    def test_un_conector_se_reclama_una_sola_vez(self):
+        conector = self._conector("http://127.0.0.1:9/menciones")
+
+        self.assertIsNotNone(conectores.reclamar(str(conector.id)))
+        self.assertIsNone(conectores.reclamar(str(conector.id)))
+        self.assertEqual(tasks.sondear_conector(str(conector.id)), "omitido")
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.base.api import utils
+from apps.base.api.utils import (
+    CriteriosAceptacion,
+    criterios_aceptacion_proyecto,
+    filtrar_registros_por_palabras,
+)
+
+
+class CriteriosAceptacionTests(SimpleTestCase):
+    def test_coincidencia_insensible_a_acentos_y_mayusculas(self):
+        criterios = CriteriosAceptacion(["Petróleo", "energia"])
+
+        self.assertTrue(criterios.cumple({"titulo": "Precio del PETROLEO"}))
+        self.assertTrue(criterios.cumple({"contenido": "Sector energía en alza"}))
+        self.assertFalse(criterios.cumple({"titulo": "Otra", "contenido": "noticia"}))
+
+    def test_sin_criterios_acepta_todo(self):
+        criterios = CriteriosAceptacion(["", None])
+
+        self.assertFalse(criterios)
+        self.assertTrue(criterios.cumple({"titulo": "Cualquier cosa"}))
+        self.assertEqual(criterios.coincidencias({"titulo": "Cualquier cosa"}), [])
+
+    def test_coincidencias_reporta_criterios_solapados_en_orden_configurado(self):
+        criterios = CriteriosAceptacion(["tierra", "Gran Tierra", "gran", "canacol"])
+
+        self.assertEqual(
+            criterios.coincidencias({"titulo": "Gran Tierra Energy", "contenido": "y Ecopetrol"}),
+            ["tierra", "Gran Tierra", "gran"],
+        )
+
+    def test_caracteres_especiales_se_buscan_literalmente(self):
+        criterios = CriteriosAceptacion(["c++", "#marca"])
+
+        self.assertTrue(criterios.cumple({"contenido": "Usamos C++ a diario"}))
+        self.assertTrue(criterios.cumple({"contenido": "hola #Marca"}))
+        self.assertFalse(criterios.cumple({"contenido": "marca c"}))
+
+    def test_filtrar_registros_por_palabras_conserva_el_orden(self):
+        registros = [
+            {"titulo": "Uno", "contenido": "acción"},
+            {"titulo": "Dos", "contenido": "nada"},
+            {"titulo": "Accion tres", "contenido": ""},
+        ]
+
+        filtrados = filtrar_registros_por_palabras(registros, ["accion"])
+
+        self.assertEqual([registro["titulo"] for registro in filtrados], ["Uno", "Accion tres"])
+
+
+class CriteriosAceptacionProyectoTests(SimpleTestCase):
+    def setUp(self):
+        utils._CRITERIOS_CACHE.clear()
+        self.addCleanup(utils._CRITERIOS_CACHE.clear)
+
+    def _proyecto(self, criterios, modified_at):
+        return SimpleNamespace(
+            id="p1",
+            modified_at=modified_at,
+            get_criterios_aceptacion_list=lambda: criterios,
+        )
+
+    def test_compila_una_vez_por_modified_at(self):
+        instante = datetime(2024, 1, 1)
+
+        with patch.object(utils, "CriteriosAceptacion", wraps=CriteriosAceptacion) as compilar:
+            primero = criterios_aceptacion_proyecto(self._proyecto(["alerta"], instante))
+            segundo = criterios_aceptacion_proyecto(self._proyecto(["alerta"], instante))
+            tercero = criterios_aceptacion_proyecto(
+                self._proyecto(["otra"], instante + timedelta(seconds=1))
+            )
+
+        self.assertIs(primero, segundo)
+        self.assertEqual(compilar.call_count, 2)
+        self.assertEqual(tercero.coincidencias({"titulo": "otra alerta"}), ["otra"])
+
+    def test_proyecto_sin_modified_at_no_se_cachea(self):
+        proyecto = SimpleNamespace(id="p1", get_criterios_aceptacion_list=lambda: ["x"])
+
+        criterios_aceptacion_proyecto(proyecto)
+
+        self.assertEqual(utils._CRITERIOS_CACHE, {})
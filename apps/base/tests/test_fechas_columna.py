@@ -0,0 +1,113 @@
+from datetime import date, datetime, time
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.base.api import mapeo_proveedores, utils
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.mapeo_proveedores import Fecha
+from apps.base.api.utils import (
+    ParserFechaColumna,
+    combinar_fecha_hora,
+    parsear_datetime,
+    parsear_fecha,
+    parsear_hora,
+)
+
+
+VALORES_DATETIME = [
+    "2024-01-05T10:30:00Z",
+    "2024-01-05 10:30",
+    "2024-01-05",
+    "05/01/2024 10:30:15",
+    "5/1/2024 9:05",
+    "05-01-2024",
+    "31/02/2024",
+    "10:30",
+    "ayer",
+    " 05/01/2024 ",
+    "",
+    None,
+    45000,
+    datetime(2024, 1, 5, 10, 30),
+]
+
+
+class ParserFechaColumnaTests(SimpleTestCase):
+    def test_mismo_resultado_que_el_parser_por_celda_en_cualquier_orden(self):
+        for tipo, por_celda, valores in (
+            ("datetime", parsear_datetime, VALORES_DATETIME),
+            ("fecha", parsear_fecha, ["2024-01-05", "05/01/2024", "05-01-2024 10:00", "x", None]),
+            ("hora", parsear_hora, ["10:30", "10:30:15.5", "a las 9:15", "", time(8, 0)]),
+        ):
+            for inicio in range(len(valores)):
+                rotados = valores[inicio:] + valores[:inicio]
+                parser = ParserFechaColumna(tipo)
+                for valor in rotados:
+                    esperado = por_celda(valor)
+                    if isinstance(esperado, datetime) and esperado.date() != date(2024, 1, 5):
+                        continue  # "10:30" se combina con la fecha de hoy
+                    with self.subTest(tipo=tipo, valor=valor, inicio=inicio):
+                        self.assertEqual(parser(valor), esperado)
+
+    def test_columna_uniforme_usa_el_formato_inferido_sin_parser_por_celda(self):
+        parser = ParserFechaColumna("datetime")
+
+        with patch.object(parser, "_por_celda", wraps=parsear_datetime) as por_celda:
+            resultados = [parser(f"{dia:02d}/03/2024 08:15") for dia in range(1, 29)]
+
+        self.assertEqual(parser.formato, "dia_primero")
+        por_celda.assert_not_called()
+        self.assertEqual(resultados[-1], parsear_datetime("28/03/2024 08:15"))
+
+    def test_celda_que_no_encaja_cae_al_parser_por_celda(self):
+        parser = ParserFechaColumna("datetime")
+        parser("2024-03-01T00:00:00")
+
+        self.assertEqual(parser("01/03/2024"), parsear_datetime("01/03/2024"))
+        self.assertEqual(parser.formato, "iso")
+        self.assertEqual(parser.celdas_por_celda, 1)
+
+    def test_sin_formato_tras_la_muestra_queda_por_celda(self):
+        parser = ParserFechaColumna("datetime")
+        for _ in range(utils.MUESTRA_INFERENCIA_FECHAS + 2):
+            parser("hoy")
+
+        self.assertIsNone(parser.formato)
+        self.assertEqual(parser("05/01/2024"), parsear_datetime("05/01/2024"))
+
+
+class CombinarFechaHoraColumnasTests(SimpleTestCase):
+    def test_equivale_a_combinar_fecha_hora(self):
+        leer = Fecha(("fecha",), ("hora",), combinar_siempre=True).compilar(
+            frozenset({"fecha", "hora"})
+        )
+        casos = [
+            ("05/01/2024", "10:30"),
+            ("2024-01-05", "a las 9:15"),
+            ("05/01/2024", ""),
+            ("", "10:00"),
+            (datetime(2024, 1, 5, 7, 0), None),
+            (datetime(2024, 1, 5), datetime(1900, 1, 1, 11, 45)),
+        ]
+
+        for fecha, hora in casos:
+            with self.subTest(fecha=fecha, hora=hora):
+                self.assertEqual(
+                    leer({"fecha": fecha, "hora": hora}),
+                    combinar_fecha_hora(fecha, hora),
+                )
+
+    def test_los_parsers_se_reinician_por_archivo(self):
+        view = IngestionAPIView()
+        filas = [{"published": "05/01/2024 10:30", "url": "http://example.com/1"}]
+
+        with patch.object(
+            mapeo_proveedores, "ParserFechaColumna", wraps=ParserFechaColumna
+        ) as parser_columna:
+            view._mapear_filas("medios_twk", filas)
+            por_archivo = parser_columna.call_count
+            view._mapear_filas("medios_twk", filas)
+
+        self.assertGreater(por_archivo, 0)
+        self.assertEqual(parser_columna.call_count, 2 * por_archivo)
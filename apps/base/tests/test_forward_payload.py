@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.models import MensajeSaliente, Redes
+from apps.proyectos.models import Proyecto
+
+
+class ForwardPayloadTests(TestCase):
+    def setUp(self):
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto forward", codigo_acceso="123@g.us", tipo_alerta="redes"
+        )
+        self.usuario = get_user_model().objects.create_user(username="forward", password="x")
+        self.payload = {
+            "proyecto_id": str(self.proyecto.id),
+            "usuario_id": self.usuario.id,
+            "alertas": [
+                {
+                    "contenido": "Contenido",
+                    "fecha": "2024-01-01T10:00:00",
+                    "url": "https://twitter.com/u/status/1",
+                    "autor": "autor",
+                    "reach": 10,
+                    "engagement": 2,
+                }
+            ],
+        }
+
+    def _view(self):
+        view = IngestionAPIView()
+        view.request = Request(
+            APIRequestFactory().post("/api/ingestion/", HTTP_AUTHORIZATION="Bearer abc")
+        )
+        return view
+
+    @patch("apps.base.api.ingestion.clientes_http.post")
+    def test_sin_base_url_ejecuta_la_vista_en_proceso(self, mock_post):
+        response = self._view().forward_payload("redes-alertas-ingestion", self.payload)
+
+        mock_post.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["mensaje"], "1 publicaciones creadas.")
+        red = Redes.objects.get(proyecto=self.proyecto)
+        self.assertEqual(red.created_by, self.usuario)
+
+    @override_settings(INGESTION_FORWARD_BASE_URL="http://localhost:8000/")
+    @patch("apps.base.api.ingestion.clientes_http.post")
+    def test_base_url_local_tambien_va_en_proceso(self, mock_post):
+        response = self._view().forward_payload("redes-alertas-ingestion", self.payload)
+        segunda = self._view().forward_payload("redes-alertas-ingestion", self.payload)
+
+        mock_post.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        # Misma forma de respuesta que la vista por HTTP: la URL ya existe
+        self.assertEqual(segunda.status_code, 400)
+        self.assertEqual(segunda.data["errores"][0]["error"], "La URL ya existe en este proyecto")
+
+    @override_settings(INGESTION_FORWARD_BASE_URL="https://ingesta.otro-host.test")
+    @patch("apps.base.api.ingestion.clientes_http.post")
+    def test_base_url_de_otro_host_reenvia_por_http(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=201, json=lambda: {"ok": True})
+
+        response = self._view().forward_payload("redes-alertas-ingestion", self.payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"ok": True})
+        self.assertEqual(
+            mock_post.call_args.args[0], "https://ingesta.otro-host.test/api/redes/ingestion/"
+        )
+        self.assertEqual(mock_post.call_args.kwargs["headers"]["Authorization"], "Bearer abc")
+        self.assertFalse(Redes.objects.exists())
+
+    @override_settings(
+        INGESTION_FORWARD_BASE_URL="https://ingesta.otro-host.test", OUTBOX_DRENAR_AL_COMMIT=False
+    )
+    def test_diferido_a_otro_host_queda_en_el_outbox(self):
+        response = self._view().forward_payload(
+            "redes-alertas-ingestion", self.payload, diferido=True
+        )
+
+        self.assertEqual(response.status_code, 202)
+        mensaje = MensajeSaliente.objects.get()
+        self.assertEqual(mensaje.destino, MensajeSaliente.DESTINO_FORWARD)
+        self.assertEqual(mensaje.headers["Authorization"], "Bearer abc")
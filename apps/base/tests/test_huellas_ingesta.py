@@ -0,0 +1,170 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.models import Articulo, HuellaFilaIngesta, HuellaIngesta, IngestaJob
+from apps.proyectos.models import Proyecto
+
+
+ENCABEZADO = "title,content,published,extra_source_attributes.name,reach,url\n"
+
+
+def _fila(indice: int) -> str:
+    return f"Titulo {indice},Contenido {indice},2024-01-01,Fuente,10,http://example.com/{indice}\n"
+
+
+def _csv(*indices: int) -> str:
+    return ENCABEZADO + "".join(_fila(indice) for indice in indices)
+
+
+class HuellasIngestaTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(username="huellas", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto huellas", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+
+    def _post(self, contenido: str, parametros: str = ""):
+        uploaded = SimpleUploadedFile("medios.csv", contenido.encode("utf-8"))
+        request = self.factory.post(
+            f"/api/ingestion/?proyecto={self.proyecto.id}{parametros}",
+            {"archivo": uploaded},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa"), \
+                self.captureOnCommitCallbacks(execute=True):
+            return IngestionAPIView.as_view()(request)
+
+    def test_archivo_identico_devuelve_el_resumen_sin_parsear(self):
+        primera = self._post(_csv(1, 2, 3))
+        self.assertEqual(primera.status_code, 201)
+
+        with patch.object(IngestionAPIView, "_parse_file") as parse:
+            segunda = self._post(_csv(1, 2, 3))
+
+        parse.assert_not_called()
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.data["creados"], 3)
+        self.assertEqual(segunda.data["listado"], [])
+        self.assertIn("ya fue ingestado", segunda.data["mensaje"])
+        self.assertEqual(segunda.data["ingesta_previa"]["archivos"], ["medios.csv"])
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 3)
+        self.assertEqual(HuellaFilaIngesta.objects.filter(proyecto=self.proyecto).count(), 3)
+
+    def test_archivo_solapado_solo_procesa_filas_nuevas(self):
+        self._post(_csv(1, 2))
+
+        for parametros in ("", "&streaming=1"):
+            with self.subTest(parametros=parametros):
+                indice_nuevo = 3 if not parametros else 4
+                # Se llama una vez por fila mapeada
+                with patch.object(
+                    IngestionAPIView, "_inferir_proveedor", return_value="medios"
+                ) as mapeadas:
+                    response = self._post(_csv(1, 2, indice_nuevo), parametros)
+
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(mapeadas.call_count, 1)
+                self.assertEqual(len(response.data["listado"]), 1)
+                self.assertEqual(response.data["filas_ya_ingestadas"], 2)
+                self.assertEqual(response.data["duplicados"], 2)
+                self.assertIn("2 duplicados", response.data["mensaje"])
+
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 4)
+
+    def test_filas_ya_ingestadas_en_otro_orden(self):
+        self._post(_csv(1, 2))
+
+        response = self._post(_csv(2, 1))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["filas_ya_ingestadas"], 2)
+        self.assertIn("0 registros nuevos", response.data["mensaje"])
+
+    def test_reingestar_ignora_las_huellas(self):
+        self._post(_csv(1))
+
+        response = self._post(_csv(1), "&reingestar=1")
+
+        # Sin huellas la fila llega a la deduplicación por URL
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["duplicados"], 1)
+        self.assertNotIn("filas_ya_ingestadas", response.data)
+
+    def test_cambio_de_criterios_invalida_las_huellas(self):
+        self._post(_csv(1, 2))
+        self.proyecto.criterios_aceptacion = "contenido"
+        self.proyecto.save()
+
+        response = self._post(_csv(1, 2))
+
+        self.assertNotIn("ingesta_previa", response.data)
+        self.assertNotIn("filas_ya_ingestadas", response.data)
+        # Las URL ya existentes quedan registradas con la nueva firma, pero una
+        # ingesta con errores no deja resumen
+        self.assertEqual(HuellaFilaIngesta.objects.filter(proyecto=self.proyecto).count(), 4)
+        self.assertEqual(HuellaIngesta.objects.filter(proyecto=self.proyecto).count(), 1)
+
+    def _fallar_fila(self, url: str):
+        original = IngestionAPIView._bulk_crear_articulos
+
+        def _bulk_crear(view, registros_con_indice, *args, **kwargs):
+            fallidas = [
+                (indice, registro)
+                for indice, registro in registros_con_indice
+                if registro.get("url") == url
+            ]
+            resultado = original(
+                view,
+                [par for par in registros_con_indice if par not in fallidas],
+                *args,
+                **kwargs,
+            )
+            resultado["errores"].extend(
+                {"fila": indice, "error": "Error simulado"} for indice, _ in fallidas
+            )
+            resultado["descartados"] += len(fallidas)
+            return resultado
+
+        return patch.object(IngestionAPIView, "_bulk_crear_articulos", _bulk_crear)
+
+    def test_fila_que_fallo_se_reprocesa_en_la_siguiente_subida(self):
+        with self._fallar_fila("http://example.com/2"):
+            primera = self._post(_csv(1, 2))
+        self.assertEqual(len(primera.data["errores"]), 1)
+        self.assertEqual(HuellaFilaIngesta.objects.filter(proyecto=self.proyecto).count(), 1)
+        self.assertFalse(HuellaIngesta.objects.exists())
+
+        segunda = self._post(_csv(1, 2))
+
+        self.assertNotIn("ingesta_previa", segunda.data)
+        self.assertEqual(segunda.data["filas_ya_ingestadas"], 1)
+        self.assertEqual(len(segunda.data["listado"]), 1)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 2)
+        self.assertEqual(HuellaIngesta.objects.filter(proyecto=self.proyecto).count(), 1)
+
+    def test_ingesta_sin_registros_creados_no_queda_como_ingestada(self):
+        with self._fallar_fila("http://example.com/1"):
+            primera = self._post(_csv(1))
+        self.assertEqual(primera.status_code, 400)
+
+        segunda = self._post(_csv(1))
+
+        self.assertEqual(segunda.status_code, 201)
+        self.assertNotIn("ingesta_previa", segunda.data)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 1)
+
+    def test_modo_asincrono_no_encola_un_archivo_ya_ingestado(self):
+        self._post(_csv(1, 2))
+
+        response = self._post(_csv(1, 2), "&asincrono=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ingesta_previa", response.data)
+        self.assertFalse(IngestaJob.objects.exists())
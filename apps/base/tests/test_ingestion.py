@@ -12,7 +12,7 @@ from rest_framework.response import Response
 from rest_framework.test import APIRequestFactory
 
 from apps.base.api.ingestion import IngestionAPIView
-from apps.base.api.utils import formatear_fecha_respuesta
+from apps.base.api.utils import formatear_fecha_respuesta, huella_clave_url
 from apps.base.models import Articulo
 
 
@@ -221,8 +221,7 @@ class IngestionAPITests(SimpleTestCase):
         view = IngestionAPIView()
         proyecto = SimpleNamespace(id=self.proyecto_id)
 
-        mock_queryset = mock_filter.return_value
-        mock_queryset.values_list.return_value = ["https://example.com/noticia"]
+        mock_filter.return_value.exists.return_value = True
 
         es_duplicado = view._es_url_duplicada_por_proyecto(
             Articulo,
@@ -231,7 +230,10 @@ class IngestionAPITests(SimpleTestCase):
         )
 
         self.assertTrue(es_duplicado)
-        mock_filter.assert_called_once_with(proyecto=proyecto)
+        mock_filter.assert_called_once_with(
+            proyecto=proyecto,
+            clave_url=huella_clave_url("https://example.com/noticia"),
+        )
 
     @patch("apps.base.api.ingestion.Proyecto")
     def test_detects_stakeholders_provider(self, mock_proyecto):
@@ -0,0 +1,121 @@
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.ingestion_jobs import IngestaJobEstadoAPIView, ProgresoIngesta, clave_progreso
+from apps.base.models import Articulo, IngestaJob
+from apps.proyectos.models import Proyecto
+
+
+CSV_MEDIOS = (
+    "title,content,published,extra_source_attributes.name,reach,url\n"
+    "Titulo 1,Contenido 1,2024-01-01,Fuente,10,http://example.com/1\n"
+    "Titulo 2,Contenido 2,2024-01-01,Fuente,10,http://example.com/2\n"
+    "Titulo 3,Otro texto,2024-01-01,Fuente,10,http://example.com/3\n"
+)
+
+
+class ProgresoIngestaTests(SimpleTestCase):
+    def test_publica_en_cache_como_mucho_una_vez_por_intervalo(self):
+        progreso = ProgresoIngesta("job-1", intervalo=3600)
+
+        progreso.sumar(filas_parseadas=1)
+        progreso.sumar(filas_parseadas=1, creados=1)
+
+        self.assertEqual(cache.get(clave_progreso("job-1"))["filas_parseadas"], 1)
+        progreso.publicar()
+        self.assertEqual(
+            cache.get(clave_progreso("job-1")),
+            {"filas_parseadas": 2, "creados": 1, "duplicados": 0, "descartados": 0},
+        )
+
+
+class IngestaAsincronaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(username="ingesta", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto async",
+            codigo_acceso="123@g.us",
+            tipo_alerta="medios",
+            criterios_aceptacion="contenido",
+        )
+        Articulo.objects.create(proyecto=self.proyecto, url="http://example.com/2")
+
+    def _post(self, nombre: str, contenido: str):
+        uploaded = SimpleUploadedFile(nombre, contenido.encode("utf-8"))
+        request = self.factory.post(
+            f"/api/ingestion/?proyecto={self.proyecto.id}&asincrono=1",
+            {"archivo": uploaded},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa"), \
+                self.captureOnCommitCallbacks(execute=True):
+            return IngestionAPIView.as_view()(request)
+
+    def _estado(self, job_id):
+        request = self.factory.get(f"/api/ingestion/jobs/{job_id}/")
+        force_authenticate(request, user=self.user)
+        return IngestaJobEstadoAPIView.as_view()(request, pk=job_id)
+
+    def test_encola_job_y_reporta_conteos_y_resultado(self):
+        response = self._post("medios.csv", CSV_MEDIOS)
+
+        self.assertEqual(response.status_code, 202)
+        job = IngestaJob.objects.get(id=response.data["job_id"])
+        self.assertEqual(job.estado, IngestaJob.ESTADO_COMPLETADA)
+        self.assertEqual(job.created_by, self.user)
+
+        estado = self._estado(job.id).data
+        self.assertEqual(estado["filas_parseadas"], 3)
+        self.assertEqual(estado["creados"], 1)
+        self.assertEqual(estado["duplicados"], 1)
+        self.assertEqual(estado["descartados"], 1)
+        self.assertEqual(estado["codigo_http"], 201)
+        self.assertEqual(estado["resultado"]["mensaje"], "1 registros creados (1 duplicados)")
+        self.assertEqual(estado["resultado"]["listado"][0]["url"], "http://example.com/1")
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 2)
+
+    def test_archivo_invalido_deja_el_job_en_error(self):
+        response = self._post("medios.csv", "columna\nvalor\n")
+
+        job = IngestaJob.objects.get(id=response.data["job_id"])
+        self.assertEqual(job.estado, IngestaJob.ESTADO_ERROR)
+        self.assertEqual(job.codigo_http, 400)
+        self.assertIn("url", job.error)
+
+    def test_rechaza_extension_no_soportada_sin_crear_job(self):
+        response = self._post("medios.txt", CSV_MEDIOS)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IngestaJob.objects.exists())
+
+    def test_estado_solo_para_el_creador_o_el_dueno_del_proyecto(self):
+        job = IngestaJob.objects.create(proyecto=self.proyecto, created_by=self.user)
+        otro = get_user_model().objects.create_user(username="otro", password="x")
+
+        request = self.factory.get(f"/api/ingestion/jobs/{job.id}/")
+        self.assertEqual(IngestaJobEstadoAPIView.as_view()(request, pk=job.id).status_code, 401)
+
+        request = self.factory.get(f"/api/ingestion/jobs/{job.id}/")
+        force_authenticate(request, user=otro)
+        self.assertEqual(IngestaJobEstadoAPIView.as_view()(request, pk=job.id).status_code, 404)
+
+        self.proyecto.created_by = otro
+        self.proyecto.save()
+        request = self.factory.get(f"/api/ingestion/jobs/{job.id}/")
+        force_authenticate(request, user=otro)
+        self.assertEqual(IngestaJobEstadoAPIView.as_view()(request, pk=job.id).status_code, 200)
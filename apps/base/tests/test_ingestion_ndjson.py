@@ -0,0 +1,142 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.ingestion_ndjson import IngestionNDJSONAPIView
+from apps.base.models import Articulo
+from apps.proyectos.models import Proyecto
+
+
+def _alerta(numero, **extra):
+    return {
+        "url": f"https://example.com/nota/{numero}",
+        "titulo": f"Titulo {numero}",
+        "contenido": f"Contenido energia {numero}",
+        "fecha": "2024-01-01T10:00:00",
+        "reach": 100,
+        **extra,
+    }
+
+
+@override_settings(INGESTION_NDJSON_LOTE=2)
+class IngestionNDJSONTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="ndjson", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto ndjson",
+            codigo_acceso="123@g.us",
+            tipo_alerta="medios",
+            criterios_aceptacion="energia",
+        )
+
+    def _post(self, cuerpo, content_type="application/x-ndjson"):
+        if isinstance(cuerpo, list):
+            cuerpo = "".join(
+                linea if isinstance(linea, str) else json.dumps(linea) + "\n" for linea in cuerpo
+            )
+        request = APIRequestFactory().post(
+            f"/api/ingestion/ndjson/?proyecto={self.proyecto.id}",
+            data=cuerpo.encode("utf-8"),
+            content_type=content_type,
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa"):
+            response = IngestionNDJSONAPIView.as_view()(request)
+            if not response.streaming:
+                return response, []
+            lineas = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        return response, [json.loads(linea) for linea in lineas]
+
+    def test_confirma_cada_lote_y_resume_al_final(self):
+        Articulo.objects.create(proyecto=self.proyecto, url="https://example.com/nota/3")
+
+        response, lineas = self._post(
+            [
+                _alerta(1),
+                _alerta(2),
+                "{no es json\n",
+                "\n",
+                _alerta(3),
+                _alerta(4, contenido="sin criterio"),
+                {"titulo": "sin url"},
+                _alerta(5),
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        acks, resumen = lineas[:-1], lineas[-1]["resumen"]
+        self.assertEqual(
+            [(ack["lote"], ack["desde_linea"], ack["hasta_linea"]) for ack in acks],
+            [(1, 1, 2), (2, 3, 5), (3, 6, 7), (4, 8, 8)],
+        )
+        self.assertEqual(acks[0]["creados"], 2)
+        self.assertEqual(
+            acks[1]["errores"],
+            [
+                {"linea": 3, "error": "JSON inválido"},
+                {"linea": 5, "error": "La URL ya existe para este proyecto"},
+            ],
+        )
+        self.assertEqual(acks[2]["descartados"], 1)
+        self.assertEqual(acks[2]["errores"], [{"linea": 7, "error": "La alerta no tiene URL"}])
+        self.assertEqual(
+            resumen,
+            {"lineas": 7, "lotes": 4, "creados": 3, "duplicados": 1, "descartados": 1, "errores": 3},
+        )
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 4)
+
+    def test_lotes_confirmados_quedan_guardados_si_falla_uno_posterior(self):
+        original = IngestionAPIView._persistir_registros
+        llamadas = []
+
+        def _persistir(view, registros, proyecto):
+            llamadas.append(len(registros))
+            if len(llamadas) == 2:
+                raise RuntimeError("falla la base")
+            return original(view, registros, proyecto)
+
+        with patch.object(IngestionAPIView, "_persistir_registros", _persistir), self.assertLogs(
+            "apps.base.api.ingestion_ndjson", level="ERROR"
+        ):
+            _, lineas = self._post([_alerta(n) for n in range(1, 6)])
+
+        self.assertEqual(lineas[0]["creados"], 2)
+        self.assertEqual(lineas[-1]["error"], "Error interno procesando el lote.")
+        self.assertEqual(lineas[-1]["desde_linea"], 3)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 2)
+
+    def test_datos_invalidos_son_error_de_la_linea(self):
+        _, lineas = self._post(
+            [
+                _alerta(1),
+                _alerta(2, fecha="2024-02-30"),
+                '{"url": "https://example.com/nota/9", "reach": 1e400}\n',
+                _alerta(3),
+            ]
+        )
+
+        acks, resumen = lineas[:-1], lineas[-1]["resumen"]
+        errores = [error for ack in acks for error in ack["errores"]]
+        self.assertEqual([error["linea"] for error in errores], [2, 3])
+        self.assertTrue(all(error["error"].startswith("Datos inválidos") for error in errores))
+        self.assertEqual(resumen["creados"], 2)
+        self.assertEqual(resumen["errores"], 2)
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 2)
+
+    @override_settings(INGESTION_NDJSON_MAXIMO_BYTES_LINEA=200)
+    def test_linea_demasiado_larga_se_rechaza_sin_cortar_las_siguientes(self):
+        _, lineas = self._post([_alerta(1, contenido="energia " + "x" * 500), _alerta(2)])
+
+        self.assertEqual(lineas[0]["errores"], [{"linea": 1, "error": "Línea demasiado larga"}])
+        self.assertEqual(lineas[0]["creados"], 1)
+
+    def test_requiere_content_type_ndjson(self):
+        response, _ = self._post([_alerta(1)], content_type="application/json")
+
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(Articulo.objects.exists())
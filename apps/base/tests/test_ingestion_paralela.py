@@ -0,0 +1,119 @@
+from io import BytesIO
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.base.api import ingestion_paralela
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.ingestion_paralela import mapear_en_procesos
+
+
+def _csv_medios(inicio: int, filas: int) -> bytes:
+    lineas = ["title,content,published,extra_source_attributes.name,reach,url"]
+    for indice in range(inicio, inicio + filas):
+        fecha = "05/01/2024 10:30" if indice % 3 else "2024-01-05T08:00:00Z"
+        lineas.append(
+            f"Nota {indice},Contenido {indice},{fecha},Fuente,{indice},http://example.com/{indice}"
+        )
+    return ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+def _csv_redes(inicio: int, filas: int) -> bytes:
+    lineas = ["content,published,extra_author_attributes.name,reach,engagement,url,domain_url"]
+    for indice in range(inicio, inicio + filas):
+        lineas.append(
+            f"Post {indice},2024-01-05 09:00,Autor {indice},{indice},3,"
+            f"http://twitter.com/p/{indice},twitter.com"
+        )
+    return ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+class ArchivoEnMemoria(BytesIO):
+    def __init__(self, contenido: bytes, name: str):
+        super().__init__(contenido)
+        self.name = name
+        self.size = len(contenido)
+
+
+class ProgresoFalso:
+    def __init__(self):
+        self.filas_parseadas = 0
+
+    def sumar(self, filas_parseadas=0, **conteos):
+        self.filas_parseadas += filas_parseadas
+
+
+@override_settings(INGESTION_PARALELO_PROCESOS=2, INGESTION_PARALELO_BLOQUE_FILAS=7)
+class MapeoParaleloTests(SimpleTestCase):
+    def _archivos(self):
+        return [
+            ArchivoEnMemoria(_csv_medios(0, 40), "medios.csv"),
+            ArchivoEnMemoria(_csv_redes(40, 25), "redes.csv"),
+        ]
+
+    def _extraer(self, umbral: int, streaming: bool):
+        view = IngestionAPIView()
+        view._progreso_ingesta = ProgresoFalso()
+        with self.settings(INGESTION_PARALELO_UMBRAL_FILAS=umbral):
+            registros, proveedor, error = view._extraer_registros_de_archivos(
+                self._archivos(), None, streaming=streaming
+            )
+            registros = list(registros)
+        self.assertIsNone(error)
+        return registros, proveedor, view._progreso_ingesta.filas_parseadas
+
+    def test_modo_completo_igual_al_secuencial(self):
+        secuencial = self._extraer(0, streaming=False)
+        paralelo = self._extraer(10, streaming=False)
+
+        self.assertEqual(paralelo, secuencial)
+        self.assertEqual(len(paralelo[0]), 65)
+        self.assertEqual(paralelo[1], "multiple")
+
+    def test_modo_streaming_igual_al_secuencial(self):
+        secuencial = self._extraer(0, streaming=True)
+        paralelo = self._extraer(10, streaming=True)
+
+        self.assertEqual(paralelo, secuencial)
+        self.assertEqual(
+            [registro["titulo"] for registro in paralelo[0][:40]],
+            [f"Nota {indice}" for indice in range(40)],
+        )
+
+    def test_por_debajo_del_umbral_no_crea_procesos(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming), patch.object(
+                ingestion_paralela, "ProcessPoolExecutor"
+            ) as pool:
+                registros, _, parseadas = self._extraer(1000, streaming=streaming)
+
+            pool.assert_not_called()
+            self.assertEqual(len(registros), 65)
+            self.assertEqual(parseadas, 65)
+
+    def test_en_un_proceso_daemon_mapea_secuencial(self):
+        # Como en un worker prefork de Celery (billiard)
+        proceso = ingestion_paralela.multiprocessing.current_process()
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming), patch.object(
+                proceso, "_config", {**proceso._config, "daemon": True}
+            ), patch.object(ingestion_paralela, "ProcessPoolExecutor") as pool:
+                registros, _, parseadas = self._extraer(10, streaming=streaming)
+
+            pool.assert_not_called()
+            self.assertEqual(len(registros), 65)
+            self.assertEqual(parseadas, 65)
+
+    def test_abandonar_el_flujo_cancela_los_bloques_pendientes(self):
+        filas = (
+            {"title": f"Nota {indice}", "url": f"http://example.com/{indice}"}
+            for indice in range(200)
+        )
+        bloques = mapear_en_procesos([("medios", ["title", "url"], filas)])
+
+        primero = next(bloques)
+        bloques.close()
+
+        self.assertEqual(
+            [registro["titulo"] for registro in primero], [f"Nota {i}" for i in range(7)]
+        )
@@ -0,0 +1,173 @@
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from openpyxl import Workbook
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api import ingestion
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.models import Articulo, DetalleEnvio
+from apps.proyectos.models import Proyecto
+
+
+CSV_MEDIOS = (
+    "title,content,published,extra_source_attributes.name,reach,url\n"
+    "Título ñandú,\"Contenido\nmultilínea\",2024-01-01,Fuente,1000,http://example.com/a\n"
+    "Otro,Contenido 2,2024-01-02,Fuente,2000,http://example.com/b\n"
+)
+
+
+class LecturaEnFlujoTests(SimpleTestCase):
+    def setUp(self):
+        self.view = IngestionAPIView()
+
+    def test_csv_en_flujo_produce_las_mismas_filas_que_el_modo_completo(self):
+        contenido = ("\ufeff" + CSV_MEDIOS).encode("utf-8")
+
+        headers_completo, rows_completo = self.view._parse_csv(BytesIO(contenido))
+        # Bloques de 7 bytes: parte caracteres multibyte y líneas entre lecturas
+        with patch.object(ingestion, "TAMANO_BLOQUE_LECTURA", 7):
+            headers, rows = self.view._parse_file_en_flujo(BytesIO(contenido), ".csv")
+            rows = list(rows)
+
+        self.assertEqual(headers, headers_completo)
+        self.assertEqual(rows, rows_completo)
+        self.assertEqual(rows[0]["title"], "Título ñandú")
+        self.assertEqual(rows[0]["content"], "Contenido\nmultilínea")
+
+    def test_xlsx_en_flujo_extrae_hipervinculos_y_omite_columnas_vacias(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Link (Streaming – Imagen)", "Titulo", "columna_vacia"])
+        cell = sheet.cell(row=2, column=1, value="Ver")
+        cell.hyperlink = "http://example.com/stream"
+        sheet.cell(row=2, column=2, value="Titulo Global")
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        headers, rows = self.view._parse_file_en_flujo(buffer, ".xlsx")
+        headers, rows = self.view._normalizar_columnas_url_en_flujo(headers, rows)
+        rows = list(rows)
+
+        self.assertIn("url", headers)
+        self.assertEqual(rows[0]["url"], "http://example.com/stream")
+        self.assertNotIn("columna_vacia", rows[0])
+
+    def test_xlsx_en_flujo_resuelve_hipervinculos_fila_a_fila(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Link", "Titulo"])
+        for fila in range(2, 9):
+            sheet.cell(row=fila, column=2, value=f"Titulo {fila}")
+        for fila in (2, 3, 5):
+            sheet.cell(row=fila, column=1, value="Ver").hyperlink = f"http://example.com/{fila}"
+        # Un hipervínculo que cubre dos filas
+        sheet["A6"].hyperlink = "http://example.com/6"
+        sheet["A6"].hyperlink.ref = "A6:A7"
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        _, rows = self.view._parse_file_en_flujo(buffer, ".xlsx")
+
+        self.assertEqual(
+            [row.get("link") for row in rows],
+            [
+                "http://example.com/2",
+                "http://example.com/3",
+                None,
+                "http://example.com/5",
+                "http://example.com/6",
+                "http://example.com/6",
+                None,
+            ],
+        )
+
+    def test_hipervinculos_fuera_de_orden_se_ordenan(self):
+        vinculos = [
+            (1, 5, 5, 1, 1, "http://example.com/5"),
+            (2, 2, 2, 1, 2, "http://example.com/2"),
+            (3, 2, 2, 2, 2, "http://example.com/2b"),
+        ]
+        with patch.object(
+            IngestionAPIView, "_recorrer_hipervinculos_xlsx", side_effect=lambda _: iter(vinculos)
+        ):
+            cursor = self.view._hipervinculos_por_fila_xlsx(None)
+
+        self.assertEqual(cursor.destinos(2), {1: "http://example.com/2", 2: "http://example.com/2b"})
+        self.assertEqual(cursor.destinos(3), {})
+        self.assertEqual(cursor.destinos(5), {1: "http://example.com/5"})
+
+    def test_validacion_url_en_flujo_conserva_las_filas_leidas(self):
+        rows = iter([{"url": ""}, {"url": "http://example.com/1"}, {"url": "http://example.com/2"}])
+
+        error, restantes = self.view._validar_columna_url_en_flujo(["url"], rows)
+
+        self.assertIsNone(error)
+        self.assertEqual(len(list(restantes)), 3)
+
+    def test_validacion_url_en_flujo_rechaza_columna_sin_datos(self):
+        error, _ = self.view._validar_columna_url_en_flujo(["url"], iter([{"url": ""}]))
+
+        self.assertEqual(error.status_code, 400)
+
+
+@override_settings(INGESTION_LOTE_PERSISTENCIA=2)
+class IngestionEnFlujoTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(username="ingesta", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto flujo",
+            codigo_acceso="123@g.us",
+            tipo_alerta="medios",
+            criterios_aceptacion="contenido",
+        )
+
+    def _post(self, contenido: str):
+        uploaded = SimpleUploadedFile("medios.csv", contenido.encode("utf-8"), content_type="text/csv")
+        request = self.factory.post(
+            f"/api/ingestion/?proyecto={self.proyecto.id}&streaming=1",
+            {"archivo": uploaded},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa"):
+            return IngestionAPIView.as_view()(request)
+
+    def test_persiste_por_lotes_y_cuenta_duplicados_y_descartados(self):
+        Articulo.objects.create(proyecto=self.proyecto, url="http://example.com/b")
+        filas = "".join(
+            f"Titulo {i},Contenido {i},2024-01-01,Fuente,10,http://example.com/n{i}\n"
+            for i in range(5)
+        )
+        contenido = (
+            "title,content,published,extra_source_attributes.name,reach,url\n"
+            + filas
+            + "Sin criterio,Nada,2024-01-01,Fuente,10,http://example.com/x\n"
+            + "Titulo,Contenido dup,2024-01-01,Fuente,10,https://www.example.com/b/\n"
+        )
+
+        response = self._post(contenido)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["listado"]), 5)
+        self.assertEqual(response.data["duplicados"], 1)
+        self.assertEqual(response.data["descartados"], 1)
+        self.assertEqual(response.data["errores"], [{"fila": 6, "error": "La URL ya existe para este proyecto"}])
+        self.assertEqual(response.data["proveedor"], "medios_twk")
+        self.assertEqual(Articulo.objects.filter(proyecto=self.proyecto).count(), 6)
+        self.assertEqual(DetalleEnvio.objects.filter(proyecto=self.proyecto).count(), 5)
+
+    def test_sin_registros_tras_criterios_responde_405(self):
+        contenido = (
+            "title,content,published,extra_source_attributes.name,reach,url\n"
+            "Otro,Nada,2024-01-01,Fuente,10,http://example.com/x\n"
+        )
+
+        response = self._post(contenido)
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.data["descartados"], 1)
@@ -0,0 +1,111 @@
+from django.test import SimpleTestCase
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.mapeo_proveedores import (
+    MAPEO_MEDIOS_TWK,
+    Columna,
+    Constante,
+    EspecificacionMapeo,
+    especificacion_medios,
+)
+from apps.base.api.utils import limpiar_texto
+
+
+class FilaContadora(dict):
+    """Fila que registra qué columnas se leyeron."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.leidas = []
+
+    def get(self, clave, default=None):
+        self.leidas.append(clave)
+        return super().get(clave, default)
+
+
+class ColumnaTests(SimpleTestCase):
+    def test_primer_alias_con_datos(self):
+        leer = Columna("titulo", "title").compilar(frozenset({"titulo", "title"}))
+
+        self.assertEqual(leer({"titulo": "", "title": "Hola"}), "Hola")
+        self.assertEqual(leer({"titulo": "Uno", "title": "Hola"}), "Uno")
+        self.assertIsNone(leer({"titulo": None, "title": ""}))
+
+    def test_solo_lee_columnas_presentes_en_el_archivo(self):
+        leer = Columna("a", "b", "c", "d").compilar(frozenset({"c"}))
+        fila = FilaContadora(c="valor")
+
+        self.assertEqual(leer(fila), "valor")
+        self.assertEqual(fila.leidas, ["c"])
+
+    def test_sin_columnas_el_campo_es_constante(self):
+        leer = Columna("a", "b", transformar=limpiar_texto).compilar(frozenset({"x"}))
+        fila = FilaContadora(x="valor")
+
+        self.assertIsNone(leer(fila))
+        self.assertEqual(fila.leidas, [])
+
+    def test_respaldo_si_el_principal_no_tiene_datos(self):
+        leer = Columna("resumen", respaldo=("content",)).compilar(
+            frozenset({"resumen", "content"})
+        )
+
+        self.assertEqual(leer({"resumen": "  ", "content": "Texto"}), "Texto")
+        self.assertEqual(leer({"resumen": "Resumen", "content": "Texto"}), "Resumen")
+
+    def test_como_or_salta_valores_falsos(self):
+        headers = frozenset({"short_name", "name"})
+        fila = {"short_name": 0, "name": "Autor"}
+
+        self.assertEqual(Columna("short_name", "name").compilar(headers)(fila), 0)
+        self.assertEqual(
+            Columna("short_name", "name", como_or=True).compilar(headers)(fila), "Autor"
+        )
+
+
+class EspecificacionMapeoTests(SimpleTestCase):
+    def test_proveedor_nuevo_por_spec(self):
+        spec = EspecificacionMapeo(
+            {
+                "tipo": Constante("articulo"),
+                "titulo": Columna("encabezado", transformar=limpiar_texto),
+                "autor": Columna("firma", "periodista", transformar=limpiar_texto),
+            },
+            ajustes=(lambda registro: registro.update(titulo=registro["titulo"].upper()),),
+        )
+        mapear = spec.compilar(["encabezado", "periodista"])
+
+        self.assertEqual(
+            mapear({"encabezado": " nota ", "periodista": "Ana"}),
+            {"tipo": "articulo", "titulo": "NOTA", "autor": "Ana"},
+        )
+
+    def test_especificacion_medios_por_proveedor(self):
+        self.assertIs(especificacion_medios(" Medios "), MAPEO_MEDIOS_TWK)
+        self.assertIsNot(especificacion_medios("desconocido"), MAPEO_MEDIOS_TWK)
+
+    def test_mapear_filas_compila_contra_los_encabezados_del_archivo(self):
+        view = IngestionAPIView()
+        headers = ["title", "content_snippet", "published", "url"]
+        filas = [
+            FilaContadora(
+                title=f"Nota {indice}",
+                content_snippet="Texto",
+                published="05/01/2024 10:30",
+                url=f"http://example.com/{indice}",
+            )
+            for indice in range(3)
+        ]
+
+        registros = view._mapear_filas("medios", filas, headers)
+
+        self.assertEqual(
+            [registro["titulo"] for registro in registros], ["Nota 0", "Nota 1", "Nota 2"]
+        )
+        self.assertEqual(registros[0]["fuente"], "example.com")
+        self.assertEqual(registros[0]["tipo_medio"], "Online")
+        # Fuera de los encabezados solo se consultan las columnas de inferencia
+        # de red social
+        permitidas = set(headers) | {"red_social", "domain_url", "social_network"}
+        for fila in filas:
+            self.assertLessEqual(set(fila.leidas), permitidas)
@@ -0,0 +1,193 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.base import outbox
+from apps.base.models import MensajeSaliente
+from apps.base.tasks import drenar_outbox
+
+
+URL_MONITOREO = "https://monitoreo.test/ingestion/payload/?token=x"
+
+
+def _respuesta(status_code):
+    return MagicMock(status_code=status_code, ok=200 <= status_code < 300, text="")
+
+
+def _payload_monitoreo(*ids, grupo="123@g.us"):
+    return {
+        "proveedor": "whatsapp",
+        "tipo_alerta": "redes",
+        "mensaje": f"{len(ids)} alertas enviadas",
+        "listado": [{"id": alerta_id} for alerta_id in ids],
+        "grupo_id": grupo,
+    }
+
+
+@override_settings(OUTBOX_DRENAR_AL_COMMIT=False)
+class OutboxTests(TestCase):
+    def test_el_mensaje_se_revierte_con_la_transaccion(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"a": 1})
+                raise RuntimeError("falla la ingesta")
+
+        self.assertFalse(MensajeSaliente.objects.exists())
+
+    @override_settings(OUTBOX_DRENAR_AL_COMMIT=True)
+    @patch("apps.base.outbox.clientes_http.post", return_value=_respuesta(200))
+    def test_se_drena_tras_el_commit(self, mock_post):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"a": 1})
+        mock_post.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        mock_post.assert_called_once()
+        mensaje = MensajeSaliente.objects.get()
+        self.assertEqual(mensaje.estado, MensajeSaliente.ESTADO_ENVIADO)
+        self.assertEqual(mensaje.codigo_http, 200)
+
+    @patch("apps.base.outbox.clientes_http.post", return_value=_respuesta(200))
+    def test_monitoreo_del_mismo_grupo_se_combina_en_un_post(self, mock_post):
+        for alerta_id in ("a1", "a2", "a3"):
+            outbox.encolar(
+                MensajeSaliente.DESTINO_MONITOREO,
+                URL_MONITOREO,
+                _payload_monitoreo(alerta_id),
+                headers={"Content-Type": "application/json"},
+            )
+        outbox.encolar(
+            MensajeSaliente.DESTINO_MONITOREO, URL_MONITOREO, _payload_monitoreo("b1", grupo="otro")
+        )
+
+        resumen = drenar_outbox.apply().get()
+
+        self.assertEqual(resumen["posts"], 2)
+        self.assertEqual(resumen["entregados"], 4)
+        combinado = mock_post.call_args_list[0].kwargs["json"]
+        self.assertEqual([alerta["id"] for alerta in combinado["listado"]], ["a1", "a2", "a3"])
+        self.assertEqual(combinado["mensaje"], "3 alertas enviadas")
+        # Tras la entrega los headers no se conservan
+        self.assertFalse(MensajeSaliente.objects.exclude(headers={}).exists())
+
+    @override_settings(OUTBOX_MAXIMO_ALERTAS_POR_POST=2)
+    @patch("apps.base.outbox.clientes_http.post", return_value=_respuesta(200))
+    def test_respeta_el_maximo_de_alertas_por_post(self, mock_post):
+        for alerta_id in ("a1", "a2", "a3"):
+            outbox.encolar(MensajeSaliente.DESTINO_MONITOREO, URL_MONITOREO, _payload_monitoreo(alerta_id))
+
+        self.assertEqual(outbox.drenar()["posts"], 2)
+
+    @patch(
+        "apps.base.outbox.clientes_http.post",
+        side_effect=requests.ConnectionError("sin conexión"),
+    )
+    def test_fallo_reintenta_con_backoff_hasta_el_maximo(self, mock_post):
+        mensaje = outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"a": 1})
+
+        outbox.drenar()
+        mensaje.refresh_from_db()
+        self.assertEqual(mensaje.estado, MensajeSaliente.ESTADO_PENDIENTE)
+        self.assertEqual(mensaje.intentos, 1)
+        self.assertGreater(mensaje.proximo_intento, timezone.now() + timedelta(seconds=10))
+
+        # Antes del próximo intento no se vuelve a tomar
+        outbox.drenar()
+        self.assertEqual(mock_post.call_count, 1)
+
+        with override_settings(OUTBOX_MAX_INTENTOS=2):
+            MensajeSaliente.objects.update(proximo_intento=timezone.now())
+            outbox.drenar()
+        mensaje.refresh_from_db()
+        self.assertEqual(mensaje.estado, MensajeSaliente.ESTADO_FALLIDO)
+        self.assertEqual(mensaje.intentos, 2)
+        self.assertIn("sin conexión", mensaje.ultimo_error)
+
+    @patch("apps.base.outbox.clientes_http.post", side_effect=[_respuesta(422), _respuesta(200), _respuesta(422)])
+    def test_4xx_de_un_grupo_reintenta_cada_mensaje_solo(self, mock_post):
+        bueno = outbox.encolar(MensajeSaliente.DESTINO_MONITOREO, URL_MONITOREO, _payload_monitoreo("a1"))
+        malo = outbox.encolar(MensajeSaliente.DESTINO_MONITOREO, URL_MONITOREO, _payload_monitoreo("a2"))
+
+        outbox.drenar()
+        outbox.drenar()
+
+        self.assertEqual(mock_post.call_count, 3)
+        bueno.refresh_from_db()
+        malo.refresh_from_db()
+        self.assertEqual(bueno.estado, MensajeSaliente.ESTADO_ENVIADO)
+        # Un 4xx de un mensaje solo no se reintenta
+        self.assertEqual(malo.estado, MensajeSaliente.ESTADO_FALLIDO)
+        self.assertEqual(malo.codigo_http, 422)
+
+    @patch("apps.base.outbox.clientes_http.post", return_value=_respuesta(200))
+    def test_reclamo_huerfano_vuelve_a_pendiente(self, mock_post):
+        mensaje = outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"a": 1})
+        MensajeSaliente.objects.update(
+            estado=MensajeSaliente.ESTADO_ENVIANDO,
+            modified_at=timezone.now() - timedelta(hours=1),
+        )
+
+        outbox.drenar()
+
+        mensaje.refresh_from_db()
+        self.assertEqual(mensaje.estado, MensajeSaliente.ESTADO_ENVIADO)
+
+    def test_drenado_largo_no_libera_lo_que_tiene_en_curso(self):
+        for numero in range(7):
+            outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"n": numero})
+        reloj = [timezone.now()]
+        posts = []
+
+        def post(url, json, **kwargs):
+            # Cada POST tarda un minuto; en el último entra otro drenado
+            posts.append(json["n"])
+            reloj[0] += timedelta(minutes=1)
+            if len(posts) == 7:
+                self.assertEqual(outbox.drenar()["posts"], 0)
+            return _respuesta(200)
+
+        with patch("apps.base.outbox.timezone.now", side_effect=lambda: reloj[0]), patch(
+            "apps.base.outbox.clientes_http.post", side_effect=post
+        ):
+            resumen = outbox.drenar()
+
+        self.assertEqual(resumen["entregados"], 7)
+        self.assertEqual(posts, list(range(7)))
+        self.assertEqual(
+            MensajeSaliente.objects.filter(estado=MensajeSaliente.ESTADO_ENVIADO).count(), 7
+        )
+
+    @patch("apps.base.outbox.clientes_http.post", return_value=_respuesta(200))
+    def test_entrega_de_un_reclamo_perdido_no_pisa_el_estado(self, mock_post):
+        mensaje = outbox.encolar(MensajeSaliente.DESTINO_RUTA_EXTERNA, "http://x/ruta", {"a": 1})
+        mensaje.estado = MensajeSaliente.ESTADO_PENDIENTE
+
+        # Otro drenado ya lo liberó y lo dejó pendiente
+        self.assertTrue(outbox._entregar([mensaje]))
+
+        mensaje.refresh_from_db()
+        self.assertEqual(mensaje.estado, MensajeSaliente.ESTADO_PENDIENTE)
+        self.assertIsNone(mensaje.enviado_en)
+
+    def test_enviar_alertas_a_monitoreo_encola_el_payload(self):
+        from apps.whatsapp.api.enviar_mensaje import enviar_alertas_a_monitoreo
+
+        resultado = enviar_alertas_a_monitoreo(
+            proyecto_id="00000000-0000-0000-0000-000000000000",
+            tipo_alerta="redes",
+            data_alertas={"alertas": [{"id": "a1"}, {"id": "a2"}]},
+            enviados_ids=["a1"],
+            grupo_id="123@g.us",
+        )
+
+        mensaje = MensajeSaliente.objects.get()
+        self.assertEqual(resultado, {"status": "encolado", "outbox_id": str(mensaje.id)})
+        self.assertEqual(mensaje.destino, MensajeSaliente.DESTINO_MONITOREO)
+        self.assertEqual(mensaje.payload["listado"], [{"id": "a1"}])
+        self.assertIsNotNone(mensaje.clave_agrupacion)
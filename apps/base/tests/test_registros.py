@@ -0,0 +1,89 @@
+import csv
+import io
+import pickle
+
+from django.test import SimpleTestCase
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.mapeo_proveedores import Columna, EspecificacionMapeo
+from apps.base.api.registros import AUSENTE, EsquemaFilas, Fila, RegistroAlerta
+from apps.base.management.commands.bench_memoria_ingesta import medir_caso
+
+
+class FilaTests(SimpleTestCase):
+    def test_se_comporta_como_el_dict_equivalente(self):
+        esquema = EsquemaFilas(["url", "titulo", "vacia"])
+        fila = esquema.fila(("https://a.test/1", "Título", AUSENTE))
+
+        self.assertEqual(fila, {"url": "https://a.test/1", "titulo": "Título"})
+        self.assertNotIn("vacia", fila)
+        self.assertIsNone(fila.get("vacia"))
+        with self.assertRaises(KeyError):
+            fila["vacia"]
+
+        fila["nueva"] = 1
+        del fila["titulo"]
+        self.assertEqual(dict(fila), {"url": "https://a.test/1", "nueva": 1})
+        # La columna nueva no altera el esquema compartido
+        self.assertEqual(esquema.encabezados, ("url", "titulo", "vacia"))
+
+    def test_encabezado_repetido_gana_la_ultima_columna_con_valor(self):
+        esquema = EsquemaFilas(["url", "autor", "autor"])
+
+        self.assertEqual(esquema.fila(("u", "a", "b"))["autor"], "b")
+        self.assertEqual(esquema.fila(("u", "a", AUSENTE))["autor"], "a")
+        self.assertEqual(list(esquema.fila(("u", "a", "b"))), ["url", "autor"])
+
+    def test_csv_igual_que_dictreader(self):
+        texto = "url,titulo\r\nhttps://a.test/1,uno\r\n\r\nhttps://a.test/2\r\nhttps://a.test/3,tres,x,y\r\n"
+
+        view = IngestionAPIView()
+        headers, filas = view._parse_csv(io.BytesIO(texto.encode("utf-8")))
+
+        self.assertEqual(headers, ["url", "titulo"])
+        # Lo que sobra queda en la columna "" (la clave None normalizada)
+        esperadas = [
+            {view._normalizar_encabezado(clave): valor for clave, valor in fila.items()}
+            for fila in csv.DictReader(io.StringIO(texto))
+        ]
+        self.assertEqual(filas, esperadas)
+
+    def test_pickle_conserva_el_esquema_compartido(self):
+        esquema = EsquemaFilas(["url", "titulo"])
+        filas = [esquema.fila((f"https://a.test/{n}", AUSENTE)) for n in range(3)]
+
+        copia = pickle.loads(pickle.dumps(filas))
+
+        self.assertEqual(copia, filas)
+        self.assertIs(copia[0].esquema, copia[2].esquema)
+        self.assertNotIn("titulo", copia[1])
+
+
+class RegistroAlertaTests(SimpleTestCase):
+    def test_datos_adicionales_se_arman_desde_la_fila_al_leerlos(self):
+        fila = EsquemaFilas(["url", "reach", "vacia"]).fila(("https://a.test/1", 10, "  "))
+        registro = RegistroAlerta(fila, url="https://a.test/1")
+
+        self.assertEqual(
+            dict(registro),
+            {"url": "https://a.test/1", "datos_adicionales": {"url": "https://a.test/1", "reach": 10}},
+        )
+        self.assertNotIn("titulo", registro)
+        self.assertEqual(pickle.loads(pickle.dumps(registro)), registro)
+
+    def test_campo_desconocido(self):
+        with self.assertRaises(KeyError):
+            RegistroAlerta()["otro"] = 1
+        with self.assertRaises(ValueError):
+            EspecificacionMapeo({"otro": Columna("url")})
+
+
+class BenchMemoriaTests(SimpleTestCase):
+    def test_mide_ambas_representaciones(self):
+        caso = medir_caso("medios", "csv", 50)
+
+        self.assertEqual(caso["proveedor_detectado"], "medios")
+        for etapa in ("filas", "registros"):
+            with self.subTest(etapa=etapa):
+                medicion = caso["mediciones"][etapa]
+                self.assertLess(medicion["compacta"]["bytes"], medicion["dict"]["bytes"])
@@ -0,0 +1,104 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.ingestion_jobs import IngestaJobEstadoAPIView
+from apps.base.api.respuestas_ingesta import json_en_flujo, resumir_respuesta
+from apps.base.models import Articulo, IngestaJob
+from apps.proyectos.models import Proyecto
+
+from .test_ingestion_streaming import CSV_MEDIOS
+
+
+class JsonEnFlujoTests(SimpleTestCase):
+    def test_produce_el_mismo_json(self):
+        respuesta = {"mensaje": "ñandú", "listado": [{"id": n, "contenido": "x"} for n in range(5)], "errores": []}
+        with self.settings(INGESTION_RESPUESTA_BLOQUE=2):
+            bloques = list(json_en_flujo(respuesta))
+
+        self.assertEqual(len(bloques), 5)
+        self.assertEqual(json.loads(b"".join(bloques)), respuesta)
+        self.assertEqual(json.loads(b"".join(json_en_flujo({}))), {"listado": []})
+
+    def test_resumen_sin_listado(self):
+        resumen = resumir_respuesta({"mensaje": "2 registros creados", "listado": [{"id": "a"}, {"id": "b"}]})
+
+        self.assertEqual(resumen, {"mensaje": "2 registros creados", "creados": 2, "ids": ["a", "b"]})
+
+
+class RespuestaIngestaTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="respuesta", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto respuesta", codigo_acceso="123@g.us", tipo_alerta="medios"
+        )
+
+    def _post(self, respuesta):
+        request = APIRequestFactory().post(
+            f"/api/ingestion/?proyecto={self.proyecto.id}&respuesta={respuesta}",
+            {"archivo": SimpleUploadedFile("medios.csv", CSV_MEDIOS.encode("utf-8"))},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        with patch.object(IngestionAPIView, "_notificar_ruta_externa") as notificar:
+            response = IngestionAPIView.as_view()(request)
+        self.notificado = notificar.call_args.args[0] if notificar.called else None
+        return response
+
+    def test_resumen_devuelve_conteos_e_ids(self):
+        response = self._post("resumen")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("listado", response.data)
+        self.assertEqual(response.data["creados"], 2)
+        self.assertEqual(
+            set(response.data["ids"]),
+            {str(articulo_id) for articulo_id in Articulo.objects.values_list("id", flat=True)},
+        )
+        self.assertEqual(response.data["mensaje"], "2 registros creados")
+        # La ruta externa sigue recibiendo el listado completo
+        self.assertEqual(len(self.notificado["listado"]), 2)
+
+    @override_settings(INGESTION_RESPUESTA_BLOQUE=1)
+    def test_stream_envia_el_listado_por_bloques(self):
+        response = self._post("stream")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        bloques = list(response.streaming_content)
+        self.assertEqual(len(bloques), 4)
+        datos = json.loads(b"".join(bloques))
+        self.assertEqual(list(datos)[-1], "listado")
+        self.assertEqual(
+            {alerta["url"] for alerta in datos["listado"]},
+            {"http://example.com/a", "http://example.com/b"},
+        )
+        self.assertEqual(datos["mensaje"], self.notificado["mensaje"])
+
+    def test_modo_invalido(self):
+        response = self._post("todo")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Articulo.objects.exists())
+
+    def test_estado_del_job_en_resumen(self):
+        job = IngestaJob.objects.create(
+            proyecto=self.proyecto,
+            created_by=self.user,
+            estado=IngestaJob.ESTADO_COMPLETADA,
+            resultado={"mensaje": "1 registros creados", "listado": [{"id": "a", "contenido": "x"}]},
+        )
+        request = APIRequestFactory().get(f"/api/ingestion/jobs/{job.id}/?respuesta=resumen")
+        force_authenticate(request, user=self.user)
+
+        response = IngestaJobEstadoAPIView.as_view()(request, pk=job.id)
+
+        self.assertEqual(
+            response.data["resultado"], {"mensaje": "1 registros creados", "creados": 1, "ids": ["a"]}
+        )
@@ -7,6 +7,8 @@ from apps.base.api.importar_redes import ImportarRedesAPIView
 from apps.base.api.formato_mensaje import CrearPlantillaAPIView , ListarPlantillasAPIView,CrearCamposPlantillaAPIView
 from apps.base.api.historial import HistorialEnviosListAPIView,HistorialEnviosDetailAPIView,ExportarHistorialExcelView
 from apps.base.api.ingestion import IngestionAPIView
+from apps.base.api.ingestion_jobs import IngestaJobEstadoAPIView
+from apps.base.api.ingestion_ndjson import IngestionNDJSONAPIView
 from apps.base.api.brightdata_trigger import BrightDataSnapshotAPIView
 from apps.base.api.procesar_alerta_existente import ProcesarAlertaExistenteAPIView
 
@@ -35,6 +37,8 @@ urlpatterns = [
     path('medios/', MediosListAPIView.as_view(), name='medios-list'),
     path("medios/<uuid:pk>/", MediosUpdateAPIView.as_view(), name="update-medio"),
     path("ingestion/", IngestionAPIView.as_view(), name="ingestion"),
+    path("ingestion/ndjson/", IngestionNDJSONAPIView.as_view(), name="ingestion-ndjson"),
+    path("ingestion/jobs/<uuid:pk>/", IngestaJobEstadoAPIView.as_view(), name="ingestion-job-estado"),
 
     path("plantillas/crear/", CrearPlantillaAPIView.as_view(), name="plantillas-crear"),
     path("plantillas/", ListarPlantillasAPIView.as_view(), name="listar-plantillas"),
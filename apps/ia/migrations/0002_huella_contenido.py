@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0019_huellas_ingesta'),
+        ('proyectos', '0006_alter_proyecto_proveedor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluacionia',
+            name='evaluacion_origen',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reutilizaciones', to='ia.evaluacionia'),
+        ),
+        migrations.AddField(
+            model_name='historicalevaluacionia',
+            name='evaluacion_origen',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='ia.evaluacionia'),
+        ),
+        migrations.CreateModel(
+            name='HuellaContenido',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+                ('simhash', models.BigIntegerField()),
+                ('distancia', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('banda_0', models.PositiveSmallIntegerField()),
+                ('banda_1', models.PositiveSmallIntegerField()),
+                ('banda_2', models.PositiveSmallIntegerField()),
+                ('banda_3', models.PositiveSmallIntegerField()),
+                ('banda_4', models.PositiveSmallIntegerField()),
+                ('banda_5', models.PositiveSmallIntegerField()),
+                ('banda_6', models.PositiveSmallIntegerField()),
+                ('banda_7', models.PositiveSmallIntegerField()),
+                ('canonico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='casi_duplicados', to='base.detalleenvio')),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_creado_por', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('detalle_envio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='huella_contenido', to='base.detalleenvio')),
+                ('modified_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_modificado_por', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='huellas_contenido', to='proyectos.proyecto')),
+            ],
+            options={
+                'verbose_name': 'Huella de contenido',
+                'verbose_name_plural': 'Huellas de contenido',
+                'indexes': [models.Index(fields=['proyecto', 'banda_0'], name='ia_huellaco_proyect_53246a_idx'), models.Index(fields=['proyecto', 'banda_1'], name='ia_huellaco_proyect_900336_idx'), models.Index(fields=['proyecto', 'banda_2'], name='ia_huellaco_proyect_fb239a_idx'), models.Index(fields=['proyecto', 'banda_3'], name='ia_huellaco_proyect_4d8638_idx'), models.Index(fields=['proyecto', 'banda_4'], name='ia_huellaco_proyect_86645c_idx'), models.Index(fields=['proyecto', 'banda_5'], name='ia_huellaco_proyect_c9d4de_idx'), models.Index(fields=['proyecto', 'banda_6'], name='ia_huellaco_proyect_21f401_idx'), models.Index(fields=['proyecto', 'banda_7'], name='ia_huellaco_proyect_da4ee6_idx'), models.Index(fields=['created_at'], name='ia_huellaco_created_f810b4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:47
+
+from django.db import migrations
+
+
+def recalcular_bandas(apps, schema_editor):
+    # Las huellas vigentes pasan de 8 bandas de 8 bits a 5 de 13
+    HuellaContenido = apps.get_model('ia', 'HuellaContenido')
+    for huella in HuellaContenido.objects.only('simhash').iterator():
+        valor = huella.simhash % (1 << 64)
+        for banda in range(5):
+            setattr(huella, f'banda_{banda}', valor >> (13 * banda) & 0x1FFF)
+        huella.save(update_fields=[f'banda_{banda}' for banda in range(5)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0002_huella_contenido'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='huellacontenido',
+            name='ia_huellaco_proyect_c9d4de_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='huellacontenido',
+            name='ia_huellaco_proyect_21f401_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='huellacontenido',
+            name='ia_huellaco_proyect_da4ee6_idx',
+        ),
+        migrations.RemoveField(
+            model_name='huellacontenido',
+            name='banda_5',
+        ),
+        migrations.RemoveField(
+            model_name='huellacontenido',
+            name='banda_6',
+        ),
+        migrations.RemoveField(
+            model_name='huellacontenido',
+            name='banda_7',
+        ),
+        migrations.RunPython(recalcular_bandas, migrations.RunPython.noop),
+    ]
@@ -213,6 +213,15 @@ class EvaluacionIA(BaseModel):
     revisado_en = models.DateTimeField(null=True, blank=True)
     comentario_revision = models.TextField(blank=True)
 
+    # Casi duplicado: salida de la IA reutilizada de la alerta canónica
+    evaluacion_origen = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="reutilizaciones",
+    )
+
     history = HistoricalRecords(table_name="evaluacion_ia_history")
 
     class Meta:
@@ -249,3 +258,51 @@ class EnriquecimientoLog(BaseModel):
     class Meta:
         verbose_name = "Log de enriquecimiento"
         verbose_name_plural = "Logs de enriquecimiento"
+
+
+class HuellaContenido(BaseModel):
+    """SimHash de titulo + contenido de una alerta, para detectar casi
+    duplicados (la misma nota de agencia o el mismo post bajo otra URL)
+    dentro de una ventana de tiempo por proyecto. Las 5 bandas de 13 bits
+    permiten buscar candidatos por índice (ver services/casi_duplicados.py)."""
+
+    proyecto = models.ForeignKey(
+        "proyectos.Proyecto",
+        on_delete=models.CASCADE,
+        related_name="huellas_contenido",
+    )
+    detalle_envio = models.OneToOneField(
+        "base.DetalleEnvio",
+        on_delete=models.CASCADE,
+        related_name="huella_contenido",
+    )
+    # Alerta cuya evaluación IA reutiliza esta (null = es canónica)
+    canonico = models.ForeignKey(
+        "base.DetalleEnvio",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="casi_duplicados",
+    )
+    simhash = models.BigIntegerField()
+    distancia = models.PositiveSmallIntegerField(null=True, blank=True)
+    banda_0 = models.PositiveSmallIntegerField()
+    banda_1 = models.PositiveSmallIntegerField()
+    banda_2 = models.PositiveSmallIntegerField()
+    banda_3 = models.PositiveSmallIntegerField()
+    banda_4 = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Huella de contenido"
+        verbose_name_plural = "Huellas de contenido"
+        indexes = [
+            models.Index(fields=["proyecto", "banda_0"]),
+            models.Index(fields=["proyecto", "banda_1"]),
+            models.Index(fields=["proyecto", "banda_2"]),
+            models.Index(fields=["proyecto", "banda_3"]),
+            models.Index(fields=["proyecto", "banda_4"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"HuellaContenido {self.simhash:x} [{self.detalle_envio_id}]"
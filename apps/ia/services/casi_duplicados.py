@@ -0,0 +1,259 @@
+"""Detección de casi duplicados para no pagar dos veces la misma
+clasificación IA.
+
+La misma nota de agencia o el mismo post reposteado llega con URLs
+distintas, así que la deduplicación por `clave_url` no la detecta. Aquí se
+calcula un SimHash de 64 bits sobre shingles de 2 palabras de titulo +
+contenido. Dos textos cuyo SimHash difiere en pocos bits son casi
+duplicados.
+
+Indexación por bandas: el SimHash se parte en 5 bandas de 13 bits (la
+última de 12). Si dos huellas difieren en 4 bits o menos, al menos una
+banda queda idéntica (palomar), así que la búsqueda de candidatos es un
+`OR` de igualdades sobre columnas indexadas. Con 13 bits por banda cada
+igualdad descarta casi toda la ventana del proyecto. Después se filtra por
+distancia de Hamming.
+
+Un lote se indexa con una consulta de candidatos para todas sus alertas y
+un solo `bulk_create`, fuera de la transacción de la ingesta.
+
+La primera alerta de un grupo es la canónica. Las demás se vinculan a ella
+(`HuellaContenido.canonico`) y `clasificar_detalle` reutiliza su salida del
+LLM en lugar de llamarlo otra vez. El gate corre igual para cada alerta.
+"""
+
+import hashlib
+import re
+import unicodedata
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.base.models import DetalleEnvio
+from apps.ia.models import EvaluacionIA, HuellaContenido
+
+BITS = 64
+BANDAS = 5
+BITS_BANDA = -(-BITS // BANDAS)
+MASCARA_BANDA = (1 << BITS_BANDA) - 1
+TAMANO_SHINGLE = 2
+
+# Con 5 bandas la búsqueda solo garantiza encontrar distancias <= 4. Copias
+# con otra URL, un "RT @x:" o una fuente añadida quedan dentro; textos
+# distintos sobre el mismo tema suelen quedar a más de 25 bits
+DISTANCIA_MAXIMA = BANDAS - 1
+DISTANCIA = DISTANCIA_MAXIMA
+VENTANA_HORAS = 72
+# Textos muy cortos ("jajaja", "👏") coinciden sin ser la misma noticia
+MIN_PALABRAS = 8
+
+ESTADOS_EN_CLASIFICACION = (
+    DetalleEnvio.PIPELINE_PENDIENTE_IA,
+    DetalleEnvio.PIPELINE_CLASIFICANDO,
+)
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_PALABRA_RE = re.compile(r"\w+")
+
+
+def _distancia_maxima() -> int:
+    return min(
+        int(getattr(settings, "IA_CASI_DUPLICADOS_DISTANCIA", DISTANCIA)),
+        DISTANCIA_MAXIMA,
+    )
+
+
+def _ventana() -> timedelta:
+    return timedelta(hours=getattr(settings, "IA_CASI_DUPLICADOS_VENTANA_HORAS", VENTANA_HORAS))
+
+
+def palabras(texto: str) -> List[str]:
+    texto = unicodedata.normalize("NFKD", _URL_RE.sub(" ", texto.lower()))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _PALABRA_RE.findall(texto)
+
+
+def _hash_64(valor: str) -> int:
+    return int.from_bytes(hashlib.blake2b(valor.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(texto: str) -> Optional[int]:
+    """SimHash sin signo de 64 bits; None si el texto es muy corto."""
+    tokens = palabras(texto or "")
+    if len(tokens) < MIN_PALABRAS:
+        return None
+
+    pesos = [0] * BITS
+    for indice in range(len(tokens) - TAMANO_SHINGLE + 1):
+        valor = _hash_64(" ".join(tokens[indice : indice + TAMANO_SHINGLE]))
+        for bit in range(BITS):
+            pesos[bit] += 1 if valor >> bit & 1 else -1
+
+    huella = 0
+    for bit, peso in enumerate(pesos):
+        if peso > 0:
+            huella |= 1 << bit
+    return huella
+
+
+def distancia(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bandas(huella: int) -> Tuple[int, ...]:
+    return tuple(huella >> (BITS_BANDA * banda) & MASCARA_BANDA for banda in range(BANDAS))
+
+
+def _con_signo(huella: int) -> int:
+    # BigIntegerField es un entero de 64 bits con signo
+    return huella - (1 << BITS) if huella >= 1 << (BITS - 1) else huella
+
+
+def _sin_signo(huella: int) -> int:
+    return huella % (1 << BITS)
+
+
+def texto_alerta(detalle) -> str:
+    objeto = detalle.medio or detalle.red_social
+    if objeto is None:
+        return ""
+    return " ".join(
+        parte for parte in (getattr(objeto, "titulo", None), objeto.contenido) if parte
+    )
+
+
+def _candidatos(proyecto_id, huellas: Iterable[int]) -> List[HuellaContenido]:
+    """Huellas de la ventana que comparten alguna banda con alguna de las
+    dadas: una sola consulta para todo el lote."""
+    valores: List[set] = [set() for _ in range(BANDAS)]
+    for huella in huellas:
+        for banda, valor in enumerate(bandas(huella)):
+            valores[banda].add(valor)
+    filtro = Q()
+    for banda, conjunto in enumerate(valores):
+        filtro |= Q(**{f"banda_{banda}__in": conjunto})
+    return list(
+        HuellaContenido.objects.filter(
+            filtro, proyecto_id=proyecto_id, created_at__gte=timezone.now() - _ventana()
+        ).only("detalle_envio_id", "canonico_id", "simhash")
+    )
+
+
+def indexar_detalles(proyecto, detalle_ids: Iterable) -> Dict[str, str]:
+    """Calcula y guarda la huella de cada detalle (si no la tiene) y lo
+    vincula a la alerta canónica más cercana de la ventana o del mismo lote.
+    Devuelve {detalle_id: canonico_id} de los que resultaron casi
+    duplicados."""
+    distancia_maxima = _distancia_maxima()
+    detalles = (
+        DetalleEnvio.objects.filter(id__in=list(detalle_ids), huella_contenido__isnull=True)
+        .select_related("medio", "red_social")
+        .order_by("created_at")
+    )
+    huellas = [(detalle, simhash(texto_alerta(detalle))) for detalle in detalles]
+    huellas = [(detalle, huella) for detalle, huella in huellas if huella is not None]
+    if not huellas:
+        return {}
+
+    # (banda, valor) -> [(huella, canónica)]; las del lote se suman al avanzar
+    por_banda: Dict[Tuple[int, int], List[Tuple[int, object]]] = {}
+
+    def _registrar(huella, canonico_id):
+        for clave in enumerate(bandas(huella)):
+            por_banda.setdefault(clave, []).append((huella, canonico_id))
+
+    for candidato in _candidatos(proyecto.id, [huella for _, huella in huellas]):
+        _registrar(
+            _sin_signo(candidato.simhash), candidato.canonico_id or candidato.detalle_envio_id
+        )
+
+    nuevas = []
+    vinculados: Dict[str, str] = {}
+    for detalle, huella in huellas:
+        canonico_id = None
+        mejor = distancia_maxima + 1
+        for clave in enumerate(bandas(huella)):
+            for otra, canonico_otra in por_banda.get(clave, ()):
+                actual = distancia(huella, otra)
+                if actual < mejor:
+                    mejor = actual
+                    canonico_id = canonico_otra
+
+        nuevas.append(
+            HuellaContenido(
+                proyecto=proyecto,
+                detalle_envio=detalle,
+                canonico_id=canonico_id,
+                simhash=_con_signo(huella),
+                distancia=mejor if canonico_id else None,
+                **{f"banda_{banda}": valor for banda, valor in enumerate(bandas(huella))},
+            )
+        )
+        _registrar(huella, canonico_id or detalle.id)
+        if canonico_id:
+            vinculados[str(detalle.id)] = str(canonico_id)
+
+    # Otra tarea pudo indexar el mismo detalle entretanto: gana la primera
+    HuellaContenido.objects.bulk_create(nuevas, ignore_conflicts=True)
+    return vinculados
+
+
+def canonico_de(detalle) -> Optional[DetalleEnvio]:
+    huella = (
+        HuellaContenido.objects.select_related("canonico")
+        .filter(detalle_envio=detalle)
+        .first()
+    )
+    return huella.canonico if huella is not None else None
+
+
+def esperando_canonico(detalle) -> bool:
+    """La canónica aún no tiene evaluación: el duplicado espera a que su
+    clasificación termine y lo reencole, en lugar de llamar al LLM."""
+    canonico = canonico_de(detalle)
+    return canonico is not None and canonico.estado_pipeline in ESTADOS_EN_CLASIFICACION
+
+
+def evaluacion_reutilizable(detalle, snapshot_matriz, version_prompt) -> Optional[EvaluacionIA]:
+    """Última evaluación de la canónica con salida del LLM, si se hizo con la
+    misma matriz y el mismo prompt (con otros, la salida no es comparable)."""
+    canonico = canonico_de(detalle)
+    if canonico is None:
+        return None
+    evaluacion = (
+        EvaluacionIA.objects.filter(
+            detalle_envio=canonico,
+            estado=EvaluacionIA.ESTADO_COMPLETADA,
+            respuesta_cruda__isnull=False,
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if (
+        evaluacion is None
+        or evaluacion.version_prompt != version_prompt
+        or evaluacion.snapshot_matriz != snapshot_matriz
+    ):
+        return None
+    return evaluacion
+
+
+def duplicados_en_espera(detalle) -> List[str]:
+    return [
+        str(detalle_id)
+        for detalle_id in HuellaContenido.objects.filter(
+            canonico=detalle,
+            detalle_envio__estado_pipeline=DetalleEnvio.PIPELINE_PENDIENTE_IA,
+        ).values_list("detalle_envio_id", flat=True)
+    ]
+
+
+def purgar_huellas() -> int:
+    """Borra las huellas fuera de la ventana (ya no se usan para buscar)."""
+    borradas, _ = HuellaContenido.objects.filter(
+        created_at__lt=timezone.now() - _ventana()
+    ).delete()
+    return borradas
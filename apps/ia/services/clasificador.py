@@ -9,7 +9,7 @@ from django.utils import timezone
 from apps.base.models import DetalleEnvio
 from apps.ia.models import EvaluacionIA
 
-from . import reglas, vertex
+from . import casi_duplicados, reglas, vertex
 from .gate import decidir
 from .prompts import PROMPT_VERSION, SalidaClasificacion, construir_prompt_clasificacion
 
@@ -93,9 +93,24 @@ def clasificar_detalle(detalle, matriz):
             detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_DESCARTADA_IA)
         return evaluacion
 
-    # 2) LLM
-    prompt = construir_prompt_clasificacion(matriz, alerta, tipo_alerta)
-    salida, metadatos = vertex.clasificar(prompt, SalidaClasificacion)
+    # 2) LLM, salvo que una alerta casi idéntica ya tenga su salida
+    origen = casi_duplicados.evaluacion_reutilizable(
+        detalle, evaluacion.snapshot_matriz, PROMPT_VERSION
+    )
+    if origen is not None:
+        salida = origen.respuesta_cruda
+        evaluacion.evaluacion_origen = origen
+        evaluacion.modelo = origen.modelo
+        evaluacion.latencia_ms = 0
+        evaluacion.tokens_entrada = 0
+        evaluacion.tokens_salida = 0
+    else:
+        prompt = construir_prompt_clasificacion(matriz, alerta, tipo_alerta)
+        salida, metadatos = vertex.clasificar(prompt, SalidaClasificacion)
+        evaluacion.modelo = metadatos.modelo
+        evaluacion.latencia_ms = metadatos.latencia_ms
+        evaluacion.tokens_entrada = metadatos.tokens_entrada
+        evaluacion.tokens_salida = metadatos.tokens_salida
 
     evaluacion.relevante = salida.get("relevante")
     evaluacion.relevancia_score = salida.get("relevancia_score")
@@ -107,10 +122,6 @@ def clasificar_detalle(detalle, matriz):
     evaluacion.marca_detectada = salida.get("marca_detectada")
     evaluacion.razones = salida.get("razones") or []
     evaluacion.respuesta_cruda = salida
-    evaluacion.modelo = metadatos.modelo
-    evaluacion.latencia_ms = metadatos.latencia_ms
-    evaluacion.tokens_entrada = metadatos.tokens_entrada
-    evaluacion.tokens_salida = metadatos.tokens_salida
 
     # 3) Gate determinístico
     decision = decidir(
@@ -11,6 +11,8 @@ import requests
 from django.conf import settings
 from django.core.cache import cache
 
+from apps.base import clientes_http
+
 logger = logging.getLogger(__name__)
 
 CACHE_TTL = 60 * 60 * 24 * 7  # 7 días
@@ -43,7 +45,7 @@ def obtener_reach_dominio(url):
         return cacheado or None  # 0 cacheado = "sin dato"
 
     try:
-        respuesta = requests.get(
+        respuesta = clientes_http.get(
             API_URL.format(domain=dominio),
             params={"api_key": api_key, "granularity": "monthly", "main_domain_only": "true"},
             timeout=30,
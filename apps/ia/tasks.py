@@ -26,9 +26,10 @@ def ping():
 )
 def clasificar_alerta(self, detalle_envio_id):
     """Clasifica una alerta con IA y aplica el gate. Idempotente: usa un
-    compare-and-set atómico sobre estado_pipeline para tolerar re-ejecuciones."""
+    compare-and-set atómico sobre estado_pipeline para tolerar re-ejecuciones.
+    Un casi duplicado cuya canónica sigue en clasificación vuelve a
+    `pendiente_ia` hasta que la canónica termina y lo reencola."""
     from apps.base.models import DetalleEnvio
-    from apps.ia.services import clasificador
 
     # CAS: solo un worker toma la alerta; 0 filas = ya la tomó otro / ya resuelta
     tomadas = DetalleEnvio.objects.filter(
@@ -56,7 +57,31 @@ def clasificar_alerta(self, detalle_envio_id):
         detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_MANUAL)
         return "sin_matriz"
 
+    from apps.ia.services import casi_duplicados
+
+    casi_duplicados.indexar_detalles(detalle.proyecto, [detalle.id])
+    if casi_duplicados.esperando_canonico(detalle):
+        # La canónica la reencola al terminar; este intento no cuenta
+        DetalleEnvio.objects.filter(
+            id=detalle.id, estado_pipeline=DetalleEnvio.PIPELINE_CLASIFICANDO
+        ).update(
+            estado_pipeline=DetalleEnvio.PIPELINE_PENDIENTE_IA,
+            intentos_ia=F("intentos_ia") - 1,
+        )
+        return "esperando_canonico"
+
+    try:
+        return _clasificar_y_encadenar(detalle, matriz)
+    finally:
+        # Con o sin salida reutilizable, los casi duplicados en espera siguen
+        for duplicado_id in casi_duplicados.duplicados_en_espera(detalle):
+            clasificar_alerta.delay(duplicado_id)
+
+
+def _clasificar_y_encadenar(detalle, matriz):
+    from apps.base.models import DetalleEnvio
     from apps.ia.models import EvaluacionIA
+    from apps.ia.services import clasificador
 
     try:
         evaluacion = clasificador.clasificar_detalle(detalle, matriz)
@@ -71,7 +96,7 @@ def clasificar_alerta(self, detalle_envio_id):
     except Exception as exc:  # pylint: disable=broad-except
         # B3: la inmediatez gana — sin reintentos largos, el error cae a cola
         # humana de una vez (el sweeper cubre cualquier otro atasco).
-        logger.exception("Clasificación IA falló para %s", detalle_envio_id)
+        logger.exception("Clasificación IA falló para %s", detalle.id)
         clasificador.registrar_fallback(
             detalle,
             matriz,
@@ -181,6 +206,14 @@ def completar_datos(detalle_envio_id):
     return {"completados": len(completados)}
 
 
+@shared_task(name="ia.purgar_huellas_contenido")
+def purgar_huellas_contenido():
+    """Mantiene el índice de casi duplicados acotado a su ventana."""
+    from apps.ia.services import casi_duplicados
+
+    return casi_duplicados.purgar_huellas()
+
+
 @shared_task(name="ia.rescatar_alertas_atascadas")
 def rescatar_alertas_atascadas():
     """Sweeper B3 (beat cada 60s): cualquier alerta atascada en el pipeline
@@ -0,0 +1,192 @@
+import random
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.base.models import DetalleEnvio, Redes
+from apps.ia.models import EvaluacionIA, HuellaContenido
+from apps.ia.services import casi_duplicados
+from apps.ia.tasks import clasificar_alerta
+
+from .test_tasks import META, SALIDA_AUTO, _mk_pipeline
+
+NOTA = (
+    "El Ministerio de Salud confirmó este martes un nuevo brote de dengue en la región "
+    "norte del país, donde ya se registran más de 1.200 casos y tres fallecidos. Las "
+    "autoridades pidieron a la población eliminar criaderos de mosquitos y acudir al "
+    "centro de salud ante cualquier síntoma de fiebre alta."
+)
+COPIAS = [
+    NOTA + " Fuente: Andina https://andina.pe/nota/1",
+    "RT @diario: " + NOTA,
+    NOTA.replace("martes", "miércoles"),
+]
+OTRAS = [
+    "El Ministerio de Educación anunció este martes el inicio del año escolar en la "
+    "región norte del país, con más de 1.200 colegios y tres nuevos programas.",
+    "Las autoridades de salud pidieron a la población vacunarse contra la influenza "
+    "antes del invierno y acudir al centro de salud ante cualquier síntoma.",
+]
+
+
+class SimHashTests(SimpleTestCase):
+    def test_copias_quedan_cerca_y_textos_distintos_lejos(self):
+        original = casi_duplicados.simhash(NOTA)
+        for copia in COPIAS:
+            with self.subTest(copia=copia[:20]):
+                self.assertLessEqual(
+                    casi_duplicados.distancia(original, casi_duplicados.simhash(copia)),
+                    casi_duplicados.DISTANCIA,
+                )
+        for otra in OTRAS:
+            with self.subTest(otra=otra[:20]):
+                self.assertGreater(
+                    casi_duplicados.distancia(original, casi_duplicados.simhash(otra)),
+                    casi_duplicados.DISTANCIA_MAXIMA,
+                )
+
+    def test_texto_corto_no_tiene_huella(self):
+        self.assertIsNone(casi_duplicados.simhash("jajaja qué buena"))
+
+    def test_huellas_cercanas_comparten_alguna_banda(self):
+        azar = random.Random(7)
+        for _ in range(200):
+            huella = azar.getrandbits(64)
+            otra = huella
+            for bit in azar.sample(range(64), casi_duplicados.DISTANCIA_MAXIMA):
+                otra ^= 1 << bit
+            self.assertTrue(
+                set(enumerate(casi_duplicados.bandas(huella)))
+                & set(enumerate(casi_duplicados.bandas(otra)))
+            )
+
+    def test_huella_se_guarda_con_signo_y_se_recupera(self):
+        huella = (1 << 64) - 5
+        self.assertEqual(
+            casi_duplicados._sin_signo(casi_duplicados._con_signo(huella)), huella
+        )
+
+
+class CasiDuplicadosPipelineTests(TestCase):
+    def setUp(self):
+        self.proyecto, self.matriz, self.canonico = _mk_pipeline()
+        red = self.canonico.red_social
+        red.contenido = NOTA
+        red.save()
+
+    def _duplicado(self, contenido, url):
+        red = Redes.objects.create(
+            contenido=contenido,
+            fecha_publicacion=timezone.now(),
+            url=url,
+            reach=2000,
+            engagement=50,
+            red_social=self.canonico.red_social.red_social,
+            proyecto=self.proyecto,
+        )
+        return DetalleEnvio.objects.create(
+            proyecto=self.proyecto,
+            red_social=red,
+            estado_pipeline=DetalleEnvio.PIPELINE_PENDIENTE_IA,
+        )
+
+    def test_indexar_vincula_copias_a_la_canonica(self):
+        copia = self._duplicado(COPIAS[1], "https://twitter.com/u/status/10")
+        otra = self._duplicado(OTRAS[0], "https://twitter.com/u/status/11")
+
+        vinculados = casi_duplicados.indexar_detalles(
+            self.proyecto, [self.canonico.id, copia.id, otra.id]
+        )
+
+        self.assertEqual(vinculados, {str(copia.id): str(self.canonico.id)})
+        self.assertIsNone(HuellaContenido.objects.get(detalle_envio=self.canonico).canonico)
+
+    def test_fuera_de_la_ventana_no_se_vincula(self):
+        casi_duplicados.indexar_detalles(self.proyecto, [self.canonico.id])
+        HuellaContenido.objects.update(created_at=timezone.now() - timedelta(days=10))
+        copia = self._duplicado(COPIAS[0], "https://twitter.com/u/status/10")
+
+        self.assertEqual(casi_duplicados.indexar_detalles(self.proyecto, [copia.id]), {})
+        self.assertEqual(casi_duplicados.purgar_huellas(), 1)
+
+    @patch("apps.whatsapp.tasks.enviar_alerta.delay")
+    @patch("apps.ia.services.vertex.clasificar", return_value=(SALIDA_AUTO, META))
+    def test_copia_en_espera_reutiliza_la_salida_de_la_canonica(self, mock_llm, mock_envio):
+        copia = self._duplicado(COPIAS[0], "https://twitter.com/u/status/10")
+        casi_duplicados.indexar_detalles(self.proyecto, [self.canonico.id, copia.id])
+
+        # La canónica aún no se clasificó: la copia espera sin llamar al LLM
+        resultado = clasificar_alerta.apply(args=[str(copia.id)]).get()
+        copia.refresh_from_db()
+        self.assertEqual(resultado, "esperando_canonico")
+        self.assertEqual(copia.estado_pipeline, DetalleEnvio.PIPELINE_PENDIENTE_IA)
+        self.assertEqual(copia.intentos_ia, 0)
+
+        # Al terminar, la canónica reencola la copia
+        clasificar_alerta.apply(args=[str(self.canonico.id)])
+
+        mock_llm.assert_called_once()
+        copia.refresh_from_db()
+        self.assertEqual(copia.estado_pipeline, DetalleEnvio.PIPELINE_AUTO_APROBADA)
+        origen = EvaluacionIA.objects.get(detalle_envio=self.canonico)
+        evaluacion = EvaluacionIA.objects.get(detalle_envio=copia)
+        self.assertEqual(evaluacion.evaluacion_origen, origen)
+        self.assertEqual(evaluacion.decision, EvaluacionIA.DECISION_AUTO_ENVIAR)
+        self.assertEqual(evaluacion.tokens_entrada, 0)
+        self.assertEqual(mock_envio.call_count, 2)
+
+    @patch("apps.whatsapp.tasks.enviar_alerta.delay")
+    @patch("apps.ia.services.vertex.clasificar", return_value=(SALIDA_AUTO, META))
+    def test_cambio_de_matriz_vuelve_a_llamar_al_llm(self, mock_llm, mock_envio):
+        clasificar_alerta.apply(args=[str(self.canonico.id)])
+        self.matriz.paises = ["PE"]
+        self.matriz.save()
+        copia = self._duplicado(COPIAS[2], "https://twitter.com/u/status/10")
+
+        clasificar_alerta.apply(args=[str(copia.id)])
+
+        self.assertEqual(mock_llm.call_count, 2)
+        self.assertIsNone(EvaluacionIA.objects.get(detalle_envio=copia).evaluacion_origen)
+
+    @patch("apps.ia.tasks.clasificar_alerta.delay")
+    def test_ingesta_no_encola_copias_de_otra_alerta_del_lote(self, mock_delay):
+        from apps.base.api.ingestion import IngestionAPIView
+
+        copia = self._duplicado(COPIAS[1], "https://twitter.com/u/status/10")
+        otra = self._duplicado(OTRAS[1], "https://twitter.com/u/status/11")
+        listado = [
+            {"id": detalle.red_social_id} for detalle in (self.canonico, copia, otra)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IngestionAPIView()._despachar_pipeline_ia(self.proyecto, listado)
+
+        encoladas = {llamada.args[0] for llamada in mock_delay.call_args_list}
+        self.assertEqual(encoladas, {str(self.canonico.id), str(otra.id)})
+
+    @patch("apps.ia.tasks.clasificar_alerta.delay")
+    def test_ingesta_indexa_en_bloque_tras_el_commit(self, mock_delay):
+        from apps.base.api.ingestion import IngestionAPIView
+
+        copias = [
+            self._duplicado(texto, f"https://twitter.com/u/status/{numero}")
+            for numero, texto in enumerate(COPIAS + OTRAS, start=10)
+        ]
+        listado = [{"id": detalle.red_social_id} for detalle in [self.canonico, *copias]]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            IngestionAPIView()._despachar_pipeline_ia(self.proyecto, listado)
+        self.assertFalse(HuellaContenido.objects.exists())
+
+        # Detalles, candidatos y un solo INSERT, sin importar el tamaño del lote
+        with self.assertNumQueries(3):
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(HuellaContenido.objects.count(), 6)
+        self.assertEqual(
+            HuellaContenido.objects.filter(canonico=self.canonico).count(), len(COPIAS)
+        )
+        self.assertEqual(mock_delay.call_count, 1 + len(OTRAS))
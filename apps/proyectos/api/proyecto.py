@@ -7,6 +7,7 @@ from apps.base.api.filtros import PaginacionEstandar
 from apps.proyectos.api.filtros import ProyectoFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
+from apps.base import clientes_http
 from apps.base.models import DetalleEnvio, Articulo, Redes, TemplateConfig
 
 from typing import Optional
@@ -24,7 +25,7 @@ def get_grupo_id(grupo_whatsapp: str) -> Optional[str]:
         "Content-Type": "application/json"
     }
     try:
-        response = requests.get(url_grupos, headers=headers, timeout=5)
+        response = clientes_http.get(url_grupos, headers=headers, timeout=5)
         response.raise_for_status()
         data = response.json()
         for grupo in data.get("groups", []):
@@ -5,20 +5,30 @@ from django.utils.timezone import now
 import json
 import logging
 import os
-import time
-from datetime import datetime
+import re
+import random
+from datetime import datetime, timedelta
 from urllib.parse import urljoin
 import requests
 from rest_framework import status
 from django.utils import timezone
 from collections.abc import Iterable
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Optional, Pattern, Tuple
 
+from apps.base import clientes_http, outbox
 from apps.base.api.utils import formatear_fecha_respuesta
-from apps.base.models import DetalleEnvio, Articulo, Redes, TemplateConfig
+from apps.base.models import DetalleEnvio, Articulo, MensajeSaliente, Redes, TemplateConfig
 from apps.proyectos.models import Proyecto
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
 
+from apps.whatsapp.providers import enviar_texto
+from apps.whatsapp.services.envio_concurrente import MensajePreparado, enviar_concurrente
+from apps.whatsapp.services.limitador import acotar_espera, reservar_turno
 from apps.whatsapp.utils import ordenar_alertas_por_fecha
 
 
@@ -107,45 +117,81 @@ def _normalizar_emojis(emojis) -> str:
     return str(emojis).strip()
 
 
+def _patron_trie(palabras) -> str:
+    """
+    Alternancia en forma de árbol de prefijos ("gran|granja" -> "gran(?:ja)?"):
+    el motor decide por carácter en lugar de probar cada keyword por posición.
+    Las variantes más largas se intentan primero.
+    """
+    trie: dict = {}
+    for palabra in palabras:
+        nodo = trie
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[""] = {}
+
+    def _construir(nodo: dict) -> str:
+        ramas = [
+            re.escape(caracter) + _construir(hijo)
+            for caracter, hijo in sorted(nodo.items())
+            if caracter
+        ]
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        if "" in nodo:
+            cuerpo = "(?:" + cuerpo + ")?"
+        return cuerpo
+
+    return _construir(trie)
+
+
+@lru_cache(maxsize=256)
+def _compilar_resaltador(keywords: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """
+    Compila las keywords en un solo patrón (cacheado por el hash de la tupla).
+    Cada keyword aporta las mismas variantes que antes: palabra completa con
+    \\b y, si empieza con @ o #, la versión con signo delimitada por espacios
+    más la versión sin signo.
+    """
+    con_signo = set()
+    palabras = set()
+    for keyword in keywords:
+        if not keyword:
+            continue
+        keyword = keyword.strip().lower()
+        if keyword.startswith('@') or keyword.startswith('#'):
+            # Versión con el signo (@usuario o #hashtag)
+            con_signo.add(keyword)
+            keyword = keyword[1:]
+        if keyword:
+            palabras.add(keyword)
+
+    alternativas = []
+    if con_signo:
+        alternativas.append(r'(?<!\S)' + _patron_trie(con_signo) + r'(?!\S)')
+    if palabras:
+        alternativas.append(r'\b' + _patron_trie(palabras) + r'\b')
+    if not alternativas:
+        return None
+    return re.compile("|".join(alternativas), flags=re.IGNORECASE)
+
+
 def _resaltar_keywords(texto: str, keywords: list) -> str:
     """
     Resalta las keywords en negrita dentro del texto.
     Búsqueda case-insensitive de palabras completas.
     Soporta keywords con @, # y otros caracteres especiales.
     Si la keyword empieza con @ o #, resalta tanto la versión con signo como sin signo.
+    Una sola pasada por texto con el patrón compilado del set de keywords.
     """
     if not texto or not keywords:
         return texto
 
-    import re
-
-    resultado = texto
-    for keyword in keywords:
-        if not keyword:
-            continue
-
-        keyword = keyword.strip()
-
-        # Si la keyword empieza con @ o #, buscar ambas versiones
-        if keyword.startswith('@') or keyword.startswith('#'):
-            # Versión con el signo (@usuario o #hashtag)
-            keyword_con_signo = re.escape(keyword)
-            pattern_con_signo = r'(?<!\S)(' + keyword_con_signo + r')(?!\S)'
-            resultado = re.sub(pattern_con_signo, r'*\1*', resultado, flags=re.IGNORECASE)
-
-            # Versión sin el signo (usuario o hashtag)
-            keyword_sin_signo = keyword[1:]  # Remover el primer caracter (@ o #)
-            keyword_sin_signo_escaped = re.escape(keyword_sin_signo)
-            # Usar \b para la versión sin signo ya que no tiene caracteres especiales
-            pattern_sin_signo = r'\b(' + keyword_sin_signo_escaped + r')\b'
-            resultado = re.sub(pattern_sin_signo, r'*\1*', resultado, flags=re.IGNORECASE)
-        else:
-            # Para keywords normales sin @ o #
-            keyword_escaped = re.escape(keyword)
-            pattern = r'\b(' + keyword_escaped + r')\b'
-            resultado = re.sub(pattern, r'*\1*', resultado, flags=re.IGNORECASE)
-
-    return resultado
+    patron = _compilar_resaltador(tuple(keywords))
+    if patron is None:
+        return texto
+    return patron.sub(r'*\g<0>*', texto)
 
 
 def formatear_mensaje(alerta, plantilla, *, nombre_plantilla=None, tipo_alerta=None, keywords=None):
@@ -210,79 +256,218 @@ def formatear_mensaje(alerta, plantilla, *, nombre_plantilla=None, tipo_alerta=N
 
 
 
-def _enviar_muchos_en_uno(
-    pendientes_envio,
+INTENTOS_ENVIO = 3
+REINTENTO_BASE_SEGUNDOS = 2
+REINTENTO_MAXIMO_SEGUNDOS = 5 * 60
+ENVIO_TOMADO_SEGUNDOS = 10 * 60
+
+
+def _intentos_envio():
+    return getattr(settings, "WHATSAPP_INTENTOS_ENVIO", INTENTOS_ENVIO)
+
+
+def _envio_tomado_segundos():
+    return getattr(settings, "WHATSAPP_ENVIO_TOMADO_SEGUNDOS", ENVIO_TOMADO_SEGUNDOS)
+
+
+def espera_reintento(intento):
+    """Segundos antes del intento número `intento` (el segundo es el primer
+    reintento): backoff exponencial con jitter."""
+    base = getattr(settings, "WHATSAPP_REINTENTO_BASE_SEGUNDOS", REINTENTO_BASE_SEGUNDOS)
+    maximo = getattr(settings, "WHATSAPP_REINTENTO_MAXIMO_SEGUNDOS", REINTENTO_MAXIMO_SEGUNDOS)
+    espera = min(base * 2 ** max(intento - 2, 0), maximo)
+    # Jitter: la mitad fija y la otra al azar, para no sincronizar reintentos
+    return espera / 2 + random.uniform(0, espera / 2)
+
+
+def _programar_envio(
+    grupo_id,
+    cuerpo,
+    items,
+    *,
+    proyecto_id,
+    tipo_alerta,
+    alertas,
+    countdown,
+    intento=1,
+    turno_reservado=False,
+):
+    """Deja el mensaje en la tarea `whatsapp.enviar_mensaje_programado`."""
+    from apps.whatsapp.tasks import enviar_mensaje_programado
+
+    ids = [item["alerta_id"] for item in items]
+    kwargs = {
+        "proyecto_id": str(proyecto_id),
+        "tipo_alerta": tipo_alerta,
+        "grupo_id": grupo_id,
+        "cuerpo": cuerpo,
+        "detalle_ids": [str(item["detalle_envio"].id) for item in items],
+        "alertas": [alerta for alerta in alertas if alerta.get("id") in ids],
+        "intento": intento,
+        "turno_reservado": turno_reservado,
+    }
+    kwargs, countdown = acotar_espera(kwargs, countdown)
+    # El DetalleEnvio tiene que estar confirmado cuando corra la tarea
+    transaction.on_commit(
+        lambda: enviar_mensaje_programado.apply_async(kwargs=kwargs, countdown=countdown)
+    )
+
+
+def _enviar_o_programar(
+    cuerpo,
+    items,
     *,
+    grupo_id,
     headers,
     url_mensaje,
-    max_retries,
-    retry_delay,
-    grupo_id,
+    proyecto_id,
+    tipo_alerta,
+    alertas,
     enviados,
     no_enviados,
+    programados,
+):
+    """Envía un mensaje (una alerta o varias en uno) sin bloquear el proceso.
+
+    Si el limitador no le da turno inmediato, o el primer intento falla y
+    quedan intentos, el mensaje sigue en Celery (`countdown`) y sus alertas
+    van a `programados`; el resultado final queda en sus DetalleEnvio.
+    """
+    ids = [item["alerta_id"] for item in items]
+    contexto = {"proyecto_id": proyecto_id, "tipo_alerta": tipo_alerta, "alertas": alertas}
+
+    espera = reservar_turno(grupo_id)
+    if espera > 0:
+        _programar_envio(grupo_id, cuerpo, items, countdown=espera, turno_reservado=True, **contexto)
+        programados.extend(ids)
+        return
+
+    payload = {"to": grupo_id, "body": cuerpo, "no_link_preview": True}
+    try:
+        response = clientes_http.post(url_mensaje, json=payload, headers=headers)
+    except requests.RequestException as e:
+        fallo = {"error": f"Error de conexión: {str(e)}"}
+    else:
+        if response.status_code == 200:
+            timestamp = timezone.now()
+            for item in items:
+                detalle_envio = item["detalle_envio"]
+                detalle_envio.fin_envio = timestamp
+                detalle_envio.estado_enviado = True
+                detalle_envio.save()
+            enviados.extend(ids)
+            return
+        try:
+            detalle_respuesta = response.json()
+        except ValueError:
+            detalle_respuesta = response.text
+        fallo = {"status_code": response.status_code, "detalle": detalle_respuesta}
+
+    if _intentos_envio() > 1:
+        _programar_envio(grupo_id, cuerpo, items, countdown=espera_reintento(2), intento=2, **contexto)
+        programados.extend(ids)
+        return
+
+    timestamp = timezone.now()
+    for item in items:
+        detalle_envio = item["detalle_envio"]
+        detalle_envio.fin_envio = timestamp
+        detalle_envio.estado_enviado = False
+        detalle_envio.save()
+    no_enviados.extend({"alerta_id": alerta_id, **fallo} for alerta_id in ids)
+
+
+def enviar_mensaje_programado(
+    proyecto_id, tipo_alerta, grupo_id, cuerpo, detalle_ids, alertas, intento=1
 ):
+    """Un intento de un mensaje legacy que salió del request o del lote
+    (por turno del limitador o por reintento). Si falla y quedan intentos,
+    programa el siguiente; si no, deja el resultado en sus DetalleEnvio. Si
+    sale, lo reporta a monitoreo (las alertas enviadas en el acto se
+    reportan desde quien las envió)."""
+    detalles = list(DetalleEnvio.objects.filter(id__in=detalle_ids, estado_enviado=False))
+    # CAS: si la misma tarea llega dos veces (reentrega del broker), solo una
+    # toma los detalles y envía; la otra no toma ninguno. `estado_enviado`
+    # recién se marca cuando el mensaje salió, y la toma vence: si el worker
+    # murió a mitad del envío, la reentrega lo retoma
+    ahora = timezone.now()
+    tomados = (
+        DetalleEnvio.objects.filter(id__in=[detalle.id for detalle in detalles], estado_enviado=False)
+        .filter(
+            Q(envio_tomado_en__isnull=True)
+            | Q(envio_tomado_en__lt=ahora - timedelta(seconds=_envio_tomado_segundos()))
+        )
+        .update(envio_tomado_en=ahora)
+    )
+    if not tomados:
+        return {"enviados": [], "no_enviados": [], "detalle": "Ya fue enviada anteriormente"}
+
+    resultado = enviar_texto(grupo_id, cuerpo)
+    ids = [alerta.get("id") for alerta in alertas]
+    if not resultado.exito and intento < _intentos_envio():
+        from apps.whatsapp.tasks import enviar_mensaje_programado as tarea
+
+        # Se liberan para el reintento
+        DetalleEnvio.objects.filter(id__in=[detalle.id for detalle in detalles]).update(
+            envio_tomado_en=None
+        )
+        kwargs, countdown = acotar_espera(
+            {
+                "proyecto_id": proyecto_id,
+                "tipo_alerta": tipo_alerta,
+                "grupo_id": grupo_id,
+                "cuerpo": cuerpo,
+                "detalle_ids": [str(detalle.id) for detalle in detalles],
+                "alertas": alertas,
+                "intento": intento + 1,
+            },
+            espera_reintento(intento + 1),
+        )
+        tarea.apply_async(kwargs=kwargs, countdown=countdown)
+        return {"exito": False, "reintento": intento + 1}
+
+    timestamp = timezone.now()
+    for detalle_envio in detalles:
+        detalle_envio.fin_envio = timestamp
+        detalle_envio.estado_enviado = resultado.exito
+        detalle_envio.envio_tomado_en = None
+        detalle_envio.save()
+
+    if not resultado.exito:
+        logger.error(
+            "Envío legacy a %s falló tras %s intentos vía %s: %s",
+            grupo_id,
+            intento,
+            resultado.proveedor,
+            resultado.detalle,
+        )
+        return {
+            "exito": False,
+            "enviados": [],
+            "no_enviados": [
+                {"alerta_id": alerta_id, "status_code": resultado.status_code, "detalle": resultado.detalle}
+                for alerta_id in ids
+            ],
+        }
+
+    monitoreo_result = enviar_alertas_a_monitoreo(
+        proyecto_id=proyecto_id,
+        tipo_alerta=tipo_alerta,
+        data_alertas={"alertas": alertas},
+        enviados_ids=ids,
+        grupo_id=grupo_id,
+    )
+    return {"exito": True, "enviados": ids, "no_enviados": [], "monitoreo": monitoreo_result}
+
+
+def _enviar_muchos_en_uno(pendientes_envio, **contexto):
     """Envía un único mensaje concatenando varias alertas."""
 
     if not pendientes_envio:
         return
 
     cuerpo_mensaje = "\n\n".join(str(item.get("mensaje", "")) for item in pendientes_envio)
-    payload = {"to": grupo_id, "body": cuerpo_mensaje, "no_link_preview": True}
-
-    attempts = 0
-    success = False
-    while attempts < max_retries and not success:
-        try:
-            response = requests.post(url_mensaje, json=payload, headers=headers)
-            if response.status_code == 200:
-                timestamp = timezone.now()
-                for item in pendientes_envio:
-                    detalle_envio = item["detalle_envio"]
-                    detalle_envio.fin_envio = timestamp
-                    detalle_envio.estado_enviado = True
-                    detalle_envio.save()
-                    enviados.append(item["alerta_id"])
-                success = True
-            else:
-                attempts += 1
-                if attempts < max_retries:
-                    time.sleep(retry_delay)
-                else:
-                    timestamp = timezone.now()
-                    try:
-                        detalle_respuesta = response.json()
-                    except ValueError:
-                        detalle_respuesta = response.text
-                    for item in pendientes_envio:
-                        detalle_envio = item["detalle_envio"]
-                        detalle_envio.fin_envio = timestamp
-                        detalle_envio.estado_enviado = False
-                        detalle_envio.save()
-                        no_enviados.append(
-                            {
-                                "alerta_id": item["alerta_id"],
-                                "status_code": response.status_code,
-                                "detalle": detalle_respuesta,
-                            }
-                        )
-        except requests.RequestException as e:
-            attempts += 1
-            if attempts < max_retries:
-                time.sleep(retry_delay)
-            else:
-                timestamp = timezone.now()
-                for item in pendientes_envio:
-                    detalle_envio = item["detalle_envio"]
-                    detalle_envio.fin_envio = timestamp
-                    detalle_envio.estado_enviado = False
-                    detalle_envio.save()
-                    no_enviados.append(
-                        {
-                            "alerta_id": item["alerta_id"],
-                            "error": f"Error de conexión: {str(e)}",
-                        }
-                    )
-
+    _enviar_o_programar(cuerpo_mensaje, pendientes_envio, **contexto)
 
 
 # -----------------------
@@ -291,8 +476,6 @@ def _enviar_muchos_en_uno(
 class CapturaAlertasMediosAPIView(BaseCapturaAlertasAPIView):
     access_key = os.getenv("WHAPI_TOKEN")
     url_mensaje = "https://gate.whapi.cloud/messages/text"
-    max_retries = 3
-    retry_delay = 2
 
     def post(self, request):
         proyecto_id = request.data.get("proyecto_id")
@@ -333,7 +516,19 @@ class CapturaAlertasMediosAPIView(BaseCapturaAlertasAPIView):
 
         enviados = []
         no_enviados = []
+        programados = []
         pendientes_envio = []
+        contexto_envio = {
+            "grupo_id": grupo_id,
+            "headers": headers,
+            "url_mensaje": self.url_mensaje,
+            "proyecto_id": proyecto_id,
+            "tipo_alerta": tipo_alerta,
+            "alertas": [],
+            "enviados": enviados,
+            "no_enviados": no_enviados,
+            "programados": programados,
+        }
 
         for alerta in alertas:
             alerta_id = alerta.get("id")  # id de la alerta en el JSON
@@ -399,62 +594,21 @@ class CapturaAlertasMediosAPIView(BaseCapturaAlertasAPIView):
                 )
                 continue
 
-            # Armar payload para WhatsApp
-            payload = {"to": grupo_id, "body": mensaje_formateado, "no_link_preview": True}
-
-            success = False
-            attempts = 0
-            while attempts < self.max_retries and not success:
-                try:
-                    response = requests.post(self.url_mensaje, json=payload, headers=headers)
-                    if response.status_code == 200:
-                        detalle_envio.fin_envio = timezone.now()
-                        detalle_envio.estado_enviado = True
-                        detalle_envio.save()
-                        enviados.append(alerta_id)
-                        success = True
-                    else:
-                        attempts += 1
-                        if attempts < self.max_retries:
-                            time.sleep(self.retry_delay)
-                        else:
-                            detalle_envio.fin_envio = timezone.now()
-                            detalle_envio.estado_enviado = False
-                            detalle_envio.save()
-                            no_enviados.append(
-                                {
-                                    "alerta_id": alerta_id,
-                                    "status_code": response.status_code,
-                                    "detalle": response.json(),
-                                }
-                            )
-                except requests.RequestException as e:
-                    attempts += 1
-                    if attempts < self.max_retries:
-                        time.sleep(self.retry_delay)
-                    else:
-                        detalle_envio.fin_envio = timezone.now()
-                        detalle_envio.estado_enviado = False
-                        detalle_envio.save()
-                        no_enviados.append({"alerta_id": alerta_id, "error": f"Error de conexión: {str(e)}"})
+            _enviar_o_programar(
+                mensaje_formateado,
+                [{"alerta_id": alerta_id, "detalle_envio": detalle_envio}],
+                **contexto_envio,
+            )
 
         if formato_muchos_en_uno:
-            _enviar_muchos_en_uno(
-                pendientes_envio,
-                headers=headers,
-                url_mensaje=self.url_mensaje,
-                max_retries=self.max_retries,
-                retry_delay=self.retry_delay,
-                grupo_id=grupo_id,
-                enviados=enviados,
-                no_enviados=no_enviados,
-            )
+            _enviar_muchos_en_uno(pendientes_envio, **contexto_envio)
 
         return Response(
             {
                 "success": f"Se enviaron {len(enviados)} alertas",
                 "enviados": enviados,
                 "no_enviados": no_enviados,
+                "programados": programados,
                 "plantilla_usada": plantilla,
             },
             status=status.HTTP_200_OK,
@@ -603,8 +757,6 @@ class MarcarRevisadoAPIView(APIView):
 class EnviarMensajeAPIView(APIView):
     access_key = os.getenv("WHAPI_TOKEN")
     url_mensaje = "https://gate.whapi.cloud/messages/text"
-    max_retries = 3
-    retry_delay = 2
 
     def post(self, request):
         proyecto_id = request.data.get("proyecto_id")
@@ -654,6 +806,7 @@ class EnviarMensajeAPIView(APIView):
 
         enviados = []
         no_enviados = []
+        programados = []
 
         # Log detallado del payload recibido
         print("=" * 80)
@@ -678,6 +831,17 @@ class EnviarMensajeAPIView(APIView):
         print("=" * 80)
 
         pendientes_envio = []
+        contexto_envio = {
+            "grupo_id": grupo_id,
+            "headers": headers,
+            "url_mensaje": self.url_mensaje,
+            "proyecto_id": proyecto_id,
+            "tipo_alerta": tipo_alerta,
+            "alertas": alertas,
+            "enviados": enviados,
+            "no_enviados": no_enviados,
+            "programados": programados,
+        }
 
         for alerta in alertas:
             alerta_id = alerta.get("id")
@@ -745,53 +909,14 @@ class EnviarMensajeAPIView(APIView):
                 )
                 continue
 
-            payload = {"to": grupo_id, "body": mensaje_formateado, "no_link_preview": True}
-
-            success = False
-            attempts = 0
-            while attempts < self.max_retries and not success:
-                try:
-                    response = requests.post(self.url_mensaje, json=payload, headers=headers)
-                    if response.status_code == 200:
-                        detalle_envio.fin_envio = timezone.now()
-                        detalle_envio.estado_enviado = True
-                        detalle_envio.save()
-                        enviados.append(alerta_id)
-                        success = True
-                    else:
-                        attempts += 1
-                        if attempts < self.max_retries:
-                            time.sleep(self.retry_delay)
-                        else:
-                            detalle_envio.fin_envio = timezone.now()
-                            detalle_envio.estado_enviado = False
-                            detalle_envio.save()
-                            no_enviados.append({
-                                "alerta_id": alerta_id,
-                                "status_code": response.status_code,
-                                "detalle": response.json(),
-                            })
-                except requests.RequestException as e:
-                    attempts += 1
-                    if attempts < self.max_retries:
-                        time.sleep(self.retry_delay)
-                    else:
-                        detalle_envio.fin_envio = timezone.now()
-                        detalle_envio.estado_enviado = False
-                        detalle_envio.save()
-                        no_enviados.append({"alerta_id": alerta_id, "error": f"Error de conexión: {str(e)}"})
+            _enviar_o_programar(
+                mensaje_formateado,
+                [{"alerta_id": alerta_id, "detalle_envio": detalle_envio}],
+                **contexto_envio,
+            )
 
         if formato_muchos_en_uno:
-            _enviar_muchos_en_uno(
-                pendientes_envio,
-                headers=headers,
-                url_mensaje=self.url_mensaje,
-                max_retries=self.max_retries,
-                retry_delay=self.retry_delay,
-                grupo_id=grupo_id,
-                enviados=enviados,
-                no_enviados=no_enviados,
-            )
+            _enviar_muchos_en_uno(pendientes_envio, **contexto_envio)
 
         payload_monitoreo = {}
         if hasattr(request.data, "items"):
@@ -813,20 +938,18 @@ class EnviarMensajeAPIView(APIView):
             "success": f"Se enviaron {len(enviados)} alertas",
             "enviados": enviados,
             "no_enviados": no_enviados,
+            "programados": programados,
             "monitoreo": monitoreo_result,
         }, status=status.HTTP_200_OK)
 
 
 
-def enviar_alertas_automatico(proyecto_id, tipo_alerta, alertas, usuario_id=2):
-    """
-    Envía alertas automáticamente simulando lo que hace EnviarMensajeAPIView.post
-    """
-    access_key = os.getenv("WHAPI_TOKEN")
-    url_mensaje = "https://gate.whapi.cloud/messages/text"
-    max_retries = 3
-    retry_delay = 2
+def _preparar_lote_automatico(proyecto_id, tipo_alerta, alertas, usuario_id):
+    """Valida el lote, crea o actualiza sus DetalleEnvio y arma los mensajes
+    (uno por alerta, o uno solo si el proyecto es "muchos en uno"). No envía.
 
+    Los DetalleEnvio se leen con una consulta y se guardan con un
+    bulk_create y un bulk_update (más su historial), no uno por alerta."""
     if not proyecto_id or not tipo_alerta or not alertas:
         return {"error": "Se requieren 'proyecto_id', 'tipo_alerta' y 'alertas'"}
 
@@ -856,15 +979,32 @@ def enviar_alertas_automatico(proyecto_id, tipo_alerta, alertas, usuario_id=2):
     User = get_user_model()
     usuario = User.objects.get(id=usuario_id)
 
-    headers = {
-        "Authorization": f"Bearer {access_key}",
-        "Content-Type": "application/json",
+    lote = {
+        "proyecto_id": proyecto_id,
+        "tipo_alerta": tipo_alerta,
+        "alertas": alertas,
+        "grupo_id": grupo_id,
+        "usuario": usuario,
+        "mensajes": [],
+        "enviados": [],
+        "no_enviados": [],
+        "programados": [],
+        "terminados": [],
     }
-
-    enviados = []
-    no_enviados = []
     pendientes_envio = []
 
+    # Los DetalleEnvio que ya existen, en una sola consulta
+    campo_alerta = "medio_id" if tipo_alerta == "medios" else "red_social_id"
+    existentes = {}
+    for detalle_envio in DetalleEnvio.objects.filter(
+        proyecto_id=proyecto_id,
+        **{f"{campo_alerta}__in": [alerta.get("id") for alerta in alertas if alerta.get("id")]},
+    ):
+        existentes.setdefault(str(getattr(detalle_envio, campo_alerta)), detalle_envio)
+    nuevos = []
+    actualizados = {}
+    ahora = timezone.now()
+
     for alerta in alertas:
         alerta_id = alerta.get("id")
         url = alerta.get("url")
@@ -876,7 +1016,7 @@ def enviar_alertas_automatico(proyecto_id, tipo_alerta, alertas, usuario_id=2):
         engagement = alerta.get("engagement", "")
 
         if not alerta_id:
-            no_enviados.append({"alerta_id": alerta_id, "error": "Falta ID de alerta"})
+            lote["no_enviados"].append({"alerta_id": alerta_id, "error": "Falta ID de alerta"})
             continue
 
         # Formatear mensaje
@@ -899,102 +1039,183 @@ def enviar_alertas_automatico(proyecto_id, tipo_alerta, alertas, usuario_id=2):
             keywords=keywords,
         )
 
-        # Crear o actualizar detalle de envío
-        filtros = {"proyecto_id": proyecto_id}
-        if tipo_alerta == "medios":
-            filtros["medio_id"] = alerta_id
-        else:
-            filtros["red_social_id"] = alerta_id
-
-        detalle_envio, _ = DetalleEnvio.objects.update_or_create(
-            **filtros,
-            defaults={
-                "inicio_envio": timezone.now(),
-                "mensaje": mensaje_formateado,
-                "usuario": usuario,
-                "proyecto_id": proyecto_id,
-            },
-        )
+        # Crear o actualizar detalle de envío (se guardan en bloque al final)
+        detalle_envio = existentes.get(str(alerta_id))
+        if detalle_envio is None:
+            detalle_envio = DetalleEnvio(proyecto_id=proyecto_id, **{campo_alerta: alerta_id})
+            existentes[str(alerta_id)] = detalle_envio
+            nuevos.append(detalle_envio)
+        elif not detalle_envio._state.adding:
+            actualizados[detalle_envio.pk] = detalle_envio
+        detalle_envio.inicio_envio = ahora
+        detalle_envio.mensaje = mensaje_formateado
+        detalle_envio.usuario = usuario
+        detalle_envio.modified_at = ahora
 
         if detalle_envio.estado_enviado:
-            no_enviados.append({"alerta_id": alerta_id, "error": "Ya fue enviada anteriormente"})
+            lote["no_enviados"].append({"alerta_id": alerta_id, "error": "Ya fue enviada anteriormente"})
             continue
 
+        item = {"alerta_id": alerta_id, "detalle_envio": detalle_envio}
         if formato_muchos_en_uno:
-            pendientes_envio.append(
-                {
-                    "alerta_id": alerta_id,
-                    "detalle_envio": detalle_envio,
-                    "mensaje": mensaje_formateado,
-                }
-            )
+            pendientes_envio.append({**item, "mensaje": mensaje_formateado})
             continue
 
-        payload = {"to": grupo_id, "body": mensaje_formateado, "no_link_preview": True}
-
-        # Reintentos
-        success = False
-        attempts = 0
-        while attempts < max_retries and not success:
-            try:
-                response = requests.post(url_mensaje, json=payload, headers=headers)
-                if response.status_code == 200:
-                    detalle_envio.fin_envio = timezone.now()
-                    detalle_envio.estado_enviado = True
-                    detalle_envio.save()
-                    enviados.append(alerta_id)
-                    success = True
-                else:
-                    attempts += 1
-                    if attempts < max_retries:
-                        time.sleep(retry_delay)
-                    else:
-                        detalle_envio.fin_envio = timezone.now()
-                        detalle_envio.estado_enviado = False
-                        detalle_envio.save()
-                        no_enviados.append({
-                            "alerta_id": alerta_id,
-                            "status_code": response.status_code,
-                            "detalle": response.json(),
-                        })
-            except requests.RequestException as e:
-                attempts += 1
-                if attempts < max_retries:
-                    time.sleep(retry_delay)
-                else:
-                    detalle_envio.fin_envio = timezone.now()
-                    detalle_envio.estado_enviado = False
-                    detalle_envio.save()
-                    no_enviados.append({"alerta_id": alerta_id, "error": f"Error de conexión: {str(e)}"})
-
-    if formato_muchos_en_uno:
-        _enviar_muchos_en_uno(
-            pendientes_envio,
-            headers=headers,
-            url_mensaje=url_mensaje,
-            max_retries=max_retries,
-            retry_delay=retry_delay,
-            grupo_id=grupo_id,
-            enviados=enviados,
-            no_enviados=no_enviados,
+        lote["mensajes"].append((mensaje_formateado, [item]))
+
+    if nuevos:
+        bulk_create_with_history(nuevos, DetalleEnvio, batch_size=500, default_user=usuario)
+    if actualizados:
+        bulk_update_with_history(
+            list(actualizados.values()),
+            DetalleEnvio,
+            ["inicio_envio", "mensaje", "usuario", "modified_at"],
+            batch_size=500,
+            default_user=usuario,
         )
 
-    payload_monitoreo = {"alertas": alertas}
+    if pendientes_envio:
+        cuerpo_mensaje = "\n\n".join(str(item.get("mensaje", "")) for item in pendientes_envio)
+        lote["mensajes"].append((cuerpo_mensaje, pendientes_envio))
 
-    monitoreo_result = enviar_alertas_a_monitoreo(
-        proyecto_id=proyecto_id,
-        tipo_alerta=tipo_alerta,
-        data_alertas=payload_monitoreo,
-        enviados_ids=enviados,
-        grupo_id=grupo_id,
+    return lote
+
+
+def _fallo_envio(resultado):
+    if resultado.status_code is None:
+        return {"error": resultado.detalle}
+    return {"status_code": resultado.status_code, "detalle": resultado.detalle}
+
+
+def enviar_lotes_automatico(lotes):
+    """Envío automático de uno o varios lotes (proyecto, tipo_alerta, alertas
+    y opcionalmente usuario_id), normalmente de proyectos y grupos distintos.
+
+    Prepara todos los mensajes, reserva el turno de cada uno en el limitador
+    y los que pueden salir ya se envían juntos por `enviar_concurrente`: en
+    paralelo entre grupos y en orden dentro de cada grupo. Los resultados de
+    todos los lotes se guardan apenas termina el envío. Los mensajes sin turno
+    o fallidos siguen como en `_enviar_o_programar`. Devuelve un resultado
+    por lote, en orden.
+
+    Un fallo al preparar un lote o en lo que sigue al envío (reintentos,
+    monitoreo) queda en el resultado de ese lote: no afecta a los demás ni
+    hace que se reintente la tarea, que volvería a enviar lo ya enviado.
+    """
+    preparados = []
+    for lote in lotes:
+        try:
+            preparado = _preparar_lote_automatico(
+                lote.get("proyecto_id"),
+                lote.get("tipo_alerta"),
+                lote.get("alertas"),
+                lote.get("usuario_id", 2),
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Fallo preparando el lote del proyecto %s", lote.get("proyecto_id"))
+            preparado = {"error": str(exc)}
+        preparados.append(preparado)
+
+    inmediatos = []
+    for lote in preparados:
+        if "error" in lote:
+            continue
+        contexto = {
+            "proyecto_id": lote["proyecto_id"],
+            "tipo_alerta": lote["tipo_alerta"],
+            "alertas": lote["alertas"],
+        }
+        for cuerpo, items in lote["mensajes"]:
+            espera = reservar_turno(lote["grupo_id"])
+            if espera > 0:
+                _programar_envio(
+                    lote["grupo_id"], cuerpo, items, countdown=espera, turno_reservado=True, **contexto
+                )
+                lote["programados"].extend(item["alerta_id"] for item in items)
+                continue
+            inmediatos.append((lote, contexto, cuerpo, items))
+
+    resultados = enviar_concurrente(
+        [MensajePreparado(lote["grupo_id"], cuerpo) for lote, _, cuerpo, _ in inmediatos]
     )
 
-    return {
-        "success": f"Se enviaron {len(enviados)} alertas",
-        "enviados": enviados,
-        "no_enviados": no_enviados,
-        "monitoreo": monitoreo_result,
-    }
+    timestamp = timezone.now()
+    reintentos = {}
+    for (lote, contexto, cuerpo, items), resultado in zip(inmediatos, resultados):
+        ids = [item["alerta_id"] for item in items]
+        if not resultado.exito and _intentos_envio() > 1:
+            reintentos.setdefault(id(lote), []).append((contexto, cuerpo, items))
+            lote["programados"].extend(ids)
+            continue
+
+        for item in items:
+            detalle_envio = item["detalle_envio"]
+            detalle_envio.fin_envio = timestamp
+            detalle_envio.estado_enviado = resultado.exito
+            detalle_envio.modified_at = timestamp
+            lote["terminados"].append(detalle_envio)
+        if resultado.exito:
+            lote["enviados"].extend(ids)
+        else:
+            fallo = _fallo_envio(resultado)
+            lote["no_enviados"].extend({"alerta_id": alerta_id, **fallo} for alerta_id in ids)
+
+    # Lo enviado queda guardado antes de cualquier otro paso
+    for lote in preparados:
+        if lote.get("terminados"):
+            bulk_update_with_history(
+                lote["terminados"],
+                DetalleEnvio,
+                ["fin_envio", "estado_enviado", "modified_at"],
+                batch_size=500,
+                default_user=lote["usuario"],
+            )
+
+    respuestas = []
+    for lote in preparados:
+        if "error" in lote:
+            respuestas.append(lote)
+            continue
+
+        respuesta = {
+            "success": f"Se enviaron {len(lote['enviados'])} alertas",
+            "enviados": lote["enviados"],
+            "no_enviados": lote["no_enviados"],
+            "programados": lote["programados"],
+        }
+        try:
+            for contexto, cuerpo, items in reintentos.get(id(lote), []):
+                _programar_envio(
+                    lote["grupo_id"], cuerpo, items, countdown=espera_reintento(2), intento=2, **contexto
+                )
+            respuesta["monitoreo"] = enviar_alertas_a_monitoreo(
+                proyecto_id=lote["proyecto_id"],
+                tipo_alerta=lote["tipo_alerta"],
+                data_alertas={"alertas": lote["alertas"]},
+                enviados_ids=lote["enviados"],
+                grupo_id=lote["grupo_id"],
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Fallo tras el envío del lote del proyecto %s", lote["proyecto_id"])
+            respuesta["error"] = str(exc)
+        respuestas.append(respuesta)
+    return respuestas
+
+
+def enviar_alertas_automatico(proyecto_id, tipo_alerta, alertas, usuario_id=2):
+    """
+    Envía alertas automáticamente simulando lo que hace EnviarMensajeAPIView.post
+    """
+    return enviar_lotes_automatico(
+        [
+            {
+                "proyecto_id": proyecto_id,
+                "tipo_alerta": tipo_alerta,
+                "alertas": alertas,
+                "usuario_id": usuario_id,
+            }
+        ]
+    )[0]
 
 
 def enviar_alertas_a_monitoreo(proyecto_id, tipo_alerta, data_alertas, enviados_ids=None, grupo_id=None):
@@ -1049,34 +1270,12 @@ def enviar_alertas_a_monitoreo(proyecto_id, tipo_alerta, data_alertas, enviados_
     if grupo_id:
         payload["grupo_id"] = grupo_id
 
-    headers = {"Content-Type": "application/json"}
-
-    print("=" * 80)
-    print("=== PAYLOAD ENVIADO A API DE MONITOREO ===")
-    print(f"URL: {url}")
-    print(f"Payload keys: {payload.keys()}")
-    print(f"Proveedor: {payload.get('proveedor')}")
-    print(f"Mensaje: {payload.get('mensaje')}")
-    print(f"Total alertas en listado: {len(payload.get('listado', []))}")
-    print(f"Proyecto: {payload.get('proyecto_nombre')}")
-    print("=" * 80)
-
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.Timeout:
-        logger.error("Timeout al enviar alertas al servicio de monitoreo", exc_info=True)
-        return {"error": "timeout"}
-    except requests.HTTPError as exc:
-        logger.error(
-            "Respuesta inesperada del servicio de monitoreo", exc_info=True
-        )
-        return {"error": "http_error", "status_code": exc.response.status_code, "detalle": exc.response.text}
-    except requests.RequestException:
-        logger.error("No fue posible contactar el servicio de monitoreo", exc_info=True)
-        return {"error": "conexion"}
-
-    try:
-        return response.json()
-    except ValueError:
-        return {"status": "ok", "status_code": response.status_code}
\ No newline at end of file
+    # La entrega (con reintentos y agrupada con otros envíos al mismo grupo)
+    # la hace el drenador del outbox tras el commit
+    mensaje = outbox.encolar(
+        MensajeSaliente.DESTINO_MONITOREO,
+        url,
+        payload,
+        headers={"Content-Type": "application/json"},
+    )
+    return {"status": "encolado", "outbox_id": str(mensaje.id)}
\ No newline at end of file
@@ -3,6 +3,8 @@ import os
 import requests
 from django.conf import settings
 
+from apps.base import clientes_http
+
 from .base import MensajeriaProvider, ResultadoEnvio
 
 
@@ -41,7 +43,7 @@ class OpenWAProvider(MensajeriaProvider):
             headers["X-Api-Key"] = self.api_key
         payload = {"chatId": grupo_id, "text": body, "session": self.session}
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = clientes_http.post(url, json=payload, headers=headers, timeout=30)
         except requests.RequestException as exc:
             return ResultadoEnvio(
                 exito=False,
@@ -2,6 +2,8 @@ import os
 
 import requests
 
+from apps.base import clientes_http
+
 from .base import MensajeriaProvider, ResultadoEnvio
 
 URL_MENSAJE = "https://gate.whapi.cloud/messages/text"
@@ -28,7 +30,7 @@ class WhapiProvider(MensajeriaProvider):
         }
         payload = {"to": grupo_id, "body": body, "no_link_preview": no_link_preview}
         try:
-            response = requests.post(URL_MENSAJE, json=payload, headers=headers)
+            response = clientes_http.post(URL_MENSAJE, json=payload, headers=headers)
         except requests.RequestException as exc:
             return ResultadoEnvio(
                 exito=False,
@@ -0,0 +1,102 @@
+"""Buzón de lotes del envío automático legacy.
+
+Cada ingesta, sondeo de conector o importación con envío automático deja
+aquí su lote (un proyecto, un grupo) tras el commit. El primer lote de una
+ventana programa `whatsapp.drenar_lotes` con
+`countdown=WHATSAPP_VENTANA_LOTES_SEGUNDOS`; al drenar, todos los lotes
+acumulados van juntos a `whatsapp.enviar_lotes_legacy`, donde los mensajes
+a grupos distintos salen en paralelo (`envio_concurrente`).
+
+El buzón es una lista en Redis cuando el cache es Redis; si no, vive en
+memoria del proceso. El beat drena cada 30s por si se perdió una
+programación. Con ventana 0 cada lote sale en su propia tarea.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.whatsapp.services.limitador import _cliente_redis
+
+logger = logging.getLogger(__name__)
+
+VENTANA_SEGUNDOS = 2
+
+CLAVE_LOTES = "envio_whatsapp:lotes"
+# Marca de "drenado ya programado"; vence sola si la tarea se pierde
+CLAVE_DRENADO = "envio_whatsapp:lotes:drenado"
+
+_lock_local = threading.Lock()
+_lotes_locales: List[Dict[str, Any]] = []
+_drenado_local = {"programado": False}
+
+
+def _ventana() -> float:
+    return float(getattr(settings, "WHATSAPP_VENTANA_LOTES_SEGUNDOS", VENTANA_SEGUNDOS))
+
+
+def _guardar(lote: Dict[str, Any], ventana: float) -> bool:
+    """Deja el lote en el buzón; True si hay que programar el drenado."""
+    cliente = _cliente_redis()
+    if cliente is None:
+        with _lock_local:
+            _lotes_locales.append(lote)
+            programar = not _drenado_local["programado"]
+            _drenado_local["programado"] = True
+        return programar
+
+    cliente.rpush(CLAVE_LOTES, json.dumps(lote, cls=DjangoJSONEncoder))
+    return bool(cliente.set(CLAVE_DRENADO, "1", nx=True, ex=max(int(ventana) * 10, 60)))
+
+
+def encolar_lote(proyecto_id, tipo_alerta, alertas, usuario_id=None) -> None:
+    """Agrega un lote al próximo envío conjunto. Se llama tras el commit."""
+    from apps.whatsapp.tasks import drenar_lotes, enviar_lotes_legacy
+
+    lote: Dict[str, Any] = {"proyecto_id": str(proyecto_id), "tipo_alerta": tipo_alerta, "alertas": alertas}
+    if usuario_id:
+        lote["usuario_id"] = usuario_id
+
+    ventana = _ventana()
+    if ventana <= 0:
+        enviar_lotes_legacy.delay([lote])
+        return
+    try:
+        programar = _guardar(lote, ventana)
+    except Exception:  # pylint: disable=broad-except
+        # Sin Redis el lote no espera a los demás: sale solo
+        logger.exception("Buzón de lotes sin Redis; el lote del proyecto %s sale solo", proyecto_id)
+        enviar_lotes_legacy.delay([lote])
+        return
+    if programar:
+        drenar_lotes.apply_async(countdown=ventana)
+
+
+def tomar_lotes() -> List[Dict[str, Any]]:
+    """Vacía el buzón y devuelve sus lotes en orden de llegada. El próximo
+    lote que llegue programa un drenado nuevo."""
+    cliente = _cliente_redis()
+    if cliente is None:
+        with _lock_local:
+            lotes = list(_lotes_locales)
+            _lotes_locales.clear()
+            _drenado_local["programado"] = False
+        return lotes
+
+    pipe = cliente.pipeline()
+    pipe.delete(CLAVE_DRENADO)
+    pipe.lrange(CLAVE_LOTES, 0, -1)
+    pipe.delete(CLAVE_LOTES)
+    _, crudos, _ = pipe.execute()
+    return [json.loads(crudo) for crudo in crudos]
+
+
+def reiniciar_local() -> None:
+    """Vacía el buzón en memoria (tests)."""
+    with _lock_local:
+        _lotes_locales.clear()
+        _drenado_local["programado"] = False
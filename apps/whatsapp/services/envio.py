@@ -117,11 +117,8 @@ def enviar_detalle(detalle_envio_id):
 
     resultado = enviar_texto(proyecto.codigo_acceso, mensaje)
 
-    if resultado.exito:
-        detalle.proveedor_envio = resultado.proveedor
-        detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_ENVIADA)
-    else:
-        detalle.proveedor_envio = resultado.proveedor
+    detalle.proveedor_envio = resultado.proveedor
+    if not resultado.exito:
         detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_ERROR_ENVIO)
         logger.error(
             "Envío fallido para %s vía %s: %s",
@@ -131,17 +128,23 @@ def enviar_detalle(detalle_envio_id):
         )
         return "error_envio"
 
-    # Paridad con el flujo legacy: reporte a monitoreo
+    # Paridad con el flujo legacy: reporte a monitoreo. El estado enviada y el
+    # mensaje del outbox se confirman juntos
     alerta_id = str(objeto.id)
-    try:
-        enviar_alertas_a_monitoreo(
-            proyecto_id=str(proyecto.id),
-            tipo_alerta=tipo_alerta,
-            data_alertas={"alertas": [{**alerta_data, "id": alerta_id, "mensaje": mensaje}]},
-            enviados_ids=[alerta_id],
-            grupo_id=proyecto.codigo_acceso,
-        )
-    except Exception:  # pylint: disable=broad-except
-        logger.exception("Fallo reportando a monitoreo el envío %s", detalle_envio_id)
+    with transaction.atomic():
+        detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_ENVIADA)
+        try:
+            with transaction.atomic():
+                enviar_alertas_a_monitoreo(
+                    proyecto_id=str(proyecto.id),
+                    tipo_alerta=tipo_alerta,
+                    data_alertas={
+                        "alertas": [{**alerta_data, "id": alerta_id, "mensaje": mensaje}]
+                    },
+                    enviados_ids=[alerta_id],
+                    grupo_id=proyecto.codigo_acceso,
+                )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Fallo reportando a monitoreo el envío %s", detalle_envio_id)
 
     return "enviada"
@@ -0,0 +1,117 @@
+"""Envío concurrente de mensajes WhatsApp ya preparados (asyncio + httpx).
+
+Recibe los mensajes de uno o varios lotes, con destino en muchos grupos, y
+los manda a WHAPI en paralelo:
+
+- Los mensajes de un mismo grupo salen en el orden recibido, uno tras otro
+  (el siguiente espera la respuesta del anterior).
+- Entre grupos no hay orden. Lo único que los frena es el tope global de
+  requests simultáneos (`WHATSAPP_ENVIO_CONCURRENCIA`).
+
+Un solo `httpx.AsyncClient` por llamada, con keep-alive y los timeouts de
+`clientes_http`. No reserva turnos en el limitador ni reintenta: eso lo
+decide quien llama, que recibe un `ResultadoEnvio` por mensaje en el mismo
+orden en que los pasó.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from django.conf import settings
+
+from apps.base.clientes_http import timeout_por_defecto
+from apps.whatsapp.providers.base import ResultadoEnvio
+from apps.whatsapp.providers.whapi import URL_MENSAJE, WhapiProvider
+
+CONCURRENCIA = 8
+
+
+@dataclass
+class MensajePreparado:
+    grupo_id: str
+    cuerpo: str
+    no_link_preview: bool = True
+
+
+def _concurrencia() -> int:
+    return max(int(getattr(settings, "WHATSAPP_ENVIO_CONCURRENCIA", CONCURRENCIA)), 1)
+
+
+async def _enviar_uno(cliente, url, headers, mensaje: MensajePreparado) -> ResultadoEnvio:
+    payload = {"to": mensaje.grupo_id, "body": mensaje.cuerpo, "no_link_preview": mensaje.no_link_preview}
+    try:
+        response = await cliente.post(url, json=payload, headers=headers)
+    except httpx.HTTPError as exc:
+        return ResultadoEnvio(
+            exito=False, proveedor=WhapiProvider.nombre, detalle=f"Error de conexión: {exc}"
+        )
+
+    try:
+        detalle = response.json()
+    except ValueError:
+        detalle = response.text
+
+    return ResultadoEnvio(
+        exito=response.status_code == 200,
+        proveedor=WhapiProvider.nombre,
+        status_code=response.status_code,
+        detalle=detalle,
+    )
+
+
+async def _enviar_grupo(cliente, cupo, url, headers, pendientes, resultados) -> None:
+    for indice, mensaje in pendientes:
+        async with cupo:
+            resultados[indice] = await _enviar_uno(cliente, url, headers, mensaje)
+
+
+async def _enviar_todos(mensajes, url, token, concurrencia) -> List[ResultadoEnvio]:
+    por_grupo: Dict[str, List[Any]] = {}
+    for indice, mensaje in enumerate(mensajes):
+        por_grupo.setdefault(mensaje.grupo_id, []).append((indice, mensaje))
+
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    conexion, lectura = timeout_por_defecto()
+    resultados: List[Optional[ResultadoEnvio]] = [None] * len(mensajes)
+    cupo = asyncio.Semaphore(concurrencia)
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(lectura, connect=conexion),
+        limits=httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia),
+    ) as cliente:
+        await asyncio.gather(
+            *(
+                _enviar_grupo(cliente, cupo, url, headers, pendientes, resultados)
+                for pendientes in por_grupo.values()
+            )
+        )
+    return resultados
+
+
+def enviar_concurrente(
+    mensajes: Sequence[MensajePreparado],
+    *,
+    url: Optional[str] = None,
+    token: Optional[str] = None,
+    concurrencia: Optional[int] = None,
+) -> List[ResultadoEnvio]:
+    """Envía los mensajes y devuelve un resultado por mensaje, en el mismo
+    orden. Se llama desde código síncrono (tareas de Celery, vistas)."""
+    if not mensajes:
+        return []
+    corrutina = _enviar_todos(
+        list(mensajes),
+        url or URL_MENSAJE,
+        os.getenv("WHAPI_TOKEN") if token is None else token,
+        concurrencia or _concurrencia(),
+    )
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrutina)
+    # Ya hay un event loop en este hilo: el envío corre en uno propio
+    with ThreadPoolExecutor(max_workers=1) as hilo:
+        return hilo.submit(asyncio.run, corrutina).result()
@@ -0,0 +1,160 @@
+"""Limitador de envíos WhatsApp por proveedor y grupo (token bucket, GCRA).
+
+Cada mensaje reserva un turno en dos baldes: el del grupo
+(`proveedor:codigo_acceso`) y el global del proveedor. `reservar_turno`
+devuelve los segundos que faltan para ese turno y el turno ya queda tomado.
+Quien envía no duerme: con espera 0 envía en el acto; si no, programa la
+tarea con `countdown` y la cola de Celery la libera a su hora.
+
+El estado vive en Redis (un script Lua reserva en los dos baldes de forma
+atómica) cuando el cache es Redis. Sin Redis cae a un balde en memoria del
+proceso, que solo limita dentro de ese worker.
+
+Tasas por defecto en `WHATSAPP_LIMITE_*`; `WHATSAPP_LIMITES_PROVEEDOR`
+las sobrescribe por proveedor (ej. {"openwa": {"por_minuto_grupo": 10}}).
+Una tasa en 0 desactiva ese balde.
+
+Con acks tardíos, Redis reentrega una tarea que lleva más de
+`visibility_timeout` sin confirmarse, y un `countdown` largo saldría dos
+veces. `acotar_espera` parte las esperas largas en saltos de como mucho
+`WHATSAPP_ESPERA_MAXIMA_SEGUNDOS` (menor que el `visibility_timeout`): la
+tarea lleva la hora de su turno (`turno_en`) y, si despierta antes, se
+reprograma sin volver a reservar.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+POR_MINUTO_GRUPO = 20
+RAFAGA_GRUPO = 5
+POR_MINUTO_PROVEEDOR = 120
+RAFAGA_PROVEEDOR = 20
+
+PREFIJO_CLAVE = "envio_whatsapp"
+ESPERA_MAXIMA_SEGUNDOS = 30 * 60
+
+# KEYS: baldes; ARGV: por balde intervalo y tolerancia (segundos).
+# Devuelve la espera hasta el turno reservado.
+_SCRIPT_RESERVA = """
+local reloj = redis.call('TIME')
+local ahora = tonumber(reloj[1]) + tonumber(reloj[2]) / 1000000
+local turno = ahora
+local tats = {}
+for i, clave in ipairs(KEYS) do
+    local tat = tonumber(redis.call('GET', clave) or ahora)
+    tats[i] = tat
+    turno = math.max(turno, tat - tonumber(ARGV[2 * i]))
+end
+for i, clave in ipairs(KEYS) do
+    local tat = math.max(tats[i], turno) + tonumber(ARGV[2 * i - 1])
+    redis.call('SET', clave, tostring(tat), 'PX', math.ceil((tat - ahora) * 1000) + 1000)
+end
+return tostring(turno - ahora)
+"""
+
+_lock_local = threading.Lock()
+_tats_locales: Dict[str, float] = {}
+
+
+def _limites(proveedor: str) -> Dict[str, float]:
+    limites = {
+        "por_minuto_grupo": getattr(settings, "WHATSAPP_LIMITE_POR_MINUTO_GRUPO", POR_MINUTO_GRUPO),
+        "rafaga_grupo": getattr(settings, "WHATSAPP_LIMITE_RAFAGA_GRUPO", RAFAGA_GRUPO),
+        "por_minuto_proveedor": getattr(
+            settings, "WHATSAPP_LIMITE_POR_MINUTO_PROVEEDOR", POR_MINUTO_PROVEEDOR
+        ),
+        "rafaga_proveedor": getattr(settings, "WHATSAPP_LIMITE_RAFAGA_PROVEEDOR", RAFAGA_PROVEEDOR),
+    }
+    limites.update((getattr(settings, "WHATSAPP_LIMITES_PROVEEDOR", None) or {}).get(proveedor, {}))
+    return limites
+
+
+def _baldes(proveedor: str, grupo_id: str) -> List[Tuple[str, float, float]]:
+    """(clave, intervalo, tolerancia) de cada balde activo. La tolerancia
+    GCRA es (ráfaga - 1) intervalos."""
+    limites = _limites(proveedor)
+    baldes = []
+    for clave, por_minuto, rafaga in (
+        (f"{PREFIJO_CLAVE}:{proveedor}:{grupo_id}", limites["por_minuto_grupo"], limites["rafaga_grupo"]),
+        (f"{PREFIJO_CLAVE}:{proveedor}", limites["por_minuto_proveedor"], limites["rafaga_proveedor"]),
+    ):
+        if por_minuto and float(por_minuto) > 0:
+            intervalo = 60.0 / float(por_minuto)
+            baldes.append((clave, intervalo, max(int(rafaga) - 1, 0) * intervalo))
+    return baldes
+
+
+def _cliente_redis():
+    """Cliente redis del cache por defecto; None si el cache no es Redis."""
+    backend = getattr(cache, "_cache", None)
+    if backend is None or not hasattr(backend, "get_client"):
+        return None
+    return backend.get_client(write=True)
+
+
+def _reservar_redis(cliente, baldes) -> float:
+    argumentos = []
+    for _, intervalo, tolerancia in baldes:
+        argumentos.extend((intervalo, tolerancia))
+    espera = cliente.eval(_SCRIPT_RESERVA, len(baldes), *[b[0] for b in baldes], *argumentos)
+    return float(espera)
+
+
+def _reservar_local(baldes, ahora: Optional[float] = None) -> float:
+    ahora = time.time() if ahora is None else ahora
+    with _lock_local:
+        turno = ahora
+        for clave, _, tolerancia in baldes:
+            turno = max(turno, _tats_locales.get(clave, ahora) - tolerancia)
+        for clave, intervalo, _ in baldes:
+            _tats_locales[clave] = max(_tats_locales.get(clave, ahora), turno) + intervalo
+    return turno - ahora
+
+
+def proveedor_primario() -> str:
+    proveedores = getattr(settings, "WHATSAPP_PROVIDERS", None) or ["whapi"]
+    return proveedores[0]
+
+
+def reservar_turno(grupo_id: str, proveedor: Optional[str] = None) -> float:
+    """Reserva el próximo turno de envío al grupo y devuelve cuántos segundos
+    faltan para él (0 = enviar ya)."""
+    if not getattr(settings, "WHATSAPP_LIMITADOR_ACTIVO", True) or not grupo_id:
+        return 0.0
+    baldes = _baldes(proveedor or proveedor_primario(), grupo_id)
+    if not baldes:
+        return 0.0
+
+    cliente = _cliente_redis()
+    if cliente is not None:
+        try:
+            return max(_reservar_redis(cliente, baldes), 0.0)
+        except Exception:  # pylint: disable=broad-except
+            # Sin Redis el envío no se frena: se limita solo en este proceso
+            logger.exception("Limitador de envíos sin Redis; se usa el balde local")
+    return max(_reservar_local(baldes), 0.0)
+
+
+def reiniciar_local():
+    """Vacía los baldes en memoria (tests)."""
+    with _lock_local:
+        _tats_locales.clear()
+
+
+def acotar_espera(kwargs: Dict[str, Any], espera: float) -> Tuple[Dict[str, Any], float]:
+    """(kwargs, countdown) para programar una tarea dentro de `espera`
+    segundos. Si la espera pasa del máximo, el countdown es el máximo y los
+    kwargs llevan `turno_en` (epoch del turno)."""
+    kwargs = {clave: valor for clave, valor in kwargs.items() if clave != "turno_en"}
+    maxima = float(getattr(settings, "WHATSAPP_ESPERA_MAXIMA_SEGUNDOS", ESPERA_MAXIMA_SEGUNDOS))
+    if espera <= maxima:
+        return kwargs, espera
+    kwargs["turno_en"] = time.time() + espera
+    return kwargs, maxima
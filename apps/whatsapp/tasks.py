@@ -1,4 +1,5 @@
 import logging
+import time
 
 from celery import shared_task
 
@@ -8,7 +9,9 @@ logger = logging.getLogger(__name__)
 @shared_task(name="whatsapp.enviar_lote_legacy", bind=True, max_retries=1)
 def enviar_lote_legacy(self, proyecto_id, tipo_alerta, alertas, usuario_id=None):
     """Envuelve el envío automático legacy para sacarlo del request HTTP de
-    ingesta (comportamiento idéntico, ahora asíncrono)."""
+    ingesta (comportamiento idéntico, ahora asíncrono). Los productores
+    usan el buzón de lotes (`drenar_lotes`); queda para las tareas ya
+    encoladas."""
     from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
 
     kwargs = {}
@@ -21,21 +24,106 @@ def enviar_lote_legacy(self, proyecto_id, tipo_alerta, alertas, usuario_id=None)
         raise self.retry(exc=exc, countdown=5)
 
 
+@shared_task(name="whatsapp.enviar_lotes_legacy")
+def enviar_lotes_legacy(lotes):
+    """Envío automático legacy de varios lotes (proyectos) en una sola
+    tarea: los mensajes a grupos distintos salen en paralelo.
+
+    Cada lote es un dict con proyecto_id, tipo_alerta, alertas y
+    opcionalmente usuario_id. No se reintenta la tarea: reenviaría los lotes
+    que ya salieron. Los fallos de cada lote quedan en su resultado y los
+    mensajes fallidos se reprograman uno a uno."""
+    from apps.whatsapp.api.enviar_mensaje import enviar_lotes_automatico
+
+    return enviar_lotes_automatico(lotes)
+
+
+@shared_task(name="whatsapp.drenar_lotes")
+def drenar_lotes():
+    """Junta los lotes del buzón en una sola tarea de envío (al cerrar la
+    ventana del primer lote y cada 30s vía beat)."""
+    from apps.whatsapp.services.buzon_lotes import tomar_lotes
+
+    lotes = tomar_lotes()
+    if lotes:
+        enviar_lotes_legacy.delay(lotes)
+    return len(lotes)
+
+
 @shared_task(name="whatsapp.enviar_alerta", bind=True, max_retries=3)
-def enviar_alerta(self, detalle_envio_id):
+def enviar_alerta(self, detalle_envio_id, turno_reservado=False, turno_en=None):
     """Envía una alerta auto-aprobada (o aprobada por humano) por la cadena de
-    proveedores WhatsApp, con dedup e idempotencia."""
+    proveedores WhatsApp, con dedup e idempotencia.
+
+    Antes reserva su turno en el limitador del grupo; si no es inmediato se
+    reprograma para esa hora en vez de esperar en el worker (en saltos
+    acotados, ver `limitador.acotar_espera`)."""
+    from apps.base.models import DetalleEnvio
     from apps.whatsapp.services.envio import enviar_detalle
+    from apps.whatsapp.services.limitador import acotar_espera, reservar_turno
+
+    espera = 0.0
+    if turno_en and turno_en > time.time():
+        espera = turno_en - time.time()
+    elif not turno_reservado:
+        grupo_id = (
+            DetalleEnvio.objects.filter(id=detalle_envio_id)
+            .values_list("proyecto__codigo_acceso", flat=True)
+            .first()
+        )
+        espera = reservar_turno(grupo_id)
+    if espera > 0:
+        kwargs, countdown = acotar_espera({"turno_reservado": True}, espera)
+        enviar_alerta.apply_async((detalle_envio_id,), kwargs, countdown=countdown)
+        return "programada"
 
     try:
         return enviar_detalle(detalle_envio_id)
     except Exception as exc:  # pylint: disable=broad-except
         if self.request.retries < self.max_retries:
-            raise self.retry(exc=exc, countdown=2 * (self.request.retries + 1))
+            # El reintento vuelve a pedir turno: es otro mensaje al proveedor
+            raise self.retry(
+                exc=exc,
+                countdown=2 * (self.request.retries + 1),
+                kwargs={"turno_reservado": False},
+            )
         logger.exception("Envío falló definitivamente para %s", detalle_envio_id)
-        from apps.base.models import DetalleEnvio
-
         detalle = DetalleEnvio.objects.filter(id=detalle_envio_id).first()
         if detalle:
             detalle.aplicar_estado_pipeline(DetalleEnvio.PIPELINE_ERROR_ENVIO)
         return "error"
+
+
+@shared_task(name="whatsapp.enviar_mensaje_programado")
+def enviar_mensaje_programado(
+    proyecto_id,
+    tipo_alerta,
+    grupo_id,
+    cuerpo,
+    detalle_ids,
+    alertas,
+    intento=1,
+    turno_reservado=False,
+    turno_en=None,
+):
+    """Un intento de un mensaje legacy fuera del request o del lote (turno
+    del limitador o reintento con backoff). Nunca espera en el worker: si no
+    es su turno se reprograma para esa hora."""
+    from apps.whatsapp.api.enviar_mensaje import enviar_mensaje_programado as enviar
+    from apps.whatsapp.services.limitador import acotar_espera, reservar_turno
+
+    espera = 0.0
+    if turno_en and turno_en > time.time():
+        espera = turno_en - time.time()
+    elif not turno_reservado:
+        espera = reservar_turno(grupo_id)
+    if espera > 0:
+        kwargs, countdown = acotar_espera({"intento": intento, "turno_reservado": True}, espera)
+        enviar_mensaje_programado.apply_async(
+            (proyecto_id, tipo_alerta, grupo_id, cuerpo, detalle_ids, alertas),
+            kwargs,
+            countdown=countdown,
+        )
+        return "programada"
+
+    return enviar(proyecto_id, tipo_alerta, grupo_id, cuerpo, detalle_ids, alertas, intento=intento)
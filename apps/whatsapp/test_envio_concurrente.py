@@ -0,0 +1,311 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.base.api.ingestion import IngestionAPIView
+from apps.base.models import Articulo, DetalleEnvio, TemplateConfig
+from apps.proyectos.models import Proyecto
+from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico, enviar_lotes_automatico
+from apps.whatsapp.providers.base import ResultadoEnvio
+from apps.whatsapp import tasks
+from apps.whatsapp.services import buzon_lotes, envio_concurrente
+from apps.whatsapp.services.envio_concurrente import MensajePreparado, enviar_concurrente
+
+
+class WhapiFalso:
+    """WHAPI local. Anota cada mensaje recibido y cuántos requests hubo en
+    curso a la vez. Los grupos en `fallan` responden 400."""
+
+    def __init__(self, demora=0.05, fallan=()):
+        self.recibidos = []
+        self.en_curso = 0
+        self.maximo_en_curso = 0
+        self.tokens = set()
+        lock = threading.Lock()
+        falso = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):  # noqa: N802
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    falso.en_curso += 1
+                    falso.maximo_en_curso = max(falso.maximo_en_curso, falso.en_curso)
+                    falso.tokens.add(self.headers.get("Authorization"))
+                time.sleep(demora)
+                with lock:
+                    falso.en_curso -= 1
+                    falso.recibidos.append((payload["to"], payload["body"]))
+                status = 400 if payload["to"] in fallan else 200
+                cuerpo = json.dumps({"sent": status == 200} if status == 200 else {"error": "grupo inválido"})
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(cuerpo.encode("utf-8"))))
+                self.end_headers()
+                self.wfile.write(cuerpo.encode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.servidor.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/messages/text"
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def cuerpos(self, grupo_id):
+        return [cuerpo for grupo, cuerpo in self.recibidos if grupo == grupo_id]
+
+
+class EnviarConcurrenteTests(SimpleTestCase):
+    def test_orden_por_grupo_y_tope_de_concurrencia(self):
+        mensajes = [
+            MensajePreparado(grupo, f"{grupo}-{numero}")
+            for numero in range(3)
+            for grupo in ("g1", "g2", "g3", "g4")
+        ]
+
+        with WhapiFalso(fallan={"g3"}) as whapi:
+            resultados = enviar_concurrente(mensajes, url=whapi.url, token="secreto", concurrencia=2)
+
+        for grupo in ("g1", "g2", "g3", "g4"):
+            self.assertEqual(whapi.cuerpos(grupo), [f"{grupo}-{numero}" for numero in range(3)])
+        self.assertEqual(whapi.maximo_en_curso, 2)
+        self.assertEqual(whapi.tokens, {"Bearer secreto"})
+        # Un resultado por mensaje, en el orden de entrada
+        self.assertEqual([r.exito for r in resultados], [m.grupo_id != "g3" for m in mensajes])
+        self.assertEqual(resultados[2].status_code, 400)
+        self.assertEqual(resultados[2].detalle, {"error": "grupo inválido"})
+
+    def test_grupos_distintos_salen_en_paralelo(self):
+        mensajes = [MensajePreparado(f"g{numero}", "hola") for numero in range(4)]
+
+        with WhapiFalso(demora=0.2) as whapi:
+            enviar_concurrente(mensajes, url=whapi.url, token="t", concurrencia=4)
+
+        # La demora mantiene las peticiones abiertas: las cuatro coinciden
+        self.assertEqual(whapi.maximo_en_curso, 4)
+
+    def test_error_de_conexion(self):
+        with WhapiFalso() as whapi:
+            url = whapi.url
+        resultado, = enviar_concurrente([MensajePreparado("g1", "hola")], url=url, token="t")
+
+        self.assertFalse(resultado.exito)
+        self.assertIsNone(resultado.status_code)
+        self.assertTrue(resultado.detalle.startswith("Error de conexión"))
+
+
+@override_settings(WHATSAPP_INTENTOS_ENVIO=1)
+class EnviarLotesAutomaticoTests(TestCase):
+    def setUp(self):
+        self.usuario = get_user_model().objects.create_user(username="lotes", password="x")
+        self.lotes = []
+        for grupo in ("g-ok", "g-falla"):
+            proyecto = Proyecto.objects.create(
+                nombre=f"Proyecto {grupo}", codigo_acceso=grupo, tipo_alerta="medios"
+            )
+            TemplateConfig.objects.create(
+                nombre="Plantilla",
+                app_label="base",
+                model_name="articulo",
+                proyecto=proyecto,
+                config_campos={"contenido": {"orden": 1}},
+            )
+            alertas = []
+            for numero in range(3):
+                articulo = Articulo.objects.create(
+                    proyecto=proyecto,
+                    titulo=f"Titulo {numero}",
+                    contenido=f"{grupo} {numero}",
+                    url=f"http://example.com/{grupo}/{numero}",
+                    fecha_publicacion=timezone.now(),
+                )
+                alertas.append({"id": str(articulo.id), "contenido": articulo.contenido, "url": articulo.url})
+            self.lotes.append(
+                {
+                    "proyecto_id": proyecto.id,
+                    "tipo_alerta": "medios",
+                    "alertas": alertas,
+                    "usuario_id": self.usuario.id,
+                }
+            )
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    def test_lotes_de_varios_grupos_se_envian_juntos_y_se_guardan_en_bloque(self, mock_monitoreo):
+        with WhapiFalso(fallan={"g-falla"}) as whapi, patch.object(
+            envio_concurrente, "URL_MENSAJE", whapi.url
+        ):
+            ok, falla = enviar_lotes_automatico(self.lotes)
+
+        self.assertEqual(whapi.maximo_en_curso, 2)
+        self.assertEqual(whapi.cuerpos("g-ok"), ["g-ok 0", "g-ok 1", "g-ok 2"])
+        self.assertEqual(ok["enviados"], [a["id"] for a in self.lotes[0]["alertas"]])
+        self.assertEqual(falla["enviados"], [])
+        self.assertEqual([f["status_code"] for f in falla["no_enviados"]], [400] * 3)
+
+        for lote, enviado in zip(self.lotes, (True, False)):
+            for alerta in lote["alertas"]:
+                detalle = DetalleEnvio.objects.get(medio_id=alerta["id"])
+                self.assertEqual(detalle.estado_enviado, enviado)
+                self.assertIsNotNone(detalle.fin_envio)
+                ultimo = detalle.history.latest()
+                self.assertEqual((ultimo.estado_enviado, ultimo.history_user), (enviado, self.usuario))
+        self.assertEqual(mock_monitoreo.call_count, 2)
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    def test_un_lote_invalido_no_frena_a_los_demas(self, _):
+        lotes = [{"proyecto_id": None, "tipo_alerta": "medios", "alertas": []}, self.lotes[0]]
+
+        with WhapiFalso() as whapi, patch.object(envio_concurrente, "URL_MENSAJE", whapi.url):
+            invalido, ok = enviar_lotes_automatico(lotes)
+
+        self.assertIn("error", invalido)
+        self.assertEqual(len(ok["enviados"]), 3)
+
+    @patch(
+        "apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo",
+        side_effect=[RuntimeError("monitoreo caído"), {}],
+    )
+    def test_un_fallo_tras_el_envio_no_reenvia_ni_deja_lotes_sin_guardar(self, mock_monitoreo):
+        with WhapiFalso() as whapi, patch.object(envio_concurrente, "URL_MENSAJE", whapi.url):
+            primero, segundo = tasks.enviar_lotes_legacy.delay(self.lotes).get()
+
+        self.assertEqual(primero["error"], "monitoreo caído")
+        self.assertEqual(len(primero["enviados"]), 3)
+        self.assertEqual(segundo["monitoreo"], {})
+        self.assertEqual(mock_monitoreo.call_count, 2)
+        # Sin reintento de la tarea: cada mensaje salió una sola vez
+        self.assertEqual(len(whapi.recibidos), 6)
+        self.assertEqual(DetalleEnvio.objects.filter(estado_enviado=True).count(), 6)
+
+    @override_settings(WHATSAPP_VENTANA_LOTES_SEGUNDOS=2)
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    def test_las_ingestas_de_la_ventana_salen_en_un_envio_conjunto(self, _):
+        buzon_lotes.reiniciar_local()
+        self.addCleanup(buzon_lotes.reiniciar_local)
+        view = IngestionAPIView()
+        view._usuario_sistema_cache = self.usuario
+
+        # Punto de entrada real: el envío automático de dos ingestas
+        with patch.object(tasks.drenar_lotes, "apply_async") as programar, self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            for lote in self.lotes:
+                proyecto = Proyecto.objects.get(id=lote["proyecto_id"])
+                proyecto.tipo_envio = "automatico"
+                view._procesar_envio_automatico(proyecto, {"listado": lote["alertas"]})
+
+        programar.assert_called_once_with(countdown=2.0)
+        with WhapiFalso(demora=0.2) as whapi, patch.object(envio_concurrente, "URL_MENSAJE", whapi.url):
+            self.assertEqual(tasks.drenar_lotes(), 2)
+
+        # Los dos grupos se envían a la vez, cada uno en su orden
+        self.assertEqual(whapi.maximo_en_curso, 2)
+        self.assertEqual(len(whapi.recibidos), 6)
+        self.assertEqual(whapi.cuerpos("g-ok"), ["g-ok 0", "g-ok 1", "g-ok 2"])
+        self.assertEqual(DetalleEnvio.objects.filter(estado_enviado=True).count(), 6)
+        self.assertEqual(buzon_lotes.tomar_lotes(), [])
+
+    @override_settings(WHATSAPP_VENTANA_LOTES_SEGUNDOS=0)
+    def test_sin_ventana_cada_lote_sale_solo(self):
+        with patch.object(tasks.enviar_lotes_legacy, "delay") as enviar:
+            buzon_lotes.encolar_lote("p1", "medios", [{"id": "a"}], usuario_id=7)
+
+        enviar.assert_called_once_with(
+            [{"proyecto_id": "p1", "tipo_alerta": "medios", "alertas": [{"id": "a"}], "usuario_id": 7}]
+        )
+
+    @override_settings(WHATSAPP_VENTANA_LOTES_SEGUNDOS=2)
+    def test_buzon_en_redis(self):
+        cliente = MagicMock()
+        cliente.set.side_effect = [True, None]
+        cliente.pipeline.return_value.execute.return_value = [1, [b'{"proyecto_id": "p1"}'], 1]
+
+        with patch.object(buzon_lotes, "_cliente_redis", return_value=cliente), patch.object(
+            tasks.drenar_lotes, "apply_async"
+        ) as programar:
+            buzon_lotes.encolar_lote("p1", "medios", [])
+            buzon_lotes.encolar_lote("p2", "medios", [])
+            lotes = buzon_lotes.tomar_lotes()
+
+        self.assertEqual(cliente.rpush.call_count, 2)
+        # Solo el primer lote de la ventana programa el drenado
+        programar.assert_called_once_with(countdown=2.0)
+        self.assertEqual(lotes, [{"proyecto_id": "p1"}])
+
+
+@patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+@patch(
+    "apps.whatsapp.api.enviar_mensaje.enviar_concurrente",
+    side_effect=lambda mensajes: [ResultadoEnvio(exito=True, proveedor="whapi", status_code=200)]
+    * len(mensajes),
+)
+class PersistenciaEnBloqueTests(TestCase):
+    def setUp(self):
+        self.usuario = get_user_model().objects.create_user(username="bloque", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto bloque", codigo_acceso="g-bloque", tipo_alerta="medios"
+        )
+
+    def _alertas(self, cantidad, desde=0):
+        alertas = []
+        for numero in range(desde, desde + cantidad):
+            articulo = Articulo.objects.create(
+                proyecto=self.proyecto,
+                titulo=f"Titulo {numero}",
+                contenido="Contenido",
+                url=f"http://example.com/bloque/{numero}",
+                fecha_publicacion=timezone.now(),
+            )
+            alertas.append({"id": str(articulo.id), "contenido": "Contenido", "url": articulo.url})
+        return alertas
+
+    def _consultas(self, alertas):
+        with CaptureQueriesContext(connection) as consultas:
+            enviar_alertas_automatico(self.proyecto.id, "medios", alertas, usuario_id=self.usuario.id)
+        return len(consultas)
+
+    def test_las_consultas_no_crecen_con_el_lote(self, *_):
+        self.assertEqual(self._consultas(self._alertas(2)), self._consultas(self._alertas(20, desde=2)))
+
+    def test_reusa_los_detalles_existentes_y_deja_historial(self, *_):
+        enviada, pendiente, nueva = self._alertas(3)
+        DetalleEnvio.objects.create(proyecto=self.proyecto, medio_id=enviada["id"], estado_enviado=True)
+        DetalleEnvio.objects.create(proyecto=self.proyecto, medio_id=pendiente["id"], mensaje="viejo")
+
+        resultado = enviar_alertas_automatico(
+            self.proyecto.id, "medios", [enviada, pendiente, nueva], usuario_id=self.usuario.id
+        )
+
+        self.assertEqual(resultado["enviados"], [pendiente["id"], nueva["id"]])
+        self.assertEqual(
+            resultado["no_enviados"], [{"alerta_id": enviada["id"], "error": "Ya fue enviada anteriormente"}]
+        )
+        self.assertEqual(DetalleEnvio.objects.filter(proyecto=self.proyecto).count(), 3)
+        for alerta in (pendiente, nueva):
+            detalle = DetalleEnvio.objects.get(medio_id=alerta["id"])
+            self.assertTrue(detalle.estado_enviado)
+            self.assertIsNotNone(detalle.inicio_envio)
+            self.assertEqual(detalle.usuario, self.usuario)
+            self.assertNotEqual(detalle.mensaje, "viejo")
+        # Alta (o creación previa), datos del envío y resultado
+        historial = DetalleEnvio.history.filter(medio_id=nueva["id"]).order_by("history_date")
+        self.assertEqual([h.history_type for h in historial], ["+", "~"])
+        self.assertEqual(DetalleEnvio.history.filter(medio_id=pendiente["id"]).count(), 3)
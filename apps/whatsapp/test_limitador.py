@@ -0,0 +1,255 @@
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.base.models import Articulo, DetalleEnvio
+from apps.proyectos.models import Proyecto
+from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
+from apps.whatsapp.providers.base import ResultadoEnvio
+from apps.whatsapp.services import limitador
+from apps.whatsapp.services.limitador import reservar_turno
+
+
+EXITO = ResultadoEnvio(exito=True, proveedor="whapi", status_code=200)
+
+LIMITES_PRUEBA = {
+    "WHATSAPP_LIMITADOR_ACTIVO": True,
+    "WHATSAPP_PROVIDERS": ["whapi"],
+    "WHATSAPP_LIMITE_POR_MINUTO_GRUPO": 60,
+    "WHATSAPP_LIMITE_RAFAGA_GRUPO": 2,
+    "WHATSAPP_LIMITE_POR_MINUTO_PROVEEDOR": 120,
+    "WHATSAPP_LIMITE_RAFAGA_PROVEEDOR": 3,
+    "WHATSAPP_LIMITES_PROVEEDOR": {},
+}
+
+
+@override_settings(**LIMITES_PRUEBA)
+class LimitadorTests(SimpleTestCase):
+    def setUp(self):
+        limitador.reiniciar_local()
+        self.addCleanup(limitador.reiniciar_local)
+
+    def test_balde_local_rafaga_y_luego_a_la_tasa(self):
+        baldes = limitador._baldes("whapi", "g1")
+
+        esperas = [limitador._reservar_local(baldes, ahora=100.0) for _ in range(4)]
+
+        # Ráfaga de 2 del grupo; después un mensaje por segundo
+        self.assertEqual(esperas, [0.0, 0.0, 1.0, 2.0])
+        self.assertEqual(limitador._reservar_local(baldes, ahora=110.0), 0.0)
+
+    def test_el_balde_del_proveedor_es_compartido_entre_grupos(self):
+        esperas = [
+            limitador._reservar_local(limitador._baldes("whapi", grupo), ahora=100.0)
+            for grupo in ("g1", "g2", "g3", "g4")
+        ]
+
+        # Cada grupo tiene turno libre, pero el proveedor admite ráfaga de 3
+        self.assertEqual(esperas, [0.0, 0.0, 0.0, 0.5])
+        self.assertEqual(
+            limitador._reservar_local(limitador._baldes("openwa", "g1"), ahora=100.0), 0.0
+        )
+
+    def test_tasas_por_proveedor_y_baldes_apagados(self):
+        with self.settings(
+            WHATSAPP_LIMITES_PROVEEDOR={"openwa": {"por_minuto_grupo": 6, "por_minuto_proveedor": 0}}
+        ):
+            self.assertEqual(limitador._baldes("openwa", "g1"), [("envio_whatsapp:openwa:g1", 10.0, 10.0)])
+            self.assertEqual(len(limitador._baldes("whapi", "g1")), 2)
+
+    def test_reservar_turno(self):
+        self.assertEqual(reservar_turno("g1"), 0.0)
+        self.assertEqual(reservar_turno("g1"), 0.0)
+        self.assertEqual(reservar_turno("g2"), 0.0)
+        self.assertGreater(reservar_turno("g1"), 0.5)
+        self.assertEqual(reservar_turno(None), 0.0)
+
+        with self.settings(WHATSAPP_LIMITADOR_ACTIVO=False):
+            self.assertEqual(reservar_turno("g1"), 0.0)
+
+    def test_usa_redis_y_cae_al_balde_local_si_falla(self):
+        cliente = MagicMock()
+        cliente.eval.return_value = b"1.5"
+        with patch.object(limitador, "_cliente_redis", return_value=cliente):
+            self.assertEqual(reservar_turno("g1", proveedor="openwa"), 1.5)
+
+        claves = cliente.eval.call_args.args[2:4]
+        self.assertEqual(claves, ("envio_whatsapp:openwa:g1", "envio_whatsapp:openwa"))
+        self.assertEqual(cliente.eval.call_args.args[4:], (1.0, 1.0, 0.5, 1.0))
+
+        cliente.eval.side_effect = ConnectionError("sin redis")
+        with patch.object(limitador, "_cliente_redis", return_value=cliente), self.assertLogs(
+            limitador.logger, "ERROR"
+        ):
+            self.assertEqual(reservar_turno("g1"), 0.0)
+
+
+@override_settings(**LIMITES_PRUEBA)
+class EnviosProgramadosTests(TestCase):
+    def setUp(self):
+        limitador.reiniciar_local()
+        self.addCleanup(limitador.reiniciar_local)
+        self.usuario = get_user_model().objects.create_user(username="limitador", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto limitado", codigo_acceso="120363@g.us", tipo_alerta="medios"
+        )
+        self.alertas = []
+        for numero in range(3):
+            articulo = Articulo.objects.create(
+                proyecto=self.proyecto,
+                titulo=f"Titulo {numero}",
+                contenido="Contenido",
+                url=f"http://example.com/{numero}",
+                fecha_publicacion=timezone.now(),
+            )
+            self.alertas.append({"id": str(articulo.id), "contenido": "Contenido", "url": articulo.url})
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_concurrente")
+    def test_lo_que_excede_la_rafaga_se_programa_sin_esperar(self, mock_enviar, _):
+        mock_enviar.side_effect = lambda mensajes: [EXITO] * len(mensajes)
+
+        with patch(
+            "apps.whatsapp.tasks.enviar_mensaje_programado.apply_async"
+        ) as programar, self.captureOnCommitCallbacks(execute=True):
+            resultado = enviar_alertas_automatico(
+                self.proyecto.id, "medios", self.alertas, usuario_id=self.usuario.id
+            )
+
+        self.assertEqual(resultado["enviados"], [a["id"] for a in self.alertas[:2]])
+        self.assertEqual(resultado["programados"], [self.alertas[2]["id"]])
+        self.assertEqual(len(mock_enviar.call_args.args[0]), 2)
+        programar.assert_called_once()
+        self.assertAlmostEqual(programar.call_args.kwargs["countdown"], 1.0, delta=0.1)
+        kwargs = programar.call_args.kwargs["kwargs"]
+        self.assertEqual(kwargs["alertas"], [self.alertas[2]])
+        self.assertEqual(kwargs["grupo_id"], "120363@g.us")
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_texto")
+    @patch("apps.whatsapp.api.enviar_mensaje.reservar_turno", return_value=30.0)
+    def test_el_mensaje_programado_deja_el_resultado_en_detalle_envio(
+        self, _, mock_enviar, mock_monitoreo
+    ):
+        mock_enviar.return_value = EXITO
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = enviar_alertas_automatico(
+                self.proyecto.id, "medios", self.alertas[:1], usuario_id=self.usuario.id
+            )
+
+        self.assertEqual(resultado["enviados"], [])
+        self.assertEqual(resultado["programados"], [self.alertas[0]["id"]])
+        # En modo eager la tarea corre en el acto
+        detalle = DetalleEnvio.objects.get(medio_id=self.alertas[0]["id"])
+        self.assertTrue(detalle.estado_enviado)
+        self.assertIsNotNone(detalle.fin_envio)
+        mock_enviar.assert_called_once_with("120363@g.us", detalle.mensaje)
+        self.assertEqual(mock_monitoreo.call_args.kwargs["enviados_ids"], [self.alertas[0]["id"]])
+
+    def test_la_alerta_del_pipeline_se_reprograma_para_su_turno(self):
+        detalle = DetalleEnvio.objects.create(
+            proyecto=self.proyecto, medio_id=self.alertas[0]["id"], estado_enviado=False
+        )
+        from apps.whatsapp.tasks import enviar_alerta
+
+        with patch(
+            "apps.whatsapp.services.limitador.reservar_turno", return_value=4.0
+        ) as reservar, patch.object(enviar_alerta, "apply_async") as programar, patch(
+            "apps.whatsapp.services.envio.enviar_detalle"
+        ) as enviar:
+            self.assertEqual(enviar_alerta(str(detalle.id)), "programada")
+
+        reservar.assert_called_once_with("120363@g.us")
+        programar.assert_called_once_with(
+            (str(detalle.id),), {"turno_reservado": True}, countdown=4.0
+        )
+        enviar.assert_not_called()
+
+    @override_settings(WHATSAPP_ESPERA_MAXIMA_SEGUNDOS=60)
+    def test_una_espera_larga_se_parte_en_saltos_sin_volver_a_reservar(self):
+        detalle = DetalleEnvio.objects.create(
+            proyecto=self.proyecto, medio_id=self.alertas[0]["id"], estado_enviado=False
+        )
+        from apps.whatsapp.tasks import enviar_alerta
+
+        with patch(
+            "apps.whatsapp.services.limitador.reservar_turno", return_value=500.0
+        ) as reservar, patch.object(enviar_alerta, "apply_async") as programar, patch(
+            "apps.whatsapp.services.envio.enviar_detalle"
+        ) as enviar:
+            inicio = time.time()
+            enviar_alerta(str(detalle.id))
+            _, kwargs = programar.call_args.args
+            # Nunca un countdown mayor que el máximo (bajo el visibility_timeout)
+            self.assertEqual(programar.call_args.kwargs["countdown"], 60)
+            self.assertTrue(kwargs["turno_reservado"])
+            self.assertAlmostEqual(kwargs["turno_en"], inicio + 500, delta=5)
+
+            # Despierta antes de su turno: otro salto, sin reservar de nuevo
+            enviar_alerta(str(detalle.id), **{**kwargs, "turno_en": time.time() + 30})
+            self.assertEqual(programar.call_args.args[1], {"turno_reservado": True})
+            self.assertAlmostEqual(programar.call_args.kwargs["countdown"], 30, delta=1)
+
+            enviar_alerta(str(detalle.id), turno_reservado=True, turno_en=time.time() - 1)
+
+        reservar.assert_called_once()
+        self.assertEqual(programar.call_count, 2)
+        enviar.assert_called_once_with(str(detalle.id))
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    def test_mensaje_programado_reentregado_sale_una_vez(self, _):
+        from apps.whatsapp.tasks import enviar_mensaje_programado
+
+        detalle = DetalleEnvio.objects.create(
+            proyecto=self.proyecto, medio_id=self.alertas[0]["id"], estado_enviado=False
+        )
+        argumentos = ("p", "medios", "120363@g.us", "cuerpo", [str(detalle.id)], self.alertas[:1])
+        reentregas = []
+
+        def enviar(grupo_id, cuerpo):
+            # El broker reentrega la tarea mientras el primer envío está en curso
+            if not reentregas:
+                reentregas.append(enviar_mensaje_programado(*argumentos, turno_reservado=True))
+            return EXITO
+
+        with patch("apps.whatsapp.api.enviar_mensaje.enviar_texto", side_effect=enviar) as mock_enviar:
+            resultado = enviar_mensaje_programado(*argumentos, turno_reservado=True)
+
+        mock_enviar.assert_called_once()
+        self.assertTrue(resultado["exito"])
+        self.assertEqual(reentregas[0]["enviados"], [])
+        detalle.refresh_from_db()
+        self.assertTrue(detalle.estado_enviado)
+        self.assertIsNone(detalle.envio_tomado_en)
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    def test_mensaje_programado_retoma_la_toma_vencida(self, _):
+        from apps.whatsapp.tasks import enviar_mensaje_programado
+
+        # Un worker murió a mitad del envío hace más de WHATSAPP_ENVIO_TOMADO_SEGUNDOS
+        detalle = DetalleEnvio.objects.create(
+            proyecto=self.proyecto,
+            medio_id=self.alertas[0]["id"],
+            estado_enviado=False,
+            envio_tomado_en=timezone.now() - timedelta(minutes=11),
+        )
+        argumentos = ("p", "medios", "120363@g.us", "cuerpo", [str(detalle.id)], self.alertas[:1])
+        en_curso = []
+
+        def enviar(grupo_id, cuerpo):
+            en_curso.append(DetalleEnvio.objects.get(id=detalle.id).estado_enviado)
+            return EXITO
+
+        with patch("apps.whatsapp.api.enviar_mensaje.enviar_texto", side_effect=enviar):
+            resultado = enviar_mensaje_programado(*argumentos, turno_reservado=True)
+
+        self.assertTrue(resultado["exito"])
+        # Mientras sale el mensaje la alerta todavía no figura como enviada
+        self.assertEqual(en_curso, [False])
+        detalle.refresh_from_db()
+        self.assertTrue(detalle.estado_enviado)
@@ -18,7 +18,7 @@ class WhapiProviderTests(TestCase):
     """El provider debe generar exactamente el mismo request que el código
     legacy de enviar_mensaje.py (payload y headers byte-idénticos)."""
 
-    @patch("apps.whatsapp.providers.whapi.requests.post")
+    @patch("apps.whatsapp.providers.whapi.clientes_http.post")
     def test_payload_y_headers_identicos_a_legacy(self, mock_post):
         mock_post.return_value = _respuesta(200)
         provider = WhapiProvider(token="token-prueba")
@@ -37,7 +37,7 @@ class WhapiProviderTests(TestCase):
         self.assertEqual(resultado.proveedor, "whapi")
         self.assertEqual(resultado.status_code, 200)
 
-    @patch("apps.whatsapp.providers.whapi.requests.post")
+    @patch("apps.whatsapp.providers.whapi.clientes_http.post")
     def test_status_no_200_es_fallo(self, mock_post):
         mock_post.return_value = _respuesta(500, {"error": "boom"})
         resultado = WhapiProvider(token="t").send_text("g", "m")
@@ -45,7 +45,7 @@ class WhapiProviderTests(TestCase):
         self.assertEqual(resultado.status_code, 500)
         self.assertEqual(resultado.detalle, {"error": "boom"})
 
-    @patch("apps.whatsapp.providers.whapi.requests.post")
+    @patch("apps.whatsapp.providers.whapi.clientes_http.post")
     def test_error_de_conexion_es_fallo(self, mock_post):
         import requests as requests_lib
 
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.base.models import Articulo, DetalleEnvio
+from apps.proyectos.models import Proyecto
+from apps.whatsapp.api import enviar_mensaje
+from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico, espera_reintento
+from apps.whatsapp.providers.base import ResultadoEnvio
+
+
+EXITO = ResultadoEnvio(exito=True, proveedor="whapi", status_code=200)
+FALLO = ResultadoEnvio(exito=False, proveedor="whapi", status_code=503, detalle="caído")
+SIN_RED = ResultadoEnvio(exito=False, proveedor="whapi", detalle="Error de conexión: sin red")
+
+
+def _todos(resultado):
+    return lambda mensajes: [resultado] * len(mensajes)
+
+
+@override_settings(WHATSAPP_REINTENTO_BASE_SEGUNDOS=2, WHATSAPP_REINTENTO_MAXIMO_SEGUNDOS=10)
+class EsperaReintentoTests(SimpleTestCase):
+    def test_backoff_exponencial_con_tope(self):
+        with patch.object(enviar_mensaje.random, "uniform", side_effect=lambda a, b: b):
+            self.assertEqual([espera_reintento(n) for n in range(2, 6)], [2, 4, 8, 10])
+
+        with patch.object(enviar_mensaje.random, "uniform", side_effect=lambda a, b: a):
+            self.assertEqual(espera_reintento(4), 4)
+
+
+class ReintentosLegacyTests(TestCase):
+    def setUp(self):
+        self.usuario = get_user_model().objects.create_user(username="reintentos", password="x")
+        self.proyecto = Proyecto.objects.create(
+            nombre="Proyecto reintentos", codigo_acceso="120363@g.us", tipo_alerta="medios"
+        )
+        self.alertas = []
+        for numero in range(2):
+            articulo = Articulo.objects.create(
+                proyecto=self.proyecto,
+                titulo=f"Titulo {numero}",
+                contenido="Contenido",
+                url=f"http://example.com/{numero}",
+                fecha_publicacion=timezone.now(),
+            )
+            self.alertas.append({"id": str(articulo.id), "contenido": "Contenido", "url": articulo.url})
+
+    def _enviar(self, alertas):
+        with self.captureOnCommitCallbacks(execute=True):
+            return enviar_alertas_automatico(
+                self.proyecto.id, "medios", alertas, usuario_id=self.usuario.id
+            )
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_concurrente", side_effect=_todos(FALLO))
+    def test_el_fallo_se_reintenta_en_una_tarea_programada(self, _):
+        with patch("apps.whatsapp.tasks.enviar_mensaje_programado.apply_async") as programar, patch.object(
+            enviar_mensaje, "espera_reintento", return_value=2.5
+        ) as espera:
+            resultado = self._enviar(self.alertas[:1])
+
+        self.assertEqual(resultado["enviados"], [])
+        self.assertEqual(resultado["no_enviados"], [])
+        self.assertEqual(resultado["programados"], [self.alertas[0]["id"]])
+        espera.assert_called_once_with(2)
+        self.assertEqual(programar.call_args.kwargs["countdown"], 2.5)
+        self.assertEqual(programar.call_args.kwargs["kwargs"]["intento"], 2)
+        # Todavía no hay resultado final
+        detalle = DetalleEnvio.objects.get(medio_id=self.alertas[0]["id"])
+        self.assertFalse(detalle.estado_enviado)
+        self.assertIsNone(detalle.fin_envio)
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_texto", side_effect=[FALLO, EXITO])
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_concurrente", side_effect=_todos(SIN_RED))
+    def test_el_reintento_que_sale_queda_en_detalle_envio(self, _, mock_enviar, mock_monitoreo):
+        # En modo eager cada reintento corre en el acto
+        self._enviar(self.alertas[:1])
+
+        self.assertEqual(mock_enviar.call_count, 2)
+        detalle = DetalleEnvio.objects.get(medio_id=self.alertas[0]["id"])
+        self.assertTrue(detalle.estado_enviado)
+        self.assertIsNotNone(detalle.fin_envio)
+        self.assertEqual(mock_monitoreo.call_args.kwargs["enviados_ids"], [self.alertas[0]["id"]])
+
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={})
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_texto", return_value=FALLO)
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_concurrente", side_effect=_todos(FALLO))
+    def test_agotados_los_intentos_el_muchos_en_uno_queda_fallido(self, _, mock_enviar, mock_monitoreo):
+        Proyecto.objects.filter(id=self.proyecto.id).update(formato_mensaje="muchos en uno")
+
+        with self.assertLogs(enviar_mensaje.logger, "ERROR"):
+            resultado = self._enviar(self.alertas)
+
+        self.assertEqual(resultado["programados"], [a["id"] for a in self.alertas])
+        # Primer intento en el acto y dos reintentos del mensaje combinado
+        self.assertEqual(mock_enviar.call_count, 2)
+        detalles = DetalleEnvio.objects.filter(proyecto=self.proyecto)
+        self.assertEqual(detalles.count(), 2)
+        for detalle in detalles:
+            self.assertFalse(detalle.estado_enviado)
+            self.assertIsNotNone(detalle.fin_envio)
+        # Solo el reporte del lote, sin alertas enviadas
+        mock_monitoreo.assert_called_once()
+        self.assertEqual(mock_monitoreo.call_args.kwargs["enviados_ids"], [])
+
+    @override_settings(WHATSAPP_INTENTOS_ENVIO=1)
+    @patch("apps.whatsapp.api.enviar_mensaje.enviar_concurrente")
+    def test_sin_reintentos_el_fallo_es_inmediato(self, mock_enviar):
+        mock_enviar.side_effect = _todos(
+            ResultadoEnvio(
+                exito=False, proveedor="whapi", status_code=400, detalle={"error": "grupo inválido"}
+            )
+        )
+
+        resultado = self._enviar(self.alertas[:1])
+
+        self.assertEqual(
+            resultado["no_enviados"],
+            [{"alerta_id": self.alertas[0]["id"], "status_code": 400, "detalle": {"error": "grupo inválido"}}],
+        )
+        self.assertEqual(resultado["programados"], [])
+        self.assertIsNotNone(DetalleEnvio.objects.get(medio_id=self.alertas[0]["id"]).fin_envio)
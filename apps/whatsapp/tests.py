@@ -1,10 +1,11 @@
 import uuid
 from types import SimpleNamespace
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 from django.test import SimpleTestCase
 
-from apps.whatsapp.api.enviar_mensaje import enviar_alertas_automatico
+from apps.whatsapp.api.enviar_mensaje import _resaltar_keywords, enviar_alertas_automatico
+from apps.whatsapp.providers.base import ResultadoEnvio
 from apps.whatsapp.utils import ordenar_alertas_por_fecha
 
 
@@ -25,10 +26,6 @@ class EnviarAlertasAutomaticoFechaTests(SimpleTestCase):
             }
         ]
 
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {}
-
         plantilla = SimpleNamespace(
             config_campos={"fecha_publicacion": {"orden": 1, "label": "Fecha"}},
             nombre="Plantilla",
@@ -45,7 +42,11 @@ class EnviarAlertasAutomaticoFechaTests(SimpleTestCase):
 
         plantilla_queryset = DummyQueryset([plantilla])
 
-        with patch("apps.whatsapp.api.enviar_mensaje.requests.post", return_value=mock_response), patch(
+        with patch(
+            "apps.whatsapp.api.enviar_mensaje.enviar_concurrente",
+            side_effect=lambda mensajes: [ResultadoEnvio(exito=True, proveedor="whapi", status_code=200)]
+            * len(mensajes),
+        ), patch(
             "apps.whatsapp.api.enviar_mensaje.formatear_mensaje"
         ) as mock_formatear_mensaje, patch(
             "apps.whatsapp.api.enviar_mensaje.enviar_alertas_a_monitoreo", return_value={}
@@ -94,3 +95,31 @@ class OrdenarAlertasPorFechaTests(SimpleTestCase):
         ordenadas = ordenar_alertas_por_fecha(alertas)
 
         self.assertEqual([alerta["id"] for alerta in ordenadas], ["primera", "segunda"])
+
+
+class ResaltarKeywordsTests(SimpleTestCase):
+    def test_resalta_palabras_completas_sin_distinguir_mayusculas(self):
+        texto = "Ecopetrol y ECOPETROL, pero no Ecopetrolera"
+
+        self.assertEqual(
+            _resaltar_keywords(texto, ["ecopetrol"]),
+            "*Ecopetrol* y *ECOPETROL*, pero no Ecopetrolera",
+        )
+
+    def test_keyword_con_signo_resalta_ambas_versiones_una_sola_vez(self):
+        texto = "Hoy @loreal publicó y loreal respondió a #Belleza y belleza"
+
+        self.assertEqual(
+            _resaltar_keywords(texto, ["@loreal", "#belleza"]),
+            "Hoy *@loreal* publicó y *loreal* respondió a *#Belleza* y *belleza*",
+        )
+
+    def test_keywords_solapadas_prefieren_la_mas_larga(self):
+        self.assertEqual(
+            _resaltar_keywords("Gran Tierra Energy es una gran empresa", ["gran", "Gran Tierra"]),
+            "*Gran Tierra* Energy es una *gran* empresa",
+        )
+
+    def test_ignora_keywords_vacias(self):
+        self.assertEqual(_resaltar_keywords("texto", ["", "  ", "#"]), "texto")
+
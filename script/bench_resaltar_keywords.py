@@ -0,0 +1,92 @@
+"""Micro-benchmark del resaltado de keywords de los mensajes de WhatsApp.
+
+Compara `_resaltar_keywords` (una pasada con el patrón compilado y cacheado
+por set de keywords) contra la versión anterior (uno o dos `re.sub` por
+keyword y mensaje). Uso:
+    python script/bench_resaltar_keywords.py [--keywords 50] [--mensajes 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SistemaAlertas.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.whatsapp.api.enviar_mensaje import _resaltar_keywords  # noqa: E402
+
+
+def resaltar_keywords_anterior(texto: str, keywords: list) -> str:
+    """Implementación previa, conservada solo como referencia."""
+    if not texto or not keywords:
+        return texto
+
+    resultado = texto
+    for keyword in keywords:
+        if not keyword:
+            continue
+        keyword = keyword.strip()
+        if keyword.startswith('@') or keyword.startswith('#'):
+            pattern_con_signo = r'(?<!\S)(' + re.escape(keyword) + r')(?!\S)'
+            resultado = re.sub(pattern_con_signo, r'*\1*', resultado, flags=re.IGNORECASE)
+            pattern_sin_signo = r'\b(' + re.escape(keyword[1:]) + r')\b'
+            resultado = re.sub(pattern_sin_signo, r'*\1*', resultado, flags=re.IGNORECASE)
+        else:
+            pattern = r'\b(' + re.escape(keyword) + r')\b'
+            resultado = re.sub(pattern, r'*\1*', resultado, flags=re.IGNORECASE)
+    return resultado
+
+
+def generar_datos(total_keywords: int, total_mensajes: int, semilla: int = 7):
+    rnd = random.Random(semilla)
+    keywords = []
+    for indice in range(total_keywords):
+        base = f"marca{indice}"
+        keywords.append(rnd.choice(["", "@", "#"]) + base)
+    vocabulario = ["noticia", "empresa", "sector", "petróleo", "mercado", "gobierno"]
+    mensajes = []
+    for _ in range(total_mensajes):
+        palabras = [rnd.choice(vocabulario) for _ in range(80)]
+        for _ in range(3):
+            palabras[rnd.randrange(len(palabras))] = rnd.choice(keywords)
+        mensajes.append(" ".join(palabras))
+    return keywords, mensajes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument("--mensajes", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    keywords, mensajes = generar_datos(args.keywords, args.mensajes)
+
+    def anterior():
+        for mensaje in mensajes:
+            resaltar_keywords_anterior(mensaje, keywords)
+
+    def compilado():
+        for mensaje in mensajes:
+            _resaltar_keywords(mensaje, keywords)
+
+    t_anterior = min(timeit.repeat(anterior, number=1, repeat=args.repeticiones))
+    t_compilado = min(timeit.repeat(compilado, number=1, repeat=args.repeticiones))
+
+    print(f"{args.keywords} keywords, {args.mensajes} mensajes")
+    print(f"  anterior:  {t_anterior * 1000:9.1f} ms  ({args.mensajes / t_anterior:,.0f} msg/s)")
+    print(f"  compilado: {t_compilado * 1000:9.1f} ms  ({args.mensajes / t_compilado:,.0f} msg/s)")
+    print(f"  speedup:   {t_anterior / t_compilado:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from apps.base import clientes_http
+
 API_TOKEN = os.getenv("API_TOKEN")
 
 BRIGHTDATA_URL = "https://api.brightdata.com/datasets/v3/trigger"
@@ -66,7 +68,7 @@ def buscar_interacciones(url: str, red_social: str) -> Optional[str]:
     }
     urls: List[Dict[str, str]] = [{"url": url}]
 
-    response = requests.post(BRIGHTDATA_URL, headers=headers, params=params, json=urls)
+    response = clientes_http.post(BRIGHTDATA_URL, headers=headers, params=params, json=urls)
     response.raise_for_status()
 
     try:
@@ -93,7 +95,7 @@ def importar_resultados(resultado_interacciones: str, *, max_wait_time: int = 12
 
     while True:
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = clientes_http.get(url, headers=headers, params=params)
             if response.status_code == 200:
                 return response.json()
             if time.time() - start_time > max_wait_time: